@@ -189,17 +189,11 @@ class AliceControlPlane:
         """
         同步版本：为指定任务创建 LLM 实例
         
-        用于无法使用 async 的场景
+        用于无法使用 async 的场景（在进程级后台事件循环上执行）
         """
-        import asyncio
+        from packages.async_runtime import run_sync
         
-        loop = asyncio.new_event_loop()
-        try:
-            return loop.run_until_complete(
-                self.create_llm_for_task(task_type, tenant_id, user_id)
-            )
-        finally:
-            loop.close()
+        return run_sync(self.create_llm_for_task(task_type, tenant_id, user_id))
     
     # ========== 信息查询 ==========
     
@@ -24,6 +24,23 @@ class SearchResult:
     video_title: Optional[str] = None
 
 
+def _governed_openai_embedding(api_key: str, api_base: Optional[str], model_name: str):
+    """
+    OpenAI 兼容 embedding 函数，每次请求占用进程共享的 embedding 并发槽
+
+    Chroma 在 add/query 时内部调用 embedding 函数，在这里统一限流。
+    """
+    from chromadb.utils import embedding_functions
+    from packages.concurrency import EMBEDDING, get_limiter
+
+    class GovernedOpenAIEmbeddingFunction(embedding_functions.OpenAIEmbeddingFunction):
+        def __call__(self, input):
+            with get_limiter(EMBEDDING, api_base or "openai").slot():
+                return super().__call__(input)
+
+    return GovernedOpenAIEmbeddingFunction(api_key=api_key, api_base=api_base, model_name=model_name)
+
+
 @dataclass 
 class ChromaConfig:
     """ChromaDB配置"""
@@ -65,6 +82,7 @@ class ChromaClient:
         
         # embedding function (延迟初始化)
         self._embedding_fn = None
+        self._embedding_model_id = None
         
         logger.info("chromadb_initialized", persist_dir=config.persist_directory, user_id=user_id)
 
@@ -85,18 +103,12 @@ class ChromaClient:
             if self.user_id:
                 try:
                     from alice.control_plane import get_control_plane
-                    import asyncio
+                    from packages.async_runtime import run_sync
                     
                     cp = get_control_plane()
                     
                     # 同步获取模型配置
-                    loop = asyncio.new_event_loop()
-                    try:
-                        resolved = loop.run_until_complete(
-                            cp.resolve_model("embedding", user_id=self.user_id)
-                        )
-                    finally:
-                        loop.close()
+                    resolved = run_sync(cp.resolve_model("embedding", user_id=self.user_id))
                     
                     if resolved.api_key:
                         api_key = resolved.api_key
@@ -115,23 +127,41 @@ class ChromaClient:
             # 创建 embedding 函数
             if api_key:
                 try:
-                    self._embedding_fn = embedding_functions.OpenAIEmbeddingFunction(
+                    self._embedding_fn = _governed_openai_embedding(
                         api_key=api_key,
                         api_base=base_url,
                         model_name=model_name,
                     )
+                    self._embedding_model_id = f"api:{base_url or 'openai'}:{model_name}"
                     logger.info("embedding_function", type="api", model=model_name)
                 except Exception as e:
                     logger.warning("api_embedding_failed", error=str(e))
                     self._embedding_fn = embedding_functions.DefaultEmbeddingFunction()
+                    self._embedding_model_id = "default"
                     logger.info("embedding_function", type="default_fallback")
             else:
                 # 无 API key 时使用默认 embedding (本地)
                 self._embedding_fn = embedding_functions.DefaultEmbeddingFunction()
+                self._embedding_model_id = "default"
                 logger.info("embedding_function", type="default_local")
         
         return self._embedding_fn
 
+    @property
+    def embedding_model_id(self) -> str:
+        """当前 embedding 模型标识（端点 + 模型名），用于向量缓存键"""
+        self._get_embedding_function()
+        return self._embedding_model_id
+
+    def split_text(self, text: str, chunk_size: int = 500) -> List[str]:
+        """与 upload_document 一致的分块"""
+        return self._split_text(text, chunk_size=chunk_size)
+
+    def embed_chunks(self, chunks: List[str]) -> List[List[float]]:
+        """批量计算分块向量"""
+        embeddings = self._get_embedding_function()(chunks)
+        return [[float(x) for x in embedding] for embedding in embeddings]
+
     def is_available(self) -> bool:
         """检查服务是否可用"""
         try:
@@ -181,6 +211,7 @@ class ChromaClient:
         title: str,
         transcript: str,
         metadata: Optional[Dict] = None,
+        embeddings: Optional[List[List[float]]] = None,
     ) -> str:
         """
         上传转写文档
@@ -191,6 +222,7 @@ class ChromaClient:
             title: 视频标题
             transcript: 转写文本
             metadata: 元数据
+            embeddings: 预先计算的分块向量（与 split_text 分块一一对应），为空时由 collection 计算
             
         Returns:
             document_id
@@ -202,6 +234,9 @@ class ChromaClient:
         
         # 分块存储 (每块约 500 字)
         chunks = self._split_text(transcript, chunk_size=500)
+        if embeddings is not None and len(embeddings) != len(chunks):
+            logger.warning("embeddings_mismatch", video_id=video_id, chunks=len(chunks), embeddings=len(embeddings))
+            embeddings = None
         
         doc_ids = []
         for i, chunk in enumerate(chunks):
@@ -216,6 +251,8 @@ class ChromaClient:
                 **(metadata or {}),
             }
             
+            chunk_embeddings = {"embeddings": [embeddings[i]]} if embeddings is not None else {}
+            
             # 检查是否已存在，存在则更新
             existing = collection.get(ids=[chunk_id])
             if existing['ids']:
@@ -223,12 +260,14 @@ class ChromaClient:
                     ids=[chunk_id],
                     documents=[chunk],
                     metadatas=[chunk_metadata],
+                    **chunk_embeddings,
                 )
             else:
                 collection.add(
                     ids=[chunk_id],
                     documents=[chunk],
                     metadatas=[chunk_metadata],
+                    **chunk_embeddings,
                 )
         
         logger.info(
@@ -85,6 +85,7 @@ class RAGService:
         tenant_id: int,
         video: Video,
         transcript: str,
+        embeddings: Optional[List[List[float]]] = None,
     ) -> str:
         """
         索引视频内容
@@ -93,12 +94,14 @@ class RAGService:
             tenant_id: 租户ID
             video: 视频对象
             transcript: 转写文本
+            embeddings: 预先计算的分块向量（仅 Chroma 后端支持）
             
         Returns:
             文档ID
         """
         dataset_id = self._get_dataset_id(str(tenant_id))
         
+        extra = {"embeddings": embeddings} if embeddings is not None else {}
         doc_id = self.client.upload_document(
             dataset_id=dataset_id,
             video_id=video.id,
@@ -110,6 +113,7 @@ class RAGService:
                 "author": video.author,
                 "duration": video.duration,
             },
+            **extra,
         )
 
         logger.info(
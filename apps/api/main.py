@@ -25,7 +25,16 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     """应用生命周期管理"""
     logger.info("api_starting", app_name=app_config.app_name)
     init_db()
+
+    # 恢复持久化队列中未完成的处理任务
+    from services.processor.queue import get_video_queue
+    if app_config.queue.consume:
+        get_video_queue().start()
+
     yield
+
+    if app_config.queue.consume:
+        get_video_queue().shutdown(wait=False)
     logger.info("api_shutdown")
 
 
@@ -4,6 +4,7 @@ P3-02: 视频CRUD API
 """
 
 import json
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Optional
 
@@ -14,7 +15,7 @@ from sqlalchemy.orm import Session
 from packages.db import Video, VideoStatus, Tenant, User
 from packages.logging import get_logger
 
-from ..deps import get_db, get_current_user, get_current_tenant, get_video_service
+from ..deps import get_db, get_admin_user, get_current_user, get_current_tenant, get_video_service
 from ..services import VideoService
 from ..exceptions import ValidationException, NotFoundException
 from ..schemas import (
@@ -155,7 +156,9 @@ async def list_videos(
         search=search,
     )
     
-    # 转换为响应格式
+    # 转换为响应格式（处理中的视频使用实时状态）
+    from services.processor.status import get_status_channel
+    channel = get_status_channel()
     items = [
         VideoSummary(
             id=v.id,
@@ -165,7 +168,7 @@ async def list_videos(
             author=v.author,
             duration=v.duration,
             cover_url=v.cover_url,
-            status=v.status,
+            status=channel.status_of(v.id, v.status),
             summary=v.summary,
             created_at=v.created_at,
             processed_at=v.processed_at,
@@ -192,14 +195,19 @@ async def get_processing_queue(
     service: VideoService = Depends(get_video_service),
 ):
     """获取处理队列"""
+    from services.processor.status import get_status_channel
+
     queue_data = service.get_processing_queue(tenant.id)
+    channel = get_status_channel()
     
     def video_to_dict(v):
+        live = channel.get(v.id)
         return {
             "id": v.id,
             "source_id": v.source_id,
             "title": v.title,
-            "status": v.status,
+            "status": live.status if live else v.status,
+            "progress": round(live.progress, 3) if live else None,
             "error_message": v.error_message,
             "created_at": v.created_at.isoformat() if v.created_at else None,
             "processed_at": v.processed_at.isoformat() if v.processed_at else None,
@@ -226,6 +234,68 @@ async def get_queue_info():
     return get_video_queue().get_queue_info()
 
 
+@router.get("/queue/positions")
+async def get_queue_positions(
+    limit: int = Query(200, ge=1, le=5000),
+    admin: User = Depends(get_admin_user),
+    tenant: Tenant = Depends(get_current_tenant),
+):
+    """
+    本租户排队中各视频的调度位置与预计等待时间（需要管理员权限）
+
+    按优先级（interactive > scheduled > backfill，随等待时间老化）与租户加权公平排序；
+    配额用尽或停用租户的任务标记为 held。位置为在全局队列中的位置。
+    """
+    from services.processor.queue import get_video_queue
+
+    queue = get_video_queue()
+    positions = queue.get_queue_positions(tenant_id=tenant.id)
+    return {
+        "total": len(positions),
+        "items": positions[:limit],
+        "tenants": queue.get_tenant_limits(tenant_id=tenant.id),
+    }
+
+
+@router.get("/queue/metrics")
+async def get_stage_metrics(
+    hours: float = Query(24, gt=0, le=24 * 90, description="统计最近N小时"),
+    group_by: List[str] = Query(["stage"], description="聚合维度：stage / provider / tenant"),
+    admin: User = Depends(get_admin_user),
+    tenant: Tenant = Depends(get_current_tenant),
+    db: Session = Depends(get_db),
+):
+    """本租户各处理阶段耗时分位数（p50/p95/p99，按阶段 / 提供方聚合，需要管理员权限）"""
+    from services.processor.metrics import GROUP_COLUMNS, stage_latency_percentiles
+
+    unknown = [g for g in group_by if g not in GROUP_COLUMNS]
+    if unknown:
+        raise ValidationException(f"未知聚合维度: {', '.join(unknown)}，可选: {', '.join(GROUP_COLUMNS)}")
+
+    until = datetime.utcnow()
+    since = until - timedelta(hours=hours)
+    return {
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "group_by": group_by,
+        "items": stage_latency_percentiles(db, since=since, until=until, group_by=group_by, tenant_id=tenant.id),
+    }
+
+
+@router.get("/queue/concurrency")
+async def get_concurrency_limits(
+    admin: User = Depends(get_admin_user),
+):
+    """
+    下载 / ASR / LLM / embedding 自适应并发的当前上限与饱和度（需要管理员权限）
+
+    统计为本进程内的控制器；独立 worker 进程各自维护自己的控制器。
+    """
+    from packages.concurrency import limiter_snapshots
+
+    return {"items": limiter_snapshots()}
+
+
 @router.get("/{video_id}", response_model=VideoDetail)
 async def get_video(
     video_id: int,
@@ -389,16 +459,27 @@ async def get_top_tags(
 async def process_video_now(
     video_id: int,
     background_tasks: BackgroundTasks,
+    from_stage: Optional[str] = Query(None, description="强制从指定阶段重新处理：download/transcribe/analyze/index/finalize"),
     user = Depends(get_current_user),
     tenant: Tenant = Depends(get_current_tenant),
     service: VideoService = Depends(get_video_service),
 ):
-    """立即开始处理视频"""
+    """立即开始处理视频（默认跳过已完成的阶段）"""
+    from services.processor.checkpoints import STAGES
+    
     video = service.get_video(video_id, tenant.id)
     if not video:
         raise NotFoundException("视频", video_id)
     
-    if video.status not in [VideoStatus.PENDING.value, VideoStatus.FAILED.value]:
+    if from_stage is not None and from_stage not in STAGES:
+        raise ValidationException(f"未知阶段: {from_stage}，可选: {', '.join(STAGES)}", field="from_stage")
+    
+    # 指定起始阶段时允许重新处理已完成的视频
+    allowed = [VideoStatus.PENDING.value, VideoStatus.FAILED.value]
+    if from_stage is not None:
+        allowed.append(VideoStatus.DONE.value)
+    
+    if video.status not in allowed:
         return {
             "message": f"视频状态为 {video.status}，无需处理",
             "status": video.status,
@@ -408,7 +489,7 @@ async def process_video_now(
     from services.processor.queue import get_video_queue
     
     queue = get_video_queue()
-    submitted = queue.submit(video_id=video_id, user_id=user.id)
+    submitted = queue.submit(video_id=video_id, user_id=user.id, from_stage=from_stage, tenant_id=tenant.id)
     
     if not submitted:
         return {
@@ -433,14 +514,26 @@ async def get_video_status(
     tenant: Tenant = Depends(get_current_tenant),
     service: VideoService = Depends(get_video_service),
 ):
-    """获取视频处理状态"""
+    """获取视频处理状态（本进程正在处理时返回内存中的实时状态与进度）"""
+    from services.asr.manifest import read_chunk_progress
+    from services.processor.status import get_status_channel
+
     video = service.get_video(video_id, tenant.id)
     if not video:
         raise NotFoundException("视频", video_id)
     
+    live = get_status_channel().get(video.id)
+    # 分片转写进度：处理中取实时值，否则读取音频旁的分片清单（失败后可看到已完成的片段）
+    chunks = live.detail if live and live.stage == "transcribe" else None
+    if chunks is None and not video.transcript_path:
+        chunks = read_chunk_progress(video.audio_path)
     return {
         "id": video.id,
-        "status": video.status,
+        "status": live.status if live else video.status,
+        "stage": live.stage if live else None,
+        "progress": round(live.progress, 3) if live else None,
+        "message": live.message if live else None,
+        "chunks": chunks,
         "error_message": video.error_message,
         "has_transcript": bool(video.transcript_path),
         "has_summary": bool(video.summary),
@@ -461,8 +554,11 @@ async def cancel_video_processing(
     if video.status == VideoStatus.DONE.value:
         return {"message": "视频已处理完成，无法取消", "status": video.status}
     
-    old_status = video.status
+    from services.processor.status import get_status_channel
+
+    old_status = get_status_channel().status_of(video.id, video.status)
     updated = service.update_status(video_id, tenant.id, VideoStatus.PENDING.value)
+    get_status_channel().forget(video.id)
     
     return {
         "message": "已取消处理",
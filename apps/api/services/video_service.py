@@ -141,6 +141,9 @@ class VideoService:
         """删除视频"""
         video = self.get_video(video_id, tenant_id)
         if video:
+            from services.processor.status import get_status_channel
+            # 丢弃本进程内尚未写回的状态，避免写回已删除的行
+            get_status_channel().forget(video_id)
             return self.repo.delete(video_id)
         return False
     
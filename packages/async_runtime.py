@@ -0,0 +1,129 @@
+"""
+进程级后台事件循环
+
+同步代码（管道阶段、控制平面同步接口、Chroma embedding 配置）需要调用协程时，
+统一提交到一个常驻后台线程的事件循环执行，而不是每次 new_event_loop() 后关闭：
+- 省去每次创建/关闭事件循环的开销
+- 循环上创建的异步资源（httpx 连接池、OpenAI 客户端等）跨调用复用
+
+注意：协程在共享循环上执行，内部不应包含长时间阻塞的同步调用。
+"""
+
+import asyncio
+import atexit
+import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Optional, TypeVar
+
+from packages.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class AsyncRuntime:
+    """常驻后台线程的事件循环"""
+
+    def __init__(self, name: str = "alice-async-runtime"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """后台事件循环（首次访问时启动）"""
+        if self._loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._start()
+        return self._loop
+
+    def _start(self):
+        with self._lock:
+            # fork 出的子进程不会继承后台线程，需要重新启动
+            if self._loop is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            thread = threading.Thread(target=run, name=self.name, daemon=True)
+            thread.start()
+            ready.wait()
+
+            self._loop = loop
+            self._thread = thread
+            self._pid = os.getpid()
+            logger.debug("async_runtime_started", name=self.name)
+
+    def in_runtime_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def run_sync(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """
+        在后台事件循环上执行协程并阻塞等待结果
+
+        Args:
+            coro: 协程
+            timeout: 超时秒数，超时后取消协程并抛出 TimeoutError
+
+        Raises:
+            RuntimeError: 在后台循环线程内调用（会死锁）
+        """
+        if self.in_runtime_thread():
+            coro.close()
+            raise RuntimeError("run_sync 不能在后台事件循环线程内调用，请直接 await")
+
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f"协程执行超时（{timeout}s）") from None
+
+    def shutdown(self, timeout: float = 5.0):
+        """停止后台事件循环"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid():
+                return
+            self._loop = None
+            self._thread = None
+
+        async def _cancel_pending():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await loop.shutdown_asyncgens()
+
+        try:
+            asyncio.run_coroutine_threadsafe(_cancel_pending(), loop).result(timeout)
+        except Exception as e:
+            logger.warning("async_runtime_shutdown_incomplete", error=str(e))
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+        logger.debug("async_runtime_stopped", name=self.name)
+
+
+_runtime = AsyncRuntime()
+atexit.register(_runtime.shutdown)
+
+
+def get_async_runtime() -> AsyncRuntime:
+    """获取进程级后台事件循环"""
+    return _runtime
+
+
+def run_sync(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """在进程级后台事件循环上执行协程（同步调用方使用）"""
+    return _runtime.run_sync(coro, timeout)
@@ -0,0 +1,530 @@
+"""
+外部资源自适应并发控制
+
+下载、ASR API、LLM 补全、embedding 各用一个进程内共享的 AdaptiveLimiter，
+管道、API 路由和定时任务调用同一资源时共用同一个并发上限：
+- 加性增：请求正常完成时上限缓慢增加（每完成约 limit 个请求 +1）
+- 乘性减：收到 429/503、超时，或延迟明显高于基线时上限乘以 decrease_factor
+- Retry-After：收到限流响应后暂停发放新的并发槽，直到服务端给出的时间
+
+同一类资源按端点（如 LLM 的 base_url）区分，慢的提供方不会拖累快的。
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Deque, Dict, List, Optional
+from urllib.parse import urlparse
+
+from packages.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 资源类型
+DOWNLOAD = "download"
+ASR = "asr"
+LLM = "llm"
+EMBEDDING = "embedding"
+
+# 视为过载（需要降低并发）的 HTTP 状态码
+OVERLOAD_STATUS = {429, 502, 503, 504}
+
+
+class LimiterTimeout(TimeoutError):
+    """等待并发槽超时"""
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """解析 Retry-After 头（秒数或 HTTP 日期），返回需要等待的秒数"""
+    if value is None or value == "":
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def classify_error(error: BaseException) -> tuple:
+    """
+    判断异常是否为过载信号
+
+    Returns:
+        (是否过载, Retry-After 秒数)
+    """
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    headers = getattr(response, "headers", None) or {}
+    if status in OVERLOAD_STATUS:
+        return True, parse_retry_after(headers.get("retry-after") or headers.get("Retry-After"))
+
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+        return True, None
+    name = type(error).__name__.lower()
+    text = str(error).lower()
+    if "timeout" in name or "ratelimit" in name or "rate limit" in text or "429" in text:
+        return True, None
+    return False, None
+
+
+class _Waiter:
+    """等待并发槽的调用方（同步用 Event，异步用 Future）"""
+
+    __slots__ = ("event", "loop", "future", "granted")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+        self.granted = False
+
+    def wake(self):
+        self.granted = True
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+
+class Slot:
+    """一次占用的并发槽；调用方可显式报告结果（否则按是否抛异常自动判断）"""
+
+    __slots__ = ("_limiter", "_started", "_reported")
+
+    def __init__(self, limiter: "AdaptiveLimiter"):
+        self._limiter = limiter
+        self._started = time.monotonic()
+        self._reported = False
+
+    def overloaded(self, retry_after: Optional[float] = None):
+        """服务端限流/过载（如 HTTP 429、503）"""
+        self._reported = True
+        self._limiter.on_overload(retry_after)
+
+    def response(self, status_code: int, headers=None):
+        """按 HTTP 响应报告结果"""
+        if status_code in OVERLOAD_STATUS:
+            headers = headers or {}
+            self.overloaded(parse_retry_after(headers.get("retry-after") or headers.get("Retry-After")))
+        elif status_code < 400:
+            self.succeeded()
+        else:
+            self.failed()
+
+    def succeeded(self, latency: Optional[float] = None):
+        self._reported = True
+        self._limiter.on_success(time.monotonic() - self._started if latency is None else latency)
+
+    def failed(self):
+        """普通失败（不是过载信号，不调整并发）"""
+        self._reported = True
+
+    def _finish(self, error: Optional[BaseException]):
+        if self._reported:
+            return
+        if error is None:
+            self.succeeded()
+            return
+        overloaded, retry_after = classify_error(error)
+        if overloaded:
+            self.overloaded(retry_after)
+
+
+class AdaptiveLimiter:
+    """AIMD 自适应并发上限"""
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        target_latency: float = 0.0,
+        decrease_factor: float = 0.7,
+        latency_tolerance: float = 2.0,
+    ):
+        """
+        Args:
+            name: 名称（资源类型或 资源类型:端点）
+            initial / min_limit / max_limit: 初始、最小、最大并发
+            target_latency: 单次请求的目标延迟（秒），超过即降低并发；0 表示只与基线比较
+            decrease_factor: 乘性减系数
+            latency_tolerance: 近期延迟超过基线的倍数时降低并发
+        """
+        self.name = name
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self._inflight = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self._last_decrease = 0.0
+
+        # 延迟：基线（慢速 EWMA）与近期（快速 EWMA）
+        self._baseline: Optional[float] = None
+        self._recent: Optional[float] = None
+
+        self._stats = {"completed": 0, "overloaded": 0, "decreases": 0, "increases": 0, "timeouts": 0}
+        self._peak_waiting = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    # ========== 占用 / 释放 ==========
+
+    def _try_grant(self) -> bool:
+        if self._inflight < int(self._limit) and time.time() >= self._paused_until:
+            self._inflight += 1
+            return True
+        return False
+
+    def _dispatch(self):
+        """按 FIFO 把空出的槽交给等待者（需持有锁）"""
+        while self._waiters and self._try_grant():
+            self._waiters.popleft().wake()
+        if self._waiters and time.time() < self._paused_until:
+            self._schedule_resume()
+
+    def _schedule_resume(self):
+        if self._timer is not None and self._timer.is_alive():
+            return
+        delay = max(0.0, self._paused_until - time.time())
+        self._timer = threading.Timer(delay + 0.01, self._resume)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _resume(self):
+        with self._lock:
+            self._timer = None
+            self._dispatch()
+
+    def _enqueue(self, waiter: _Waiter) -> bool:
+        """立即拿到槽返回 True，否则加入等待队列"""
+        with self._lock:
+            if not self._waiters and self._try_grant():
+                return True
+            self._waiters.append(waiter)
+            self._peak_waiting = max(self._peak_waiting, len(self._waiters))
+            if time.time() < self._paused_until:
+                self._schedule_resume()
+            return False
+
+    def _abandon(self, waiter: _Waiter):
+        """等待超时/取消：未拿到槽则出队，已拿到则归还"""
+        with self._lock:
+            if waiter.granted:
+                self._inflight -= 1
+                self._dispatch()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            self._stats["timeouts"] += 1
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """同步占用一个并发槽，超时返回 False"""
+        waiter = _Waiter()
+        if self._enqueue(waiter):
+            return True
+        if waiter.event.wait(timeout):
+            return True
+        self._abandon(waiter)
+        return False
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> bool:
+        """异步占用一个并发槽（任意事件循环均可），超时返回 False"""
+        waiter = _Waiter(asyncio.get_running_loop())
+        if self._enqueue(waiter):
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+            return True
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            return False
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def release(self):
+        with self._lock:
+            self._inflight = max(0, self._inflight - 1)
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None):
+        """
+        占用并发槽执行一次请求
+
+        Usage:
+            with get_limiter(ASR, base_url).slot() as slot:
+                response = client.post(...)
+                slot.response(response.status_code, response.headers)
+        """
+        if not self.acquire(timeout):
+            raise LimiterTimeout(f"等待 {self.name} 并发槽超时")
+        slot = Slot(self)
+        try:
+            yield slot
+        except BaseException as e:
+            slot._finish(e)
+            raise
+        else:
+            slot._finish(None)
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def slot_async(self, timeout: Optional[float] = None):
+        """slot() 的异步版本"""
+        if not await self.acquire_async(timeout):
+            raise LimiterTimeout(f"等待 {self.name} 并发槽超时")
+        slot = Slot(self)
+        try:
+            yield slot
+        except BaseException as e:
+            slot._finish(e)
+            raise
+        else:
+            slot._finish(None)
+        finally:
+            self.release()
+
+    # ========== AIMD 调整 ==========
+
+    def on_success(self, latency: float):
+        with self._lock:
+            self._stats["completed"] += 1
+            self._baseline = latency if self._baseline is None else 0.95 * self._baseline + 0.05 * latency
+            self._recent = latency if self._recent is None else 0.7 * self._recent + 0.3 * latency
+
+            too_slow = (self.target_latency > 0 and latency > self.target_latency) or (
+                self._recent > self._baseline * self.latency_tolerance
+            )
+            if too_slow:
+                self._decrease("latency")
+            elif self._inflight >= int(self._limit) - 1 and self._limit < self.max_limit:
+                # 只有并发被用满时才增加，空闲时上限不会无限上涨
+                before = int(self._limit)
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+                if int(self._limit) > before:
+                    self._stats["increases"] += 1
+                    self._dispatch()
+
+    def on_overload(self, retry_after: Optional[float] = None):
+        with self._lock:
+            self._stats["overloaded"] += 1
+            self._decrease("overload")
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.time() + retry_after)
+                logger.warning("concurrency_paused", limiter=self.name, retry_after=round(retry_after, 1))
+
+    def _decrease(self, reason: str):
+        """乘性减（需持有锁）；同一批并发请求的过载信号只降一次"""
+        now = time.monotonic()
+        if now - self._last_decrease < (self._recent or 1.0):
+            return
+        self._last_decrease = now
+        before = int(self._limit)
+        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+        if int(self._limit) < before:
+            self._stats["decreases"] += 1
+            logger.info("concurrency_decreased", limiter=self.name, reason=reason, limit=int(self._limit))
+
+    # ========== 状态 ==========
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            limit = int(self._limit)
+            paused = max(0.0, self._paused_until - time.time())
+            return {
+                "name": self.name,
+                "limit": limit,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "inflight": self._inflight,
+                "waiting": len(self._waiters),
+                "peak_waiting": self._peak_waiting,
+                "saturation": round(self._inflight / limit, 2) if limit else 0.0,
+                "paused_seconds": round(paused, 1),
+                "latency_baseline": round(self._baseline, 3) if self._baseline is not None else None,
+                "latency_recent": round(self._recent, 3) if self._recent is not None else None,
+                **self._stats,
+            }
+
+
+class TokenBucket:
+    """
+    令牌桶请求速率限制（与 AdaptiveLimiter 限制并发互补，这里限制每秒请求数）
+
+    按 GCRA 方式预约发放时间：空闲时最多连续放行 burst 个请求，之后按 rate 匀速放行。
+    penalize() 在收到风控/限流响应后暂停发放，恢复后不立即突发。
+    同步与异步调用方共用同一个桶。
+    """
+
+    def __init__(self, name: str, rate: float, burst: int = 1):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._tat = 0.0          # 理论到达时间：下一个令牌按匀速发放的时间点
+        self._lock = threading.Lock()
+        self.granted = 0
+        self.waited = 0.0        # 累计等待时间（秒）
+
+    def _reserve(self) -> float:
+        """预约一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._tat - (self.burst - 1) * self._interval)
+            self._tat = max(self._tat, start) + self._interval
+            self.granted += 1
+            wait = start - now
+            self.waited += wait
+            return wait
+
+    def acquire(self):
+        """同步获取令牌（阻塞等待）"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """异步获取令牌"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def penalize(self, seconds: float):
+        """暂停发放 seconds 秒（已预约更晚时间的请求不受影响）"""
+        with self._lock:
+            until = time.monotonic() + seconds
+            self._tat = max(self._tat, until + (self.burst - 1) * self._interval)
+        logger.warning("rate_limiter_penalized", name=self.name, seconds=round(seconds, 2))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "rate": self.rate,
+                "burst": self.burst,
+                "granted": self.granted,
+                "waited": round(self.waited, 3),
+                "backlog": round(max(0.0, self._tat - time.monotonic()), 3),
+            }
+
+
+# ========== 进程级注册表 ==========
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_buckets: Dict[str, TokenBucket] = {}
+_registry_lock = threading.Lock()
+_registry_pid: Optional[int] = None
+
+
+def _endpoint(key: Optional[str]) -> Optional[str]:
+    """URL -> host[:port]，其他取值原样返回"""
+    if not key:
+        return None
+    parsed = urlparse(key)
+    return parsed.netloc or key
+
+
+def get_limiter(resource: str, key: Optional[str] = None) -> AdaptiveLimiter:
+    """
+    获取资源的共享并发控制器
+
+    Args:
+        resource: 资源类型（DOWNLOAD / ASR / LLM / EMBEDDING）
+        key: 端点（URL 或任意标识），同一资源类型下按端点分别限流
+    """
+    global _registry_pid
+    endpoint = _endpoint(key)
+    name = f"{resource}:{endpoint}" if endpoint else resource
+
+    with _registry_lock:
+        # fork 出的子进程不继承父进程的在途计数
+        if _registry_pid != os.getpid():
+            _limiters.clear()
+            _buckets.clear()
+            _registry_pid = os.getpid()
+
+        limiter = _limiters.get(name)
+        if limiter is None:
+            from packages.config import get_config
+
+            config = get_config().concurrency
+            params = dict(config.resources.get(resource, {}))
+            limiter = AdaptiveLimiter(
+                name,
+                initial=int(params.get("initial", 4)),
+                min_limit=int(params.get("min", 1)),
+                max_limit=int(params.get("max", 16)),
+                target_latency=float(params.get("target_latency", 0)),
+                decrease_factor=config.decrease_factor,
+                latency_tolerance=config.latency_tolerance,
+            )
+            _limiters[name] = limiter
+        return limiter
+
+
+def get_token_bucket(name: str, rate: float, burst: int = 1) -> TokenBucket:
+    """
+    获取进程内共享的令牌桶（同名共用，参数以首次创建时为准）
+
+    Args:
+        name: 限速对象（如 "bilibili_api"）
+        rate: 每秒请求数（0 不限）
+        burst: 空闲时允许的连续请求数
+    """
+    global _registry_pid
+    with _registry_lock:
+        if _registry_pid != os.getpid():
+            _limiters.clear()
+            _buckets.clear()
+            _registry_pid = os.getpid()
+        bucket = _buckets.get(name)
+        if bucket is None:
+            bucket = _buckets[name] = TokenBucket(name, rate, burst)
+        return bucket
+
+
+def limiter_snapshots() -> List[dict]:
+    """所有已创建的并发控制器状态"""
+    with _registry_lock:
+        limiters = list(_limiters.values()) if _registry_pid == os.getpid() else []
+    return [limiter.snapshot() for limiter in sorted(limiters, key=lambda l: l.name)]
+
+
+def reset_limiters():
+    """清空注册表（配置变更后或测试用）"""
+    with _registry_lock:
+        _limiters.clear()
+        _buckets.clear()
@@ -16,6 +16,8 @@ class DatabaseSettings(BaseSettings):
     """数据库配置"""
     url: str = Field(default="sqlite:///data/bili_learner.db")
     echo: bool = Field(default=False)
+    sqlite_wal: bool = Field(default=True)      # SQLite 使用 WAL 模式（读写不互斥）
+    sqlite_busy_timeout: int = Field(default=30)  # 写锁等待时间（秒）
     
     model_config = SettingsConfigDict(env_prefix="ALICE_DB_")
 
@@ -25,6 +27,29 @@ class ASRSettings(BaseSettings):
     provider: str = Field(default="faster_whisper")
     model_size: str = Field(default="medium")
     device: str = Field(default="auto")
+    compute_type: str = Field(default="float16")      # float16 / int8 / int8_float16（CPU 上 float16 自动改为 int8）
+    cpu_threads: int = Field(default=0)                # 推理线程数，0 为 CTranslate2 默认
+    # 本地 ASR 服务（provider: server，python -m services.asr_server）
+    server_url: str = Field(default="http://127.0.0.1:8765")
+    server_batch_size: int = Field(default=8)          # 每批最多语音片段数（跨任务合批）
+    server_max_wait_ms: int = Field(default=50)        # 不满一批时等待更多片段的时间
+    server_timeout: float = Field(default=3600.0)      # 单个转写请求超时（秒）
+    api_audio_profile: str = Field(default="opus")     # API 上传编码：opus / mp3 / flac / wav
+    # API 连接池（连接数上限取 ASR 并发上限）
+    http2: bool = Field(default=False)                 # 需要安装 h2（httpx[http2]）
+    http_timeout: float = Field(default=300.0)         # 单次上传超时（秒）
+    http_connect_timeout: float = Field(default=10.0)
+    http_keepalive_expiry: float = Field(default=60.0)  # 空闲连接保留时间（秒）
+    # API 转写分片
+    chunk_seconds: float = Field(default=600)          # 超过该时长分片上传，也是片段最大长度
+    vad_enabled: bool = Field(default=True)            # 在静音处切分并去除长静音
+    vad_search_seconds: float = Field(default=60)      # 在片段末尾该范围内寻找静音切分点
+    vad_min_silence: float = Field(default=0.3)        # 可作为切分点的最短静音（秒）
+    vad_drop_silence: float = Field(default=2.0)       # 超过该长度的静音不上传（秒）
+    vad_threshold_db: float = Field(default=-45.0)     # 静音判定能量下限（dBFS）
+    chunk_retries: int = Field(default=2)              # 单个片段失败后的重试次数
+    allow_partial: bool = Field(default=False)         # 少量片段失败时仍输出转写（缺失区间加标记）
+    max_gap_ratio: float = Field(default=0.1)          # 部分降级允许的最大缺失时长占比
     
     model_config = SettingsConfigDict(env_prefix="ALICE_ASR_")
 
@@ -64,10 +89,106 @@ class BilibiliSettings(BaseSettings):
     """B站配置"""
     sessdata: str = Field(default="")
     poll_interval: int = Field(default=300)  # 秒
+    full_scan_interval: int = Field(default=86400)  # 收藏夹完整扫描校对间隔（秒），其余轮询增量扫描
+    subtitle_probe: bool = Field(default=True)  # 扫描发现视频时探测字幕，有字幕的走快速通道
+    api_rate: float = Field(default=5.0)        # 定时扫描的全局接口速率（每秒请求数，0 不限）
+    api_burst: int = Field(default=10)          # 空闲时允许的连续请求数
+    risk_backoff: float = Field(default=10.0)   # 风控响应后的首次退避（秒，带随机抖动，指数增长）
+    risk_retries: int = Field(default=3)        # 风控响应重试次数
+    scan_concurrency: int = Field(default=16)   # 同时扫描的收藏夹数（所有租户共用）
+    folder_deadline: float = Field(default=120.0)  # 单个收藏夹扫描时限（秒），超时跳过等下一轮
     
     model_config = SettingsConfigDict(env_prefix="ALICE_BILI_")
 
 
+class PipelineSettings(BaseSettings):
+    """视频处理管道配置"""
+    download_workers: int = Field(default=2)    # 下载/提取音频并发
+    transcribe_workers: int = Field(default=2)  # 转写并发
+    analyze_workers: int = Field(default=2)     # AI分析并发
+    index_workers: int = Field(default=1)       # 向量化并发
+    stage_queue_size: int = Field(default=2)    # 阶段间缓冲队列容量
+    cache_enabled: bool = Field(default=True)   # 跨租户复用音频/转写/摘要/向量
+    cache_dir: str = Field(default="data/cache")
+    cache_gc_grace_hours: int = Field(default=24)  # 无引用缓存保留时长
+    metrics_enabled: bool = Field(default=True)    # 记录各阶段耗时（processing_stage_metrics）
+    metrics_retention_days: int = Field(default=90)  # 阶段耗时记录保留天数（每天清理）
+    status_flush_interval: float = Field(default=2.0)  # 中间状态批量写回间隔（秒，0 为同步写入）
+    integrity_check: str = Field(default="probe")  # 提取音频前的完整性检查：probe / full / off
+    integrity_tail_seconds: float = Field(default=10.0)  # probe 模式尾部采样解码时长（秒）
+    
+    model_config = SettingsConfigDict(env_prefix="ALICE_PIPELINE_")
+
+
+class DownloadSettings(BaseSettings):
+    """HTTP 直链下载配置（播客、直接媒体 URL）"""
+    chunk_size: int = Field(default=1048576)     # 流式写盘的缓冲块大小（字节）
+    timeout: float = Field(default=300.0)        # 单次请求超时（秒）
+    resume: bool = Field(default=True)           # 中断后按 Range 续传 .part / .seg 文件
+    progress_interval: float = Field(default=1.0)  # 进度回调最小间隔（秒）
+    segments: int = Field(default=4)             # 支持 Range 的大文件分段并发数（1 关闭）
+    min_segment_size: int = Field(default=8388608)  # 每段最小字节数，不足两段时单连接下载
+    segment_retries: int = Field(default=3)      # 单段失败重试次数（从已写入位置继续）
+    
+    model_config = SettingsConfigDict(env_prefix="ALICE_DOWNLOAD_")
+
+
+class QueueSettings(BaseSettings):
+    """持久化任务队列配置"""
+    backend: str = Field(default="sqlite")                    # sqlite / redis
+    sqlite_path: str = Field(default="data/jobs.db")
+    redis_url: str = Field(default="redis://localhost:6379/0")
+    consume: bool = Field(default=True)         # 本进程是否消费队列（False 时仅入队）
+    lease_seconds: int = Field(default=300)     # 认领租约（可见性超时）
+    heartbeat_interval: int = Field(default=30)  # 续约间隔（秒）
+    poll_interval: float = Field(default=2.0)   # 空闲轮询间隔（秒）
+    reap_interval: int = Field(default=60)      # 过期租约回收间隔（秒）
+    max_attempts: int = Field(default=3)
+    retry_delay: int = Field(default=60)        # 失败重试延迟（秒）
+    max_inflight: int = Field(default=4)        # 本进程同时处理的任务上限
+    subtitle_inflight: int = Field(default=4)   # 字幕快速通道同时处理的任务上限（不占 max_inflight）
+    retention_hours: int = Field(default=72)    # 已结束任务保留时长
+    retention_max_jobs: int = Field(default=1000)  # 已结束任务最多保留数量
+    aging_seconds: int = Field(default=1800)    # 排队每满该时长提升一个优先级
+    fair_share_window: int = Field(default=3600)  # 租户公平份额用量统计窗口（秒）
+    # 按租户计划的公平份额权重与同时运行上限（0 不限）
+    plan_weights: dict[str, float] = Field(
+        default_factory=lambda: {"free": 1, "pro": 2, "team": 4, "enterprise": 8}
+    )
+    plan_max_running: dict[str, int] = Field(
+        default_factory=lambda: {"free": 0, "pro": 0, "team": 0, "enterprise": 0}
+    )
+    
+    model_config = SettingsConfigDict(env_prefix="ALICE_QUEUE_")
+
+
+class WorkerSettings(BaseSettings):
+    """独立 worker 进程池配置（python -m services.worker）"""
+    processes: int = Field(default=2)            # worker 进程数
+    concurrency: int = Field(default=2)          # 每个进程同时处理的视频数
+    max_tasks_per_child: int = Field(default=0)  # 每个进程处理N个任务后重启（0 不限）
+    shutdown_timeout: int = Field(default=600)   # 优雅退出等待时间（秒），超时强制结束
+    
+    model_config = SettingsConfigDict(env_prefix="ALICE_WORKER_")
+
+
+class ConcurrencySettings(BaseSettings):
+    """外部资源自适应并发（AIMD）配置"""
+    # 资源 -> {initial, min, max, target_latency(秒，0 表示只与基线比较)}
+    resources: dict[str, dict[str, float]] = Field(
+        default_factory=lambda: {
+            "download": {"initial": 2, "min": 1, "max": 6, "target_latency": 0},
+            "asr": {"initial": 3, "min": 1, "max": 12, "target_latency": 0},
+            "llm": {"initial": 4, "min": 1, "max": 16, "target_latency": 0},
+            "embedding": {"initial": 4, "min": 1, "max": 16, "target_latency": 0},
+        }
+    )
+    decrease_factor: float = Field(default=0.7)    # 过载时并发乘以该系数
+    latency_tolerance: float = Field(default=2.0)  # 近期延迟超过基线该倍数视为过载
+    
+    model_config = SettingsConfigDict(env_prefix="ALICE_CONCURRENCY_")
+
+
 class Settings(BaseSettings):
     """主配置"""
     app_name: str = Field(default="AliceLM")
@@ -81,6 +202,11 @@ class Settings(BaseSettings):
     rag: RAGSettings = Field(default_factory=RAGSettings)
     wechat: WeChatSettings = Field(default_factory=WeChatSettings)
     bilibili: BilibiliSettings = Field(default_factory=BilibiliSettings)
+    pipeline: PipelineSettings = Field(default_factory=PipelineSettings)
+    download: DownloadSettings = Field(default_factory=DownloadSettings)
+    queue: QueueSettings = Field(default_factory=QueueSettings)
+    worker: WorkerSettings = Field(default_factory=WorkerSettings)
+    concurrency: ConcurrencySettings = Field(default_factory=ConcurrencySettings)
     
     model_config = SettingsConfigDict(
         env_prefix="ALICE_",
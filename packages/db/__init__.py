@@ -1,9 +1,15 @@
 from .database import Base, get_db, get_db_context, get_engine, init_db
 from .models import (
+    ArtifactCacheEntry,
+    ArtifactCacheRef,
     Conversation,
+    FolderScanCursor,
     LearningRecord,
     Message,
     MessageRole,
+    SUBTITLE_LANE,
+    ProcessingCheckpoint,
+    ProcessingStageMetric,
     Tag,
     Tenant,
     TenantConfig,
@@ -31,9 +37,15 @@ __all__ = [
     "TenantConfig",
     "Video",
     "VideoStatus",
+    "SUBTITLE_LANE",
+    "ProcessingCheckpoint",
+    "ProcessingStageMetric",
+    "ArtifactCacheEntry",
+    "ArtifactCacheRef",
     "Tag",
     "VideoTag",
     "WatchedFolder",
+    "FolderScanCursor",
     "LearningRecord",
     "Conversation",
     "Message",
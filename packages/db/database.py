@@ -5,7 +5,7 @@
 from contextlib import contextmanager
 from typing import Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 from packages.config import get_config
@@ -26,9 +26,30 @@ def get_engine():
             echo=config.database.echo,
             connect_args={"check_same_thread": False} if "sqlite" in config.database.url else {},
         )
+        if _engine.dialect.name == "sqlite":
+            _configure_sqlite(_engine, config.database)
     return _engine
 
 
+def _configure_sqlite(engine, db_config):
+    """
+    SQLite 连接参数
+
+    WAL 模式下读不阻塞写、写不阻塞读，API / 管道 / 定时任务并发访问时
+    不再频繁出现 database is locked；busy_timeout 让写者排队等待而不是立即报错。
+    """
+    in_memory = engine.url.database in (None, "", ":memory:")
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout={int(db_config.sqlite_busy_timeout * 1000)}")
+        if db_config.sqlite_wal and not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+
 def get_session_local():
     """获取SessionLocal"""
     global _SessionLocal
@@ -53,6 +53,10 @@ class VideoStatus(enum.Enum):
     FAILED = "failed"
 
 
+# Video.processing_lane 取值：扫描时已确认有字幕，不下载音频、不经过 ASR（字幕快速通道）
+SUBTITLE_LANE = "subtitle"
+
+
 # ============== 租户与用户 ==============
 
 class Tenant(Base):
@@ -214,6 +218,7 @@ class Video(Base):
     # 处理配置
     asr_provider: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     llm_provider: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    processing_lane: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)  # SUBTITLE_LANE：字幕快速通道
 
     # 时间戳
     collected_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
@@ -233,6 +238,85 @@ class Video(Base):
     )
 
 
+class ProcessingCheckpoint(Base):
+    """
+    视频处理阶段检查点
+
+    记录每个阶段完成时的产物与参数版本，重新处理时从第一个未完成/失效的阶段继续。
+    """
+    __tablename__ = "processing_checkpoints"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    video_id: Mapped[int] = mapped_column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), index=True)
+    stage: Mapped[str] = mapped_column(String(20))  # download / transcribe / analyze / index
+
+    artifact_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)  # 产物（或输入）sha256
+    params_version: Mapped[str] = mapped_column(String(64))  # 阶段参数版本，变更后检查点失效
+    extra_data: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON额外数据
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, onupdate=datetime.utcnow)
+
+    __table_args__ = (UniqueConstraint("video_id", "stage", name="uq_video_stage"),)
+
+
+class ArtifactCacheEntry(Base):
+    """
+    内容寻址产物缓存条目（跨租户共享）
+
+    cache_key 由内容源/内容哈希与模型、prompt 版本等参数派生，
+    相同输入的音频、转写、摘要、向量只计算一次。
+    """
+    __tablename__ = "artifact_cache_entries"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cache_key: Mapped[str] = mapped_column(String(64), unique=True)
+    kind: Mapped[str] = mapped_column(String(20), index=True)  # audio / transcript / summary / embedding
+    path: Mapped[str] = mapped_column(String(500))
+    size: Mapped[int] = mapped_column(Integer, default=0)
+    hit_count: Mapped[int] = mapped_column(Integer, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+
+class ArtifactCacheRef(Base):
+    """视频对缓存条目的引用（引用计数，无引用的条目可被回收）"""
+    __tablename__ = "artifact_cache_refs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    video_id: Mapped[int] = mapped_column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), index=True)
+    kind: Mapped[str] = mapped_column(String(20))
+    cache_key: Mapped[str] = mapped_column(String(64), index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (UniqueConstraint("video_id", "kind", name="uq_video_artifact_kind"),)
+
+
+class ProcessingStageMetric(Base):
+    """
+    视频处理阶段耗时记录（每个实际执行的阶段一行）
+
+    用于按阶段 / 提供方 / 租户统计延迟分位数。
+    """
+    __tablename__ = "processing_stage_metrics"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    video_id: Mapped[int] = mapped_column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), index=True)
+    tenant_id: Mapped[int] = mapped_column(Integer, index=True)
+    stage: Mapped[str] = mapped_column(String(20))
+    provider: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)  # 下载源 / ASR / LLM / cache
+    status: Mapped[str] = mapped_column(String(10), default="ok")  # ok / failed
+
+    started_at: Mapped[datetime] = mapped_column(DateTime)
+    duration_ms: Mapped[int] = mapped_column(Integer)
+    bytes_in: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    bytes_out: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+    __table_args__ = (Index("ix_stage_metrics_stage_started", "stage", "started_at"),)
+
+
 class Tag(Base):
     """标签"""
     __tablename__ = "tags"
@@ -276,10 +360,36 @@ class WatchedFolder(Base):
     # 关系
     tenant: Mapped["Tenant"] = relationship("Tenant", back_populates="watched_folders")
     videos: Mapped[List["Video"]] = relationship("Video", back_populates="watched_folder")
+    scan_cursor: Mapped[Optional["FolderScanCursor"]] = relationship(
+        "FolderScanCursor", back_populates="folder", uselist=False, cascade="all, delete-orphan"
+    )
 
     __table_args__ = (UniqueConstraint("tenant_id", "folder_id", name="uq_tenant_folder"),)
 
 
+class FolderScanCursor(Base):
+    """
+    收藏夹增量扫描游标
+
+    记录上次扫描时列表最前面的条目（收藏夹按收藏时间倒序），增量扫描翻页到该位置即停止；
+    每隔一段时间做一次完整扫描校对。
+    """
+    __tablename__ = "folder_scan_cursors"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    watched_folder_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("watched_folders.id", ondelete="CASCADE"), unique=True
+    )
+
+    top_source_id: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)  # 上次扫描时最新的条目
+    top_fav_time: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)     # 其收藏时间（unix 秒）
+    last_full_scan_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, onupdate=datetime.utcnow)
+
+    folder: Mapped["WatchedFolder"] = relationship("WatchedFolder", back_populates="scan_cursor")
+
+
 class LearningRecord(Base):
     """学习记录（旧表，保留兼容）"""
     __tablename__ = "learning_records"
@@ -0,0 +1,72 @@
+"""
+持久化任务队列
+
+默认使用 SQLite 后端，可通过 queue.backend 切换到 Redis。
+"""
+
+import threading
+from typing import Optional
+
+from .base import ACTIVE_STATES, FINISHED_STATES, Job, JobBackend, JobState
+from .scheduling import FairSharePolicy, GroupLimits, Priority
+from .sqlite_backend import SQLiteJobBackend
+
+_backend: Optional[JobBackend] = None
+_backend_lock = threading.Lock()
+
+
+def create_job_backend(backend: str, **kwargs) -> JobBackend:
+    """
+    创建任务队列后端
+
+    Args:
+        backend: sqlite / redis
+        kwargs: 后端参数（sqlite: path；redis: url, prefix）
+    """
+    if backend == "sqlite":
+        return SQLiteJobBackend(**kwargs)
+    if backend == "redis":
+        from .redis_backend import RedisJobBackend
+        return RedisJobBackend(**kwargs)
+    raise ValueError(f"未知的队列后端: {backend}")
+
+
+def get_job_backend() -> JobBackend:
+    """获取全局任务队列后端（按配置创建）"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                from packages.config import get_config
+
+                config = get_config().queue
+                if config.backend == "redis":
+                    _backend = create_job_backend("redis", url=config.redis_url)
+                else:
+                    _backend = create_job_backend("sqlite", path=config.sqlite_path)
+    return _backend
+
+
+def reset_job_backend():
+    """重置全局后端（用于测试）"""
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+        _backend = None
+
+
+__all__ = [
+    "Job",
+    "JobBackend",
+    "JobState",
+    "ACTIVE_STATES",
+    "FINISHED_STATES",
+    "FairSharePolicy",
+    "GroupLimits",
+    "Priority",
+    "SQLiteJobBackend",
+    "create_job_backend",
+    "get_job_backend",
+    "reset_job_backend",
+]
@@ -0,0 +1,155 @@
+"""
+持久化任务队列抽象接口
+
+任务生命周期：
+    queued --claim--> running --complete--> completed
+                         |--fail--> queued（未达重试上限，延迟可见）/ failed
+                         |--租约过期（reaper）--> queued / failed
+    queued --cancel--> cancelled
+
+running 状态的任务持有租约（lease），执行者需定期 heartbeat 续约；
+进程崩溃或重启后租约过期，任务由 reaper 放回队列被其他执行者认领。
+
+认领顺序由调度策略决定（见 scheduling.py）：优先级、老化、按分组加权公平。
+"""
+
+import enum
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .scheduling import FairSharePolicy
+
+
+class JobState(enum.Enum):
+    """任务状态"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+ACTIVE_STATES = (JobState.QUEUED, JobState.RUNNING)
+FINISHED_STATES = (JobState.COMPLETED, JobState.FAILED, JobState.CANCELLED)
+
+
+@dataclass
+class Job:
+    """队列任务（时间均为 Unix 时间戳）"""
+    id: int
+    queue: str
+    payload: Dict[str, Any]
+    state: JobState = JobState.QUEUED
+    key: Optional[str] = None              # 去重键：同一键同时只允许一个活跃任务
+    priority: int = 1                      # 优先级（scheduling.Priority，越小越优先）
+    group: Optional[str] = None            # 公平调度分组（如租户）
+    attempts: int = 0
+    max_attempts: int = 3
+    available_at: float = 0.0              # 可见时间（重试退避）
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[float] = None
+    claimed_at: Optional[float] = None     # 最近一次被认领的时间
+    error: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+    finished_at: Optional[float] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+class JobBackend(ABC):
+    """任务队列存储后端"""
+
+    name: str = "base"
+
+    @abstractmethod
+    def enqueue(
+        self,
+        queue: str,
+        payload: Dict[str, Any],
+        key: Optional[str] = None,
+        max_attempts: int = 3,
+        delay: float = 0.0,
+        priority: int = 1,
+        group: Optional[str] = None,
+    ) -> Optional[Job]:
+        """
+        入队
+
+        Args:
+            priority: 优先级（scheduling.Priority）
+            group: 公平调度分组
+
+        Returns:
+            新任务；若同一 key 已有活跃任务则返回 None
+        """
+
+    @abstractmethod
+    def claim(
+        self,
+        queue: str,
+        worker_id: str,
+        lease_seconds: float,
+        limit: int = 1,
+        policy: Optional["FairSharePolicy"] = None,
+    ) -> List[Job]:
+        """按调度策略原子认领最多 limit 个可见任务，并授予租约（policy 为空时使用默认策略）"""
+
+    @abstractmethod
+    def list_queued(self, queue: str) -> List[Job]:
+        """排队中的全部任务（含尚未到可见时间的）"""
+
+    @abstractmethod
+    def group_usage(self, queue: str, since: float) -> Tuple[Dict[Optional[str], int], Dict[Optional[str], int]]:
+        """
+        各分组的服务量
+
+        Returns:
+            (usage, running)：usage 为运行中或 since 之后被认领的任务数，running 为运行中的任务数
+        """
+
+    @abstractmethod
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+        """续约；租约已丢失时返回 False"""
+
+    @abstractmethod
+    def complete(self, job_id: int, worker_id: str) -> bool:
+        """标记完成"""
+
+    @abstractmethod
+    def fail(self, job_id: int, worker_id: str, error: str, retry_delay: float = 0.0) -> bool:
+        """标记失败；未达重试上限时延迟 retry_delay 秒重新入队"""
+
+    @abstractmethod
+    def cancel(self, job_id: int, worker_id: Optional[str] = None) -> bool:
+        """取消排队中的任务；指定 worker_id 时也可取消该执行者持有租约的任务"""
+
+    @abstractmethod
+    def get(self, job_id: int) -> Optional[Job]:
+        """按ID获取任务"""
+
+    @abstractmethod
+    def get_active_by_key(self, key: str) -> Optional[Job]:
+        """获取某个去重键当前的活跃任务"""
+
+    @abstractmethod
+    def reap_expired(self, now: Optional[float] = None) -> int:
+        """回收租约过期的任务，返回回收数量"""
+
+    @abstractmethod
+    def purge_finished(self, older_than: float, max_finished: int = 0) -> int:
+        """
+        清理已结束任务，返回清理数量
+
+        Args:
+            older_than: 清理结束时间早于该时间戳的任务
+            max_finished: 大于0时，已结束任务最多保留最近的 N 个
+        """
+
+    @abstractmethod
+    def stats(self, queue: Optional[str] = None) -> Dict[str, int]:
+        """各状态任务数量"""
+
+    def close(self):
+        """释放资源"""
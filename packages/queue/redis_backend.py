@@ -0,0 +1,413 @@
+"""
+Redis 任务队列后端（可选，需安装 redis extra：pip install alicelm[redis]）
+
+数据结构（prefix 默认 alice:jobs）：
+    {prefix}:seq                  任务ID自增计数
+    {prefix}:job:{id}             任务 hash
+    {prefix}:queues               set，出现过的队列名
+    {prefix}:counts:{queue}       hash，状态 -> 任务数（stats 直接读取）
+    {prefix}:lanes:{queue}        set，有排队任务的 "优先级:分组"
+    {prefix}:ready:{queue}:{lane} zset，score = available_at（每个 优先级 × 分组 一个）
+    {prefix}:running:{queue}      zset，member = "分组|任务ID"，score = lease_expires_at
+    {prefix}:claims:{queue}       zset，member = "分组|任务ID"，score = 认领时间（公平调度用量）
+    {prefix}:finished             zset，score = finished_at
+    {prefix}:keys                 hash，去重键 -> 活跃任务ID
+
+状态迁移均由 Lua 脚本完成，保证多进程认领/回收的原子性；状态计数在同一脚本内增减。
+认领时先在客户端按调度策略（scheduling.py）选出任务ID，再由脚本逐个确认仍在排队后认领。
+"""
+
+import json
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from packages.logging import get_logger
+
+from .base import Job, JobBackend, JobState
+from .scheduling import FairSharePolicy
+
+logger = get_logger(__name__)
+
+# 任务所在的排队通道（优先级:分组）、运行中集合及其成员（分组|任务ID），以及状态计数
+_LANE = """
+local function lane_of(job)
+    return (redis.call('HGET', job, 'priority') or '1') .. ':' .. (redis.call('HGET', job, 'group') or '')
+end
+local function running_of(prefix, job, id)
+    return prefix .. ':running:' .. redis.call('HGET', job, 'queue'),
+        (redis.call('HGET', job, 'group') or '') .. '|' .. id
+end
+local function move(prefix, queue, from, to)
+    local counts = prefix .. ':counts:' .. queue
+    if from then
+        redis.call('HINCRBY', counts, from, -1)
+    end
+    if to then
+        redis.call('HINCRBY', counts, to, 1)
+    end
+end
+"""
+
+_ENQUEUE = _LANE + """
+local prefix, queue, payload, key = KEYS[1], ARGV[1], ARGV[2], ARGV[3]
+local max_attempts, available_at, now = ARGV[4], tonumber(ARGV[5]), ARGV[6]
+local priority, group = ARGV[7], ARGV[8]
+if key ~= '' and redis.call('HEXISTS', prefix .. ':keys', key) == 1 then
+    return 0
+end
+local id = redis.call('INCR', prefix .. ':seq')
+redis.call('HSET', prefix .. ':job:' .. id,
+    'id', id, 'queue', queue, 'payload', payload, 'state', 'queued', 'key', key,
+    'priority', priority, 'group', group,
+    'attempts', 0, 'max_attempts', max_attempts, 'available_at', available_at,
+    'created_at', now, 'updated_at', now)
+local lane = priority .. ':' .. group
+redis.call('ZADD', prefix .. ':ready:' .. queue .. ':' .. lane, available_at, id)
+redis.call('SADD', prefix .. ':lanes:' .. queue, lane)
+redis.call('SADD', prefix .. ':queues', queue)
+move(prefix, queue, nil, 'queued')
+if key ~= '' then
+    redis.call('HSET', prefix .. ':keys', key, id)
+end
+return id
+"""
+
+_CLAIM = _LANE + """
+-- ARGV: queue, worker, now, lease, usage_window, id...
+local prefix, queue, worker, now = KEYS[1], ARGV[1], ARGV[2], tonumber(ARGV[3])
+local lease, window = tonumber(ARGV[4]), tonumber(ARGV[5])
+local claimed = {}
+for i = 6, #ARGV do
+    local id = ARGV[i]
+    local job = prefix .. ':job:' .. id
+    local lane = lane_of(job)
+    local ready = prefix .. ':ready:' .. queue .. ':' .. lane
+    local score = redis.call('ZSCORE', ready, id)
+    if score and tonumber(score) <= now then
+        local running, member = running_of(prefix, job, id)
+        redis.call('ZREM', ready, id)
+        redis.call('ZADD', running, now + lease, member)
+        redis.call('HSET', job, 'state', 'running', 'lease_owner', worker,
+            'lease_expires_at', now + lease, 'claimed_at', now, 'updated_at', now)
+        redis.call('HINCRBY', job, 'attempts', 1)
+        redis.call('ZADD', prefix .. ':claims:' .. queue, now, member)
+        move(prefix, queue, 'queued', 'running')
+        table.insert(claimed, id)
+    end
+    if redis.call('ZCARD', ready) == 0 then
+        redis.call('SREM', prefix .. ':lanes:' .. queue, lane)
+    end
+end
+redis.call('ZREMRANGEBYSCORE', prefix .. ':claims:' .. queue, '-inf', '(' .. (now - window))
+return claimed
+"""
+
+_HEARTBEAT = _LANE + """
+local prefix, id, worker, now, lease = KEYS[1], ARGV[1], ARGV[2], tonumber(ARGV[3]), tonumber(ARGV[4])
+local job = prefix .. ':job:' .. id
+if redis.call('HGET', job, 'state') ~= 'running' or redis.call('HGET', job, 'lease_owner') ~= worker then
+    return 0
+end
+local running, member = running_of(prefix, job, id)
+redis.call('ZADD', running, now + lease, member)
+redis.call('HSET', job, 'lease_expires_at', now + lease, 'updated_at', now)
+return 1
+"""
+
+_FINISH = _LANE + """
+-- ARGV: id, worker('' 表示 reaper), now, outcome(completed/failed/retry), error, retry_at
+local prefix, id, worker, now = KEYS[1], ARGV[1], ARGV[2], tonumber(ARGV[3])
+local outcome, err, retry_at = ARGV[4], ARGV[5], tonumber(ARGV[6])
+local job = prefix .. ':job:' .. id
+if redis.call('HGET', job, 'state') ~= 'running' then
+    return 0
+end
+if worker ~= '' and redis.call('HGET', job, 'lease_owner') ~= worker then
+    return 0
+end
+local queue = redis.call('HGET', job, 'queue')
+local running, member = running_of(prefix, job, id)
+if worker == '' then
+    -- reaper：仅回收确实已过期的租约（期间可能已被续约）
+    local expires = redis.call('ZSCORE', running, member)
+    if not expires or tonumber(expires) >= now then
+        return 0
+    end
+end
+redis.call('ZREM', running, member)
+redis.call('HDEL', job, 'lease_owner', 'lease_expires_at')
+if outcome == 'retry' then
+    local attempts = tonumber(redis.call('HGET', job, 'attempts'))
+    local max_attempts = tonumber(redis.call('HGET', job, 'max_attempts'))
+    if attempts < max_attempts then
+        local lane = lane_of(job)
+        redis.call('HSET', job, 'state', 'queued', 'error', err,
+            'available_at', retry_at, 'updated_at', now)
+        redis.call('ZADD', prefix .. ':ready:' .. queue .. ':' .. lane, retry_at, id)
+        redis.call('SADD', prefix .. ':lanes:' .. queue, lane)
+        move(prefix, queue, 'running', 'queued')
+        return 1
+    end
+    outcome = 'failed'
+end
+redis.call('HSET', job, 'state', outcome, 'error', err, 'updated_at', now, 'finished_at', now)
+move(prefix, queue, 'running', outcome)
+redis.call('ZADD', prefix .. ':finished', now, id)
+local key = redis.call('HGET', job, 'key')
+if key and key ~= '' then
+    redis.call('HDEL', prefix .. ':keys', key)
+end
+return 1
+"""
+
+_CANCEL = _LANE + """
+local prefix, id, now, worker = KEYS[1], ARGV[1], tonumber(ARGV[2]), ARGV[3]
+local job = prefix .. ':job:' .. id
+local state, queue = redis.call('HGET', job, 'state'), redis.call('HGET', job, 'queue')
+if state == 'running' and worker ~= '' and redis.call('HGET', job, 'lease_owner') == worker then
+    local running, member = running_of(prefix, job, id)
+    redis.call('ZREM', running, member)
+    redis.call('HDEL', job, 'lease_owner', 'lease_expires_at')
+elseif state == 'queued' then
+    local lane = lane_of(job)
+    local ready = prefix .. ':ready:' .. queue .. ':' .. lane
+    redis.call('ZREM', ready, id)
+    if redis.call('ZCARD', ready) == 0 then
+        redis.call('SREM', prefix .. ':lanes:' .. queue, lane)
+    end
+else
+    return 0
+end
+redis.call('HSET', job, 'state', 'cancelled', 'updated_at', now, 'finished_at', now)
+move(prefix, queue, state, 'cancelled')
+redis.call('ZADD', prefix .. ':finished', now, id)
+local key = redis.call('HGET', job, 'key')
+if key and key ~= '' then
+    redis.call('HDEL', prefix .. ':keys', key)
+end
+return 1
+"""
+
+_PURGE = """
+local prefix, older_than, max_finished = KEYS[1], tonumber(ARGV[1]), tonumber(ARGV[2])
+local victims = redis.call('ZRANGEBYSCORE', prefix .. ':finished', '-inf', '(' .. older_than)
+if max_finished > 0 then
+    local extra = redis.call('ZREVRANGE', prefix .. ':finished', max_finished, -1)
+    for _, id in ipairs(extra) do table.insert(victims, id) end
+end
+local n = 0
+for _, id in ipairs(victims) do
+    if redis.call('ZREM', prefix .. ':finished', id) == 1 then
+        local job = prefix .. ':job:' .. id
+        local queue, state = unpack(redis.call('HMGET', job, 'queue', 'state'))
+        if queue then
+            redis.call('HINCRBY', prefix .. ':counts:' .. queue, state, -1)
+        end
+        redis.call('DEL', job)
+        n = n + 1
+    end
+end
+return n
+"""
+
+
+class RedisJobBackend(JobBackend):
+    """Redis 任务队列后端"""
+
+    name = "redis"
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "alice:jobs"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("Redis 队列后端需要安装 redis 包: pip install alicelm[redis]") from e
+
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._enqueue = self._redis.register_script(_ENQUEUE)
+        self._claim = self._redis.register_script(_CLAIM)
+        self._heartbeat = self._redis.register_script(_HEARTBEAT)
+        self._finish = self._redis.register_script(_FINISH)
+        self._cancel = self._redis.register_script(_CANCEL)
+        self._purge = self._redis.register_script(_PURGE)
+        self._default_policy = FairSharePolicy()
+
+    def _job_key(self, job_id: int) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    @staticmethod
+    def _to_job(data: Dict[str, str]) -> Job:
+        def _float(name: str) -> Optional[float]:
+            value = data.get(name)
+            return float(value) if value not in (None, "") else None
+
+        return Job(
+            id=int(data["id"]),
+            queue=data["queue"],
+            payload=json.loads(data["payload"]),
+            state=JobState(data["state"]),
+            key=data.get("key") or None,
+            priority=int(data.get("priority", 1)),
+            group=data.get("group") or None,
+            attempts=int(data.get("attempts", 0)),
+            max_attempts=int(data.get("max_attempts", 3)),
+            available_at=_float("available_at") or 0.0,
+            lease_owner=data.get("lease_owner"),
+            lease_expires_at=_float("lease_expires_at"),
+            claimed_at=_float("claimed_at"),
+            error=data.get("error") or None,
+            created_at=_float("created_at") or 0.0,
+            updated_at=_float("updated_at") or 0.0,
+            finished_at=_float("finished_at"),
+        )
+
+    # ========== 接口实现 ==========
+
+    def enqueue(
+        self,
+        queue: str,
+        payload: Dict[str, Any],
+        key: Optional[str] = None,
+        max_attempts: int = 3,
+        delay: float = 0.0,
+        priority: int = 1,
+        group: Optional[str] = None,
+    ) -> Optional[Job]:
+        now = time.time()
+        job_id = self._enqueue(
+            keys=[self.prefix],
+            args=[queue, json.dumps(payload, ensure_ascii=False), key or "",
+                  max_attempts, now + delay, now, int(priority), group or ""],
+        )
+        if not job_id:
+            return None
+        return self.get(int(job_id))
+
+    def _lane_jobs(self, queue: str, max_score: str, per_lane: Optional[int]) -> List[Job]:
+        """各排队通道中 available_at <= max_score 的最早 per_lane 个任务"""
+        jobs = []
+        for lane in self._redis.smembers(f"{self.prefix}:lanes:{queue}"):
+            ready = f"{self.prefix}:ready:{queue}:{lane}"
+            if per_lane is None:
+                ids = self._redis.zrangebyscore(ready, "-inf", max_score)
+            else:
+                ids = self._redis.zrangebyscore(ready, "-inf", max_score, start=0, num=per_lane)
+            jobs.extend(j for j in (self.get(int(i)) for i in ids) if j is not None)
+        return jobs
+
+    def claim(
+        self,
+        queue: str,
+        worker_id: str,
+        lease_seconds: float,
+        limit: int = 1,
+        policy: Optional[FairSharePolicy] = None,
+    ) -> List[Job]:
+        if limit <= 0:
+            return []
+        policy = policy or self._default_policy
+        now = time.time()
+
+        candidates = self._lane_jobs(queue, str(now), per_lane=limit)
+        if not candidates:
+            return []
+        usage, running = self.group_usage(queue, now - policy.usage_window)
+        selected = policy.select(candidates, usage, running, now, limit=limit)
+        if not selected:
+            return []
+
+        # 选出后到认领前可能被其他执行者抢走，脚本只认领仍在排队的任务
+        ids = self._claim(
+            keys=[self.prefix],
+            args=[queue, worker_id, now, lease_seconds, policy.usage_window, *(j.id for j in selected)],
+        )
+        jobs = [self.get(int(i)) for i in ids]
+        return [j for j in jobs if j is not None]
+
+    def list_queued(self, queue: str) -> List[Job]:
+        jobs = self._lane_jobs(queue, "+inf", per_lane=None)
+        return sorted(jobs, key=lambda j: (j.available_at, j.id))
+
+    def group_usage(self, queue: str, since: float) -> Tuple[Dict[Optional[str], int], Dict[Optional[str], int]]:
+        used: Dict[str, Optional[str]] = {}
+        for member in self._redis.zrangebyscore(f"{self.prefix}:claims:{queue}", since, "+inf"):
+            group, _, job_id = member.rpartition("|")
+            used[job_id] = group or None
+
+        running: Counter = Counter()
+        for member in self._redis.zrange(f"{self.prefix}:running:{queue}", 0, -1):
+            group, _, job_id = member.rpartition("|")
+            running[group or None] += 1
+            used[job_id] = group or None
+
+        return dict(Counter(used.values())), dict(running)
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+        return bool(self._heartbeat(
+            keys=[self.prefix],
+            args=[job_id, worker_id, time.time(), lease_seconds],
+        ))
+
+    def complete(self, job_id: int, worker_id: str) -> bool:
+        return bool(self._finish(
+            keys=[self.prefix],
+            args=[job_id, worker_id, time.time(), "completed", "", 0],
+        ))
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry_delay: float = 0.0) -> bool:
+        now = time.time()
+        return bool(self._finish(
+            keys=[self.prefix],
+            args=[job_id, worker_id, now, "retry", error, now + retry_delay],
+        ))
+
+    def cancel(self, job_id: int, worker_id: Optional[str] = None) -> bool:
+        return bool(self._cancel(keys=[self.prefix], args=[job_id, time.time(), worker_id or ""]))
+
+    def get(self, job_id: int) -> Optional[Job]:
+        data = self._redis.hgetall(self._job_key(job_id))
+        return self._to_job(data) if data else None
+
+    def get_active_by_key(self, key: str) -> Optional[Job]:
+        job_id = self._redis.hget(f"{self.prefix}:keys", key)
+        return self.get(int(job_id)) if job_id else None
+
+    def reap_expired(self, now: Optional[float] = None) -> int:
+        now = now or time.time()
+        expired = [
+            member.rpartition("|")[2]
+            for queue in self._redis.smembers(f"{self.prefix}:queues")
+            for member in self._redis.zrangebyscore(f"{self.prefix}:running:{queue}", "-inf", f"({now}")
+        ]
+        reaped = 0
+        for job_id in expired:
+            owner = self._redis.hget(self._job_key(int(job_id)), "lease_owner") or "?"
+            # 不校验持有者；脚本内再次确认状态，避免与正常完成竞争
+            if self._finish(
+                keys=[self.prefix],
+                args=[job_id, "", now, "retry", f"lease expired (owner: {owner})", now],
+            ):
+                reaped += 1
+        if reaped:
+            logger.warning("jobs_reaped", count=reaped)
+        return reaped
+
+    def purge_finished(self, older_than: float, max_finished: int = 0) -> int:
+        return int(self._purge(keys=[self.prefix], args=[older_than, max_finished]))
+
+    def stats(self, queue: Optional[str] = None) -> Dict[str, int]:
+        queues = [queue] if queue is not None else self._redis.smembers(f"{self.prefix}:queues")
+        pipe = self._redis.pipeline(transaction=False)
+        for name in queues:
+            pipe.hgetall(f"{self.prefix}:counts:{name}")
+
+        counts = {state.value: 0 for state in JobState}
+        for per_queue in pipe.execute():
+            for state, n in per_queue.items():
+                if state in counts:
+                    counts[state] += int(n)
+        return counts
+
+    def close(self):
+        self._redis.close()
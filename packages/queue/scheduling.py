@@ -0,0 +1,123 @@
+"""
+优先级 + 公平份额调度
+
+认领任务时不再简单按入队时间（FIFO）：
+1. 优先级：interactive（用户点击“立即处理”）> scheduled（扫描发现）> backfill（批量补处理/重试）
+2. 老化：每等待 aging_seconds 提升一个优先级，低优先级任务不会被无限期饿死
+3. 同一优先级内按分组（租户）加权公平：已获得服务量 / 权重 最小的分组优先，
+   服务量 = 正在运行的任务数 + 最近 usage_window 秒内被认领的任务数
+4. 分组限制：max_running 限制分组同时运行的任务数；held 的分组（如配额耗尽）暂不调度
+
+策略本身与存储无关，后端负责取候选任务（每个 优先级 × 分组 最早的若干个）和分组用量。
+"""
+
+import enum
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from .base import Job
+
+
+class Priority(enum.IntEnum):
+    """任务优先级（数值越小越优先）"""
+    INTERACTIVE = 0
+    SCHEDULED = 1
+    BACKFILL = 2
+
+
+@dataclass
+class GroupLimits:
+    """分组调度参数"""
+    weight: float = 1.0     # 公平份额权重
+    max_running: int = 0    # 同时运行上限（0 不限）
+    held: bool = False      # 暂停调度（任务保留在队列中）
+
+
+class FairSharePolicy:
+    """优先级 + 老化 + 加权公平调度策略"""
+
+    def __init__(
+        self,
+        aging_seconds: float = 1800,
+        usage_window: float = 3600,
+        limits: Optional[Callable[[Optional[str]], GroupLimits]] = None,
+    ):
+        """
+        Args:
+            aging_seconds: 等待多久提升一个优先级（<=0 关闭老化）
+            usage_window: 统计分组已获得服务量的时间窗口（秒）
+            limits: 分组 -> GroupLimits，为空时所有分组权重相同且不限流
+        """
+        self.aging_seconds = aging_seconds
+        self.usage_window = usage_window
+        self._limits = limits or (lambda group: GroupLimits())
+
+    def limits(self, group: Optional[str]) -> GroupLimits:
+        return self._limits(group)
+
+    def effective_priority(self, job: Job, now: float) -> int:
+        """老化后的优先级"""
+        if self.aging_seconds <= 0:
+            return job.priority
+        waited = max(0.0, now - job.created_at)
+        return max(int(Priority.INTERACTIVE), job.priority - int(waited // self.aging_seconds))
+
+    def select(
+        self,
+        candidates: Iterable[Job],
+        usage: Dict[Optional[str], int],
+        running: Dict[Optional[str], int],
+        now: float,
+        limit: Optional[int] = None,
+        enforce_limits: bool = True,
+    ) -> List[Job]:
+        """
+        按调度顺序选出任务
+
+        Args:
+            candidates: 可认领的任务
+            usage: 分组已获得服务量（含运行中）
+            running: 分组运行中的任务数
+            limit: 最多选出数量（None 表示全部排序，用于估算排队位置）
+            enforce_limits: 是否执行 max_running 限制（估算位置时忽略，held 始终生效）
+        """
+        lanes: Dict[Optional[str], Deque[Tuple[int, Job]]] = defaultdict(deque)
+        for job in sorted(
+            candidates,
+            key=lambda j: (self.effective_priority(j, now), j.available_at, j.id),
+        ):
+            lanes[job.group].append((self.effective_priority(job, now), job))
+
+        limits = {group: self.limits(group) for group in lanes}
+        usage = defaultdict(int, usage)
+        running = defaultdict(int, running)
+
+        selected: List[Job] = []
+        while lanes and (limit is None or len(selected) < limit):
+            best_key, best_group = None, None
+            for group, lane in list(lanes.items()):
+                group_limits = limits[group]
+                if group_limits.held or (
+                    enforce_limits
+                    and group_limits.max_running
+                    and running[group] >= group_limits.max_running
+                ):
+                    del lanes[group]
+                    continue
+                priority, job = lane[0]
+                key = (priority, usage[group] / max(group_limits.weight, 1e-9), job.available_at, job.id)
+                if best_key is None or key < best_key:
+                    best_key, best_group = key, group
+
+            if best_key is None:
+                break
+
+            _, job = lanes[best_group].popleft()
+            if not lanes[best_group]:
+                del lanes[best_group]
+            selected.append(job)
+            usage[best_group] += 1
+            running[best_group] += 1
+
+        return selected
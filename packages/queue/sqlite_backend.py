@@ -0,0 +1,412 @@
+"""
+SQLite 任务队列后端（默认）
+
+- 独立数据库文件，WAL 模式，多进程可安全并发认领
+- 写操作使用 BEGIN IMMEDIATE 事务（认领时保证同一任务只被一个执行者拿到）；
+  只读查询用普通的延迟事务，WAL 下不阻塞写入也不被写入阻塞
+- 认领时在同一事务内取候选任务与分组用量，按调度策略（scheduling.py）选择
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from packages.logging import get_logger
+
+from .base import FINISHED_STATES, Job, JobBackend, JobState
+from .scheduling import FairSharePolicy
+
+logger = get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    queue TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    key TEXT,
+    priority INTEGER NOT NULL DEFAULT 1,
+    grp TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    claimed_at REAL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+"""
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS ix_jobs_ready ON jobs (queue, state, available_at);
+CREATE INDEX IF NOT EXISTS ix_jobs_lane ON jobs (queue, state, priority, grp, available_at);
+CREATE INDEX IF NOT EXISTS ix_jobs_claimed ON jobs (queue, claimed_at);
+CREATE INDEX IF NOT EXISTS ix_jobs_lease ON jobs (state, lease_expires_at);
+CREATE INDEX IF NOT EXISTS ix_jobs_finished ON jobs (finished_at);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_jobs_active_key
+    ON jobs (key) WHERE key IS NOT NULL AND state IN ('queued', 'running');
+"""
+
+_FINISHED = tuple(s.value for s in FINISHED_STATES)
+
+
+class SQLiteJobBackend(JobBackend):
+    """SQLite 任务队列后端"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = "data/jobs.db"):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        # :memory: 数据库无法跨连接共享，退化为单连接 + 锁
+        self._shared: Optional[sqlite3.Connection] = None
+        self._shared_lock = threading.RLock()
+        self._default_policy = FairSharePolicy()
+        with self._shared_lock:
+            conn = self._conn()
+            conn.executescript(_SCHEMA)
+            conn.executescript(_INDEXES)
+
+    # ========== 连接与事务 ==========
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=30,
+            isolation_level=None,  # 手动管理事务
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA busy_timeout=30000")
+        if self.path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        if self.path == ":memory:":
+            if self._shared is None:
+                self._shared = self._connect()
+            return self._shared
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    class _Tx:
+        def __init__(self, backend: "SQLiteJobBackend", write: bool = True):
+            self.backend = backend
+            self.write = write
+            # 文件数据库每个线程一个连接，只读事务不需要进程内互斥
+            self.locked = write or backend.path == ":memory:"
+
+        def __enter__(self) -> sqlite3.Connection:
+            if self.locked:
+                self.backend._shared_lock.acquire()
+            try:
+                self.conn = self.backend._conn()
+                self.conn.execute("BEGIN IMMEDIATE" if self.write else "BEGIN")
+            except BaseException:
+                if self.locked:
+                    self.backend._shared_lock.release()
+                raise
+            return self.conn
+
+        def __exit__(self, exc_type, exc, tb):
+            try:
+                self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+            finally:
+                if self.locked:
+                    self.backend._shared_lock.release()
+            return False
+
+    def _tx(self) -> "_Tx":
+        """写事务"""
+        return SQLiteJobBackend._Tx(self)
+
+    def _read(self) -> "_Tx":
+        """只读事务（延迟事务，不取写锁）"""
+        return SQLiteJobBackend._Tx(self, write=False)
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> Job:
+        return Job(
+            id=row["id"],
+            queue=row["queue"],
+            payload=json.loads(row["payload"]),
+            state=JobState(row["state"]),
+            key=row["key"],
+            priority=row["priority"],
+            group=row["grp"],
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            available_at=row["available_at"],
+            lease_owner=row["lease_owner"],
+            lease_expires_at=row["lease_expires_at"],
+            claimed_at=row["claimed_at"],
+            error=row["error"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            finished_at=row["finished_at"],
+        )
+
+    # ========== 接口实现 ==========
+
+    def enqueue(
+        self,
+        queue: str,
+        payload: Dict[str, Any],
+        key: Optional[str] = None,
+        max_attempts: int = 3,
+        delay: float = 0.0,
+        priority: int = 1,
+        group: Optional[str] = None,
+    ) -> Optional[Job]:
+        now = time.time()
+        with self._tx() as conn:
+            if key is not None:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE key = ? AND state IN ('queued', 'running')",
+                    (key,),
+                ).fetchone()
+                if row:
+                    return None
+
+            cursor = conn.execute(
+                """
+                INSERT INTO jobs (queue, payload, state, key, priority, grp, max_attempts,
+                                  available_at, created_at, updated_at)
+                VALUES (?, ?, 'queued', ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (queue, json.dumps(payload, ensure_ascii=False), key, int(priority), group,
+                 max_attempts, now + delay, now, now),
+            )
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (cursor.lastrowid,)).fetchone()
+        return self._to_job(row)
+
+    def claim(
+        self,
+        queue: str,
+        worker_id: str,
+        lease_seconds: float,
+        limit: int = 1,
+        policy: Optional[FairSharePolicy] = None,
+    ) -> List[Job]:
+        if limit <= 0:
+            return []
+        policy = policy or self._default_policy
+        now = time.time()
+        with self._tx() as conn:
+            # 每个 优先级 × 分组 最早的 limit 个任务即足够（同一分组内总是先取最早的）
+            candidates = [
+                self._to_job(r)
+                for r in conn.execute(
+                    """
+                    SELECT * FROM (
+                        SELECT *, ROW_NUMBER() OVER (
+                            PARTITION BY priority, grp ORDER BY available_at, id
+                        ) AS lane_rank
+                        FROM jobs
+                        WHERE queue = ? AND state = 'queued' AND available_at <= ?
+                    ) WHERE lane_rank <= ?
+                    """,
+                    (queue, now, limit),
+                )
+            ]
+            if not candidates:
+                return []
+
+            usage, running = self._group_usage(conn, queue, now - policy.usage_window)
+            ids = [job.id for job in policy.select(candidates, usage, running, now, limit=limit)]
+            if not ids:
+                return []
+
+            placeholders = ",".join("?" * len(ids))
+            conn.execute(
+                f"""
+                UPDATE jobs
+                SET state = 'running', lease_owner = ?, lease_expires_at = ?,
+                    attempts = attempts + 1, claimed_at = ?, updated_at = ?
+                WHERE id IN ({placeholders})
+                """,
+                (worker_id, now + lease_seconds, now, now, *ids),
+            )
+            rows = {
+                r["id"]: r
+                for r in conn.execute(f"SELECT * FROM jobs WHERE id IN ({placeholders})", ids)
+            }
+        return [self._to_job(rows[i]) for i in ids]
+
+    def list_queued(self, queue: str) -> List[Job]:
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE queue = ? AND state = 'queued' ORDER BY available_at, id",
+                (queue,),
+            ).fetchall()
+        return [self._to_job(r) for r in rows]
+
+    @staticmethod
+    def _group_usage(
+        conn: sqlite3.Connection, queue: str, since: float
+    ) -> Tuple[Dict[Optional[str], int], Dict[Optional[str], int]]:
+        usage: Dict[Optional[str], int] = {}
+        running: Dict[Optional[str], int] = {}
+        for row in conn.execute(
+            """
+            SELECT grp,
+                   COUNT(*) AS used,
+                   SUM(CASE WHEN state = 'running' THEN 1 ELSE 0 END) AS running
+            FROM jobs
+            WHERE queue = ? AND (state = 'running' OR claimed_at >= ?)
+            GROUP BY grp
+            """,
+            (queue, since),
+        ):
+            usage[row["grp"]] = row["used"]
+            if row["running"]:
+                running[row["grp"]] = row["running"]
+        return usage, running
+
+    def group_usage(self, queue: str, since: float) -> Tuple[Dict[Optional[str], int], Dict[Optional[str], int]]:
+        with self._read() as conn:
+            return self._group_usage(conn, queue, since)
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+        now = time.time()
+        with self._tx() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET lease_expires_at = ?, updated_at = ?
+                WHERE id = ? AND state = 'running' AND lease_owner = ?
+                """,
+                (now + lease_seconds, now, job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str) -> bool:
+        now = time.time()
+        with self._tx() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs
+                SET state = 'completed', lease_owner = NULL, lease_expires_at = NULL,
+                    error = NULL, updated_at = ?, finished_at = ?
+                WHERE id = ? AND state = 'running' AND lease_owner = ?
+                """,
+                (now, now, job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry_delay: float = 0.0) -> bool:
+        now = time.time()
+        with self._tx() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs
+                SET state = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+                    finished_at = CASE WHEN attempts >= max_attempts THEN ? ELSE NULL END,
+                    available_at = ?, lease_owner = NULL, lease_expires_at = NULL,
+                    error = ?, updated_at = ?
+                WHERE id = ? AND state = 'running' AND lease_owner = ?
+                """,
+                (now, now + retry_delay, error, now, job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def cancel(self, job_id: int, worker_id: Optional[str] = None) -> bool:
+        now = time.time()
+        with self._tx() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs
+                SET state = 'cancelled', lease_owner = NULL, lease_expires_at = NULL,
+                    updated_at = ?, finished_at = ?
+                WHERE id = ? AND (state = 'queued' OR (state = 'running' AND lease_owner = ?))
+                """,
+                (now, now, job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self._read() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def get_active_by_key(self, key: str) -> Optional[Job]:
+        with self._read() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE key = ? AND state IN ('queued', 'running')",
+                (key,),
+            ).fetchone()
+        return self._to_job(row) if row else None
+
+    def reap_expired(self, now: Optional[float] = None) -> int:
+        now = now or time.time()
+        with self._tx() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs
+                SET state = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+                    finished_at = CASE WHEN attempts >= max_attempts THEN ? ELSE NULL END,
+                    error = 'lease expired (owner: ' || COALESCE(lease_owner, '?') || ')',
+                    available_at = ?, lease_owner = NULL, lease_expires_at = NULL,
+                    updated_at = ?
+                WHERE state = 'running' AND lease_expires_at < ?
+                """,
+                (now, now, now, now),
+            )
+        if cursor.rowcount:
+            logger.warning("jobs_reaped", count=cursor.rowcount)
+        return cursor.rowcount
+
+    def purge_finished(self, older_than: float, max_finished: int = 0) -> int:
+        placeholders = ",".join("?" * len(_FINISHED))
+        with self._tx() as conn:
+            deleted = conn.execute(
+                f"DELETE FROM jobs WHERE state IN ({placeholders}) AND finished_at < ?",
+                (*_FINISHED, older_than),
+            ).rowcount
+            if max_finished > 0:
+                deleted += conn.execute(
+                    f"""
+                    DELETE FROM jobs WHERE id IN (
+                        SELECT id FROM jobs WHERE state IN ({placeholders})
+                        ORDER BY finished_at DESC, id DESC
+                        LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (*_FINISHED, max_finished),
+                ).rowcount
+        return deleted
+
+    def stats(self, queue: Optional[str] = None) -> Dict[str, int]:
+        sql = "SELECT state, COUNT(*) AS n FROM jobs"
+        params: tuple = ()
+        if queue is not None:
+            sql += " WHERE queue = ?"
+            params = (queue,)
+        sql += " GROUP BY state"
+
+        counts = {state.value: 0 for state in JobState}
+        with self._read() as conn:
+            for row in conn.execute(sql, params):
+                counts[row["state"]] = row["n"]
+        return counts
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
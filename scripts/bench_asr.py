@@ -0,0 +1,414 @@
+"""
+ASR 端到端吞吐基准（离线，不产生 API 费用）
+
+    python scripts/bench_asr.py [--seconds 60 900 3600] [--providers api faster_whisper]
+    python scripts/bench_asr.py --latency 1.5 --error-rate 0.05 --max-concurrent 4 --output after.json
+    python scripts/bench_asr.py --output after.json --compare before.json
+
+- 合成类语音测试音频（基频 + 谐波的音节、词间停顿、句间静音、底噪），可指定时长
+- 本机启动 OpenAI 兼容的 /audio/transcriptions 替身服务：可配置延迟、错误率、
+  超过并发上限时返回 429（带 Retry-After）
+- 每个场景在独立子进程中运行 APIASRProvider / FasterWhisperProvider 的完整转写，
+  报告墙钟时间、峰值 RSS、ffmpeg/ffprobe 启动次数、上传字节数、分片并发利用率
+- 结果以 JSON 输出，--compare 与之前（其他提交）的结果逐项对比
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+SAMPLE_RATE = 16000
+
+
+# ========== 测试音频 ==========
+
+def synthesize_speech(path: Path, seconds: float, sample_rate: int = SAMPLE_RATE, seed: int = 0):
+    """
+    合成类语音音频（16-bit 单声道 wav）
+
+    音节 120-300ms（基频 100-240Hz 加 4 个衰减谐波，带起落包络），
+    词间 30-120ms 停顿，每 6-14 个音节一句，句间 0.3-1.5s 静音；全程叠加弱噪声。
+    能量起伏与停顿分布接近口语，静音检测与按静音切分会被真实触发。
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    audio = np.zeros(total, dtype=np.float32)
+    position = 0
+    while position < total:
+        for _ in range(rng.integers(6, 15)):
+            length = int(rng.uniform(0.12, 0.30) * sample_rate)
+            if position + length >= total:
+                break
+            t = np.arange(length) / sample_rate
+            f0 = rng.uniform(100, 240) * (1 + 0.08 * np.sin(2 * np.pi * rng.uniform(2, 5) * t))
+            phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+            tone = sum(np.sin(k * phase) / k ** 1.5 for k in range(1, 5))
+            envelope = np.sin(np.pi * np.arange(length) / length) ** 0.6
+            audio[position:position + length] = 0.25 * tone * envelope
+            position += length + int(rng.uniform(0.03, 0.12) * sample_rate)
+        position += int(rng.uniform(0.3, 1.5) * sample_rate)
+
+    audio += rng.normal(0, 0.003, total).astype(np.float32)
+    pcm = (np.clip(audio, -1, 1) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+
+
+def encode_source(wav_path: Path, fmt: str) -> Path:
+    """转为下载得到的常见格式（m4a 44.1kHz 立体声），模拟真实输入"""
+    if fmt == "wav":
+        return wav_path
+    target = wav_path.with_suffix(f".{fmt}")
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-y", "-i", str(wav_path), "-ar", "44100", "-ac", "2", str(target)],
+        check=True,
+    )
+    return target
+
+
+# ========== ASR 替身服务 ==========
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    server: "StandInASRServer"
+    protocol_version = "HTTP/1.1"     # keep-alive，与真实服务一致
+
+    def _read_body(self) -> int:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            size = 0
+            while True:
+                length = int(self.rfile.readline().strip() or b"0", 16)
+                if length == 0:
+                    self.rfile.readline()
+                    return size
+                self.rfile.read(length)
+                self.rfile.readline()
+                size += length
+        length = int(self.headers.get("Content-Length", 0))
+        remaining = length
+        while remaining:
+            remaining -= len(self.rfile.read(min(remaining, 1 << 16)))
+        return length
+
+    def _send(self, status: HTTPStatus, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        size = self._read_body()
+        if not self.path.endswith("/audio/transcriptions"):
+            self._send(HTTPStatus.NOT_FOUND, {"error": "not found"})
+            return
+        server = self.server
+        status, index = server.begin(size)
+        try:
+            if status == HTTPStatus.TOO_MANY_REQUESTS:
+                self._send(status, {"error": {"message": "rate limited"}},
+                           {"Retry-After": f"{server.retry_after:g}"})
+                return
+            time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+            if status != HTTPStatus.OK:
+                self._send(status, {"error": {"message": "injected failure"}})
+                return
+            text = f"第{index}段转写。"
+            self._send(HTTPStatus.OK, {
+                "text": text,
+                "language": "zh",
+                "duration": 0.0,
+                "segments": [{"start": 0.0, "end": 1.0, "text": text}],
+            })
+        finally:
+            server.end(status)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInASRServer(ThreadingHTTPServer):
+    """
+    OpenAI 兼容 /audio/transcriptions 替身
+
+    Args:
+        latency / jitter: 每个请求的处理耗时（秒）及随机抖动
+        error_rate: 返回 500 的请求比例
+        max_concurrent: 同时处理的请求上限，超出返回 429（0 不限）
+        throttle_rate: 随机返回 429 的比例（模拟按速率限流）
+        retry_after: 429 响应的 Retry-After（秒）
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.5, jitter=0.1, error_rate=0.0, max_concurrent=0,
+                 throttle_rate=0.0, retry_after=1.0, seed=0):
+        super().__init__(("127.0.0.1", 0), _StandInHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.max_concurrent = max_concurrent
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def reset(self):
+        with self._lock:
+            self._inflight = 0
+            self._peak = 0
+            self._busy_area = 0.0          # ∫ 并发数 dt（只统计处理中的 200 请求）
+            self._last_change = None
+            self._first = self._last = None
+            self._requests = 0
+            self._bytes = 0
+            self._status = {}
+
+    def _advance(self, now: float):
+        if self._last_change is not None:
+            self._busy_area += self._inflight * (now - self._last_change)
+        self._last_change = now
+
+    def begin(self, size: int):
+        now = time.perf_counter()
+        with self._lock:
+            self._requests += 1
+            self._bytes += size
+            if self._first is None:
+                self._first = now
+            if (self.max_concurrent and self._inflight >= self.max_concurrent) \
+                    or self._random.random() < self.throttle_rate:
+                return HTTPStatus.TOO_MANY_REQUESTS, self._requests
+            self._advance(now)
+            self._inflight += 1
+            self._peak = max(self._peak, self._inflight)
+            if self._random.random() < self.error_rate:
+                return HTTPStatus.INTERNAL_SERVER_ERROR, self._requests
+            return HTTPStatus.OK, self._requests
+
+    def end(self, status: HTTPStatus):
+        now = time.perf_counter()
+        with self._lock:
+            self._status[int(status)] = self._status.get(int(status), 0) + 1
+            self._last = now
+            if status != HTTPStatus.TOO_MANY_REQUESTS:
+                self._advance(now)
+                self._inflight -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            window = (self._last - self._first) if self._first is not None and self._last else 0.0
+            return {
+                "requests": self._requests,
+                "bytes_uploaded": self._bytes,
+                "status": {str(k): v for k, v in sorted(self._status.items())},
+                "peak_concurrency": self._peak,
+                "mean_concurrency": round(self._busy_area / window, 2) if window else 0.0,
+            }
+
+
+# ========== 场景（子进程） ==========
+
+def _count_spawns():
+    """统计本进程启动的 ffmpeg / ffprobe（subprocess.run 内部也经过 Popen）"""
+    counts = {"ffmpeg": 0, "ffprobe": 0}
+    original = subprocess.Popen
+
+    class CountingPopen(original):
+        def __init__(self, args, *a, **kw):
+            program = Path(str(args[0] if isinstance(args, (list, tuple)) else args).split()[0]).name
+            if program in counts:
+                counts[program] += 1
+            super().__init__(args, *a, **kw)
+
+    subprocess.Popen = CountingPopen
+    return counts
+
+
+def _run_scenario(spec: dict, results):
+    counts = _count_spawns()
+    report = {"provider": spec["provider"], "seconds": spec["seconds"]}
+    try:
+        if spec["provider"] == "api":
+            from packages.concurrency import ASR, get_limiter
+            from services.asr import APIASRProvider
+            from services.asr.vad import VADConfig
+
+            provider = APIASRProvider(
+                base_url=spec["base_url"],
+                api_key="bench",
+                model="bench",
+                chunk_seconds=spec["chunk_seconds"],
+                vad=VADConfig(target_seconds=spec["chunk_seconds"]) if spec["vad"] else None,
+                audio_profile=spec["profile"],
+                allow_partial=True,
+            )
+            report["concurrency_limit"] = get_limiter(ASR, spec["base_url"]).max_limit
+        else:
+            from services.asr import FasterWhisperProvider
+
+            provider = FasterWhisperProvider(model_size=spec["whisper_model"], device="cpu", compute_type="int8")
+            if not provider.is_available():
+                raise RuntimeError("faster-whisper 未安装")
+
+        started = time.perf_counter()
+        transcript = provider.transcribe(spec["audio"])
+        report["wall_s"] = round(time.perf_counter() - started, 3)
+        report["segments"] = len(transcript.segments)
+        report["gaps"] = len(transcript.gaps)
+    except Exception as e:
+        report["error"] = f"{type(e).__name__}: {e}"
+
+    # Linux 下 ru_maxrss 单位为 KB
+    report["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    report["peak_child_rss_mb"] = round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    report["ffmpeg_spawns"] = counts["ffmpeg"]
+    report["ffprobe_spawns"] = counts["ffprobe"]
+    results.put(report)
+
+
+def run_scenario(spec: dict, server: StandInASRServer) -> dict:
+    """在独立子进程中运行（峰值 RSS、探测缓存、连接池互不影响）"""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    server.reset()
+    process = context.Process(target=_run_scenario, args=(spec, results))
+    process.start()
+    report = results.get()
+    process.join()
+
+    if spec["provider"] == "api":
+        report.update(server.stats())
+        limit = report.get("concurrency_limit")
+        if limit:
+            report["utilization"] = round(report["mean_concurrency"] / limit, 3)
+    return report
+
+
+# ========== 对比 ==========
+
+_COMPARED = ("wall_s", "peak_rss_mb", "ffmpeg_spawns", "ffprobe_spawns", "bytes_uploaded", "utilization")
+
+
+def compare(before: dict, after: dict):
+    """按 (提供者, 时长) 对齐两次结果，打印各指标的变化"""
+    old = {(r["provider"], r["seconds"]): r for r in before["results"]}
+    print(f"{'场景':<24}{'指标':<18}{'之前':>14}{'之后':>14}{'变化':>10}")
+    for row in after["results"]:
+        key = (row["provider"], row["seconds"])
+        if key not in old:
+            continue
+        for metric in _COMPARED:
+            a, b = old[key].get(metric), row.get(metric)
+            if a is None or b is None:
+                continue
+            change = f"{(b - a) / a:+.1%}" if a else "-"
+            print(f"{f'{key[0]}/{key[1]}s':<24}{metric:<18}{a:>14}{b:>14}{change:>10}")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ASR 端到端吞吐基准（本机替身服务）")
+    parser.add_argument("--seconds", type=float, nargs="+", default=[60, 900, 3600], help="测试音频时长（秒）")
+    parser.add_argument("--providers", nargs="+", default=["api"], choices=["api", "faster_whisper"])
+    parser.add_argument("--source-format", default="m4a", choices=["wav", "m4a", "mp3"], help="模拟的下载音频格式")
+    parser.add_argument("--profile", default="opus", help="API 上传编码配置")
+    parser.add_argument("--chunk-seconds", type=float, default=600)
+    parser.add_argument("--vad", action="store_true", help="按静音切分")
+    parser.add_argument("--whisper-model", default="tiny")
+    parser.add_argument("--latency", type=float, default=0.5, help="替身服务每请求耗时（秒）")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 500 的比例")
+    parser.add_argument("--max-concurrent", type=int, default=0, help="超过该并发返回 429（0 不限）")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="随机返回 429 的比例")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--output", help="结果 JSON 文件（默认打印到标准输出）")
+    parser.add_argument("--compare", help="与之前的结果 JSON 对比")
+    args = parser.parse_args()
+
+    server = StandInASRServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        max_concurrent=args.max_concurrent,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    report = {
+        "commit": _git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "results": [],
+    }
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for seconds in args.seconds:
+                wav = Path(tmp) / f"speech_{int(seconds)}s.wav"
+                synthesize_speech(wav, seconds)
+                source = encode_source(wav, args.source_format)
+                for provider in args.providers:
+                    spec = {
+                        "provider": provider,
+                        "seconds": seconds,
+                        "audio": str(source),
+                        "base_url": server.base_url,
+                        "chunk_seconds": args.chunk_seconds,
+                        "vad": args.vad,
+                        "profile": args.profile,
+                        "whisper_model": args.whisper_model,
+                    }
+                    row = run_scenario(spec, server)
+                    print(json.dumps(row, ensure_ascii=False), file=sys.stderr)
+                    report["results"].append(row)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+    else:
+        print(output)
+
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), report)
+
+
+if __name__ == "__main__":
+    main()
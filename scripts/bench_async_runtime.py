@@ -0,0 +1,95 @@
+"""
+同步调用协程的单次开销对比
+
+    python scripts/bench_async_runtime.py [--calls 2000]
+
+- per_call_loop: 每次 new_event_loop() + run_until_complete() + close()（旧实现）
+- run_sync:      提交到进程级后台事件循环（packages.async_runtime）
+- pooled_client: 协程内复用同一个 httpx.AsyncClient（只有共享循环才能跨调用复用）
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from packages.async_runtime import get_async_runtime, run_sync  # noqa: E402
+
+
+async def _noop():
+    await asyncio.sleep(0)
+    return 1
+
+
+async def _make_client(httpx):
+    return httpx.AsyncClient()
+
+
+def per_call_loop(coro_fn):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro_fn())
+    finally:
+        loop.close()
+
+
+def bench(name: str, fn, calls: int) -> dict:
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "name": name,
+        "mean_us": statistics.fmean(samples),
+        "p50_us": samples[len(samples) // 2],
+        "p99_us": samples[int(len(samples) * 0.99) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="同步调用协程的单次开销对比")
+    parser.add_argument("--calls", type=int, default=2000, help="每种方式的调用次数")
+    args = parser.parse_args()
+
+    # 预热后台循环
+    run_sync(_noop())
+
+    results = [
+        bench("per_call_loop", lambda: per_call_loop(_noop), args.calls),
+        bench("run_sync", lambda: run_sync(_noop()), args.calls),
+    ]
+
+    try:
+        import httpx
+
+        # 客户端绑定在后台循环上，跨调用复用；旧实现中每次调用都要新建并关闭
+        client = run_sync(_make_client(httpx))
+
+        async def _touch():
+            return client.is_closed
+
+        async def _fresh_client():
+            async with httpx.AsyncClient() as c:
+                return c.is_closed
+
+        results.append(bench("per_call_loop+new_client", lambda: per_call_loop(_fresh_client), args.calls // 4))
+        results.append(bench("run_sync+pooled_client", lambda: run_sync(_touch()), args.calls))
+        run_sync(client.aclose())
+    except ImportError:
+        pass
+
+    print(f"{'方式':<28}{'mean(us)':>12}{'p50(us)':>12}{'p99(us)':>12}")
+    for r in results:
+        print(f"{r['name']:<28}{r['mean_us']:>12.1f}{r['p50_us']:>12.1f}{r['p99_us']:>12.1f}")
+
+    get_async_runtime().shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+ASR 音频编码配置对比
+
+    python scripts/bench_audio_profiles.py [--input talk.m4a] [--seconds 300]
+    python scripts/bench_audio_profiles.py --input talk.m4a --reference talk.txt \
+        --base-url https://api.groq.com/openai/v1 --api-key $KEY --model whisper-large-v3-turbo
+
+- 未指定 --input 时用 ffmpeg 合成测试音频（语音频段的调制音 + 噪声），只对比体积与编码耗时
+- 给出 API 参数时逐个上传，报告上传耗时；给出 --reference 时计算 WER，
+  并以 wav 的 WER 为基线报告各编码的 WER 漂移（中文按字计）
+- mp3-128k 为旧的提取参数，作为对照
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.asr.profiles import PROFILES, AudioProfile  # noqa: E402
+
+LEGACY = AudioProfile("mp3-128k", ".legacy.mp3", "audio/mpeg", ("-c:a", "libmp3lame", "-b:a", "128k"))
+
+
+def synthesize(path: Path, seconds: int):
+    """合成测试音频：200-3000Hz 调制音叠加粉噪声，44.1kHz 立体声（模拟下载得到的原始音轨）"""
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-y",
+         "-f", "lavfi", "-i", f"sine=frequency=220:beep_factor=6:duration={seconds}:sample_rate=44100",
+         "-f", "lavfi", "-i", f"anoisesrc=color=pink:amplitude=0.05:duration={seconds}:sample_rate=44100",
+         "-filter_complex", "[0][1]amix=inputs=2,tremolo=f=4:d=0.8", "-ac", "2",
+         "-c:a", "aac", "-b:a", "128k", str(path)],
+        check=True,
+    )
+
+
+def _tokens(text: str) -> list:
+    """中日韩文字按字切分，其余按空白切分，去掉标点"""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return re.findall(r"[぀-ヿ㐀-鿿]|[^\s぀-ヿ㐀-鿿]+", text)
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """编辑距离 / 参考词数"""
+    ref, hyp = _tokens(reference), _tokens(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def encode(source: Path, profile: AudioProfile, out_dir: Path) -> dict:
+    target = out_dir / f"bench{profile.suffix}"
+    started = time.perf_counter()
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-y", "-i", str(source), *profile.ffmpeg_args(), str(target)],
+        check=True,
+    )
+    return {
+        "name": profile.name,
+        "path": target,
+        "bytes": target.stat().st_size,
+        "encode_s": time.perf_counter() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ASR 音频编码配置对比")
+    parser.add_argument("--input", help="源音频/视频（默认合成）")
+    parser.add_argument("--seconds", type=int, default=300, help="合成音频时长（秒）")
+    parser.add_argument("--reference", help="参考文本文件，用于计算 WER")
+    parser.add_argument("--base-url", help="OpenAI 兼容 ASR 地址，给出时实际上传")
+    parser.add_argument("--api-key", default="")
+    parser.add_argument("--model", default="whisper-1")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = Path(args.input) if args.input else tmp / "fixture.m4a"
+        if not args.input:
+            synthesize(source, args.seconds)
+
+        reference = Path(args.reference).read_text(encoding="utf-8") if args.reference else None
+        provider = None
+        if args.base_url:
+            from services.asr import APIASRProvider
+            provider = APIASRProvider(base_url=args.base_url, api_key=args.api_key, model=args.model)
+
+        results = []
+        for profile in (LEGACY, *PROFILES.values()):
+            row = encode(source, profile, tmp)
+            if provider is not None:
+                started = time.perf_counter()
+                transcript = provider._transcribe_single(str(row["path"]))
+                row["upload_s"] = time.perf_counter() - started
+                if reference is not None:
+                    row["wer"] = word_error_rate(reference, transcript.text)
+            results.append(row)
+
+        baseline = next((r.get("wer") for r in results if r["name"] == "wav"), None)
+        legacy_bytes = results[0]["bytes"]
+
+        print(f"{'配置':<12}{'字节':>12}{'相对旧版':>10}{'编码(s)':>10}{'上传(s)':>10}{'WER':>8}{'漂移':>8}")
+        for r in results:
+            upload = f"{r['upload_s']:.2f}" if "upload_s" in r else "-"
+            wer = f"{r['wer']:.3f}" if "wer" in r else "-"
+            drift = f"{r['wer'] - baseline:+.3f}" if "wer" in r and baseline is not None else "-"
+            print(
+                f"{r['name']:<12}{r['bytes']:>12}{r['bytes'] / legacy_bytes:>10.2f}"
+                f"{r['encode_s']:>10.2f}{upload:>10}{wer:>8}{drift:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
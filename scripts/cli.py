@@ -16,6 +16,7 @@ from packages.db import init_db, get_db_context, Tenant, User, WatchedFolder, Vi
 from packages.logging import setup_logging, get_logger
 from services.watcher import BilibiliClient, FolderScanner
 from services.processor import VideoPipeline
+from services.processor.checkpoints import STAGES
 from services.scheduler import TaskScheduler
 
 logger = get_logger(__name__)
@@ -181,18 +182,6 @@ def cmd_process(args):
             print("[ERROR] 请先运行 'cli.py init' 初始化数据库")
             return
         
-        # 检查待处理视频数量
-        pending_count = db.query(Video).filter(
-            Video.tenant_id == tenant.id,
-            Video.status == VideoStatus.PENDING,
-        ).count()
-        
-        if pending_count == 0:
-            print("[INFO] 没有待处理的视频")
-            return
-        
-        print(f"[INFO] 发现 {pending_count} 个待处理视频")
-        
         if args.source_id:
             # 处理指定视频
             video = db.query(Video).filter(
@@ -205,15 +194,29 @@ def cmd_process(args):
                 return
             
             print(f"开始处理: [{video.source_id}] {video.title[:40]}")
+            if args.from_stage:
+                print(f"   从阶段开始: {args.from_stage}")
             pipeline = VideoPipeline(sessdata=sessdata)
             
             try:
-                pipeline.process(video, db)
+                pipeline.process(video, db, from_stage=args.from_stage)
                 print(f"[OK] 处理完成")
                 print(f"   转写文件: {video.transcript_path}")
             except Exception as e:
                 print(f"[ERROR] 处理失败: {e}")
         else:
+            # 检查待处理视频数量
+            pending_count = db.query(Video).filter(
+                Video.tenant_id == tenant.id,
+                Video.status == VideoStatus.PENDING.value,
+            ).count()
+            
+            if pending_count == 0:
+                print("[INFO] 没有待处理的视频")
+                return
+            
+            print(f"[INFO] 发现 {pending_count} 个待处理视频")
+            
             # 批量处理
             limit = args.limit or 5
             print(f"开始批量处理 (最多 {limit} 个)...")
@@ -286,27 +289,43 @@ def cmd_worker(args):
     
     config = get_config()
     sessdata = args.cookie or config.bilibili.sessdata
+    use_pool = args.processes > 0
     
     print("启动 AliceLM Worker")
     print(f"   扫描间隔: {args.scan_interval}分钟")
-    print(f"   处理间隔: {args.process_interval}分钟")
-    print(f"   每次处理: {args.batch_size}个视频")
+    if use_pool:
+        print(f"   处理进程: {args.processes}个 (每进程 {args.concurrency} 个视频)")
+    else:
+        print(f"   处理间隔: {args.process_interval}分钟")
+        print(f"   每次处理: {args.batch_size}个视频")
     print("-" * 50)
     
-    scheduler = TaskScheduler(blocking=True)
+    # 进程池模式下调度器只负责扫描/重试，处理交给独立进程
+    scheduler = TaskScheduler(blocking=not use_pool)
     
     # 添加任务
     scheduler.add_scan_job(
         interval_minutes=args.scan_interval,
         sessdata=sessdata,
     )
-    scheduler.add_process_job(
-        interval_minutes=args.process_interval,
-        limit=args.batch_size,
-        sessdata=sessdata,
-    )
+    if not use_pool:
+        scheduler.add_process_job(
+            interval_minutes=args.process_interval,
+            limit=args.batch_size,
+            sessdata=sessdata,
+        )
     scheduler.add_retry_job(cron_hour=3)
     
+    pool = None
+    if use_pool:
+        from services.worker import WorkerPool
+        pool = WorkerPool(
+            processes=args.processes,
+            concurrency=args.concurrency,
+            max_tasks_per_child=args.max_tasks_per_child,
+            shutdown_timeout=config.worker.shutdown_timeout,
+        )
+    
     # 显示任务列表
     print("\n已注册任务:")
     for job in scheduler.list_jobs():
@@ -316,6 +335,9 @@ def cmd_worker(args):
     # 信号处理
     def shutdown(signum, frame):
         print("\n正在停止...")
+        if pool is not None:
+            pool.stop()
+            return
         scheduler.shutdown(wait=True)
         print("Worker已停止")
         sys.exit(0)
@@ -332,6 +354,11 @@ def cmd_worker(args):
         job_scan_folders(sessdata=sessdata)
     
     scheduler.start()
+    
+    if pool is not None:
+        pool.run()
+        scheduler.shutdown(wait=True)
+        print("Worker已停止")
 
 
 def cmd_models(args):
@@ -406,7 +433,12 @@ def main():
 
     # process
     process_parser = subparsers.add_parser("process", help="处理视频（下载→转写）")
-    process_parser.add_argument("--bvid", help="指定处理的视频BV号")
+    process_parser.add_argument("--bvid", "--source-id", dest="source_id", help="指定处理的视频BV号/内容源ID")
+    process_parser.add_argument(
+        "--from-stage",
+        choices=STAGES,
+        help="强制从指定阶段重新处理（需配合 --bvid；默认跳过已完成阶段）",
+    )
     process_parser.add_argument("--limit", type=int, default=5, help="批量处理数量")
     process_parser.add_argument("--cookie", help="SESSDATA cookie")
     process_parser.set_defaults(func=cmd_process)
@@ -426,6 +458,9 @@ def main():
     worker_parser.add_argument("--batch-size", type=int, default=3, help="每次处理数量")
     worker_parser.add_argument("--cookie", help="SESSDATA cookie")
     worker_parser.add_argument("--run-now", action="store_true", help="立即执行一次扫描")
+    worker_parser.add_argument("--processes", type=int, default=0, help="处理进程数（0 为单进程定时处理）")
+    worker_parser.add_argument("--concurrency", type=int, default=2, help="每个处理进程同时处理的视频数")
+    worker_parser.add_argument("--max-tasks-per-child", type=int, default=0, help="处理进程处理N个任务后重启（0 不限）")
     worker_parser.set_defaults(func=cmd_worker)
 
     # models
@@ -0,0 +1,128 @@
+"""
+迁移脚本：字幕快速通道标记独立成列
+videos 新增 processing_lane，原先写在 asr_provider 里的 'subtitle' 标记迁移过去
+
+使用方法：
+    python scripts/migrations/003_video_processing_lane.py
+    python scripts/migrations/003_video_processing_lane.py --execute  # 实际执行
+
+注意：
+    - 执行前请备份数据库
+    - 此脚本为增量变更，向后兼容
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def migrate(db_path: str, dry_run: bool = True):
+    """
+    执行迁移
+
+    Args:
+        db_path: 数据库文件路径
+        dry_run: 如果为 True，只打印 SQL 不执行
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    print(f"数据库: {db_path}")
+    print(f"模式: {'DRY RUN（不执行）' if dry_run else '实际执行'}")
+    print("-" * 50)
+
+    sqls = []
+
+    # 1. videos 表新增 processing_lane
+    cursor.execute("PRAGMA table_info(videos)")
+    video_columns = {row[1] for row in cursor.fetchall()}
+
+    if "processing_lane" in video_columns:
+        print("✓ videos.processing_lane 已存在，跳过")
+    else:
+        sqls.append("ALTER TABLE videos ADD COLUMN processing_lane VARCHAR(20)")
+
+    # 2. 字幕快速通道标记从 asr_provider 迁移到 processing_lane
+    sqls.append("""
+        UPDATE videos SET processing_lane = 'subtitle', asr_provider = NULL
+        WHERE asr_provider = 'subtitle'
+    """)
+
+    # 执行 SQL
+    print("\n待执行的 SQL:")
+    for sql in sqls:
+        print(f"  {sql.strip()[:80]}...")
+
+    if not dry_run and sqls:
+        print("\n执行中...")
+        for sql in sqls:
+            try:
+                cursor.execute(sql)
+                print(f"  ✓ {sql.strip()[:50]}...")
+            except Exception as e:
+                print(f"  ✗ {sql.strip()[:50]}... 错误: {e}")
+
+        conn.commit()
+        print("\n✓ 迁移完成")
+    elif not sqls:
+        print("\n✓ 无需迁移")
+    else:
+        print("\n（DRY RUN 模式，未执行任何变更）")
+
+    conn.close()
+
+
+def verify(db_path: str):
+    """验证迁移结果"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    print("\n验证迁移结果:")
+    print("-" * 50)
+
+    cursor.execute("PRAGMA table_info(videos)")
+    video_columns = {row[1] for row in cursor.fetchall()}
+    cursor.execute("SELECT COUNT(*) FROM videos WHERE asr_provider = 'subtitle'")
+    leftover = cursor.fetchone()[0]
+
+    checks = [
+        ("videos.processing_lane", "processing_lane" in video_columns),
+        ("videos.asr_provider 无字幕通道标记", leftover == 0),
+    ]
+
+    for name, passed in checks:
+        status = "✓" if passed else "✗"
+        print(f"  {status} {name}")
+
+    conn.close()
+
+    return all(passed for _, passed in checks)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="字幕快速通道标记迁移脚本")
+    parser.add_argument("--db", default="data/bili_learner.db", help="数据库路径")
+    parser.add_argument("--execute", action="store_true", help="实际执行（默认 dry-run）")
+    parser.add_argument("--verify", action="store_true", help="仅验证迁移结果")
+
+    args = parser.parse_args()
+
+    db_path = Path(project_root) / args.db
+
+    if not db_path.exists():
+        print(f"错误: 数据库不存在: {db_path}")
+        sys.exit(1)
+
+    if args.verify:
+        success = verify(str(db_path))
+        sys.exit(0 if success else 1)
+    else:
+        migrate(str(db_path), dry_run=not args.execute)
+        if args.execute:
+            verify(str(db_path))
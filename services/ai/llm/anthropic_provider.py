@@ -4,6 +4,7 @@ Anthropic Claude LLM Provider
 
 from typing import List, Optional
 
+from packages.concurrency import LLM, get_limiter
 from packages.config import get_config
 from packages.logging import get_logger
 from alice.errors import AliceError, LLMError, LLMConnectionError, NetworkError
@@ -76,14 +77,15 @@ class AnthropicProvider(LLMProvider):
         )
 
         try:
-            response = client.messages.create(
-                model=self.model,
-                max_tokens=max_tokens or 4096,
-                system=system_content,
-                messages=api_messages,
-                temperature=temperature,
-                **kwargs,
-            )
+            with get_limiter(LLM, self.name).slot():
+                response = client.messages.create(
+                    model=self.model,
+                    max_tokens=max_tokens or 4096,
+                    system=system_content,
+                    messages=api_messages,
+                    temperature=temperature,
+                    **kwargs,
+                )
 
             result = LLMResponse(
                 content=response.content[0].text,
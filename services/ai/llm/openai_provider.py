@@ -11,6 +11,7 @@ OpenAI兼容 LLM Provider
 
 from typing import List, Optional
 
+from packages.concurrency import LLM, get_limiter
 from packages.config import get_config
 from packages.logging import get_logger
 from alice.errors import AliceError, LLMError, LLMConnectionError, NetworkError
@@ -133,13 +134,14 @@ class OpenAIProvider(LLMProvider):
         last_error = None
         for attempt in range(1, max_attempts + 1):
             try:
-                response = client.chat.completions.create(
-                    model=self.model,
-                    messages=api_messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    **kwargs,
-                )
+                with get_limiter(LLM, self.base_url).slot():
+                    response = client.chat.completions.create(
+                        model=self.model,
+                        messages=api_messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        **kwargs,
+                    )
 
                 result = LLMResponse(
                     content=response.choices[0].message.content,
@@ -227,13 +229,14 @@ class OpenAIProvider(LLMProvider):
         last_error = None
         for attempt in range(1, max_attempts + 1):
             try:
-                response = await client.chat.completions.create(
-                    model=self.model,
-                    messages=api_messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    **kwargs,
-                )
+                async with get_limiter(LLM, self.base_url).slot_async():
+                    response = await client.chat.completions.create(
+                        model=self.model,
+                        messages=api_messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        **kwargs,
+                    )
 
                 result = LLMResponse(
                     content=response.choices[0].message.content,
@@ -308,62 +311,11 @@ class OpenAIProvider(LLMProvider):
             messages_count=len(messages),
         )
 
+        # 流式输出期间占用并发槽；以首包延迟作为 AIMD 的延迟信号（生成长度不影响调整）
+        limiter = get_limiter(LLM, self.base_url)
         try:
-            stream = client.chat.completions.create(
-                model=self.model,
-                messages=api_messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                stream=True,
-                **kwargs,
-            )
-
-            full_content = ""
-            full_reasoning = ""
-            
-            for chunk in stream:
-                if not chunk.choices:
-                    continue
-                    
-                delta = chunk.choices[0].delta
-                finish_reason = chunk.choices[0].finish_reason
-                
-                # 处理思维链（如果API支持）
-                # OpenAI o1/o3 使用 reasoning_content
-                # DeepSeek R1 使用 reasoning_content
-                reasoning_content = getattr(delta, 'reasoning_content', None)
-                if reasoning_content:
-                    full_reasoning += reasoning_content
-                    yield {
-                        "type": "thinking",
-                        "content": reasoning_content,
-                    }
-                
-                # 处理正常内容
-                if delta.content:
-                    full_content += delta.content
-                    yield {
-                        "type": "content",
-                        "content": delta.content,
-                    }
-                
-                # 完成
-                if finish_reason:
-                    yield {
-                        "type": "done",
-                        "finish_reason": finish_reason,
-                        "full_content": full_content,
-                        "full_reasoning": full_reasoning,
-                    }
-
-            logger.info(
-                "llm_stream_complete",
-                provider=self.name,
-                model=self.model,
-                content_length=len(full_content),
-                reasoning_length=len(full_reasoning),
-            )
-
+            with limiter.slot() as slot:
+                yield from self._iter_stream(client, api_messages, temperature, max_tokens, slot, **kwargs)
         except (LLMError, LLMConnectionError, NetworkError):
             logger.exception("llm_stream_error", provider=self.name)
             raise
@@ -371,6 +323,67 @@ class OpenAIProvider(LLMProvider):
             logger.exception("llm_stream_error_unexpected", provider=self.name)
             raise LLMError(str(e)) from e
 
+    def _iter_stream(self, client, api_messages, temperature, max_tokens, slot, **kwargs):
+        """逐块解析流式响应"""
+        stream = client.chat.completions.create(
+            model=self.model,
+            messages=api_messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            **kwargs,
+        )
+
+        full_content = ""
+        full_reasoning = ""
+        first_chunk = True
+        
+        for chunk in stream:
+            if first_chunk:
+                slot.succeeded()
+                first_chunk = False
+            if not chunk.choices:
+                continue
+                
+            delta = chunk.choices[0].delta
+            finish_reason = chunk.choices[0].finish_reason
+            
+            # 处理思维链（如果API支持）
+            # OpenAI o1/o3 使用 reasoning_content
+            # DeepSeek R1 使用 reasoning_content
+            reasoning_content = getattr(delta, 'reasoning_content', None)
+            if reasoning_content:
+                full_reasoning += reasoning_content
+                yield {
+                    "type": "thinking",
+                    "content": reasoning_content,
+                }
+            
+            # 处理正常内容
+            if delta.content:
+                full_content += delta.content
+                yield {
+                    "type": "content",
+                    "content": delta.content,
+                }
+            
+            # 完成
+            if finish_reason:
+                yield {
+                    "type": "done",
+                    "finish_reason": finish_reason,
+                    "full_content": full_content,
+                    "full_reasoning": full_reasoning,
+                }
+
+        logger.info(
+            "llm_stream_complete",
+            provider=self.name,
+            model=self.model,
+            content_length=len(full_content),
+            reasoning_length=len(full_reasoning),
+        )
+
     def is_available(self) -> bool:
         """检查是否可用"""
         # 有api_key或使用本地端点(Ollama)
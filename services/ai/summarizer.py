@@ -4,6 +4,7 @@ P2-03: 摘要生成
 P2-04: 核心观点提取
 """
 
+import hashlib
 import json
 from dataclasses import dataclass, field
 from typing import List, Optional
@@ -80,6 +81,12 @@ def _get_summary_quick_prompt() -> str:
     return "你是一个专业的内容摘要助手，善于提炼核心信息。"
 
 
+def summary_prompt_version() -> str:
+    """当前摘要 prompt 的版本（内容哈希），prompt 变化后缓存的摘要失效"""
+    raw = _get_summary_prompt() + USER_PROMPT_TEMPLATE
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
 class Summarizer:
     """摘要生成器"""
 
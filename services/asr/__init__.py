@@ -1,16 +1,20 @@
-from .base import ASRProvider, TranscriptResult, TranscriptSegment
+from .base import ASRProvider, SegmentStream, TranscriptResult, TranscriptSegment
 from .faster_whisper import FasterWhisperProvider
 from .manager import ASRManager
 from .whisper_local import WhisperLocalProvider
-from .api_provider import APIASRProvider, create_api_asr
+from .server_provider import ASRServerProvider
+from .api_provider import APIASRProvider, ChunkTranscriptionError, create_api_asr
 
 __all__ = [
     "ASRProvider",
     "TranscriptResult",
     "TranscriptSegment",
+    "SegmentStream",
     "ASRManager",
     "WhisperLocalProvider",
     "FasterWhisperProvider",
+    "ASRServerProvider",
     "APIASRProvider",
+    "ChunkTranscriptionError",
     "create_api_asr",
 ]
@@ -4,33 +4,69 @@ API ASR提供者
 支持长音频自动分片处理
 """
 
+import math
+import shutil
 import subprocess
-import tempfile
+import time
 import concurrent.futures
+from dataclasses import asdict
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Callable, Optional, List, Tuple
 
 import httpx
 
+from packages.concurrency import ASR, get_limiter
+from packages.config import get_config
 from packages.logging import get_logger
 from .base import ASRProvider, TranscriptResult, TranscriptSegment
+from .http_client import get_asr_client
+from .manifest import ChunkManifest
+from .probe import media_duration
+from .profiles import UPLOAD_MIME, get_profile
+from .segmenter import AudioChunk, AudioSegmenter
+from .vad import VADConfig
 
 logger = get_logger(__name__)
 
 # 分片配置
 CHUNK_DURATION_SECONDS = 600  # 10分钟
-CHUNK_OVERLAP_SECONDS = 2     # 片段重叠，避免切断句子
-MAX_PARALLEL_CHUNKS = 3       # 最大并行处理数
+CHUNK_OVERLAP_SECONDS = 2     # 片段重叠，避免切断句子（未启用静音检测时）
+# 分片并行度由进程共享的 ASR 并发控制器决定（packages.concurrency）
+MAX_CONSECUTIVE_FAILURES = 3  # 连续失败的片段数达到该值时停止提交（服务不可用）
+GAP_MARKER = "[转写缺失 {start}-{end}]"
+
+
+def _clock(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+
+class ChunkTranscriptionError(Exception):
+    """部分片段重试后仍转写失败；已完成的片段保存在清单中，重试时不再上传"""
+
+    def __init__(self, failed: List[AudioChunk], processed: int, cause: Exception):
+        self.failed = failed
+        self.processed = processed
+        super().__init__(f"{len(failed)}/{processed} 个音频片段转写失败: {cause}")
 
 
 class APIASRProvider(ASRProvider):
     """OpenAI兼容API的ASR提供者"""
 
+    retry_backoff = 2.0  # 片段重试的初始等待（秒），之后指数增长
+
     def __init__(
         self,
         base_url: str,
         api_key: str,
         model: str = "whisper-1",
+        chunk_seconds: float = CHUNK_DURATION_SECONDS,
+        vad: Optional[VADConfig] = None,
+        audio_profile: str = "opus",
+        chunk_retries: int = 2,
+        allow_partial: bool = False,
+        max_gap_ratio: float = 0.1,
     ):
         """
         初始化API ASR提供者
@@ -39,133 +75,96 @@ class APIASRProvider(ASRProvider):
             base_url: API地址（如 https://api.siliconflow.cn/v1）
             api_key: API密钥
             model: 模型名称
+            chunk_seconds: 超过该时长的音频分片上传
+            vad: 静音检测参数；给出时在静音处切分并去除长静音，否则按固定步长重叠切分
+            audio_profile: 上传编码配置（opus / mp3 / flac / wav，见 services.asr.profiles）
+            chunk_retries: 单个片段失败后的重试次数
+            allow_partial: 少量片段失败时仍输出转写，缺失区间以标记占位
+            max_gap_ratio: 部分降级允许的最大缺失时长占比
         """
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
         self.model = model
+        self.chunk_seconds = chunk_seconds
+        self.vad = vad
+        self.audio_profile = audio_profile
+        self._profile = get_profile(audio_profile)
+        self.chunk_retries = chunk_retries
+        self.allow_partial = allow_partial
+        self.max_gap_ratio = max_gap_ratio
 
     @property
     def name(self) -> str:
         return "api"
 
-    def _convert_to_mp3(self, audio_path: str) -> str:
-        """将音频转换为mp3格式（如果需要）"""
+    def _prepare_upload(self, audio_path: str) -> str:
+        """接口可直接接受的格式原样上传，否则转码为上传编码配置"""
         path = Path(audio_path)
-        supported_formats = {".mp3", ".wav", ".pcm", ".opus", ".webm"}
         
-        if path.suffix.lower() in supported_formats:
+        if path.suffix.lower() in UPLOAD_MIME:
             return audio_path
         
-        # 转换为mp3
-        mp3_path = path.with_suffix(".mp3")
-        if mp3_path.exists():
-            return str(mp3_path)
+        target = self._profile.path_for(path)
+        if target.exists():
+            return str(target)
         
-        logger.info("converting_audio_to_mp3", src=audio_path, dst=str(mp3_path))
+        logger.info("converting_audio_for_upload", src=audio_path, dst=str(target), profile=self.audio_profile)
         
         try:
             subprocess.run(
-                ["ffmpeg", "-i", audio_path, "-acodec", "libmp3lame", "-q:a", "2", str(mp3_path), "-y"],
+                ["ffmpeg", "-i", audio_path, *self._profile.ffmpeg_args(), str(target), "-y"],
                 check=True,
                 capture_output=True,
             )
-            return str(mp3_path)
+            return str(target)
         except subprocess.CalledProcessError as e:
             logger.error("ffmpeg_convert_failed", error=e.stderr.decode() if e.stderr else str(e))
             raise RuntimeError(f"音频格式转换失败: {e}")
 
     def _get_audio_duration(self, audio_path: str) -> float:
-        """获取音频时长（秒）"""
-        try:
-            result = subprocess.run(
-                ["ffprobe", "-v", "error", "-show_entries", "format=duration",
-                 "-of", "default=noprint_wrappers=1:nokey=1", audio_path],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            return float(result.stdout.strip())
-        except (subprocess.CalledProcessError, ValueError) as e:
-            logger.warning("ffprobe_duration_failed", error=str(e), audio_path=audio_path)
-            return 0.0
+        """获取音频时长（秒，与音频处理共用探测缓存）"""
+        return media_duration(audio_path)
 
-    def _split_audio(self, audio_path: str, chunk_duration: int = CHUNK_DURATION_SECONDS) -> List[Tuple[str, float]]:
-        """
-        将音频切分为多个片段
-        
-        Returns:
-            List of (chunk_path, start_time) tuples
-        """
-        duration = self._get_audio_duration(audio_path)
-        if duration <= chunk_duration:
-            return [(audio_path, 0.0)]
-        
-        chunks = []
-        path = Path(audio_path)
-        chunk_dir = path.parent / f"{path.stem}_chunks"
-        chunk_dir.mkdir(exist_ok=True)
-        
-        start = 0.0
-        chunk_idx = 0
-        
-        while start < duration:
-            chunk_path = chunk_dir / f"chunk_{chunk_idx:03d}.mp3"
-            
-            # 使用 ffmpeg 切分
-            cmd = [
-                "ffmpeg", "-y",
-                "-i", audio_path,
-                "-ss", str(start),
-                "-t", str(chunk_duration + CHUNK_OVERLAP_SECONDS),
-                "-acodec", "libmp3lame",
-                "-q:a", "2",
-                str(chunk_path),
-            ]
-            
+    def _transcribe_chunk(self, chunk: AudioChunk, language: Optional[str], prompt: Optional[str]) -> Tuple[AudioChunk, TranscriptResult]:
+        """转写单个音频片段（失败后重试 chunk_retries 次）"""
+        for attempt in range(self.chunk_retries + 1):
             try:
-                subprocess.run(cmd, check=True, capture_output=True)
-                chunks.append((str(chunk_path), start))
-                logger.debug("audio_chunk_created", chunk=chunk_idx, start=start, path=str(chunk_path))
-            except subprocess.CalledProcessError as e:
-                logger.error("audio_split_failed", chunk=chunk_idx, error=e.stderr.decode() if e.stderr else str(e))
-                raise RuntimeError(f"音频分片失败: {e}")
-            
-            start += chunk_duration
-            chunk_idx += 1
-        
-        logger.info("audio_split_complete", total_chunks=len(chunks), duration=duration)
-        return chunks
-
-    def _transcribe_chunk(self, chunk_info: Tuple[str, float], language: Optional[str], prompt: Optional[str]) -> Tuple[float, TranscriptResult]:
-        """转写单个音频片段"""
-        chunk_path, start_offset = chunk_info
-        result = self._transcribe_single(chunk_path, language, prompt)
-        return start_offset, result
+                return chunk, self._transcribe_single(str(chunk.path), language, prompt)
+            except Exception as e:
+                if attempt >= self.chunk_retries:
+                    raise
+                logger.warning("chunk_transcribe_retry", chunk=chunk.index, attempt=attempt + 1, error=str(e))
+                time.sleep(self.retry_backoff * (2 ** attempt))
 
-    def _merge_transcripts(self, results: List[Tuple[float, TranscriptResult]]) -> TranscriptResult:
-        """合并多个转写结果，调整时间戳"""
+    def _merge_transcripts(
+        self,
+        results: List[Tuple[AudioChunk, TranscriptResult]],
+        gaps: Optional[List[Tuple[float, float]]] = None,
+    ) -> TranscriptResult:
+        """合并多个转写结果，把片段内时间戳映射回源音频；缺失区间插入占位标记"""
         # 按开始时间排序
-        results.sort(key=lambda x: x[0])
+        results.sort(key=lambda x: x[0].start)
         
+        gaps = gaps or []
         all_segments = []
-        all_text_parts = []
+        all_text_parts = []  # (源音频起点, 文本)，与缺失标记一起按时间排列
         total_duration = 0.0
         detected_language = "zh"
         
-        for start_offset, result in results:
-            # 调整每个 segment 的时间戳
+        for chunk, result in results:
+            # 调整每个 segment 的时间戳（片段去除过静音时按映射还原）
             for seg in result.segments:
                 adjusted_seg = TranscriptSegment(
-                    start=seg.start + start_offset,
-                    end=seg.end + start_offset,
+                    start=chunk.to_source(seg.start),
+                    end=chunk.to_source(seg.end),
                     text=seg.text,
                 )
                 all_segments.append(adjusted_seg)
             
-            all_text_parts.append(result.text)
+            all_text_parts.append((chunk.start, result.text))
             
             if result.duration > 0:
-                total_duration = max(total_duration, start_offset + result.duration)
+                total_duration = max(total_duration, chunk.to_source(result.duration))
             
             if result.language:
                 detected_language = result.language
@@ -173,11 +172,20 @@ class APIASRProvider(ASRProvider):
         # 去除重叠部分的重复文本
         merged_segments = self._deduplicate_segments(all_segments)
         
+        for start, end in gaps:
+            marker = GAP_MARKER.format(start=_clock(start), end=_clock(end))
+            merged_segments.append(TranscriptSegment(start=start, end=end, text=marker))
+            all_text_parts.append((start, marker))
+            total_duration = max(total_duration, end)
+        merged_segments.sort(key=lambda seg: seg.start)
+        all_text_parts.sort(key=lambda part: part[0])
+        
         return TranscriptResult(
-            text=" ".join(all_text_parts),
+            text=" ".join(text for _, text in all_text_parts),
             segments=merged_segments,
             language=detected_language,
             duration=total_duration,
+            gaps=list(gaps),
         )
 
     def _deduplicate_segments(self, segments: List[TranscriptSegment]) -> List[TranscriptSegment]:
@@ -232,15 +240,18 @@ class APIASRProvider(ASRProvider):
         
         try:
             with open(audio_path, "rb") as f:
-                files = {"file": (Path(audio_path).name, f, "audio/mpeg")}
+                mime = UPLOAD_MIME.get(Path(audio_path).suffix.lower(), "application/octet-stream")
+                files = {"file": (Path(audio_path).name, f, mime)}
                 
-                with httpx.Client(timeout=300.0) as client:
-                    response = client.post(
+                # 共享连接池（keep-alive）；文件句柄按块流式上传
+                with get_limiter(ASR, self.base_url).slot() as slot:
+                    response = get_asr_client(self.base_url).post(
                         url,
                         headers=headers,
                         data=data,
                         files=files,
                     )
+                    slot.response(response.status_code, response.headers)
             
             if response.status_code != 200:
                 logger.error(
@@ -277,6 +288,7 @@ class APIASRProvider(ASRProvider):
         audio_path: str,
         language: Optional[str] = None,
         prompt: Optional[str] = None,
+        progress: Optional[Callable[[int, int, dict], None]] = None,
     ) -> TranscriptResult:
         """
         使用API进行转写，自动处理长音频分片
@@ -285,15 +297,17 @@ class APIASRProvider(ASRProvider):
             audio_path: 音频文件路径
             language: 语言代码
             prompt: 提示词
-        """
-        # 转换为支持的格式
-        audio_path = self._convert_to_mp3(audio_path)
+            progress: 进度回调 (已完成分片数, 总分片数, {done, total, failed, resumed})
         
-        # 检查是否需要分片
+        Raises:
+            ChunkTranscriptionError: 分片转写有片段失败（已完成片段已保存，重试时跳过）
+        """
+        # 检查是否需要分片（只探测一次时长；分片时由解码结果给出精确时长）
         duration = self._get_audio_duration(audio_path)
         
-        if duration <= CHUNK_DURATION_SECONDS:
-            # 短音频，直接处理
+        if duration <= self.chunk_seconds:
+            # 短音频，转换为支持的格式后直接处理
+            audio_path = self._prepare_upload(audio_path)
             logger.info("asr_direct_transcribe", duration=duration, audio_path=audio_path)
             try:
                 result = self._transcribe_single(audio_path, language, prompt)
@@ -308,43 +322,29 @@ class APIASRProvider(ASRProvider):
                 logger.error("api_asr_error", error=str(e))
                 raise
         
-        # 长音频，分片处理
-        logger.info("asr_chunked_transcribe", duration=duration, chunk_size=CHUNK_DURATION_SECONDS)
+        # 长音频，单遍解码分片（直接读源文件，无需先整体转 mp3），边切边上传
+        logger.info(
+            "asr_chunked_transcribe",
+            duration=duration,
+            chunk_size=self.chunk_seconds,
+            vad=self.vad is not None,
+        )
         
         try:
-            chunks = self._split_audio(audio_path)
-            results: List[Tuple[float, TranscriptResult]] = []
-            
-            # 并行处理分片
-            with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_PARALLEL_CHUNKS) as executor:
-                futures = {
-                    executor.submit(self._transcribe_chunk, chunk, language, prompt): chunk
-                    for chunk in chunks
-                }
-                
-                for future in concurrent.futures.as_completed(futures):
-                    chunk = futures[future]
-                    try:
-                        start_offset, result = future.result()
-                        results.append((start_offset, result))
-                        logger.info(
-                            "chunk_transcribe_complete",
-                            chunk_start=start_offset,
-                            text_length=len(result.text),
-                        )
-                    except Exception as e:
-                        logger.error("chunk_transcribe_failed", chunk=chunk[0], error=str(e))
-                        raise
+            results, total_duration, gaps = self._transcribe_chunked(audio_path, duration, language, prompt, progress)
             
             # 合并结果
-            transcript = self._merge_transcripts(results)
+            transcript = self._merge_transcripts(results, gaps)
+            if total_duration:
+                transcript.duration = total_duration
             
             logger.info(
                 "api_asr_complete",
                 model=self.model,
                 duration=transcript.duration,
                 text_length=len(transcript.text),
-                chunks=len(chunks),
+                chunks=len(results),
+                gaps=len(gaps),
             )
             
             return transcript
@@ -353,6 +353,138 @@ class APIASRProvider(ASRProvider):
             logger.error("api_asr_error", error=str(e))
             raise
 
+    def _manifest_params(self, language: Optional[str], prompt: Optional[str]) -> dict:
+        """影响分片边界与转写结果的参数，变化时已保存的片段结果作废"""
+        return {
+            "model": self.model,
+            "chunk_seconds": self.chunk_seconds,
+            "overlap_seconds": CHUNK_OVERLAP_SECONDS,
+            "vad": asdict(self.vad) if self.vad is not None else None,
+            "profile": self.audio_profile,
+            "language": language,
+            "prompt": prompt,
+        }
+
+    def _transcribe_chunked(
+        self,
+        audio_path: str,
+        probed_duration: float,
+        language: Optional[str],
+        prompt: Optional[str],
+        progress: Optional[Callable[[int, int, dict], None]],
+    ) -> Tuple[List[Tuple[AudioChunk, TranscriptResult]], Optional[float], List[Tuple[float, float]]]:
+        """
+        分片转写：片段编码完成即提交上传，编码与上传重叠进行
+
+        每个片段的结果写入音频旁的清单，重试时跳过已完成的片段。片段重试后仍失败时
+        继续转写其余片段；连续失败 MAX_CONSECUTIVE_FAILURES 次视为服务不可用，停止提交。
+
+        Returns:
+            ([(片段, 转写结果)], 解码得到的总时长, 缺失区间)
+
+        Raises:
+            ChunkTranscriptionError: 有片段失败且不满足部分降级条件
+        """
+        path = Path(audio_path)
+        chunk_dir = path.parent / f"{path.stem}_chunks"
+        segmenter = AudioSegmenter(
+            self.chunk_seconds, CHUNK_OVERLAP_SECONDS, codec=self.audio_profile, vad=self.vad
+        )
+        manifest = ChunkManifest(path, self._manifest_params(language, prompt))
+        expected = max(1, math.ceil(probed_duration / self.chunk_seconds))
+        results: List[Tuple[AudioChunk, TranscriptResult]] = []
+        failed: List[AudioChunk] = []
+        last_error: List[Exception] = []
+        consecutive = [0]
+        
+        def report(pending: int):
+            if progress is None:
+                return
+            total = max(expected, len(results) + len(failed) + pending)
+            progress(len(results), total, {
+                "done": len(results),
+                "total": total,
+                "failed": len(failed),
+                "resumed": manifest.resumed,
+            })
+        
+        # 线程数取并发上限的最大值，实际并发由 ASR 并发控制器动态限制
+        max_workers = get_limiter(ASR, self.base_url).max_limit
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {}
+                
+                def collect(future):
+                    chunk = futures.pop(future)
+                    chunk.path.unlink(missing_ok=True)
+                    try:
+                        _, result = future.result()
+                    except Exception as e:
+                        logger.error("chunk_transcribe_failed", chunk=chunk.index, chunk_start=chunk.start, error=str(e))
+                        manifest.fail(chunk.index, chunk.start, chunk.duration, str(e))
+                        failed.append(chunk)
+                        last_error[:] = [e]
+                        consecutive[0] += 1
+                    else:
+                        manifest.put(chunk.index, chunk.start, chunk.duration, result)
+                        results.append((chunk, result))
+                        consecutive[0] = 0
+                        logger.info(
+                            "chunk_transcribe_complete",
+                            chunk_start=chunk.start,
+                            text_length=len(result.text),
+                        )
+                    report(len(futures))
+                
+                chunks = segmenter.segment(audio_path, chunk_dir)
+                try:
+                    for chunk in chunks:
+                        cached = manifest.get(chunk.index, chunk.start, chunk.duration)
+                        if cached is not None:
+                            chunk.path.unlink(missing_ok=True)
+                            results.append((chunk, cached))
+                            report(len(futures))
+                            continue
+                        future = executor.submit(self._transcribe_chunk, chunk, language, prompt)
+                        futures[future] = chunk
+                        # 已完成的上传先收集；连续失败时尽早停止解码
+                        for done in [f for f in futures if f.done()]:
+                            collect(done)
+                        if consecutive[0] >= MAX_CONSECUTIVE_FAILURES:
+                            break
+                finally:
+                    chunks.close()
+                
+                for done in concurrent.futures.as_completed(list(futures)):
+                    collect(done)
+        finally:
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+        
+        if segmenter.duration is not None:
+            manifest.set_total(len(results) + len(failed))
+        
+        gaps: List[Tuple[float, float]] = []
+        if failed:
+            gaps = sorted((c.start, c.to_source(c.duration)) for c in failed)
+            total_seconds = segmenter.duration or probed_duration
+            missing = sum(end - start for start, end in gaps)
+            if not (
+                self.allow_partial
+                and segmenter.duration is not None
+                and missing <= self.max_gap_ratio * total_seconds
+            ):
+                raise ChunkTranscriptionError(failed, len(results) + len(failed), last_error[0])
+            logger.warning(
+                "asr_partial_transcript",
+                failed_chunks=len(failed),
+                missing_seconds=round(missing, 1),
+            )
+        else:
+            manifest.remove()
+        
+        logger.info("chunk_transcribe_summary", chunks=len(results), resumed=manifest.resumed, failed=len(failed))
+        return results, segmenter.duration, gaps
+
     def is_available(self) -> bool:
         """检查API是否可用"""
         return bool(self.api_key and self.base_url)
@@ -360,7 +492,7 @@ class APIASRProvider(ASRProvider):
 
 def create_api_asr(base_url: str, api_key: str, model: str) -> APIASRProvider:
     """
-    创建API ASR提供者
+    创建API ASR提供者（分片与静音检测参数取自 asr 配置）
     
     Args:
         base_url: API地址
@@ -370,4 +502,24 @@ def create_api_asr(base_url: str, api_key: str, model: str) -> APIASRProvider:
     Returns:
         APIASRProvider实例
     """
-    return APIASRProvider(base_url=base_url, api_key=api_key, model=model)
+    asr = get_config().asr
+    vad = None
+    if asr.vad_enabled:
+        vad = VADConfig(
+            target_seconds=asr.chunk_seconds,
+            search_seconds=asr.vad_search_seconds,
+            min_silence=asr.vad_min_silence,
+            drop_silence=asr.vad_drop_silence,
+            threshold_db=asr.vad_threshold_db,
+        )
+    return APIASRProvider(
+        base_url=base_url,
+        api_key=api_key,
+        model=model,
+        chunk_seconds=asr.chunk_seconds,
+        vad=vad,
+        audio_profile=asr.api_audio_profile,
+        chunk_retries=asr.chunk_retries,
+        allow_partial=asr.allow_partial,
+        max_gap_ratio=asr.max_gap_ratio,
+    )
@@ -4,7 +4,7 @@ ASR抽象基类
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 
 @dataclass
@@ -22,11 +22,55 @@ class TranscriptResult:
     segments: List[TranscriptSegment] = field(default_factory=list)  # 分段信息
     language: str = "zh"                         # 检测到的语言
     duration: float = 0.0                        # 音频时长
+    gaps: List[Tuple[float, float]] = field(default_factory=list)  # 未能转写的区间（部分降级时）
+
+
+class SegmentStream:
+    """
+    逐段产出的转写结果
+
+    迭代时按识别顺序产出分段；迭代结束（或调用 result()）后得到完整的 TranscriptResult。
+    language / duration 在开始迭代前即可读取（提供者能提前给出时）。
+    """
+
+    def __init__(
+        self,
+        segments: Iterable[TranscriptSegment],
+        language: str = "zh",
+        duration: float = 0.0,
+    ):
+        self._segments = iter(segments)
+        self.language = language
+        self.duration = duration            # 音频总时长（秒），未知时为 0
+        self._collected: List[TranscriptSegment] = []
+        self._exhausted = False
+
+    def __iter__(self) -> Iterator[TranscriptSegment]:
+        for seg in self._segments:
+            self._collected.append(seg)
+            yield seg
+        self._exhausted = True
+
+    def result(self) -> TranscriptResult:
+        """取得完整结果（未迭代完的部分在此读完）"""
+        if not self._exhausted:
+            for _ in self:
+                pass
+        segments = self._collected
+        return TranscriptResult(
+            text=" ".join(seg.text for seg in segments),
+            segments=list(segments),
+            language=self.language,
+            duration=segments[-1].end if segments else 0.0,
+        )
 
 
 class ASRProvider(ABC):
     """ASR提供者抽象基类"""
 
+    # 期望的输入音频编码（services.asr.profiles）；本地模型直接读 PCM，无需解码
+    audio_profile: str = "wav"
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -53,6 +97,20 @@ class ASRProvider(ABC):
         """
         pass
 
+    def transcribe_stream(
+        self,
+        audio_path: str,
+        language: Optional[str] = None,
+        prompt: Optional[str] = None,
+    ) -> SegmentStream:
+        """
+        流式转写：分段识别出来即产出
+
+        默认实现等待完整结果后再逐段产出；能边识别边输出的提供者应覆盖此方法。
+        """
+        result = self.transcribe(audio_path, language=language, prompt=prompt)
+        return SegmentStream(result.segments, language=result.language, duration=result.duration)
+
     def is_available(self) -> bool:
         """检查是否可用"""
         return True
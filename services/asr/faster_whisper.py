@@ -3,11 +3,12 @@ Faster-Whisper ASR实现
 使用CTranslate2优化，速度更快
 """
 
+import threading
 from typing import Optional
 
 from packages.logging import get_logger
 
-from .base import ASRProvider, TranscriptResult, TranscriptSegment
+from .base import ASRProvider, SegmentStream, TranscriptResult, TranscriptSegment
 
 logger = get_logger(__name__)
 
@@ -22,6 +23,7 @@ class FasterWhisperProvider(ASRProvider):
         model_size: str = "medium",
         device: str = "auto",
         compute_type: str = "float16",
+        cpu_threads: int = 0,
     ):
         """
         初始化Faster-Whisper模型
@@ -30,49 +32,59 @@ class FasterWhisperProvider(ASRProvider):
             model_size: 模型大小 (tiny/base/small/medium/large-v2/large-v3)
             device: 设备 (auto/cpu/cuda)
             compute_type: 计算类型 (float16/int8/int8_float16)
+            cpu_threads: CPU 推理线程数（0 为 CTranslate2 默认）
         """
         self.model_size = model_size
         self.device = device
         self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
         self._model = None
+        self._load_lock = threading.Lock()  # 并发转写时只加载一次
 
     def _load_model(self):
         """延迟加载模型"""
-        if self._model is None:
-            from faster_whisper import WhisperModel
-            
-            # 确定设备
-            if self.device == "auto":
-                try:
-                    import torch
-                    device = "cuda" if torch.cuda.is_available() else "cpu"
-                except ImportError:
-                    device = "cpu"
-            else:
-                device = self.device
-
-            # CPU不支持float16
-            compute_type = self.compute_type
-            if device == "cpu" and compute_type == "float16":
-                compute_type = "int8"
-
-            logger.info(
-                "loading_faster_whisper",
-                model=self.model_size,
-                device=device,
-                compute_type=compute_type,
-            )
-
-            self._model = WhisperModel(
-                self.model_size,
-                device=device,
-                compute_type=compute_type,
-            )
-
-            logger.info("faster_whisper_loaded", model=self.model_size)
-
+        with self._load_lock:
+            if self._model is None:
+                self._model = self._create_model()
         return self._model
 
+    def _create_model(self):
+        """加载模型（设备、计算类型按配置与硬件确定）"""
+        from faster_whisper import WhisperModel
+        
+        # 确定设备
+        if self.device == "auto":
+            try:
+                import torch
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+            except ImportError:
+                device = "cpu"
+        else:
+            device = self.device
+
+        # CPU不支持float16
+        compute_type = self.compute_type
+        if device == "cpu" and compute_type == "float16":
+            compute_type = "int8"
+
+        logger.info(
+            "loading_faster_whisper",
+            model=self.model_size,
+            device=device,
+            compute_type=compute_type,
+        )
+
+        model = WhisperModel(
+            self.model_size,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=self.cpu_threads,
+        )
+
+        logger.info("faster_whisper_loaded", model=self.model_size)
+
+        return model
+
     def transcribe(
         self,
         audio_path: str,
@@ -80,6 +92,25 @@ class FasterWhisperProvider(ASRProvider):
         prompt: Optional[str] = None,
     ) -> TranscriptResult:
         """执行转写"""
+        transcript = self.transcribe_stream(audio_path, language=language, prompt=prompt).result()
+
+        logger.info(
+            "transcription_complete",
+            audio=audio_path,
+            text_length=len(transcript.text),
+            segments=len(transcript.segments),
+            language=transcript.language,
+        )
+
+        return transcript
+
+    def transcribe_stream(
+        self,
+        audio_path: str,
+        language: Optional[str] = None,
+        prompt: Optional[str] = None,
+    ) -> SegmentStream:
+        """流式转写：模型每解码出一段即产出（语言、总时长在开始解码前已知）"""
         model = self._load_model()
 
         # 默认提示词
@@ -88,7 +119,7 @@ class FasterWhisperProvider(ASRProvider):
 
         logger.info("transcribing", audio=audio_path, model=self.model_size)
 
-        # 转写
+        # 转写（segments_iter 是惰性生成器，迭代时才逐段解码）
         segments_iter, info = model.transcribe(
             audio_path,
             language=language,
@@ -97,36 +128,11 @@ class FasterWhisperProvider(ASRProvider):
             vad_parameters=dict(min_silence_duration_ms=500),
         )
 
-        # 收集结果
-        segments = []
-        full_text = []
-
-        for seg in segments_iter:
-            segments.append(TranscriptSegment(
-                start=seg.start,
-                end=seg.end,
-                text=seg.text.strip(),
-            ))
-            full_text.append(seg.text.strip())
-
-        duration = segments[-1].end if segments else 0.0
-
-        transcript = TranscriptResult(
-            text=" ".join(full_text),
-            segments=segments,
-            language=info.language,
-            duration=duration,
+        segments = (
+            TranscriptSegment(start=seg.start, end=seg.end, text=seg.text.strip())
+            for seg in segments_iter
         )
-
-        logger.info(
-            "transcription_complete",
-            audio=audio_path,
-            text_length=len(transcript.text),
-            segments=len(segments),
-            language=info.language,
-        )
-
-        return transcript
+        return SegmentStream(segments, language=info.language, duration=info.duration or 0.0)
 
     def is_available(self) -> bool:
         """检查faster-whisper是否可用"""
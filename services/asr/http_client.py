@@ -0,0 +1,97 @@
+"""
+ASR 接口的进程级 HTTP 连接池
+
+每个片段上传都新建 httpx.Client 时，每次都要重新 TCP + TLS 握手，
+并行处理多个视频时连接数也没有上限。这里按端点（host[:port]）共享一个客户端：
+- keep-alive 复用连接，可选 HTTP/2（需要 h2：pip install "httpx[http2]"）
+- 连接数上限取该端点 ASR 并发控制器的 max_limit，与并发预算一致
+- 上传时传入文件句柄，multipart 按块读取发送，不把整个文件读入内存
+
+fork 出的子进程不复用父进程的连接。
+"""
+
+import atexit
+import os
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from packages.concurrency import ASR, get_limiter
+from packages.logging import get_logger
+
+logger = get_logger(__name__)
+
+_clients: Dict[str, httpx.Client] = {}
+_clients_lock = threading.Lock()
+_clients_pid: Optional[int] = None
+
+
+def _endpoint(base_url: str) -> str:
+    """URL -> host[:port]（与并发控制器按端点区分的方式一致）"""
+    return urlparse(base_url).netloc or base_url
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client(base_url: str) -> httpx.Client:
+    from packages.config import get_config
+
+    config = get_config().asr
+    connections = get_limiter(ASR, base_url).max_limit
+    http2 = config.http2
+    if http2 and not _http2_available():
+        logger.warning("asr_http2_unavailable", reason="h2 未安装，使用 HTTP/1.1")
+        http2 = False
+
+    logger.info(
+        "asr_http_client_created",
+        endpoint=_endpoint(base_url),
+        max_connections=connections,
+        http2=http2,
+    )
+    return httpx.Client(
+        http2=http2,
+        timeout=httpx.Timeout(config.http_timeout, connect=config.http_connect_timeout),
+        limits=httpx.Limits(
+            max_connections=connections,
+            max_keepalive_connections=connections,
+            keepalive_expiry=config.http_keepalive_expiry,
+        ),
+    )
+
+
+def get_asr_client(base_url: str) -> httpx.Client:
+    """获取端点共享的 HTTP 客户端（线程安全，调用方不要关闭）"""
+    global _clients_pid
+    endpoint = _endpoint(base_url)
+
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            # 父进程的连接不能在子进程中使用，直接丢弃（不关闭，避免影响父进程）
+            _clients.clear()
+            _clients_pid = os.getpid()
+
+        client = _clients.get(endpoint)
+        if client is None or client.is_closed:
+            client = _clients[endpoint] = _build_client(base_url)
+        return client
+
+
+def close_asr_clients():
+    """关闭所有共享客户端（进程退出或配置变更时）"""
+    with _clients_lock:
+        clients = list(_clients.values()) if _clients_pid == os.getpid() else []
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+atexit.register(close_asr_clients)
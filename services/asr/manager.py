@@ -3,12 +3,13 @@ ASR管理器
 统一管理不同的ASR提供者
 """
 
+import threading
 from typing import Dict, Optional, Type
 
 from packages.config import get_config
 from packages.logging import get_logger
 
-from .base import ASRProvider, TranscriptResult
+from .base import ASRProvider, SegmentStream, TranscriptResult
 
 logger = get_logger(__name__)
 
@@ -17,6 +18,9 @@ class ASRManager:
     """ASR管理器"""
 
     _providers: Dict[str, Type[ASRProvider]] = {}
+    # 提供者实例进程内共享：管道每个视频都会新建 ASRManager，模型只加载一次
+    _instances: Dict[str, ASRProvider] = {}
+    _instances_lock = threading.Lock()
 
     def __init__(self, default_provider: Optional[str] = None):
         """
@@ -27,7 +31,6 @@ class ASRManager:
         """
         config = get_config()
         self.default_provider = default_provider or config.asr.provider
-        self._instances: Dict[str, ASRProvider] = {}
         
         # 注册内置提供者
         self._register_builtin_providers()
@@ -36,9 +39,11 @@ class ASRManager:
         """注册内置提供者"""
         from .whisper_local import WhisperLocalProvider
         from .faster_whisper import FasterWhisperProvider
+        from .server_provider import ASRServerProvider
 
         self.register("whisper_local", WhisperLocalProvider)
         self.register("faster_whisper", FasterWhisperProvider)
+        self.register("server", ASRServerProvider)
 
     @classmethod
     def register(cls, name: str, provider_class: Type[ASRProvider]):
@@ -58,6 +63,10 @@ class ASRManager:
         """
         name = name or self.default_provider
 
+        with self._instances_lock:
+            return self._get_or_create(name)
+
+    def _get_or_create(self, name: str) -> ASRProvider:
         if name not in self._instances:
             if name not in self._providers:
                 raise ValueError(f"未知的ASR提供者: {name}")
@@ -75,6 +84,13 @@ class ASRManager:
                 self._instances[name] = provider_class(
                     model_size=config.asr.model_size,
                     device=config.asr.device,
+                    compute_type=config.asr.compute_type,
+                    cpu_threads=config.asr.cpu_threads,
+                )
+            elif name == "server":
+                self._instances[name] = provider_class(
+                    base_url=config.asr.server_url,
+                    timeout=config.asr.server_timeout,
                 )
             else:
                 self._instances[name] = provider_class()
@@ -83,6 +99,12 @@ class ASRManager:
 
         return self._instances[name]
 
+    @property
+    def audio_profile(self) -> str:
+        """默认提供者期望的输入音频编码"""
+        provider_class = self._providers.get(self.default_provider, ASRProvider)
+        return provider_class.audio_profile
+
     def transcribe(
         self,
         audio_path: str,
@@ -105,6 +127,17 @@ class ASRManager:
         asr = self.get_provider(provider)
         return asr.transcribe(audio_path, language=language, prompt=prompt)
 
+    def transcribe_stream(
+        self,
+        audio_path: str,
+        provider: Optional[str] = None,
+        language: Optional[str] = None,
+        prompt: Optional[str] = None,
+    ) -> SegmentStream:
+        """流式转写（参数同 transcribe），迭代返回值逐段取得结果"""
+        asr = self.get_provider(provider)
+        return asr.transcribe_stream(audio_path, language=language, prompt=prompt)
+
     def list_providers(self) -> list:
         """列出可用的提供者"""
         available = []
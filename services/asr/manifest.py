@@ -0,0 +1,149 @@
+"""
+分片转写清单（sidecar）
+
+长音频分片上传时，每个片段的转写结果写入音频旁的 <音频文件名>.chunks.json：
+- 某个片段重试后仍失败时，已完成的片段不会丢失；视频重试时只重新转写缺失的片段
+- 源文件（大小 / 修改时间）或分片参数变化时清单作废，重新开始
+- 状态接口可读取清单得到分片进度（含失败后的视频）
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from packages.logging import get_logger
+
+from .base import TranscriptResult, TranscriptSegment
+
+logger = get_logger(__name__)
+
+MANIFEST_SUFFIX = ".chunks.json"
+_VERSION = 1
+
+
+def manifest_path(audio_path: Union[str, Path]) -> Path:
+    audio_path = Path(audio_path)
+    return audio_path.with_name(audio_path.name + MANIFEST_SUFFIX)
+
+
+def _source_stat(audio_path: Path) -> Dict[str, int]:
+    stat = audio_path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _result_to_dict(result: TranscriptResult) -> dict:
+    return {
+        "text": result.text,
+        "language": result.language,
+        "duration": result.duration,
+        "segments": [[seg.start, seg.end, seg.text] for seg in result.segments],
+    }
+
+
+def _result_from_dict(data: dict) -> TranscriptResult:
+    return TranscriptResult(
+        text=data["text"],
+        language=data.get("language", "zh"),
+        duration=data.get("duration", 0.0),
+        segments=[TranscriptSegment(start=s, end=e, text=t) for s, e, t in data.get("segments", [])],
+    )
+
+
+class ChunkManifest:
+    """一个音频文件的分片转写结果"""
+
+    def __init__(self, audio_path: Union[str, Path], params: Dict[str, Any]):
+        """
+        Args:
+            audio_path: 源音频路径
+            params: 影响分片边界与转写结果的参数（模型、分片长度、静音检测等）；与已有清单不一致时作废
+        """
+        self.audio_path = Path(audio_path)
+        self.path = manifest_path(self.audio_path)
+        self._lock = threading.Lock()
+        self._data = {
+            "version": _VERSION,
+            "source": _source_stat(self.audio_path),
+            "params": params,
+            "total": None,
+            "chunks": {},
+            "failed": {},
+        }
+        self.resumed = 0
+
+        existing = read_manifest(self.path)
+        if existing is not None:
+            if all(existing.get(k) == self._data[k] for k in ("version", "source", "params")):
+                self._data["chunks"] = existing.get("chunks", {})
+                self._data["total"] = existing.get("total")
+            else:
+                logger.info("chunk_manifest_stale", path=str(self.path))
+
+    def get(self, index: int, start: float, duration: float) -> Optional[TranscriptResult]:
+        """已完成片段的转写结果（片段位置不一致时视为未完成）"""
+        entry = self._data["chunks"].get(str(index))
+        if entry is None:
+            return None
+        if abs(entry["start"] - start) > 1e-3 or abs(entry["duration"] - duration) > 1e-3:
+            return None
+        self.resumed += 1
+        return _result_from_dict(entry["result"])
+
+    def put(self, index: int, start: float, duration: float, result: TranscriptResult):
+        with self._lock:
+            self._data["chunks"][str(index)] = {
+                "start": start,
+                "duration": duration,
+                "result": _result_to_dict(result),
+            }
+            self._data["failed"].pop(str(index), None)
+            self._save()
+
+    def fail(self, index: int, start: float, duration: float, error: str):
+        with self._lock:
+            self._data["failed"][str(index)] = {"start": start, "duration": duration, "error": error}
+            self._save()
+
+    def set_total(self, total: int):
+        with self._lock:
+            self._data["total"] = total
+            self._save()
+
+    def progress(self) -> dict:
+        return _progress(self._data)
+
+    def remove(self):
+        self.path.unlink(missing_ok=True)
+
+    def _save(self):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self._data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def _progress(data: dict) -> dict:
+    return {
+        "done": len(data.get("chunks", {})),
+        "failed": len(data.get("failed", {})),
+        "total": data.get("total"),
+    }
+
+
+def read_manifest(path: Union[str, Path]) -> Optional[dict]:
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("chunk_manifest_unreadable", path=str(path), error=str(e))
+        return None
+
+
+def read_chunk_progress(audio_path: Optional[Union[str, Path]]) -> Optional[dict]:
+    """读取音频对应清单的分片进度 {done, failed, total}；没有清单时返回 None"""
+    if not audio_path:
+        return None
+    data = read_manifest(manifest_path(audio_path))
+    return _progress(data) if data is not None else None
@@ -0,0 +1,128 @@
+"""
+媒体探测（ffprobe）与探测结果缓存
+
+时长、容器、音视频流信息只读取文件头，不解码。同一文件在一次处理中会被多处探测
+（完整性检查、音频时长、API 转写判断是否分片），结果按 (路径, 大小, 修改时间)
+缓存在进程内，文件被覆盖或改动后自动失效。
+"""
+
+import json
+import subprocess
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple, Union
+
+from packages.logging import get_logger
+
+logger = get_logger(__name__)
+
+_CACHE_SIZE = 256
+
+
+class ProbeError(RuntimeError):
+    """ffprobe 无法解析文件（容器损坏、文件不存在等）"""
+
+
+@dataclass(frozen=True)
+class StreamInfo:
+    codec_type: str        # audio / video / subtitle / data
+    codec_name: str = ""
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    """ffprobe 结果"""
+    duration: float                    # 秒（容器时长，缺失时取最长的流）
+    format_name: str
+    streams: Tuple[StreamInfo, ...] = ()
+    size: int = 0
+
+    @property
+    def has_audio(self) -> bool:
+        return any(s.codec_type == "audio" for s in self.streams)
+
+    @property
+    def has_video(self) -> bool:
+        return any(s.codec_type == "video" for s in self.streams)
+
+
+_cache: "OrderedDict[Tuple[str, int, int], MediaInfo]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _run_ffprobe(path: Path) -> MediaInfo:
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe", "-v", "error",
+                "-show_entries", "format=duration,format_name:stream=codec_type,codec_name,duration",
+                "-of", "json",
+                str(path),
+            ],
+            capture_output=True,
+            text=True,
+        )
+    except OSError as e:
+        raise ProbeError(f"ffprobe 不可用: {e}") from None
+    if result.returncode != 0:
+        raise ProbeError(result.stderr.strip() or f"ffprobe 退出码 {result.returncode}")
+
+    try:
+        data = json.loads(result.stdout or "{}")
+    except ValueError as e:
+        raise ProbeError(f"ffprobe 输出无法解析: {e}") from None
+
+    fmt = data.get("format") or {}
+    raw_streams = data.get("streams") or []
+    durations = [fmt.get("duration")] + [s.get("duration") for s in raw_streams]
+    values = [float(d) for d in durations if d not in (None, "N/A")]
+    return MediaInfo(
+        duration=float(fmt["duration"]) if fmt.get("duration") not in (None, "N/A") else max(values, default=0.0),
+        format_name=fmt.get("format_name", ""),
+        streams=tuple(StreamInfo(s.get("codec_type", ""), s.get("codec_name", "")) for s in raw_streams),
+        size=path.stat().st_size,
+    )
+
+
+def probe_media(path: Union[str, Path]) -> MediaInfo:
+    """
+    探测媒体文件（结果按路径、大小、修改时间缓存）
+
+    Raises:
+        ProbeError: 文件不存在或无法解析
+    """
+    path = Path(path)
+    try:
+        stat = path.stat()
+    except OSError as e:
+        raise ProbeError(str(e)) from None
+    key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+
+    with _cache_lock:
+        info = _cache.get(key)
+        if info is not None:
+            _cache.move_to_end(key)
+            return info
+
+    info = _run_ffprobe(path)
+    with _cache_lock:
+        _cache[key] = info
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return info
+
+
+def media_duration(path: Union[str, Path]) -> float:
+    """媒体时长（秒），无法探测时返回 0"""
+    try:
+        return probe_media(path).duration
+    except (ProbeError, OSError) as e:
+        logger.warning("ffprobe_duration_failed", error=str(e), path=str(path))
+        return 0.0
+
+
+def clear_probe_cache():
+    with _cache_lock:
+        _cache.clear()
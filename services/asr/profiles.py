@@ -0,0 +1,67 @@
+"""
+ASR 音频编码配置
+
+语音识别只需要 16kHz 单声道，128kbps mp3 远超所需。按 ASR 提供者选择编码：
+- opus: Ogg/Opus 低码率，API 上传体积最小（约为 128k mp3 的 1/5）
+- mp3:  兼容性最好，部分 OpenAI 兼容服务不接受 ogg 时使用
+- flac: 无损压缩，对识别结果零影响
+- wav:  PCM，本地模型直接读取，无需解码
+
+音频提取直接写出目标格式，上传前不再二次转码。
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+SAMPLE_RATE = 16000
+
+
+@dataclass(frozen=True)
+class AudioProfile:
+    """一种音频编码方式"""
+    name: str
+    suffix: str                  # 文件扩展名
+    mime: str
+    codec_args: tuple            # ffmpeg 编码参数
+    sample_rate: int = SAMPLE_RATE
+    channels: int = 1
+
+    def ffmpeg_args(self) -> List[str]:
+        """重采样 + 编码参数（接在 -i 输入之后）"""
+        return ["-vn", "-ac", str(self.channels), "-ar", str(self.sample_rate), *self.codec_args]
+
+    def path_for(self, path: Path) -> Path:
+        return Path(path).with_suffix(self.suffix)
+
+
+PROFILES: Dict[str, AudioProfile] = {
+    "opus": AudioProfile("opus", ".ogg", "audio/ogg", ("-c:a", "libopus", "-b:a", "24k", "-application", "voip")),
+    "mp3": AudioProfile("mp3", ".mp3", "audio/mpeg", ("-c:a", "libmp3lame", "-b:a", "48k")),
+    "flac": AudioProfile("flac", ".flac", "audio/flac", ("-c:a", "flac", "-sample_fmt", "s16")),
+    "wav": AudioProfile("wav", ".wav", "audio/wav", ("-c:a", "pcm_s16le",)),
+}
+
+# 上传时不需要转码的格式（OpenAI 兼容接口普遍接受）
+UPLOAD_MIME: Dict[str, str] = {
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+    ".flac": "audio/flac",
+    ".ogg": "audio/ogg",
+    ".opus": "audio/ogg",
+    ".webm": "audio/webm",
+    ".pcm": "audio/pcm",
+}
+
+
+def get_profile(name: str) -> AudioProfile:
+    """
+    按名称获取编码配置
+
+    Raises:
+        ValueError: 未知的配置名
+    """
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"未知的音频编码配置: {name}（可选 {', '.join(PROFILES)}）") from None
@@ -0,0 +1,301 @@
+"""
+单遍音频分片
+
+长音频送 API 转写前需要切成带重叠的片段。逐片段启动 ffmpeg（-ss 定位 + 重新编码）
+会对源文件重复解封装、解码；这里只解码一次：
+- 一个 ffmpeg 进程把源音频解码为 16kHz 单声道 PCM 流
+- 按采样位置把 PCM 分发给当前覆盖该位置的片段（重叠区同时写入相邻两个片段）
+- 每个片段由轻量编码器（PCM -> opus/mp3/flac，或直接写 WAV）边读边编码，写满即交给调用方上传
+- 总时长取自解码得到的采样数，无需额外 ffprobe
+- 启用静音检测（vad）时改为在静音处切分、去除长静音，见 services.asr.vad
+"""
+
+import shutil
+import subprocess
+import wave
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from packages.logging import get_logger
+from .profiles import AudioProfile, get_profile
+from .vad import SilencePlanner, VADConfig
+
+logger = get_logger(__name__)
+
+_SAMPLE_WIDTH = 2          # s16le
+_READ_BYTES = 1 << 16
+
+
+@dataclass
+class AudioChunk:
+    """一个已编码完成的片段"""
+    index: int
+    path: Path
+    start: float       # 在源音频中的起始时间（秒）
+    duration: float    # 片段时长（秒，含重叠）
+    # 去除静音后的时间映射 [(片段内起点, 源音频起点, 长度)]（秒）；为空表示片段连续
+    spans: List[Tuple[float, float, float]] = field(default_factory=list)
+
+    def to_source(self, t: float) -> float:
+        """片段内时间 -> 源音频时间"""
+        if not self.spans:
+            return self.start + t
+        for chunk_offset, source_offset, length in self.spans:
+            if t < chunk_offset + length:
+                return source_offset + max(0.0, t - chunk_offset)
+        chunk_offset, source_offset, length = self.spans[-1]
+        return source_offset + min(t - chunk_offset, length)
+
+
+class _WavWriter:
+    """PCM 直接写 WAV（无需编码进程）"""
+
+    def __init__(self, path: Path, sample_rate: int):
+        self._wav = wave.open(str(path), "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(_SAMPLE_WIDTH)
+        self._wav.setframerate(sample_rate)
+
+    def write(self, data: bytes):
+        self._wav.writeframes(data)
+
+    def close(self):
+        self._wav.close()
+
+    def abort(self):
+        self._wav.close()
+
+
+class _EncoderWriter:
+    """PCM 通过管道交给 ffmpeg 编码（不读取源文件，开销很小）"""
+
+    def __init__(self, path: Path, sample_rate: int, profile: AudioProfile, ffmpeg: str):
+        self.path = path
+        self._proc = subprocess.Popen(
+            [ffmpeg, "-nostdin", "-v", "error", "-y",
+             "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+             *profile.codec_args, str(path)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+
+    def write(self, data: bytes):
+        self._proc.stdin.write(data)
+
+    def close(self):
+        self._proc.stdin.close()
+        stderr = self._proc.stderr.read()
+        if self._proc.wait() != 0:
+            raise RuntimeError(f"音频片段编码失败: {stderr.decode(errors='replace').strip()}")
+
+    def abort(self):
+        self._proc.kill()
+        self._proc.wait()
+
+
+class AudioSegmenter:
+    """单次解码、输出重叠片段的分片器"""
+
+    def __init__(
+        self,
+        chunk_seconds: float = 600,
+        overlap_seconds: float = 2,
+        sample_rate: int = 16000,
+        codec: str = "mp3",
+        ffmpeg: str = "ffmpeg",
+        vad: Optional[VADConfig] = None,
+    ):
+        """
+        Args:
+            chunk_seconds: 片段步长（秒）；启用 vad 时为片段最大长度
+            overlap_seconds: 相邻片段重叠（秒），避免切断句子；启用 vad 时不重叠
+            sample_rate: 解码采样率（ASR 模型通常为 16kHz）
+            codec: 片段编码配置名 opus / mp3 / flac / wav（见 services.asr.profiles；
+                wav 不启动编码进程，但文件最大）
+            vad: 静音检测参数，给出时在静音处切分并去除长静音
+        """
+        self.profile = get_profile(codec)
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds
+        self.sample_rate = sample_rate
+        self.codec = codec
+        self.ffmpeg = ffmpeg
+        self.vad = vad
+
+        self.duration: Optional[float] = None  # 分片完成后为源音频总时长（秒）
+        self.dropped: float = 0.0              # 未上传的静音时长（秒）
+
+    @property
+    def suffix(self) -> str:
+        return self.profile.suffix
+
+    def _open_writer(self, path: Path):
+        if self.codec == "wav":
+            return _WavWriter(path, self.sample_rate)
+        return _EncoderWriter(path, self.sample_rate, self.profile, self.ffmpeg)
+
+    def segment(self, source: str, out_dir: Path) -> Iterator[AudioChunk]:
+        """
+        解码 source 并按顺序产出片段（片段编码完成即产出）
+
+        Raises:
+            RuntimeError: ffmpeg 不可用或解码失败
+        """
+        if shutil.which(self.ffmpeg) is None:
+            raise RuntimeError(f"未找到 {self.ffmpeg}，无法切分音频")
+
+        decoder = subprocess.Popen(
+            [self.ffmpeg, "-nostdin", "-v", "error", "-i", str(source),
+             "-vn", "-ac", "1", "-ar", str(self.sample_rate), "-f", "s16le", "pipe:1"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        completed = False
+        try:
+            yield from self.segment_pcm(decoder.stdout, out_dir)
+            completed = True
+        finally:
+            if not completed:
+                decoder.kill()
+            decoder.stdout.close()
+            stderr = decoder.stderr.read()
+            returncode = decoder.wait()
+        if returncode != 0:
+            raise RuntimeError(f"音频解码失败: {stderr.decode(errors='replace').strip()}")
+
+    def segment_pcm(self, stream: BinaryIO, out_dir: Path) -> Iterator[AudioChunk]:
+        """从 s16le 单声道 PCM 流切分片段"""
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        if self.vad is not None:
+            yield from self._segment_on_silence(stream, out_dir)
+            return
+
+        step = int(self.chunk_seconds * self.sample_rate)
+        length = step + int(self.overlap_seconds * self.sample_rate)
+        overlap = length - step
+
+        writers: Dict[int, object] = {}
+        written: Dict[int, int] = {}
+        position = 0          # 已读取的采样数
+        next_index = 0        # 下一个待打开的片段
+        pending = b""         # 不足一个采样的残余字节
+        emitted: List[int] = []
+
+        def chunk_path(index: int) -> Path:
+            return out_dir / f"chunk_{index:03d}{self.suffix}"
+
+        def finish(index: int) -> AudioChunk:
+            writers.pop(index).close()
+            samples = written.pop(index)
+            emitted.append(index)
+            return AudioChunk(
+                index=index,
+                path=chunk_path(index),
+                start=index * step / self.sample_rate,
+                duration=samples / self.sample_rate,
+            )
+
+        try:
+            while True:
+                data = stream.read(_READ_BYTES)
+                if not data:
+                    break
+                data = pending + data
+                usable = len(data) - len(data) % _SAMPLE_WIDTH
+                data, pending = data[:usable], data[usable:]
+                count = len(data) // _SAMPLE_WIDTH
+                block_start, block_end = position, position + count
+
+                # 打开起点落在本块内的片段
+                while next_index * step < block_end:
+                    writers[next_index] = self._open_writer(chunk_path(next_index))
+                    written[next_index] = 0
+                    next_index += 1
+
+                for index in sorted(writers):
+                    chunk_start = index * step
+                    lo = max(block_start, chunk_start)
+                    hi = min(block_end, chunk_start + length)
+                    if lo < hi:
+                        writers[index].write(data[(lo - block_start) * _SAMPLE_WIDTH:(hi - block_start) * _SAMPLE_WIDTH])
+                        written[index] += hi - lo
+
+                position = block_end
+                for index in sorted(writers):
+                    if index * step + length <= position:
+                        yield finish(index)
+
+            # 结尾：尾部片段如果完全落在上一片段的重叠区内则丢弃
+            for index in sorted(writers):
+                if index > 0 and written[index] <= overlap and (index - 1) in emitted:
+                    writers.pop(index).abort()
+                    written.pop(index)
+                    chunk_path(index).unlink(missing_ok=True)
+                    continue
+                yield finish(index)
+        finally:
+            for writer in writers.values():
+                writer.abort()
+
+        self.duration = position / self.sample_rate
+        logger.info(
+            "audio_segmented",
+            chunks=len(emitted),
+            duration=round(self.duration, 1),
+            codec=self.codec,
+        )
+
+    def _segment_on_silence(self, stream: BinaryIO, out_dir: Path) -> Iterator[AudioChunk]:
+        """在静音处切分；片段确定后一次性编码"""
+        config = replace(self.vad, target_seconds=self.chunk_seconds)
+        planner = SilencePlanner(self.sample_rate, config)
+        rate = self.sample_rate
+        pending = b""
+        index = 0
+
+        def emit(planned) -> AudioChunk:
+            nonlocal index
+            path = out_dir / f"chunk_{index:03d}{self.suffix}"
+            writer = self._open_writer(path)
+            try:
+                writer.write(planned.pcm.astype("<i2").tobytes())
+            except BaseException:
+                writer.abort()
+                raise
+            writer.close()
+            chunk = AudioChunk(
+                index=index,
+                path=path,
+                start=planned.source_start / rate,
+                duration=planned.pcm.size / rate,
+                spans=[(s.chunk_offset / rate, s.source_offset / rate, s.length / rate) for s in planned.spans],
+            )
+            index += 1
+            return chunk
+
+        while True:
+            data = stream.read(_READ_BYTES)
+            if not data:
+                break
+            data = pending + data
+            usable = len(data) - len(data) % _SAMPLE_WIDTH
+            data, pending = data[:usable], data[usable:]
+            for planned in planner.feed(np.frombuffer(data, dtype="<i2")):
+                yield emit(planned)
+        for planned in planner.finish():
+            yield emit(planned)
+
+        self.duration = planner.total_samples / rate
+        self.dropped = planner.dropped_samples / rate
+        logger.info(
+            "audio_segmented",
+            chunks=index,
+            duration=round(self.duration, 1),
+            dropped_silence=round(self.dropped, 1),
+            codec=self.codec,
+        )
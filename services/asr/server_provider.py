@@ -0,0 +1,71 @@
+"""
+本地 ASR 服务客户端
+
+Worker 进程不加载模型，转写请求发给本机的 ASR 服务（services.asr_server），
+音频以文件路径传递。
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from packages.logging import get_logger
+
+from .base import ASRProvider, TranscriptResult, TranscriptSegment
+
+logger = get_logger(__name__)
+
+
+class ASRServerProvider(ASRProvider):
+    """调用本地 ASR 服务"""
+
+    name = "server"
+
+    def __init__(self, base_url: str = "http://127.0.0.1:8765", timeout: float = 3600.0):
+        """
+        Args:
+            base_url: ASR 服务地址
+            timeout: 单个转写请求超时（秒），长音频在 CPU 上转写较慢
+        """
+        self.base_url = base_url.rstrip("/")
+        self._client = httpx.Client(timeout=httpx.Timeout(timeout, connect=5.0))
+
+    def transcribe(
+        self,
+        audio_path: str,
+        language: Optional[str] = None,
+        prompt: Optional[str] = None,
+    ) -> TranscriptResult:
+        """执行转写（服务端与本进程共享磁盘，传绝对路径）"""
+        path = str(Path(audio_path).resolve())
+        logger.info("asr_server_transcribe", audio=path, server=self.base_url)
+
+        try:
+            response = self._client.post(
+                f"{self.base_url}/transcribe",
+                json={"audio_path": path, "language": language, "prompt": prompt},
+            )
+        except httpx.TransportError as e:
+            raise RuntimeError(f"ASR 服务不可用（{self.base_url}）: {e}") from e
+
+        if response.status_code != 200:
+            try:
+                error = response.json().get("error", response.text)
+            except ValueError:
+                error = response.text
+            raise RuntimeError(f"ASR 服务转写失败: {error}")
+
+        data = response.json()
+        return TranscriptResult(
+            text=data["text"],
+            language=data.get("language") or "zh",
+            duration=data.get("duration", 0.0),
+            segments=[TranscriptSegment(start=s, end=e, text=t) for s, e, t in data.get("segments", [])],
+        )
+
+    def is_available(self) -> bool:
+        try:
+            return self._client.get(f"{self.base_url}/health", timeout=2.0).status_code == 200
+        except httpx.HTTPError:
+            return False
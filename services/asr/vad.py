@@ -0,0 +1,203 @@
+"""
+基于能量的静音检测（VAD）分片规划
+
+在解码后的 PCM 上用 numpy 计算短帧能量（无需 GPU / 模型）：
+- 在目标长度附近的搜索窗口内找最长的静音，在静音中点切分，避免切断句子，片段之间无需重叠
+- 窗口内没有足够长的静音时，在能量最低的帧处切分
+- 片段内部的长静音只保留两侧少量留白，不上传
+- 每个片段记录时间映射（片段内时间 -> 源音频时间），转写结果的时间戳据此还原
+
+逐块输入、逐片段输出，内存中只保留当前片段的音频。
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class VADConfig:
+    """静音检测参数（时间单位：秒）"""
+    target_seconds: float = 600      # 片段最大长度
+    search_seconds: float = 60       # 在 [target - search, target] 内寻找切分点
+    frame_ms: int = 30
+    min_silence: float = 0.3         # 可作为切分点的最短静音
+    drop_silence: float = 2.0        # 超过该长度的静音不上传
+    keep_padding: float = 0.25       # 去除静音时两侧保留的留白
+    threshold_db: float = -45.0      # 静音判定阈值下限（dBFS）
+    max_threshold_db: float = -30.0  # 静音判定阈值上限（整段都有声时噪声底本身很高）
+    margin_db: float = 10.0          # 高于噪声底（帧能量 10 分位）该值以上视为语音
+
+
+@dataclass
+class Span:
+    """片段中保留的一段连续音频（采样数）"""
+    chunk_offset: int
+    source_offset: int
+    length: int
+
+
+@dataclass
+class PlannedChunk:
+    """规划好的片段"""
+    pcm: np.ndarray                  # int16，已去除长静音
+    spans: List[Span] = field(default_factory=list)
+    source_start: int = 0            # 片段在源音频中的起点（采样数）
+    source_end: int = 0              # 片段在源音频中的终点（采样数，含被去除的静音）
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """布尔数组中连续 True 的区间 [start, end)"""
+    if not mask.any():
+        return []
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+class SilencePlanner:
+    """流式静音分片规划器"""
+
+    def __init__(self, sample_rate: int, config: Optional[VADConfig] = None):
+        self.sample_rate = sample_rate
+        self.config = config or VADConfig()
+        self.frame = max(1, int(sample_rate * self.config.frame_ms / 1000))
+
+        self._pieces: List[np.ndarray] = []   # 当前缓冲的音频块
+        self._buffered = 0                    # 缓冲的采样数
+        self._buf_start = 0                   # 缓冲起点在源音频中的位置
+        self._frame_db: List[np.ndarray] = []  # 缓冲内完整帧的能量
+        self._frames = 0
+        self._tail = np.zeros(0, dtype=np.int16)  # 未凑满一帧的采样
+
+        self.total_samples = 0
+        self.dropped_samples = 0              # 未上传的静音采样数
+
+    # ========== 输入 ==========
+
+    def feed(self, samples: np.ndarray) -> List[PlannedChunk]:
+        """输入一段 int16 采样，返回已可以切出的片段"""
+        if samples.size == 0:
+            return []
+        self._pieces.append(samples)
+        self._buffered += samples.size
+        self.total_samples += samples.size
+
+        data = np.concatenate((self._tail, samples)) if self._tail.size else samples
+        usable = data.size - data.size % self.frame
+        if usable:
+            frames = data[:usable].astype(np.float32).reshape(-1, self.frame)
+            rms = np.sqrt(np.mean(frames * frames, axis=1))
+            self._frame_db.append(20 * np.log10(rms / 32768.0 + 1e-10))
+            self._frames += frames.shape[0]
+        self._tail = data[usable:].copy()
+
+        chunks = []
+        limit = int(self.config.target_seconds * self.sample_rate / self.frame)
+        while self._frames >= limit:
+            chunk = self._cut(self._choose_cut(limit))
+            if chunk is not None:
+                chunks.append(chunk)
+        return chunks
+
+    def finish(self) -> List[PlannedChunk]:
+        """输入结束，输出剩余音频"""
+        if self._buffered == 0:
+            return []
+        chunk = self._cut(None)
+        return [chunk] if chunk is not None else []
+
+    # ========== 切分 ==========
+
+    def _energies(self) -> np.ndarray:
+        if len(self._frame_db) > 1:
+            self._frame_db = [np.concatenate(self._frame_db)]
+        return self._frame_db[0] if self._frame_db else np.zeros(0, dtype=np.float32)
+
+    def _silence_mask(self, db: np.ndarray) -> np.ndarray:
+        if db.size == 0:
+            return np.zeros(0, dtype=bool)
+        noise_floor = float(np.percentile(db, 10))
+        threshold = min(
+            max(self.config.threshold_db, noise_floor + self.config.margin_db),
+            self.config.max_threshold_db,
+        )
+        return db <= threshold
+
+    def _frames_of(self, seconds: float) -> int:
+        return max(1, int(round(seconds * self.sample_rate / self.frame)))
+
+    def _choose_cut(self, limit: int) -> int:
+        """在搜索窗口内选择切分帧"""
+        db = self._energies()[:limit]
+        lo = max(1, limit - self._frames_of(self.config.search_seconds))
+        silent = self._silence_mask(db)
+
+        best = None
+        for start, end in _runs(silent):
+            start, end = max(start, lo), min(end, limit)
+            if end - start < self._frames_of(self.config.min_silence):
+                continue
+            if best is None or end - start > best[1] - best[0]:
+                best = (start, end)
+        if best is not None:
+            return (best[0] + best[1]) // 2
+        return lo + int(np.argmin(db[lo:limit]))
+
+    def _cut(self, cut_frame: Optional[int]) -> Optional[PlannedChunk]:
+        """切出缓冲前 cut_frame 帧（None 表示全部），去除长静音后返回；整段静音时返回 None"""
+        audio = np.concatenate(self._pieces) if len(self._pieces) > 1 else self._pieces[0]
+        db = self._energies()
+        if cut_frame is None:
+            cut_samples, cut_frame = audio.size, db.size
+        else:
+            cut_samples = cut_frame * self.frame
+
+        head, rest = audio[:cut_samples], audio[cut_samples:]
+        head_db = db[:cut_frame]
+        source_start = self._buf_start
+
+        self._pieces = [rest] if rest.size else []
+        self._buffered = rest.size
+        self._buf_start += head.size
+        self._frame_db = [db[cut_frame:]] if db.size > cut_frame else []
+        self._frames = max(0, db.size - cut_frame)
+
+        silent = self._silence_mask(head_db)
+        if silent.size and silent.all():
+            self.dropped_samples += head.size
+            return None
+
+        # 需要保留的帧：非长静音部分 + 长静音两侧留白
+        keep = np.ones(head_db.size, dtype=bool)
+        pad = self._frames_of(self.config.keep_padding)
+        drop = self._frames_of(self.config.drop_silence)
+        for start, end in _runs(silent):
+            if end - start >= drop:
+                inner_start = start + pad if start > 0 else start
+                inner_end = end - pad if end < head_db.size else end
+                if inner_end > inner_start:
+                    keep[inner_start:inner_end] = False
+
+        spans: List[Span] = []
+        parts: List[np.ndarray] = []
+        offset = 0
+        for start, end in _runs(keep):
+            s0 = start * self.frame
+            # 最后一段包含不足一帧的尾部采样
+            s1 = head.size if end == head_db.size else end * self.frame
+            parts.append(head[s0:s1])
+            spans.append(Span(chunk_offset=offset, source_offset=source_start + s0, length=s1 - s0))
+            offset += s1 - s0
+        if head_db.size == 0:
+            parts, spans = [head], [Span(0, source_start, head.size)]
+            offset = head.size
+
+        self.dropped_samples += head.size - offset
+        return PlannedChunk(
+            pcm=np.concatenate(parts) if len(parts) > 1 else parts[0],
+            spans=spans,
+            source_start=source_start,
+            source_end=source_start + head.size,
+        )
@@ -0,0 +1,20 @@
+"""
+本地 ASR 服务进程
+
+faster-whisper 模型在服务进程中只加载一次，各 Worker 进程通过本机 HTTP 调用
+（asr.provider: server），不再各自持有一份模型内存。多个视频同时转写时，
+语音片段跨任务合批推理。
+
+用法: python -m services.asr_server [--host 127.0.0.1] [--port 8765] [--batch-size 8]
+"""
+
+from .batcher import BatchScheduler
+from .engine import WhisperEngine, merge_speech
+from .server import ASRServer
+
+__all__ = [
+    "ASRServer",
+    "BatchScheduler",
+    "WhisperEngine",
+    "merge_speech",
+]
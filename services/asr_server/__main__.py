@@ -0,0 +1,69 @@
+"""
+ASR 服务入口
+
+python -m services.asr_server --batch-size 8 --cpu-threads 8 --compute-type int8
+"""
+
+import argparse
+import signal
+import threading
+from urllib.parse import urlparse
+
+from packages.config import get_config
+from packages.logging import get_logger, setup_logging
+
+from .batcher import BatchScheduler
+from .engine import WhisperEngine
+from .server import ASRServer
+
+logger = get_logger(__name__)
+
+
+def main():
+    config = get_config()
+    asr = config.asr
+    default = urlparse(asr.server_url)
+
+    parser = argparse.ArgumentParser(prog="python -m services.asr_server", description="AliceLM 本地 ASR 服务")
+    parser.add_argument("--host", default=default.hostname or "127.0.0.1", help="监听地址（建议只监听本机）")
+    parser.add_argument("--port", type=int, default=default.port or 8765, help="监听端口")
+    parser.add_argument("--model", default=asr.model_size, help="faster-whisper 模型")
+    parser.add_argument("--device", default=asr.device, help="auto / cpu / cuda")
+    parser.add_argument("--compute-type", default=asr.compute_type, help="float16 / int8 / int8_float16")
+    parser.add_argument("--cpu-threads", type=int, default=asr.cpu_threads, help="推理线程数（0 为默认）")
+    parser.add_argument("--batch-size", type=int, default=asr.server_batch_size, help="每批最多语音片段数")
+    parser.add_argument("--max-wait-ms", type=int, default=asr.server_max_wait_ms, help="凑批等待时间（毫秒）")
+    args = parser.parse_args()
+
+    setup_logging(config.debug)
+
+    engine = WhisperEngine(
+        model_size=args.model,
+        device=args.device,
+        compute_type=args.compute_type,
+        cpu_threads=args.cpu_threads,
+    )
+    engine.load()
+
+    scheduler = BatchScheduler(engine, batch_size=args.batch_size, max_wait=args.max_wait_ms / 1000)
+    scheduler.start()
+    server = ASRServer((args.host, args.port), scheduler, model_name=args.model)
+
+    def shutdown(signum, frame):
+        logger.info("asr_server_signal_received", signal=signum)
+        # shutdown() 会等待 serve_forever 返回，不能在主线程的信号处理中直接调用
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    logger.info("asr_server_started", host=args.host, port=args.port, model=args.model, batch_size=args.batch_size)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        logger.info("asr_server_stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+跨任务的语音片段批处理
+
+每个转写请求在自己的线程里解码音频、切出语音片段，片段进入共享队列；
+单个推理线程从队列中取出同一 (语言, 提示词) 的片段组成一批，
+队列不满一批时最多等待 max_wait 秒以凑满。多个视频同时转写时，
+它们的片段共用一次推理，CPU 上的模型只有一份。
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from packages.logging import get_logger
+from services.asr.base import TranscriptResult, TranscriptSegment
+
+from .engine import SAMPLE_RATE
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _Job:
+    key: Tuple[Optional[str], Optional[str]]     # (语言, 提示词)
+    offsets: List[float]                         # 各片段在源音频中的起点（秒）
+    duration: float
+    results: Dict[int, List[TranscriptSegment]] = field(default_factory=dict)
+    error: Optional[BaseException] = None
+    done: threading.Event = field(default_factory=threading.Event)
+
+    def deliver(self, index: int, segments: List[TranscriptSegment]):
+        self.results[index] = segments
+        if len(self.results) == len(self.offsets):
+            self.done.set()
+
+    def fail(self, error: BaseException):
+        self.error = error
+        self.done.set()
+
+
+@dataclass
+class _Clip:
+    job: _Job
+    index: int
+    audio: np.ndarray
+
+
+class BatchScheduler:
+    """把多个任务的语音片段合批送入推理引擎"""
+
+    def __init__(self, engine, batch_size: int = 8, max_wait: float = 0.05):
+        """
+        Args:
+            engine: 推理引擎（WhisperEngine 或同接口对象）
+            batch_size: 每批最多片段数
+            max_wait: 不满一批时等待更多片段的时间（秒）
+        """
+        self.engine = engine
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait
+
+        self._pending: Deque[_Clip] = deque()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"jobs": 0, "batches": 0, "clips": 0, "multi_job_batches": 0}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="asr-batcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            failed = list(self._pending)
+            self._pending.clear()
+            self._cond.notify_all()
+        for clip in failed:
+            clip.job.fail(RuntimeError("ASR 服务已停止"))
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    # ========== 请求线程 ==========
+
+    def transcribe(
+        self,
+        audio_path: str,
+        language: Optional[str] = None,
+        prompt: Optional[str] = None,
+    ) -> TranscriptResult:
+        """解码并切分音频，等待所有片段转写完成（在请求线程中调用）"""
+        audio = self.engine.decode(audio_path)
+        duration = audio.size / SAMPLE_RATE
+        if language is None:
+            language = self.engine.detect_language(audio)
+        ranges = self.engine.speech_clips(audio)
+        if not ranges:
+            return TranscriptResult(text="", language=language or "zh", duration=duration)
+
+        job = _Job(key=(language, prompt), offsets=[start / SAMPLE_RATE for start, _ in ranges], duration=duration)
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("ASR 服务已停止")
+            for index, (start, end) in enumerate(ranges):
+                self._pending.append(_Clip(job, index, audio[start:end]))
+            self._stats["jobs"] += 1
+            self._cond.notify_all()
+        self.start()
+
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+
+        segments = [
+            TranscriptSegment(start=seg.start + offset, end=seg.end + offset, text=seg.text)
+            for index, offset in enumerate(job.offsets)
+            for seg in job.results[index]
+            if seg.text
+        ]
+        return TranscriptResult(
+            text=" ".join(seg.text for seg in segments),
+            segments=segments,
+            language=language or "zh",
+            duration=duration,
+        )
+
+    # ========== 推理线程 ==========
+
+    def _next_batch(self) -> Optional[List[_Clip]]:
+        with self._cond:
+            while not self._pending and not self._stopped:
+                self._cond.wait()
+            if self._stopped:
+                return None
+
+            deadline = time.monotonic() + self.max_wait
+            while len(self._pending) < self.batch_size and not self._stopped:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            if self._stopped:
+                return None
+
+            # 取与队首同 (语言, 提示词) 的片段，其余保持原顺序；已失败任务的片段丢弃
+            key = None
+            batch, rest = [], deque()
+            while self._pending:
+                clip = self._pending.popleft()
+                if clip.job.error is not None:
+                    continue
+                if key is None:
+                    key = clip.job.key
+                if clip.job.key == key and len(batch) < self.batch_size:
+                    batch.append(clip)
+                else:
+                    rest.append(clip)
+            self._pending = rest
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if not batch:
+                continue
+            language, prompt = batch[0].job.key
+            try:
+                results = self.engine.transcribe_batch([clip.audio for clip in batch], language, prompt)
+            except Exception as e:
+                logger.exception("asr_batch_failed", clips=len(batch))
+                for job in {id(clip.job): clip.job for clip in batch}.values():
+                    job.fail(e)
+                continue
+
+            self._stats["batches"] += 1
+            self._stats["clips"] += len(batch)
+            if len({id(clip.job) for clip in batch}) > 1:
+                self._stats["multi_job_batches"] += 1
+            for clip, segments in zip(batch, results):
+                if clip.job.error is None:
+                    clip.job.deliver(clip.index, segments)
+
+    def stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._stats, queued=len(self._pending))
+        stats["avg_batch"] = round(stats["clips"] / stats["batches"], 2) if stats["batches"] else 0.0
+        return stats
@@ -0,0 +1,129 @@
+"""
+faster-whisper 推理引擎（ASR 服务进程内只加载一次）
+
+对批处理调度器提供四个操作：解码、语言检测、语音区间切分、批量转写。
+批量转写把多个任务的语音片段拼接成一段音频，以 clip_timestamps 交给
+BatchedInferencePipeline 一次推理，再按片段偏移拆回；旧版本 faster-whisper
+没有批量接口时逐段转写。
+"""
+
+import bisect
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from packages.logging import get_logger
+from services.asr.base import TranscriptSegment
+from services.asr.faster_whisper import FasterWhisperProvider
+
+logger = get_logger(__name__)
+
+SAMPLE_RATE = 16000
+MAX_CLIP_SECONDS = 30       # Whisper 单个窗口长度
+DEFAULT_PROMPT = "以下是普通话的句子。"
+
+
+def merge_speech(
+    speech: Sequence[Tuple[int, int]],
+    max_samples: int = MAX_CLIP_SECONDS * SAMPLE_RATE,
+) -> List[Tuple[int, int]]:
+    """把相邻语音区间合并为不超过一个窗口的片段（采样区间 [start, end)）"""
+    clips: List[Tuple[int, int]] = []
+    for start, end in speech:
+        # 超过窗口的单个区间先切开
+        while end - start > max_samples:
+            clips.append((start, start + max_samples))
+            start += max_samples
+        if clips and end - clips[-1][0] <= max_samples:
+            clips[-1] = (clips[-1][0], end)
+        else:
+            clips.append((start, end))
+    return clips
+
+
+class WhisperEngine:
+    """共享的 faster-whisper 模型"""
+
+    def __init__(
+        self,
+        model_size: str = "medium",
+        device: str = "auto",
+        compute_type: str = "int8",
+        cpu_threads: int = 0,
+    ):
+        self.model_size = model_size
+        self._provider = FasterWhisperProvider(
+            model_size=model_size,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+        )
+        self._batched = None
+
+    def load(self):
+        """加载模型（启动服务时调用，避免首个请求承担加载耗时）"""
+        model = self._provider._load_model()
+        if self._batched is None:
+            try:
+                from faster_whisper import BatchedInferencePipeline
+            except ImportError:
+                self._batched = False
+                logger.warning("faster_whisper_batching_unavailable")
+            else:
+                self._batched = BatchedInferencePipeline(model=model)
+        return model
+
+    def decode(self, audio_path: str) -> np.ndarray:
+        from faster_whisper.audio import decode_audio
+
+        return decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+
+    def detect_language(self, audio: np.ndarray) -> Optional[str]:
+        model = self.load()
+        language, _, _ = model.detect_language(audio[: MAX_CLIP_SECONDS * SAMPLE_RATE])
+        return language
+
+    def speech_clips(self, audio: np.ndarray) -> List[Tuple[int, int]]:
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+        speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=500))
+        return merge_speech([(ts["start"], ts["end"]) for ts in speech])
+
+    def transcribe_batch(
+        self,
+        clips: List[np.ndarray],
+        language: Optional[str],
+        prompt: Optional[str],
+    ) -> List[List[TranscriptSegment]]:
+        """转写一批片段，返回每个片段内的分段（时间相对片段起点）"""
+        model = self.load()
+        prompt = prompt or DEFAULT_PROMPT
+
+        if not self._batched:
+            results = []
+            for clip in clips:
+                segments, _ = model.transcribe(clip, language=language, initial_prompt=prompt, vad_filter=False)
+                results.append([TranscriptSegment(s.start, s.end, s.text.strip()) for s in segments])
+            return results
+
+        offsets, clip_timestamps, position = [], [], 0
+        for clip in clips:
+            offsets.append(position / SAMPLE_RATE)
+            clip_timestamps.append({"start": position, "end": position + clip.size})
+            position += clip.size
+        audio = np.concatenate(clips)
+
+        segments, _ = self._batched.transcribe(
+            audio,
+            language=language,
+            initial_prompt=prompt,
+            batch_size=len(clips),
+            vad_filter=False,
+            clip_timestamps=clip_timestamps,
+        )
+        results: List[List[TranscriptSegment]] = [[] for _ in clips]
+        for seg in segments:
+            index = max(0, bisect.bisect_right(offsets, seg.start + 1e-3) - 1)
+            offset = offsets[index]
+            results[index].append(TranscriptSegment(seg.start - offset, seg.end - offset, seg.text.strip()))
+        return results
@@ -0,0 +1,92 @@
+"""
+ASR 服务的 HTTP 接口（只监听本机）
+
+    POST /transcribe  {"audio_path": "...", "language": null, "prompt": null}
+    GET  /health
+
+音频通过本机文件路径传递（与 Worker 共享磁盘），不经过网络上传。
+"""
+
+import json
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from packages.logging import get_logger
+
+from .batcher import BatchScheduler
+
+logger = get_logger(__name__)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "ASRServer"
+
+    def _send(self, status: HTTPStatus, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send(HTTPStatus.NOT_FOUND, {"error": "not found"})
+            return
+        self._send(HTTPStatus.OK, {
+            "status": "ok",
+            "model": self.server.model_name,
+            "batcher": self.server.scheduler.stats(),
+        })
+
+    def do_POST(self):
+        if self.path != "/transcribe":
+            self._send(HTTPStatus.NOT_FOUND, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            audio_path = request["audio_path"]
+        except (ValueError, KeyError):
+            self._send(HTTPStatus.BAD_REQUEST, {"error": "需要 JSON 参数 audio_path"})
+            return
+        if not Path(audio_path).is_file():
+            self._send(HTTPStatus.BAD_REQUEST, {"error": f"音频文件不存在: {audio_path}"})
+            return
+
+        try:
+            result = self.server.scheduler.transcribe(
+                audio_path,
+                language=request.get("language"),
+                prompt=request.get("prompt"),
+            )
+        except Exception as e:
+            logger.exception("asr_server_transcribe_failed", audio=audio_path)
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+            return
+
+        self._send(HTTPStatus.OK, {
+            "text": result.text,
+            "language": result.language,
+            "duration": result.duration,
+            "segments": [[seg.start, seg.end, seg.text] for seg in result.segments],
+        })
+
+    def log_message(self, format, *args):
+        logger.debug("asr_server_request", message=format % args)
+
+
+class ASRServer(ThreadingHTTPServer):
+    """每个请求一个线程（解码、切分并行），推理由共享的批处理调度器完成"""
+
+    daemon_threads = True
+
+    def __init__(self, address, scheduler: BatchScheduler, model_name: str = ""):
+        super().__init__(address, _Handler)
+        self.scheduler = scheduler
+        self.model_name = model_name
+
+    def server_close(self):
+        super().server_close()
+        self.scheduler.stop()
@@ -10,6 +10,7 @@ from .base import (
     ContentMetadata,
     DownloadMode,
     DownloadResult,
+    ProgressCallback,
     get_downloader,
     list_downloaders,
     register_downloader,
@@ -17,6 +18,7 @@ from .base import (
 
 # 具体实现
 from .bilibili_downloader import BilibiliDownloader
+from .http_downloader import HTTPDownloader
 from .podcast_downloader import PodcastDownloader
 
 # 兼容旧代码
@@ -31,6 +33,7 @@ from .bbdown import (
 # 注册默认下载器
 register_downloader(BilibiliDownloader())
 register_downloader(PodcastDownloader())
+register_downloader(HTTPDownloader())
 
 __all__ = [
     # 新接口
@@ -38,10 +41,12 @@ __all__ = [
     "ContentMetadata",
     "DownloadMode",
     "DownloadResult",
+    "ProgressCallback",
     "get_downloader",
     "list_downloaders",
     "register_downloader",
     "BilibiliDownloader",
+    "HTTPDownloader",
     "PodcastDownloader",
     # 兼容旧代码
     "BBDownService",
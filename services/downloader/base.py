@@ -8,7 +8,7 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 
 class DownloadMode(Enum):
@@ -29,6 +29,10 @@ class DownloadResult:
     duration: float = 0  # 下载耗时（秒）
 
 
+# 下载进度回调：(已下载字节, 总字节；未知时为 0)
+ProgressCallback = Callable[[int, int], None]
+
+
 @dataclass
 class ContentMetadata:
     """内容元数据"""
@@ -61,6 +65,7 @@ class ContentDownloader(ABC):
         source_id: str,
         mode: DownloadMode = DownloadMode.AUDIO,
         output_dir: Optional[Path] = None,
+        progress: Optional[ProgressCallback] = None,
     ) -> DownloadResult:
         """
         下载内容
@@ -69,6 +74,7 @@ class ContentDownloader(ABC):
             source_id: 内容源 ID（如 bvid, youtube_id, rss_guid）
             mode: 下载模式（视频/音频/字幕）
             output_dir: 输出目录
+            progress: 进度回调（不支持进度的下载器可以忽略）
 
         Returns:
             DownloadResult
@@ -14,7 +14,7 @@ import httpx
 from packages.config import get_config
 from packages.logging import get_logger
 
-from .base import ContentDownloader, ContentMetadata, DownloadMode, DownloadResult
+from .base import ContentDownloader, ContentMetadata, DownloadMode, DownloadResult, ProgressCallback
 from .bbdown import BBDownService, DownloadMode as BBDownMode
 
 logger = get_logger(__name__)
@@ -49,8 +49,9 @@ class BilibiliDownloader(ContentDownloader):
         source_id: str,
         mode: DownloadMode = DownloadMode.AUDIO,
         output_dir: Optional[Path] = None,
+        progress: Optional[ProgressCallback] = None,
     ) -> DownloadResult:
-        """下载 B 站视频/音频"""
+        """下载 B 站视频/音频（BBDown 不提供字节进度，progress 被忽略）"""
         # 确保 BV 格式正确
         bvid = self._normalize_bvid(source_id)
 
@@ -0,0 +1,317 @@
+"""
+HTTP 直链下载器
+
+播客音频、直接媒体 URL 等通过 HTTP 获取的内容共用：
+- 大文件且服务端支持 Range 时分段并发下载（见 segmented.py），中断后只补下缺失的区间
+- 否则单连接流式写入 .part，中断后按 Range 续传
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+import httpx
+
+from packages.config import get_config
+from packages.logging import get_logger
+
+from .base import ContentDownloader, ContentMetadata, DownloadMode, DownloadResult, ProgressCallback
+from .segmented import SegmentedFetcher, SegmentError, SegmentMismatch, probe_ranges
+
+logger = get_logger(__name__)
+
+PART_SUFFIX = ".part"
+SEGMENTED_SUFFIX = ".seg"      # 分段下载的预分配文件，已完成的区间记录在同名 .seg.json
+
+
+def _load_meta(meta_path: Path) -> Optional[dict]:
+    """读取 .part 的续传信息，不存在或损坏时返回 None"""
+    try:
+        return json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _if_range(meta: dict) -> Optional[str]:
+    """
+    续传请求的 If-Range 值
+
+    弱 ETag（W/ 前缀）不能用于 If-Range，此时退回 Last-Modified；两者都没有则不续传。
+    """
+    etag = meta.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return meta.get("last_modified")
+
+
+def _resumable(resp: httpx.Response, offset: int, meta: dict) -> bool:
+    """服务端是否按请求从 offset 继续返回了同一个文件"""
+    if resp.status_code != 206:
+        return False                         # 忽略 Range 或 If-Range 不匹配：返回完整文件
+    content_range = resp.headers.get("content-range", "")
+    if not content_range.startswith(f"bytes {offset}-"):
+        return False
+    etag = resp.headers.get("etag")
+    return not (etag and meta.get("etag") and etag != meta["etag"])
+
+
+class HTTPDownloader(ContentDownloader):
+    """
+    HTTP 直链下载器（source_id 即媒体 URL）
+
+    Args:
+        output_dir: 默认输出目录
+        segments: 分段并发数（1 关闭分段下载，默认读取 download.segments）
+        min_segment_size: 每段最小字节数，文件不足两段时单连接下载
+    """
+
+    def __init__(
+        self,
+        output_dir: str = "data/downloads/http",
+        segments: Optional[int] = None,
+        min_segment_size: Optional[int] = None,
+    ):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        config = get_config().download
+        self.segments = segments or config.segments
+        self.min_segment_size = min_segment_size or config.min_segment_size
+
+    @property
+    def source_type(self) -> str:
+        return "http"
+
+    async def download(
+        self,
+        source_id: str,
+        mode: DownloadMode = DownloadMode.AUDIO,
+        output_dir: Optional[Path] = None,
+        progress: Optional[ProgressCallback] = None,
+    ) -> DownloadResult:
+        """
+        下载 URL 指向的文件
+
+        文件足够大且服务端支持 Range 时分成 segments 段并发下载到预分配的 {hash}.seg，
+        各段已落盘的区间记录在 .seg.json，中断后只下载缺失的区间；
+        否则按块流式写入 {hash}.part，内存占用与文件大小无关。单连接下载中断时保留 .part
+        与记录服务端校验值（ETag / Last-Modified）的 .part.json，下次用 Range + If-Range
+        续传；服务端文件已变化时从头下载。完成后重命名为正式文件。
+
+        Args:
+            source_id: 文件 URL
+            mode: 下载模式（直链按原文件保存，忽略）
+            output_dir: 输出目录
+            progress: 进度回调 (已下载字节, 总字节)
+        """
+        start_time = time.time()
+        work_dir = Path(output_dir or self.output_dir)
+        url = source_id
+
+        try:
+            work_dir.mkdir(parents=True, exist_ok=True)
+            config = get_config().download
+            file_hash = hashlib.md5(url.encode()).hexdigest()[:12]
+            part_path = work_dir / f"{file_hash}{PART_SUFFIX}"
+
+            async with httpx.AsyncClient(timeout=config.timeout, follow_redirects=True) as client:
+                logger.info("http_download_start", source_type=self.source_type, url=url[:100])
+                result = None
+                if not part_path.exists():          # 有未完成的 .part 时优先单连接续传
+                    result = await self._fetch_segmented(client, url, part_path, config, progress)
+                if result is None:
+                    result = await self._stream_to_part(client, url, part_path, config, progress)
+                file_path, size, resumed_from = result
+
+            duration = time.time() - start_time
+            logger.info(
+                "http_download_complete",
+                source_type=self.source_type,
+                url=url[:100],
+                file_path=str(file_path),
+                size_mb=size / 1024 / 1024,
+                resumed_from=resumed_from,
+                duration=duration,
+            )
+
+            return DownloadResult(
+                success=True,
+                file_path=file_path,
+                duration=duration,
+            )
+
+        except Exception as e:
+            logger.error("http_download_failed", source_type=self.source_type, url=url[:100], error=str(e))
+            return DownloadResult(
+                success=False,
+                error=str(e),
+                duration=time.time() - start_time,
+            )
+
+    async def _fetch_segmented(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        part_path: Path,
+        config,
+        progress: Optional[ProgressCallback],
+    ) -> Optional[Tuple[Path, int, int]]:
+        """
+        分段并发下载；不值得分段、服务端不支持 Range 或分段失败时返回 None（由调用方单连接下载）
+
+        开启续传（download.resume）时，中断或某段重试耗尽会保留 .seg 与 .seg.json 并抛出异常，
+        下次下载只补缺失的区间；服务端文件已变化时丢弃已下载的分段，回退到单连接下载。
+        """
+        seg_path = part_path.with_suffix(SEGMENTED_SUFFIX)
+        state_path = seg_path.with_name(seg_path.name + ".json")
+        info = await probe_ranges(client, url) if self.segments >= 2 else None
+        segments = min(self.segments, info.size // self.min_segment_size) if info else 0
+        if segments < 2:
+            if self.segments >= 2:
+                logger.debug("segmented_download_skipped", url=url[:100], range_support=info is not None)
+            self._discard_segmented(seg_path, state_path)
+            return None
+
+        fetcher = SegmentedFetcher(
+            client,
+            segments=segments,
+            retries=config.segment_retries,
+            buffer_size=config.chunk_size,
+            progress_interval=config.progress_interval,
+        )
+        try:
+            size = await fetcher.fetch(url, seg_path, info, progress, state_path=state_path if config.resume else None)
+        except SegmentError as e:
+            if config.resume and not isinstance(e, SegmentMismatch) and state_path.exists():
+                logger.warning("segmented_download_interrupted", url=url[:100], error=str(e))
+                raise
+            logger.warning("segmented_download_fallback", url=url[:100], error=str(e))
+            self._discard_segmented(seg_path, state_path)
+            return None
+        except BaseException:
+            if not (config.resume and state_path.exists()):
+                self._discard_segmented(seg_path, state_path)
+            raise
+
+        file_path = part_path.with_suffix(self._get_extension(info.content_type, url))
+        os.replace(seg_path, file_path)
+        return file_path, size, 0
+
+    async def _stream_to_part(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        part_path: Path,
+        config,
+        progress: Optional[ProgressCallback],
+    ) -> Tuple[Path, int, int]:
+        """流式下载到 .part（必要时续传），完成后重命名；返回 (文件路径, 大小, 续传起点)"""
+        meta_path = part_path.with_name(part_path.name + ".json")
+        meta = _load_meta(meta_path) if config.resume else None
+        offset = part_path.stat().st_size if meta and meta.get("url") == url and part_path.exists() else 0
+        validator = _if_range(meta) if offset else None
+        if not validator:
+            offset = 0
+
+        for _ in range(2):
+            # 禁止压缩传输：Range 偏移和 Content-Length 按实际文件字节计算
+            headers = {"Accept-Encoding": "identity"}
+            if offset:
+                headers.update({"Range": f"bytes={offset}-", "If-Range": validator})
+            async with client.stream("GET", url, headers=headers) as resp:
+                if offset and resp.status_code == 416:
+                    if offset == meta.get("total"):
+                        # 上次已下载完整，只是没来得及重命名
+                        return self._finish_part(part_path, meta_path, meta["ext"]), offset, offset
+                    offset = 0
+                    continue
+                resp.raise_for_status()
+
+                if offset and not _resumable(resp, offset, meta):
+                    logger.info("http_download_restart", url=url[:100], offset=offset, status=resp.status_code)
+                    offset = 0
+                    if resp.status_code == 206:
+                        continue                 # 返回的是部分内容但不是同一文件：不带 Range 重新请求
+
+                length = int(resp.headers.get("content-length") or 0)
+                meta = {
+                    "url": url,
+                    "etag": resp.headers.get("etag") or (meta["etag"] if offset else None),
+                    "last_modified": resp.headers.get("last-modified") or (meta["last_modified"] if offset else None),
+                    "total": offset + length if length else 0,
+                    "ext": meta["ext"] if offset else self._get_extension(resp.headers.get("content-type", ""), url),
+                }
+                # 先落盘续传信息，写入过程中断也能续传
+                meta_path.write_text(json.dumps(meta), encoding="utf-8")
+
+                done = offset
+                reported = 0.0
+                # 收到的数据直接进文件缓冲（chunk_size 即写盘块大小），中断时已收到的字节都会落盘
+                with open(part_path, "ab" if offset else "wb", buffering=config.chunk_size) as f:
+                    async for chunk in resp.aiter_bytes():
+                        f.write(chunk)
+                        done += len(chunk)
+                        if progress and time.monotonic() - reported >= config.progress_interval:
+                            reported = time.monotonic()
+                            progress(done, meta["total"])
+                break
+        else:
+            raise IOError("服务端续传响应无效")
+
+        if meta["total"] and done != meta["total"]:
+            raise IOError(f"下载不完整: {done}/{meta['total']} 字节")
+        if progress:
+            progress(done, meta["total"] or done)
+        return self._finish_part(part_path, meta_path, meta["ext"]), done, offset
+
+    @staticmethod
+    def _discard_segmented(seg_path: Path, state_path: Path):
+        """删除分段下载的残留文件"""
+        seg_path.unlink(missing_ok=True)
+        state_path.unlink(missing_ok=True)
+
+    def _finish_part(self, part_path: Path, meta_path: Path, ext: str) -> Path:
+        """.part → 正式文件（同目录 rename，原子替换）"""
+        file_path = part_path.with_name(part_path.name[: -len(PART_SUFFIX)] + ext)
+        os.replace(part_path, file_path)
+        meta_path.unlink(missing_ok=True)
+        return file_path
+
+    def _get_extension(self, content_type: str, url: str) -> str:
+        """根据 content-type 或 URL 确定文件扩展名"""
+        type_map = {
+            "audio/mpeg": ".mp3",
+            "audio/mp3": ".mp3",
+            "audio/mp4": ".m4a",
+            "audio/x-m4a": ".m4a",
+            "audio/aac": ".aac",
+            "audio/ogg": ".ogg",
+            "audio/wav": ".wav",
+            "audio/flac": ".flac",
+        }
+
+        for mime, ext in type_map.items():
+            if mime in content_type:
+                return ext
+
+        # 从 URL 推断
+        url_lower = url.lower()
+        for ext in [".mp3", ".m4a", ".aac", ".ogg", ".wav", ".flac"]:
+            if ext in url_lower:
+                return ext
+
+        return ".mp3"  # 默认
+
+    async def get_metadata(self, source_id: str) -> ContentMetadata:
+        """直链没有元数据接口，只返回以 URL 摘要为 ID 的基本信息"""
+        file_hash = hashlib.md5(source_id.encode()).hexdigest()[:12]
+        return ContentMetadata(
+            source_type=self.source_type,
+            source_id=file_hash,
+            title=Path(httpx.URL(source_id).path).name or file_hash,
+            author="Unknown",
+            source_url=source_id,
+        )
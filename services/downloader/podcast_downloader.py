@@ -1,12 +1,10 @@
 """
 播客/RSS 内容下载器
 
-支持从 RSS feed 下载播客音频。
+支持从 RSS feed 下载播客音频（音频下载复用 HTTPDownloader 的分段/续传逻辑）。
 """
 
 import hashlib
-import time
-from pathlib import Path
 from typing import Optional
 from xml.etree import ElementTree as ET
 
@@ -14,87 +12,22 @@ import httpx
 
 from packages.logging import get_logger
 
-from .base import ContentDownloader, ContentMetadata, DownloadMode, DownloadResult
+from .base import ContentMetadata
+from .http_downloader import HTTPDownloader
 
 logger = get_logger(__name__)
 
 
-class PodcastDownloader(ContentDownloader):
+class PodcastDownloader(HTTPDownloader):
     """播客/RSS 内容下载器"""
 
-    def __init__(self, output_dir: str = "data/downloads/podcast"):
-        self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+    def __init__(self, output_dir: str = "data/downloads/podcast", **kwargs):
+        super().__init__(output_dir, **kwargs)
 
     @property
     def source_type(self) -> str:
         return "podcast"
 
-    async def download(
-        self,
-        source_id: str,
-        mode: DownloadMode = DownloadMode.AUDIO,
-        output_dir: Optional[Path] = None,
-    ) -> DownloadResult:
-        """
-        下载播客音频
-
-        Args:
-            source_id: 音频 URL 或 RSS item guid
-            mode: 下载模式（播客只支持 AUDIO）
-            output_dir: 输出目录
-        """
-        start_time = time.time()
-        work_dir = output_dir or self.output_dir
-
-        # source_id 可能是直接的音频 URL
-        audio_url = source_id
-
-        try:
-            async with httpx.AsyncClient(timeout=300, follow_redirects=True) as client:
-                # 下载音频
-                logger.info("podcast_download_start", url=audio_url[:100])
-
-                resp = await client.get(audio_url)
-                resp.raise_for_status()
-
-                # 确定文件扩展名
-                content_type = resp.headers.get("content-type", "")
-                ext = self._get_extension(content_type, audio_url)
-
-                # 生成文件名
-                file_hash = hashlib.md5(audio_url.encode()).hexdigest()[:12]
-                file_name = f"{file_hash}{ext}"
-                file_path = work_dir / file_name
-
-                work_dir.mkdir(parents=True, exist_ok=True)
-
-                # 保存文件
-                file_path.write_bytes(resp.content)
-
-                duration = time.time() - start_time
-                logger.info(
-                    "podcast_download_complete",
-                    url=audio_url[:100],
-                    file_path=str(file_path),
-                    size_mb=len(resp.content) / 1024 / 1024,
-                    duration=duration,
-                )
-
-                return DownloadResult(
-                    success=True,
-                    file_path=file_path,
-                    duration=duration,
-                )
-
-        except Exception as e:
-            logger.error("podcast_download_failed", url=audio_url[:100], error=str(e))
-            return DownloadResult(
-                success=False,
-                error=str(e),
-                duration=time.time() - start_time,
-            )
-
     async def get_metadata(self, source_id: str) -> ContentMetadata:
         """
         获取播客元数据
@@ -227,31 +160,6 @@ class PodcastDownloader(ContentDownloader):
 
         return episodes
 
-    def _get_extension(self, content_type: str, url: str) -> str:
-        """根据 content-type 或 URL 确定文件扩展名"""
-        type_map = {
-            "audio/mpeg": ".mp3",
-            "audio/mp3": ".mp3",
-            "audio/mp4": ".m4a",
-            "audio/x-m4a": ".m4a",
-            "audio/aac": ".aac",
-            "audio/ogg": ".ogg",
-            "audio/wav": ".wav",
-            "audio/flac": ".flac",
-        }
-
-        for mime, ext in type_map.items():
-            if mime in content_type:
-                return ext
-
-        # 从 URL 推断
-        url_lower = url.lower()
-        for ext in [".mp3", ".m4a", ".aac", ".ogg", ".wav", ".flac"]:
-            if ext in url_lower:
-                return ext
-
-        return ".mp3"  # 默认
-
     def _parse_duration(self, duration_str: str) -> int:
         """解析时长字符串为秒数"""
         if not duration_str:
@@ -0,0 +1,280 @@
+"""
+分段并发下载（HTTP Range）
+
+CDN 往往按连接限速，大文件把 [0, size) 切成 N 段并发请求，每段写入预分配文件的对应偏移。
+单段失败只重试该段（从已写入的位置继续）；服务端不支持 Range 时由调用方回退到单连接下载。
+传入 state_path 时各段已落盘的区间记录在旁路 JSON 里，中断后再次下载只请求缺失的区间。
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import httpx
+
+from packages.logging import get_logger
+
+from .base import ProgressCallback
+
+logger = get_logger(__name__)
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class SegmentError(IOError):
+    """分段下载无法继续（服务端不再按 Range 返回同一文件，或重试耗尽）"""
+
+
+class SegmentMismatch(SegmentError):
+    """服务端忽略 Range 或 If-Range 不匹配（文件已变化），已下载的分段作废"""
+
+
+@dataclass(frozen=True)
+class RangeInfo:
+    """Range 探测结果"""
+    size: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_type: str = ""
+
+    @property
+    def validator(self) -> Optional[str]:
+        """If-Range 校验值（弱 ETag 不能用于 If-Range）"""
+        if self.etag and not self.etag.startswith("W/"):
+            return self.etag
+        return self.last_modified
+
+
+async def probe_ranges(client: httpx.AsyncClient, url: str) -> Optional[RangeInfo]:
+    """
+    用 Range: bytes=0-0 探测服务端是否支持分段（不依赖 HEAD，部分 CDN 不支持 HEAD）
+
+    Returns:
+        支持 Range 且总大小已知时返回 RangeInfo，否则 None
+    """
+    headers = {"Range": "bytes=0-0", "Accept-Encoding": "identity"}
+    async with client.stream("GET", url, headers=headers) as resp:
+        if resp.status_code != 206:
+            return None
+        total = resp.headers.get("content-range", "").rpartition("/")[2]
+        if not total.isdigit():
+            return None
+        return RangeInfo(
+            size=int(total),
+            etag=resp.headers.get("etag"),
+            last_modified=resp.headers.get("last-modified"),
+            content_type=resp.headers.get("content-type", ""),
+        )
+
+
+def split_ranges(size: int, segments: int) -> List[Tuple[int, int]]:
+    """[0, size) 均分为 segments 段，返回闭区间 (start, end) 列表"""
+    step = -(-size // segments)
+    return [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+
+
+def merge_ranges(ranges) -> List[Tuple[int, int]]:
+    """合并半开区间 [start, end)，按起点排序"""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted((int(s), int(e)) for s, e in ranges if int(e) > int(s)):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_ranges(ranges: List[Tuple[int, int]], done: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """从闭区间列表中扣除已完成的半开区间（merge_ranges 的结果），返回仍需下载的闭区间"""
+    missing = []
+    for start, end in ranges:
+        position = start
+        for done_start, done_end in done:
+            if done_end <= position or done_start > end:
+                continue
+            if done_start > position:
+                missing.append((position, done_start - 1))
+            position = max(position, done_end)
+        if position <= end:
+            missing.append((position, end))
+    return missing
+
+
+def preallocate(path: Path, size: int):
+    """创建（或截断）为指定大小的文件；支持时预先分配磁盘块，空间不足在开始前就报错"""
+    with open(path, "wb") as f:
+        if hasattr(os, "posix_fallocate") and size:
+            os.posix_fallocate(f.fileno(), 0, size)
+        else:
+            f.truncate(size)
+
+
+class SegmentedFetcher:
+    """
+    把一个 URL 分段并发下载到预分配文件（每次下载新建一个实例）
+
+    Args:
+        client: 共享的 httpx.AsyncClient（连接池上限需不小于 segments）
+        segments: 并发段数
+        retries: 单段失败后的重试次数
+        retry_delay: 首次重试等待（秒），之后指数增长
+        buffer_size: 每段写文件的缓冲大小（字节）
+        progress_interval: 进度回调最小间隔（秒）
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        segments: int = 4,
+        retries: int = 3,
+        retry_delay: float = 0.5,
+        buffer_size: int = 1 << 20,
+        progress_interval: float = 1.0,
+    ):
+        self.client = client
+        self.segments = max(1, segments)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.buffer_size = buffer_size
+        self.progress_interval = progress_interval
+
+    async def fetch(
+        self,
+        url: str,
+        dest: Path,
+        info: RangeInfo,
+        progress: Optional[ProgressCallback] = None,
+        state_path: Optional[Path] = None,
+    ) -> int:
+        """
+        下载到 dest（先按 info.size 预分配），返回文件大小
+
+        Args:
+            state_path: 续传记录（各段已落盘的区间）；记录与 dest 匹配时只下载缺失区间，
+                下载完成后删除。服务端没有强校验值（ETag / Last-Modified）时不续传
+
+        Raises:
+            SegmentMismatch: 服务端返回的已不是同一文件
+            SegmentError: 某段重试耗尽（已落盘的区间保留在 state_path 里）
+        """
+        self._state_path = state_path if info.validator else None
+        self._state = {"url": url, "size": info.size, "validator": info.validator}
+        self._size = info.size
+        resumed = self._load_state(dest) if self._state_path else []
+        if not resumed:
+            preallocate(dest, info.size)
+        self._resumed = resumed
+        self._flushed = {}
+        self._flushed_at = {}
+        self._done = sum(end - start for start, end in resumed)
+        self._reported = 0.0
+        self._progress = progress
+        self._save_state()
+        if resumed:
+            logger.info("segmented_download_resume", url=url[:100], done=self._done, size=info.size)
+
+        pending = missing_ranges(split_ranges(info.size, self.segments), resumed)
+        tasks = [
+            asyncio.ensure_future(self._fetch_segment(url, dest, start, end, info.validator))
+            for start, end in pending
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._save_state()
+
+        if self._state_path:
+            self._state_path.unlink(missing_ok=True)
+        if progress:
+            progress(info.size, info.size)
+        return info.size
+
+    def _load_state(self, dest: Path) -> List[Tuple[int, int]]:
+        """读取与本次下载匹配的已完成区间；记录缺失、损坏或文件已变化时返回空"""
+        try:
+            state = json.loads(self._state_path.read_text(encoding="utf-8"))
+            if any(state.get(k) != v for k, v in self._state.items()) or dest.stat().st_size != self._size:
+                return []
+            return merge_ranges(state.get("done") or [])
+        except (OSError, ValueError, TypeError):
+            return []
+
+    def _save_state(self):
+        """已落盘区间写入续传记录（先写临时文件再替换，中断时不会留下半截 JSON）"""
+        if not self._state_path:
+            return
+        done = merge_ranges(self._resumed + list(self._flushed.items()))
+        tmp = self._state_path.with_name(self._state_path.name + ".tmp")
+        tmp.write_text(json.dumps({**self._state, "done": done}), encoding="utf-8")
+        os.replace(tmp, self._state_path)
+
+    def _checkpoint(self, f, start: int, position: int):
+        """每段每隔 progress_interval 记录一次 [start, position) 已落盘（先把缓冲写出再记录）"""
+        now = time.monotonic()
+        if now - self._flushed_at.setdefault(start, now) >= self.progress_interval:
+            f.flush()
+            self._flushed[start] = position
+            self._flushed_at[start] = now
+            self._save_state()
+
+    async def _fetch_segment(self, url: str, dest: Path, start: int, end: int, validator: Optional[str]):
+        """下载闭区间 [start, end]；传输失败时从已写入位置重试"""
+        position = start
+        attempt = 0
+        with open(dest, "r+b", buffering=self.buffer_size) as f:
+            f.seek(start)
+            try:
+                while position <= end:
+                    headers = {"Range": f"bytes={position}-{end}", "Accept-Encoding": "identity"}
+                    if validator:
+                        headers["If-Range"] = validator
+                    try:
+                        async with self.client.stream("GET", url, headers=headers) as resp:
+                            if resp.status_code in _RETRY_STATUS:
+                                raise httpx.HTTPStatusError(
+                                    f"HTTP {resp.status_code}", request=resp.request, response=resp
+                                )
+                            if resp.status_code != 206 or not resp.headers.get(
+                                "content-range", ""
+                            ).startswith(f"bytes {position}-"):
+                                # 200 表示忽略 Range 或 If-Range 不匹配（文件已变化），重试无意义
+                                raise SegmentMismatch(
+                                    f"分段 {start}-{end} 响应无效: HTTP {resp.status_code} "
+                                    f"{resp.headers.get('content-range', '')}"
+                                )
+                            async for chunk in resp.aiter_bytes():
+                                chunk = chunk[: end + 1 - position]
+                                f.write(chunk)
+                                position += len(chunk)
+                                self._advance(len(chunk))
+                                if self._state_path:
+                                    self._checkpoint(f, start, position)
+                                if position > end:
+                                    break
+                            if position <= end:
+                                # 连接正常结束但数据不足，按传输中断处理
+                                raise httpx.ReadError(f"数据不完整: {position - start}/{end + 1 - start}")
+                    except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                        attempt += 1
+                        if attempt > self.retries:
+                            raise SegmentError(f"分段 {start}-{end} 重试 {self.retries} 次仍失败: {e}") from e
+                        logger.warning(
+                            "segment_retry", start=start, end=end, position=position, attempt=attempt, error=str(e)
+                        )
+                        await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+            finally:
+                f.flush()
+                self._flushed[start] = position
+
+    def _advance(self, n: int):
+        self._done += n
+        if self._progress and time.monotonic() - self._reported >= self.progress_interval:
+            self._reported = time.monotonic()
+            self._progress(self._done, self._size)
@@ -1,6 +1,16 @@
 from .audio import AudioProcessor
 from .downloader import VideoDownloader
-from .pipeline import VideoPipeline
+from .pipeline import PipelineContext, VideoPipeline
 from .queue import VideoProcessingQueue, get_video_queue
+from .stages import Stage, StagedExecutor
 
-__all__ = ["VideoDownloader", "AudioProcessor", "VideoPipeline", "VideoProcessingQueue", "get_video_queue"]
+__all__ = [
+    "VideoDownloader",
+    "AudioProcessor",
+    "VideoPipeline",
+    "PipelineContext",
+    "VideoProcessingQueue",
+    "get_video_queue",
+    "Stage",
+    "StagedExecutor",
+]
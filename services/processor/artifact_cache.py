@@ -0,0 +1,217 @@
+"""
+内容寻址产物缓存
+
+同一内容（如多个租户收藏的同一门课程）的下载、转写、摘要、向量化只做一次：
+    audio       key = (内容源, source_id)
+    transcript  key = (内容源, source_id, 转写参数) 或 (音频哈希, 转写参数)
+    summary     key = (转写文本哈希, 摘要参数, prompt 哈希)
+    embedding   key = (转写文本哈希, embedding 模型, 分块参数)
+
+文件存放于 {root}/{kind}/{key[:2]}/{key}{suffix}，条目与引用关系记录在数据库。
+视频通过 ArtifactCacheRef 引用条目（引用计数）；无引用且超过宽限期的条目由 gc() 回收。
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from packages.db import ArtifactCacheEntry, ArtifactCacheRef, Video
+from packages.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def cache_key(kind: str, *parts: Any) -> str:
+    """由产物类型与输入参数派生缓存键"""
+    raw = "|".join([kind, *(str(p) for p in parts)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def text_sha256(text: str) -> str:
+    """文本 sha256"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def link_or_copy(src: Path, dest: Path):
+    """优先硬链接（不占额外空间），跨文件系统时回退为复制"""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+class ArtifactCache:
+    """内容寻址产物缓存"""
+
+    def __init__(self, root: str = "data/cache"):
+        self.root = Path(root)
+
+    def _path(self, kind: str, key: str, suffix: str) -> Path:
+        return self.root / kind / key[:2] / f"{key}{suffix}"
+
+    # ========== 读取 ==========
+
+    def get(self, db: Session, kind: str, key: str) -> Optional[Path]:
+        """命中时返回缓存文件路径"""
+        entry = db.query(ArtifactCacheEntry).filter(ArtifactCacheEntry.cache_key == key).first()
+        if entry is None:
+            return None
+
+        path = Path(entry.path)
+        if not path.exists():
+            logger.warning("artifact_cache_entry_missing", kind=kind, key=key[:12])
+            db.delete(entry)
+            db.commit()
+            return None
+
+        entry.hit_count += 1
+        entry.last_used_at = datetime.utcnow()
+        db.commit()
+
+        logger.info("artifact_cache_hit", kind=kind, key=key[:12])
+        return path
+
+    def get_json(self, db: Session, kind: str, key: str) -> Optional[Any]:
+        path = self.get(db, kind, key)
+        if path is None:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    # ========== 写入 ==========
+
+    def put_file(self, db: Session, kind: str, key: str, src: Path) -> Path:
+        """写入文件产物（原文件保留）"""
+        src = Path(src)
+        dest = self._path(kind, key, src.suffix)
+        tmp = dest.with_name(f"{dest.name}.{uuid.uuid4().hex[:8]}.tmp")
+        link_or_copy(src, tmp)
+        os.replace(tmp, dest)
+        return self._register(db, kind, key, dest)
+
+    def put_json(self, db: Session, kind: str, key: str, data: Any) -> Path:
+        """写入 JSON 产物"""
+        dest = self._path(kind, key, ".json")
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f"{dest.name}.{uuid.uuid4().hex[:8]}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, dest)
+        return self._register(db, kind, key, dest)
+
+    def _register(self, db: Session, kind: str, key: str, path: Path) -> Path:
+        now = datetime.utcnow()
+        entry = db.query(ArtifactCacheEntry).filter(ArtifactCacheEntry.cache_key == key).first()
+        if entry is None:
+            entry = ArtifactCacheEntry(cache_key=key, kind=kind, created_at=now)
+            db.add(entry)
+        entry.path = str(path)
+        entry.size = path.stat().st_size
+        entry.last_used_at = now
+        try:
+            db.commit()
+        except IntegrityError:
+            # 其他进程同时写入了同一键（内容相同），以对方为准
+            db.rollback()
+
+        logger.info("artifact_cache_stored", kind=kind, key=key[:12], size=path.stat().st_size)
+        return path
+
+    # ========== 引用计数 ==========
+
+    def acquire(self, db: Session, video_id: int, kind: str, key: str):
+        """记录视频引用某个条目（同一视频同类产物只保留最新引用）"""
+        ref = (
+            db.query(ArtifactCacheRef)
+            .filter(ArtifactCacheRef.video_id == video_id, ArtifactCacheRef.kind == kind)
+            .first()
+        )
+        if ref is None:
+            db.add(ArtifactCacheRef(video_id=video_id, kind=kind, cache_key=key))
+        else:
+            ref.cache_key = key
+        db.commit()
+
+    def release(self, db: Session, video_id: int, kind: Optional[str] = None) -> int:
+        """释放视频的引用，返回释放数量"""
+        query = db.query(ArtifactCacheRef).filter(ArtifactCacheRef.video_id == video_id)
+        if kind is not None:
+            query = query.filter(ArtifactCacheRef.kind == kind)
+        released = query.delete(synchronize_session=False)
+        db.commit()
+        return released
+
+    def ref_count(self, db: Session, key: str) -> int:
+        return db.query(ArtifactCacheRef).filter(ArtifactCacheRef.cache_key == key).count()
+
+    # ========== 回收 ==========
+
+    def gc(self, db: Session, grace_hours: float = 24) -> dict:
+        """
+        回收无引用的条目
+
+        Args:
+            grace_hours: 无引用条目最近一次使用后的保留时长（便于删除后重新导入时命中）
+
+        Returns:
+            {"entries": 回收条目数, "freed_mb": 释放空间}
+        """
+        # 视频已删除但引用残留（SQLite 默认不执行外键级联）
+        orphan_refs = (
+            db.query(ArtifactCacheRef)
+            .filter(~ArtifactCacheRef.video_id.in_(db.query(Video.id)))
+            .delete(synchronize_session=False)
+        )
+
+        cutoff = datetime.utcnow() - timedelta(hours=grace_hours)
+        referenced = db.query(ArtifactCacheRef.cache_key)
+        stale = (
+            db.query(ArtifactCacheEntry)
+            .filter(
+                ArtifactCacheEntry.last_used_at < cutoff,
+                ~ArtifactCacheEntry.cache_key.in_(referenced),
+            )
+            .all()
+        )
+
+        freed_bytes = 0
+        for entry in stale:
+            path = Path(entry.path)
+            try:
+                if path.exists():
+                    freed_bytes += path.stat().st_size
+                    path.unlink()
+            except OSError as e:
+                logger.warning("artifact_cache_delete_failed", path=str(path), error=str(e))
+                continue
+            db.delete(entry)
+        db.commit()
+
+        freed_mb = round(freed_bytes / (1024 * 1024), 2)
+        logger.info("artifact_cache_gc", entries=len(stale), orphan_refs=orphan_refs, freed_mb=freed_mb)
+        return {"entries": len(stale), "freed_mb": freed_mb}
+
+
+_cache: Optional[ArtifactCache] = None
+
+
+def get_artifact_cache() -> Optional[ArtifactCache]:
+    """获取产物缓存（配置关闭时返回 None）"""
+    global _cache
+    from packages.config import get_config
+
+    config = get_config().pipeline
+    if not config.cache_enabled:
+        return None
+    if _cache is None:
+        _cache = ArtifactCache(config.cache_dir)
+    return _cache
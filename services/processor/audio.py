@@ -8,6 +8,8 @@ from pathlib import Path
 from typing import Optional
 
 from packages.logging import get_logger
+from services.asr.probe import ProbeError, media_duration, probe_media
+from services.asr.profiles import get_profile
 
 logger = get_logger(__name__)
 
@@ -15,14 +17,63 @@ logger = get_logger(__name__)
 class AudioProcessor:
     """音频处理器"""
 
-    def __init__(self, output_dir: str = "data/audio"):
+    def __init__(
+        self,
+        output_dir: str = "data/audio",
+        integrity_check: Optional[str] = None,
+        tail_seconds: Optional[float] = None,
+    ):
+        """
+        Args:
+            output_dir: 音频输出目录
+            integrity_check: 提取前的完整性检查（probe / full / off，默认读取 pipeline.integrity_check）
+            tail_seconds: probe 模式尾部采样解码的时长（秒）
+        """
+        from packages.config import get_config
+
+        config = get_config().pipeline
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.integrity_check = integrity_check or config.integrity_check
+        self.tail_seconds = tail_seconds if tail_seconds is not None else config.integrity_tail_seconds
+
+    def check_video_integrity(self, video_path: Path, mode: Optional[str] = None) -> bool:
+        """
+        验证视频文件完整性
 
-    def check_video_integrity(self, video_path: Path) -> bool:
-        """使用FFmpeg验证视频文件完整性"""
+        Args:
+            mode: probe（默认）：探测容器与音频流，再从尾部采样解码一小段（下载中断的文件在尾部出错）；
+                  full：完整解码整个文件，耗时与文件长度成正比，仅在需要时使用
+        """
+        mode = mode or self.integrity_check
+        if mode == "full":
+            return self._decode_check(video_path, ["-i", str(video_path)])
+
+        try:
+            info = probe_media(video_path)
+        except ProbeError as e:
+            logger.warning("video_integrity_issue", path=str(video_path), error=str(e))
+            return False
+        if not info.has_audio or info.duration <= 0:
+            logger.warning(
+                "video_integrity_issue",
+                path=str(video_path),
+                error="没有音频流或时长为 0",
+                streams=[s.codec_type for s in info.streams],
+            )
+            return False
+
+        start = max(0.0, info.duration - self.tail_seconds)
+        return self._decode_check(
+            video_path,
+            ["-ss", f"{start:.3f}", "-i", str(video_path), "-map", "0:a:0", "-t", f"{self.tail_seconds:g}"],
+        )
+
+    @staticmethod
+    def _decode_check(video_path: Path, input_args: list) -> bool:
+        """解码到空输出，有错误输出即视为损坏"""
         result = subprocess.run(
-            ["ffmpeg", "-v", "error", "-i", str(video_path), "-f", "null", "-"],
+            ["ffmpeg", "-v", "error", *input_args, "-f", "null", "-"],
             stderr=subprocess.PIPE,
             text=True,
         )
@@ -31,13 +82,14 @@ class AudioProcessor:
             return False
         return True
 
-    def extract_audio(self, video_path: Path, output_name: Optional[str] = None) -> Path:
+    def extract_audio(self, video_path: Path, output_name: Optional[str] = None, profile: str = "mp3") -> Path:
         """
         从视频中提取音频
         
         Args:
             video_path: 视频文件路径
             output_name: 输出文件名（不含扩展名）
+            profile: 音频编码配置（opus / mp3 / flac / wav），按 ASR 提供者选择，避免转写前二次转码
             
         Returns:
             音频文件路径
@@ -47,26 +99,25 @@ class AudioProcessor:
         if not video_path.exists():
             raise FileNotFoundError(f"视频文件不存在: {video_path}")
 
-        # 检查视频完整性
-        if not self.check_video_integrity(video_path):
+        # 检查视频完整性（默认只探测 + 尾部采样，提取失败时再完整解码定位问题）
+        if self.integrity_check != "off" and not self.check_video_integrity(video_path):
             logger.warning("video_may_be_corrupted", path=str(video_path))
 
+        audio_profile = get_profile(profile)
+
         # 输出文件名
         if output_name is None:
             output_name = video_path.stem
         
-        audio_path = self.output_dir / f"{output_name}.mp3"
+        audio_path = self.output_dir / f"{output_name}{audio_profile.suffix}"
 
-        logger.info("extracting_audio", video=str(video_path), audio=str(audio_path))
+        logger.info("extracting_audio", video=str(video_path), audio=str(audio_path), profile=profile)
 
-        # 使用ffmpeg提取音频（比moviepy更快更稳定）
+        # 使用ffmpeg提取音频（比moviepy更快更稳定）：16kHz单声道，适合语音识别
         cmd = [
             "ffmpeg",
             "-i", str(video_path),
-            "-vn",  # 不要视频
-            "-acodec", "libmp3lame",
-            "-ab", "128k",
-            "-ar", "16000",  # 16kHz采样率，适合语音识别
+            *audio_profile.ffmpeg_args(),
             "-y",  # 覆盖已存在的文件
             str(audio_path),
         ]
@@ -75,22 +126,14 @@ class AudioProcessor:
 
         if result.returncode != 0:
             logger.error("audio_extraction_failed", error=result.stderr)
+            if self.integrity_check != "full":
+                intact = self.check_video_integrity(video_path, mode="full")
+                logger.info("video_full_integrity_check", path=str(video_path), intact=intact)
             raise Exception(f"音频提取失败: {result.stderr}")
 
         logger.info("audio_extracted", path=str(audio_path))
         return audio_path
 
     def get_audio_duration(self, audio_path: Path) -> float:
-        """获取音频时长（秒）"""
-        cmd = [
-            "ffprobe",
-            "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            str(audio_path),
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            return float(result.stdout.strip())
-        return 0.0
+        """获取音频时长（秒，探测结果有缓存）"""
+        return media_duration(audio_path)
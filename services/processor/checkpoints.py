@@ -0,0 +1,239 @@
+"""
+处理阶段检查点
+
+重新处理视频时跳过已完成且仍然有效的阶段：
+- download：产物为音频文件，文件缺失或内容变化则失效
+- transcribe：产物为转写 JSON，同上；有缺失区间（extra.gaps）的转写不算完成，重新处理时补齐
+- analyze / index：无文件产物，content_hash 记录输入转写的哈希，转写变化则失效
+某阶段参数版本变化（如用户更换 ASR / 摘要模型）时，该阶段及之后的阶段全部重做。
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from packages.config import get_config
+from packages.db import ProcessingCheckpoint, Video
+from packages.logging import get_logger
+from services.asr import TranscriptResult, TranscriptSegment
+
+logger = get_logger(__name__)
+
+# 管道阶段（按顺序）
+STAGES = ("download", "transcribe", "analyze", "index", "finalize")
+
+# 记录检查点的阶段（finalize 只更新状态并通知，总是执行）
+CHECKPOINT_STAGES = ("download", "transcribe", "analyze", "index")
+
+# 阶段实现发生不兼容变化时递增，使旧检查点失效
+_STAGE_VERSIONS = {
+    "download": 1,
+    "transcribe": 1,
+    "analyze": 1,
+    "index": 1,
+}
+
+
+def stage_index(stage: str) -> int:
+    """阶段序号；未知阶段抛出 ValueError"""
+    try:
+        return STAGES.index(stage)
+    except ValueError:
+        raise ValueError(f"未知阶段: {stage}，可选: {', '.join(STAGES)}") from None
+
+
+def stage_params_version(stage: str, models: Optional[Dict[str, dict]] = None) -> str:
+    """
+    阶段参数版本（实现版本 + 影响产物的配置项）
+
+    Args:
+        models: 本次处理按用户配置解析出的各阶段参数（stage -> 参数，见 VideoPipeline._resolve_models）；
+            未提供的阶段按全局配置
+    """
+    params: Dict[str, object] = {"version": _STAGE_VERSIONS[stage]}
+    if models and stage in models:
+        params.update(models[stage])
+    else:
+        config = get_config()
+        if stage == "transcribe":
+            params.update(asr_provider=config.asr.provider, asr_model=config.asr.model_size)
+        elif stage == "analyze":
+            params.update(llm_provider=config.llm.provider, llm_model=config.llm.model)
+        elif stage == "index":
+            params.update(rag_provider=config.rag.provider)
+
+    raw = json.dumps(params, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """计算文件 sha256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_checkpoints(db: Session, video_id: int) -> Dict[str, ProcessingCheckpoint]:
+    """获取视频的全部检查点（stage -> 检查点）"""
+    rows = db.query(ProcessingCheckpoint).filter(ProcessingCheckpoint.video_id == video_id).all()
+    return {row.stage: row for row in rows}
+
+
+def record_checkpoint(
+    db: Session,
+    video_id: int,
+    stage: str,
+    artifact_path: Optional[Path] = None,
+    content_hash: Optional[str] = None,
+    extra: Optional[dict] = None,
+    models: Optional[Dict[str, dict]] = None,
+) -> ProcessingCheckpoint:
+    """
+    记录阶段完成（同一视频同一阶段只保留一条，由调用方提交）
+
+    Args:
+        artifact_path: 阶段产物文件，未传 content_hash 时自动计算其哈希
+        content_hash: 无文件产物时记录输入内容的哈希
+        extra: 恢复上下文需要的额外信息
+        models: 本次实际使用的各阶段参数（见 stage_params_version）
+    """
+    if artifact_path is not None and content_hash is None:
+        content_hash = file_sha256(Path(artifact_path))
+
+    checkpoint = (
+        db.query(ProcessingCheckpoint)
+        .filter(ProcessingCheckpoint.video_id == video_id, ProcessingCheckpoint.stage == stage)
+        .first()
+    )
+    if checkpoint is None:
+        checkpoint = ProcessingCheckpoint(video_id=video_id, stage=stage)
+        db.add(checkpoint)
+
+    checkpoint.artifact_path = str(artifact_path) if artifact_path is not None else None
+    checkpoint.content_hash = content_hash
+    checkpoint.params_version = stage_params_version(stage, models)
+    checkpoint.extra_data = json.dumps(extra, ensure_ascii=False) if extra else None
+    # 只 flush：与阶段自身的写入一起由调用方提交，每个阶段一次提交
+    db.flush()
+
+    logger.debug("checkpoint_recorded", video_id=video_id, stage=stage)
+    return checkpoint
+
+
+def _invalid_reason(
+    checkpoint: Optional[ProcessingCheckpoint],
+    stage: str,
+    transcript_hash: Optional[str],
+    models: Optional[Dict[str, dict]] = None,
+) -> Optional[str]:
+    """检查点失效原因；有效时返回 None"""
+    if checkpoint is None:
+        return "missing"
+    if checkpoint.params_version != stage_params_version(stage, models):
+        return "params_changed"
+    if checkpoint.extra_data and json.loads(checkpoint.extra_data).get("gaps"):
+        return "partial"
+
+    if checkpoint.artifact_path:
+        path = Path(checkpoint.artifact_path)
+        if not path.exists():
+            return "artifact_missing"
+        if file_sha256(path) != checkpoint.content_hash:
+            return "artifact_changed"
+    elif checkpoint.content_hash != transcript_hash:
+        return "input_changed"
+
+    return None
+
+
+def plan_resume(
+    db: Session,
+    video: Video,
+    from_stage: Optional[str] = None,
+    models: Optional[Dict[str, dict]] = None,
+) -> str:
+    """
+    确定本次处理的起始阶段，并清除该阶段及之后的检查点
+
+    Args:
+        video: 视频
+        from_stage: 强制从指定阶段开始（之前的阶段仍需检查点有效）
+        models: 本次将使用的各阶段参数（用户更换模型后，对应阶段及之后的阶段重做）
+
+    Returns:
+        起始阶段名
+    """
+    limit = stage_index(from_stage) if from_stage else len(STAGES) - 1
+    checkpoints = load_checkpoints(db, video.id)
+
+    stages = CHECKPOINT_STAGES[:limit]
+    # 转写仍有效时不再需要音频（音频会被定期清理）
+    if "transcribe" in stages and _invalid_reason(checkpoints.get("transcribe"), "transcribe", None, models) is None:
+        stages = stages[1:]
+
+    start = STAGES[limit]
+    transcript_hash = None
+    for stage in stages:
+        checkpoint = checkpoints.get(stage)
+        reason = _invalid_reason(checkpoint, stage, transcript_hash, models)
+        if reason:
+            if checkpoint is not None:
+                logger.info("checkpoint_invalidated", video_id=video.id, stage=stage, reason=reason)
+            start = stage
+            break
+        if stage == "transcribe":
+            transcript_hash = checkpoint.content_hash
+
+    start_idx = stage_index(start)
+    stale = [cp for stage, cp in checkpoints.items() if stage_index(stage) >= start_idx]
+    for checkpoint in stale:
+        db.delete(checkpoint)
+    if stale:
+        db.commit()
+
+    if start_idx > 0:
+        logger.info("pipeline_resume", video_id=video.id, source_id=video.source_id, from_stage=start)
+    return start
+
+
+def load_transcript(path: Path) -> TranscriptResult:
+    """从转写 JSON 恢复转写结果"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    return TranscriptResult(
+        text=data["text"],
+        language=data.get("language", "zh"),
+        duration=data.get("duration", 0.0),
+        gaps=[tuple(gap) for gap in data.get("gaps", [])],
+        segments=[
+            TranscriptSegment(start=seg["start"], end=seg["end"], text=seg["text"])
+            for seg in data.get("segments", [])
+        ],
+    )
+
+
+def restore_context(db: Session, ctx, start_stage: str):
+    """按已完成的阶段恢复管道上下文（音频路径、字幕、转写结果）"""
+    start_idx = stage_index(start_stage)
+    if start_idx <= stage_index("download"):
+        return
+
+    checkpoints = load_checkpoints(db, ctx.video_id)
+
+    if start_idx == stage_index("transcribe"):
+        download = checkpoints["download"]
+        ctx.audio_path = Path(download.artifact_path)
+        extra = json.loads(download.extra_data) if download.extra_data else {}
+        subtitle_path = extra.get("subtitle_path")
+        if subtitle_path and Path(subtitle_path).exists():
+            ctx.ai_subtitle = Path(subtitle_path).read_text(encoding="utf-8")
+    else:
+        transcribe = checkpoints["transcribe"]
+        ctx.result = load_transcript(Path(transcribe.artifact_path))
+        ctx.transcript_hash = transcribe.content_hash
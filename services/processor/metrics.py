@@ -0,0 +1,163 @@
+"""
+处理阶段耗时统计
+
+管道每执行一个阶段记录一行 ProcessingStageMetric（开始时间、耗时、输入/输出字节、提供方），
+经状态通道与状态变化一起批量写入，不占用管道阶段的数据库会话；
+stage_latency_percentiles() 按阶段 / 提供方 / 租户聚合 p50/p95/p99，
+用于估算 worker 池规模、发现 ASR/LLM 提供方的性能退化。
+记录保留 pipeline.metrics_retention_days 天，由定时任务 prune_stage_metrics 清理。
+"""
+
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from packages.db import ProcessingStageMetric
+from packages.logging import get_logger
+
+from .status import StatusChannel, get_status_channel
+
+logger = get_logger(__name__)
+
+# 可用的聚合维度 -> 列
+GROUP_COLUMNS = {
+    "stage": ProcessingStageMetric.stage,
+    "provider": ProcessingStageMetric.provider,
+    "tenant": ProcessingStageMetric.tenant_id,
+}
+
+DEFAULT_PERCENTILES = (50, 95, 99)
+
+
+def record_stage_metric(
+    video_id: int,
+    tenant_id: int,
+    stage: str,
+    started_at: datetime,
+    duration_ms: int,
+    status: str = "ok",
+    provider: Optional[str] = None,
+    bytes_in: Optional[int] = None,
+    bytes_out: Optional[int] = None,
+    channel: Optional[StatusChannel] = None,
+):
+    """记录一次阶段执行（交给状态通道批量写入；写入失败只记日志，不影响处理流程）"""
+    (channel or get_status_channel()).add_metric({
+        "video_id": video_id,
+        "tenant_id": tenant_id,
+        "stage": stage,
+        "provider": provider,
+        "status": status,
+        "started_at": started_at,
+        "duration_ms": duration_ms,
+        "bytes_in": bytes_in,
+        "bytes_out": bytes_out,
+    })
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> Optional[float]:
+    """最近秩百分位（输入需已排序）"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def stage_latency_percentiles(
+    db: Session,
+    since: datetime,
+    until: Optional[datetime] = None,
+    group_by: Iterable[str] = ("stage",),
+    tenant_id: Optional[int] = None,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+) -> List[Dict]:
+    """
+    按维度聚合阶段耗时分位数
+
+    Args:
+        since / until: 统计时间窗口（按阶段开始时间）
+        group_by: 聚合维度，取值见 GROUP_COLUMNS
+        tenant_id: 只统计指定租户
+        percentiles: 分位点
+
+    Returns:
+        [{"stage": ..., "count", "failed", "mean_ms", "p50_ms", ..., "bytes_in", "bytes_out"}]，
+        按维度取值排序
+    """
+    group_by = list(dict.fromkeys(group_by))
+    unknown = [g for g in group_by if g not in GROUP_COLUMNS]
+    if unknown:
+        raise ValueError(f"未知聚合维度: {', '.join(unknown)}，可选: {', '.join(GROUP_COLUMNS)}")
+
+    query = db.query(
+        *(GROUP_COLUMNS[g] for g in group_by),
+        ProcessingStageMetric.duration_ms,
+        ProcessingStageMetric.status,
+        ProcessingStageMetric.bytes_in,
+        ProcessingStageMetric.bytes_out,
+    ).filter(ProcessingStageMetric.started_at >= since)
+    if until is not None:
+        query = query.filter(ProcessingStageMetric.started_at < until)
+    if tenant_id is not None:
+        query = query.filter(ProcessingStageMetric.tenant_id == tenant_id)
+
+    groups: Dict[tuple, dict] = defaultdict(
+        lambda: {"durations": [], "failed": 0, "bytes_in": 0, "bytes_out": 0}
+    )
+    width = len(group_by)
+    for row in query:
+        group = groups[tuple(row[:width])]
+        duration_ms, status, bytes_in, bytes_out = row[width:]
+        group["durations"].append(duration_ms)
+        group["failed"] += status != "ok"
+        group["bytes_in"] += bytes_in or 0
+        group["bytes_out"] += bytes_out or 0
+
+    results = []
+    for key in sorted(groups, key=lambda k: tuple("" if v is None else str(v) for v in k)):
+        group = groups[key]
+        durations = sorted(group["durations"])
+        item = dict(zip(group_by, key))
+        item.update(
+            count=len(durations),
+            failed=group["failed"],
+            mean_ms=round(sum(durations) / len(durations), 1),
+            bytes_in=group["bytes_in"],
+            bytes_out=group["bytes_out"],
+        )
+        for p in percentiles:
+            item[f"p{p:g}_ms"] = percentile(durations, p)
+        results.append(item)
+    return results
+
+
+def prune_stage_metrics(db: Session, retention_days: int) -> int:
+    """删除开始时间早于保留期的阶段耗时记录，返回删除行数"""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    stages = [row.stage for row in db.query(ProcessingStageMetric.stage).distinct()]
+    deleted = 0
+    # 按阶段删除，走 (stage, started_at) 索引
+    for stage in stages:
+        deleted += (
+            db.query(ProcessingStageMetric)
+            .filter(ProcessingStageMetric.stage == stage, ProcessingStageMetric.started_at < cutoff)
+            .delete(synchronize_session=False)
+        )
+    db.commit()
+    return deleted
+
+
+def mean_video_seconds(db: Session, hours: float = 24) -> Optional[float]:
+    """最近一段时间内单个视频各阶段耗时之和的平均值（无数据时返回 None）"""
+    since = datetime.utcnow() - timedelta(hours=hours)
+    total_ms, videos = db.query(
+        func.sum(ProcessingStageMetric.duration_ms),
+        func.count(func.distinct(ProcessingStageMetric.video_id)),
+    ).filter(ProcessingStageMetric.started_at >= since).one()
+    if not videos:
+        return None
+    return total_ms / videos / 1000
@@ -1,16 +1,25 @@
 """
 视频处理管道
-编排：下载 → 提取音频 → 转写 → 保存
+编排：下载 → 提取音频 → 转写 → 分析 → 索引 → 通知
+单个视频串行执行；批量处理时各阶段独立并发（见 stages.py）
 """
 
 import json
+import time
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
 
-from packages.db import Video, VideoStatus
+from packages.async_runtime import run_sync
+from packages.concurrency import DOWNLOAD, get_limiter
+from packages.config import get_config
+from packages.db import SUBTITLE_LANE, Video, VideoStatus
 from packages.logging import get_logger
 from alice.errors import AliceError, NetworkError
 from services.asr import ASRManager, TranscriptResult, create_api_asr
@@ -19,11 +28,140 @@ from services.asr import ASRManager, TranscriptResult, create_api_asr
 from alice.control_plane import get_control_plane
 
 from .audio import AudioProcessor
+from .artifact_cache import cache_key, get_artifact_cache, link_or_copy, text_sha256
+from .checkpoints import (
+    STAGES,
+    file_sha256,
+    load_transcript,
+    plan_resume,
+    record_checkpoint,
+    restore_context,
+    stage_index,
+    stage_params_version,
+)
 from .downloader import VideoDownloader
+from .metrics import record_stage_metric
+from .stages import Stage, StagedExecutor
+from .status import STAGE_PROGRESS, get_status_channel
+from .streaming import PARTIAL_SUFFIX, IncrementalEmbedder, TranscriptWriter
+from .subtitles import segments_from_bilibili, subtitle_transcript, to_srt
 
 logger = get_logger(__name__)
 
 
+@dataclass
+class PipelineContext:
+    """单个视频在各阶段之间传递的处理状态"""
+    video_id: int
+    user_id: Optional[int] = None
+    audio_path: Optional[Path] = None
+    ai_subtitle: Optional[str] = None
+    result: Optional[TranscriptResult] = None
+    transcript_hash: Optional[str] = None
+    cached_transcript: Optional[Tuple[str, Path]] = None  # 命中的缓存转写 (键, 路径)
+    from_stage: Optional[str] = None   # 强制从该阶段开始
+    start_stage: str = STAGES[0]       # 本次实际起始阶段（按检查点确定）
+    models: Dict[str, dict] = field(default_factory=dict)  # 按用户配置解析出的各阶段参数（见 _resolve_models）
+    stage_meta: Dict[str, Any] = field(default_factory=dict)  # 当前阶段的统计信息（提供方、字节数）
+    embedder: Optional[IncrementalEmbedder] = None  # 流式转写时预先计算的分块向量（索引阶段取用）
+
+    def should_run(self, stage: str) -> bool:
+        return stage_index(stage) >= stage_index(self.start_stage)
+
+    def note(self, **meta):
+        """补充当前阶段的统计信息（provider / bytes_in / bytes_out / status）"""
+        self.stage_meta.update(meta)
+
+
+def _file_size(path: Optional[Path]) -> Optional[int]:
+    if path is None:
+        return None
+    try:
+        return Path(path).stat().st_size
+    except OSError:
+        return None
+
+
+def claim_pending_videos(
+    db: Session,
+    limit: int,
+    tenant_id: Optional[int] = None,
+    exclude_tenants: Optional[Iterable[int]] = None,
+) -> List[int]:
+    """
+    原子认领待处理视频（PENDING → DOWNLOADING）
+
+    逐条条件更新，多个进程并发认领时同一视频只会被一个进程拿到。
+    多个租户都有待处理视频时轮流认领（各租户最早的视频优先），避免批量导入独占。
+
+    Args:
+        exclude_tenants: 跳过的租户（如配额已用完）
+
+    Returns:
+        认领成功的视频ID列表
+    """
+    if limit <= 0:
+        return []
+
+    lane_rank = func.row_number().over(partition_by=Video.tenant_id, order_by=Video.id).label("lane_rank")
+    query = db.query(Video.id, lane_rank).filter(Video.status == VideoStatus.PENDING.value)
+    if tenant_id is not None:
+        query = query.filter(Video.tenant_id == tenant_id)
+    if exclude_tenants:
+        query = query.filter(Video.tenant_id.notin_(list(exclude_tenants)))
+    ranked = query.subquery()
+    # 多取一些候选，抵消被其他进程抢先认领的部分
+    candidates = [
+        row.id
+        for row in db.query(ranked.c.id)
+        .order_by(ranked.c.lane_rank, ranked.c.id)
+        .limit(limit * 2)
+        .all()
+    ]
+
+    claimed = []
+    for video_id in candidates:
+        if len(claimed) >= limit:
+            break
+        result = db.execute(
+            update(Video)
+            .where(Video.id == video_id, Video.status == VideoStatus.PENDING.value)
+            .values(status=VideoStatus.DOWNLOADING.value, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            claimed.append(video_id)
+    db.commit()
+
+    if claimed:
+        logger.info("videos_claimed", count=len(claimed), tenant_id=tenant_id)
+    return claimed
+
+
+def release_claimed_videos(db: Session, video_ids: Iterable[int]) -> int:
+    """
+    撤销认领（DOWNLOADING → PENDING），用于认领后没能转成队列任务的视频
+
+    只回退仍处于 DOWNLOADING 的视频，已被其他流程推进的不受影响。
+
+    Returns:
+        回退的视频数
+    """
+    video_ids = list(video_ids)
+    if not video_ids:
+        return 0
+    result = db.execute(
+        update(Video)
+        .where(Video.id.in_(video_ids), Video.status == VideoStatus.DOWNLOADING.value)
+        .values(status=VideoStatus.PENDING.value, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if result.rowcount:
+        logger.warning("video_claims_released", count=result.rowcount, video_ids=video_ids)
+    return result.rowcount
+
+
 class VideoPipeline:
     """视频处理管道"""
 
@@ -41,29 +179,27 @@ class VideoPipeline:
         self.transcript_dir = Path(transcript_dir)
         self.transcript_dir.mkdir(parents=True, exist_ok=True)
         self.sessdata = sessdata
+        self.cache = get_artifact_cache()
+        self.status = get_status_channel()
         
         # 通知器
         from services.notifier import WeChatWorkNotifier
         self.notifier = WeChatWorkNotifier() if notify else None
 
+    @staticmethod
+    def _resolve_api_model(task_type: str, user_id: int):
+        """控制平面解析出的 API 模型；未配置 API（回退本地/默认实现）时返回 None"""
+        resolved = run_sync(get_control_plane().resolve_model(task_type, user_id=user_id))
+        return resolved if resolved.api_key and resolved.base_url else None
+
     def _get_asr_provider(self, db: Session, user_id: int):
         """
         获取ASR提供者
         使用控制平面获取 ASR 模型配置
         """
-        cp = get_control_plane()
+        resolved = self._resolve_api_model("asr", user_id)
         
-        # 同步获取 ASR 模型配置
-        import asyncio
-        loop = asyncio.new_event_loop()
-        try:
-            resolved = loop.run_until_complete(
-                cp.resolve_model("asr", user_id=user_id)
-            )
-        finally:
-            loop.close()
-        
-        if resolved.api_key and resolved.base_url:
+        if resolved is not None:
             logger.info(
                 "using_api_asr",
                 user_id=user_id,
@@ -90,205 +226,724 @@ class VideoPipeline:
         logger.info("using_summary_model_from_control_plane", user_id=user_id)
         return Summarizer(llm_manager=llm)
 
-    def process(self, video: Video, db: Session, user_id: Optional[int] = None) -> Video:
+    # ========== 阶段定义 ==========
+
+    def _steps(self) -> List[Tuple[str, Callable]]:
+        """管道阶段（按顺序）"""
+        return [
+            ("download", self._step_download),
+            ("transcribe", self._step_transcribe),
+            ("analyze", self._step_analyze),
+            ("index", self._step_index),
+            ("finalize", self._step_finalize),
+        ]
+
+    def _resolve_user_id(self, video: Video, db: Session, user_id: Optional[int]) -> Optional[int]:
+        """获取用户ID（如果没传入，从tenant获取默认用户）"""
+        if user_id is not None:
+            return user_id
+        from packages.db import User
+        user = db.query(User).filter(User.tenant_id == video.tenant_id).first()
+        return user.id if user else None
+
+    def _resolve_models(self, user_id: Optional[int]) -> Dict[str, dict]:
         """
-        处理单个视频
+        本次处理实际使用的各阶段参数（stage -> 参数）
+
+        ASR / 摘要模型按用户配置经控制平面解析，用于检查点参数版本与产物缓存键：
+        用户更换模型后对应阶段重做，不同配置的租户之间也不会复用彼此的产物。
+        """
+        config = get_config()
+        asr = self._resolve_api_model("asr", user_id) if user_id else None
+        if asr is not None:
+            transcribe = {
+                "asr": "api", "provider": asr.provider, "model": asr.model, "base_url": asr.base_url,
+                "audio_profile": config.asr.api_audio_profile,
+            }
+        else:
+            transcribe = {
+                "asr": "local", "provider": self.asr_manager.default_provider, "model": config.asr.model_size,
+                "audio_profile": self.asr_manager.audio_profile,
+            }
+
+        llm = self._resolve_api_model("summary", user_id) if user_id else None
+        if llm is not None:
+            analyze = {"provider": llm.provider, "model": llm.model, "base_url": llm.base_url}
+        else:
+            analyze = {"provider": config.llm.provider, "model": config.llm.model}
+
+        return {
+            "download": {"audio_profile": transcribe["audio_profile"]},
+            "transcribe": transcribe,
+            "analyze": analyze,
+        }
+
+    def _prepare(self, video: Video, ctx: "PipelineContext", db: Session):
+        """按检查点确定起始阶段，并恢复已完成阶段的上下文"""
+        ctx.user_id = self._resolve_user_id(video, db, ctx.user_id)
+        ctx.models = self._resolve_models(ctx.user_id)
+        ctx.start_stage = plan_resume(db, video, from_stage=ctx.from_stage, models=ctx.models)
+        restore_context(db, ctx, ctx.start_stage)
+
+    def process(
+        self,
+        video: Video,
+        db: Session,
+        user_id: Optional[int] = None,
+        from_stage: Optional[str] = None,
+    ) -> Video:
+        """
+        处理单个视频（各阶段串行执行）
+        
+        已完成且有效的阶段（见 checkpoints.py）会被跳过。
         
         Args:
             video: Video对象
             db: 数据库会话
             user_id: 用户ID（用于获取用户配置的模型）
+            from_stage: 强制从指定阶段开始重新处理
             
         Returns:
             更新后的Video对象
         """
-        # 获取用户ID（如果没传入，从tenant获取默认用户）
-        if user_id is None:
-            from packages.db import User
-            user = db.query(User).filter(User.tenant_id == video.tenant_id).first()
-            user_id = user.id if user else None
-        
+        ctx = PipelineContext(video_id=video.id, user_id=user_id, from_stage=from_stage)
+        self._run_all(video, ctx, db)
+        return video
+
+    def _run_all(self, video: Video, ctx: "PipelineContext", db: Session):
+        """在同一会话中依次执行各阶段"""
         try:
-            # Step 1: 下载音频（优先BBDown，可获取AI字幕）
-            video.status = VideoStatus.DOWNLOADING.value
-            db.commit()
-            
-            logger.info("pipeline_step", step="download", source_type=video.source_type, source_id=video.source_id)
+            self._prepare(video, ctx, db)
+            for name, step in self._steps():
+                if ctx.should_run(name):
+                    self._execute_step(name, step, video, ctx, db)
+        except Exception as e:
+            self._mark_failed(video, db, e)
+            raise
+
+    def process_subtitle_lane(self, ctx: "PipelineContext") -> bool:
+        """
+        字幕快速通道：获取字幕后串行执行各阶段（不下载音频、不经过 ASR）
+
+        在独立数据库会话中执行，供处理队列的快速通道调用。
+
+        Returns:
+            False 表示字幕已不可用（视频已移出快速通道，需要进入常规 ASR 队列）
+        """
+        from packages.db import get_db_context
 
-            ai_subtitle = None
-            audio_path = None
+        with get_db_context() as db:
+            video = db.query(Video).filter(Video.id == ctx.video_id).first()
+            if video is None:
+                raise ValueError(f"Video {ctx.video_id} not found")
+
+            if not self._load_subtitle(video, ctx):
+                video.processing_lane = None
+                db.commit()
+                logger.info("subtitle_lane_demoted", source_id=video.source_id)
+                return False
+
+            self._run_all(video, ctx, db)
+        return True
+
+    def build_executor(self) -> StagedExecutor:
+        """
+        构建分阶段执行器
+        
+        每个阶段独立并发，阶段之间有界队列交接：
+        下载第 N+1 个视频的同时转写第 N 个、分析第 N-1 个。
+        提交的任务为 PipelineContext。
+        """
+        config = get_config().pipeline
+        workers = {
+            "download": config.download_workers,
+            "transcribe": config.transcribe_workers,
+            "analyze": config.analyze_workers,
+            "index": config.index_workers,
+            "finalize": 1,
+        }
+
+        stages = [
+            Stage(
+                name=name,
+                handler=partial(self._run_stage, name, step),
+                workers=workers.get(name, 1),
+                queue_size=config.stage_queue_size,
+            )
+            for name, step in self._steps()
+        ]
+        return StagedExecutor(stages, name="video_pipeline")
+
+    def _run_stage(self, name: str, step: Callable, ctx: "PipelineContext") -> "PipelineContext":
+        """在独立数据库会话中执行一个阶段（供分阶段执行器调用）"""
+        from packages.db import get_db_context
+
+        with get_db_context() as db:
+            video = db.query(Video).filter(Video.id == ctx.video_id).first()
+            if video is None:
+                raise ValueError(f"Video {ctx.video_id} not found")
 
-            # 使用统一下载器接口
             try:
-                from services.downloader import get_downloader, DownloadMode
-                import asyncio
-
-                downloader = get_downloader(video.source_type)
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    result = loop.run_until_complete(
-                        downloader.download(video.source_id, mode=DownloadMode.AUDIO)
-                    )
-                    if result.success and result.file_path:
-                        audio_path = result.file_path
-                        if result.subtitle_content:
-                            ai_subtitle = result.subtitle_content
-                            logger.info("subtitle_found", source_id=video.source_id)
-                        logger.info("download_success", source_type=video.source_type, source_id=video.source_id)
-                finally:
-                    loop.close()
-            except (NetworkError, OSError, IOError) as e:
-                logger.error("download_failed", source_id=video.source_id, error=str(e), exc_info=True)
+                # 首阶段负责确定起始阶段
+                if name == STAGES[0]:
+                    self._prepare(video, ctx, db)
+                if ctx.should_run(name):
+                    self._execute_step(name, step, video, ctx, db)
             except Exception as e:
-                logger.exception("download_failed_unexpected", source_id=video.source_id)
+                self._mark_failed(video, db, e)
+                raise
 
-            # 如果统一下载器失败，回退到旧逻辑（仅 bilibili）
-            if audio_path is None and video.source_type == "bilibili":
-                logger.info("fallback_to_legacy", source_id=video.source_id)
-                video_path = self.downloader.download_bilibili(video.source_id, self.sessdata)
-                video.video_path = str(video_path)
-                db.commit()
+        return ctx
 
-                # 提取音频
-                logger.info("pipeline_step", step="extract_audio", source_id=video.source_id)
-                audio_path = self.audio_processor.extract_audio(video_path, video.source_id)
-                
-                # 删除原视频文件
-                try:
-                    if video_path.exists():
-                        video_path.unlink()
-                        logger.info("video_file_deleted", source_id=video.source_id, path=str(video_path))
-                    video.video_path = None
-                    db.commit()
-                except (OSError, IOError) as e:
-                    logger.error("video_delete_failed", source_id=video.source_id, error=str(e), exc_info=True)
-                except Exception:
-                    logger.exception("video_delete_failed_unexpected", source_id=video.source_id)
+    def _execute_step(self, name: str, step: Callable, video: Video, ctx: "PipelineContext", db: Session):
+        """执行一个阶段并记录耗时（见 metrics.py）"""
+        if not get_config().pipeline.metrics_enabled:
+            step(video, ctx, db)
+            return
+
+        ctx.stage_meta = {}
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            step(video, ctx, db)
+        except Exception:
+            status = "failed"
+            raise
+        finally:
+            meta = dict(ctx.stage_meta)
+            # 阶段标记的状态（如 partial）只在成功时生效，失败总是记为 failed
+            noted = meta.pop("status", None)
+            record_stage_metric(
+                video_id=video.id,
+                tenant_id=video.tenant_id,
+                stage=name,
+                started_at=started_at,
+                duration_ms=int((time.perf_counter() - start) * 1000),
+                status=noted if noted and status == "ok" else status,
+                channel=self.status,
+                **meta,
+            )
+
+    def process_many(
+        self,
+        video_ids: List[int],
+        user_id: Optional[int] = None,
+    ) -> List[Tuple[int, Optional[BaseException]]]:
+        """
+        分阶段并行处理多个视频
+        
+        Args:
+            video_ids: 视频ID列表
+            user_id: 用户ID（为空时按视频所属租户解析）
             
-            video.audio_path = str(audio_path)
-            db.commit()
+        Returns:
+            [(video_id, 异常或None)]
+        """
+        executor = self.build_executor()
+        try:
+            outcomes = executor.map(
+                PipelineContext(video_id=vid, user_id=user_id) for vid in video_ids
+            )
+        finally:
+            executor.shutdown(wait=True)
+
+        return [(ctx.video_id, error) for ctx, error in outcomes]
+
+    # ========== 产物缓存 ==========
+
+    def _stage_models(self, ctx: "PipelineContext") -> Dict[str, dict]:
+        """本次处理的各阶段参数（单独调用某个阶段、未经 _prepare 时在此解析）"""
+        if not ctx.models:
+            ctx.models = self._resolve_models(ctx.user_id)
+        return ctx.models
+
+    def _audio_key(self, video: Video, ctx: "PipelineContext") -> str:
+        """音频按内容源 + 编码配置缓存（不同 ASR 期望的输入编码不同）"""
+        profile = self._stage_models(ctx)["download"]["audio_profile"]
+        return cache_key("audio", video.source_type, video.source_id, profile)
 
-            # Step 2: 转写
-            video.status = VideoStatus.TRANSCRIBING.value
+    def _transcript_source_keys(self, video: Video, ctx: "PipelineContext") -> List[str]:
+        """
+        按内容源查找转写的候选键
+
+        AI字幕转写与ASR参数无关；ASR 转写的键包含实际使用的 ASR（提供方、模型、base_url），
+        配置不同的租户之间不会复用彼此的转写。
+        """
+        source = f"{video.source_type}:{video.source_id}"
+        return [
+            cache_key("transcript", source, "subtitle", "timed"),  # 字幕按条分段（旧的整段字幕缓存不再复用）
+            cache_key("transcript", source, stage_params_version("transcribe", self._stage_models(ctx))),
+        ]
+
+    def _transcript_keys(self, video: Video, ctx: "PipelineContext") -> List[str]:
+        """
+        本次转写对应的缓存键（首个为主键）
+
+        AI字幕：按内容源；ASR：按内容源 + 音频哈希（同一音频被不同来源引用时也能命中）
+        """
+        source_keys = self._transcript_source_keys(video, ctx)
+        if ctx.ai_subtitle:
+            return source_keys[:1]
+
+        keys = source_keys[1:]
+        if ctx.audio_path is not None and Path(ctx.audio_path).exists():
+            audio_hash = file_sha256(Path(ctx.audio_path))
+            keys.append(cache_key(
+                "transcript", f"audio:{audio_hash}", stage_params_version("transcribe", self._stage_models(ctx))
+            ))
+        return keys
+
+    def _summary_key(self, video: Video, ctx: "PipelineContext") -> str:
+        """摘要按转写内容 + 视频信息 + 实际使用的摘要模型 + prompt 版本缓存"""
+        from services.ai.summarizer import summary_prompt_version
+
+        return cache_key(
+            "summary",
+            text_sha256(ctx.result.text),
+            video.title,
+            video.author,
+            video.duration or 0,
+            stage_params_version("analyze", self._stage_models(ctx)),
+            summary_prompt_version(),
+        )
+
+    def _lookup_transcript(self, db: Session, keys: List[str]) -> Optional[Tuple[str, Path]]:
+        for key in keys:
+            path = self.cache.get(db, "transcript", key)
+            if path is not None:
+                return key, path
+        return None
+
+    def _lookup_transcript_by_source(
+        self, video: Video, ctx: "PipelineContext", db: Session
+    ) -> Optional[Tuple[str, Path]]:
+        return self._lookup_transcript(db, self._transcript_source_keys(video, ctx))
+
+    # ========== 阶段实现 ==========
+
+    def _step_download(self, video: Video, ctx: "PipelineContext", db: Session):
+        """Step 1: 下载音频（优先BBDown，可获取AI字幕）；字幕快速通道只获取字幕"""
+        self._set_status(video, "download", VideoStatus.DOWNLOADING)
+        
+        logger.info("pipeline_step", step="download", source_type=video.source_type, source_id=video.source_id)
+
+        audio_path = None
+        ai_subtitle = None
+
+        # 产物缓存：同源转写已存在时无需下载
+        if self.cache is not None:
+            ctx.cached_transcript = self._lookup_transcript_by_source(video, ctx, db)
+            if ctx.cached_transcript is not None:
+                logger.info("download_skipped_cached_transcript", source_id=video.source_id)
+                ctx.note(provider="cache")
+                return
+
+        # 字幕快速通道：字幕即转写来源，不下载音频（字幕获取失败时按常规流程下载）
+        if video.processing_lane == SUBTITLE_LANE and (ctx.ai_subtitle or self._load_subtitle(video, ctx)):
+            subtitle_path = self.transcript_dir / f"{video.source_id}.subtitle.srt"
+            subtitle_path.write_text(ctx.ai_subtitle, encoding="utf-8")
+            ctx.note(provider="subtitle", bytes_out=subtitle_path.stat().st_size)
+            record_checkpoint(
+                db, video.id, "download", artifact_path=subtitle_path, extra={"subtitle_path": str(subtitle_path)},
+                models=ctx.models,
+            )
             db.commit()
-            
-            logger.info("pipeline_step", step="transcribe", source_id=video.source_id)
-            
-            # 如果有AI字幕，直接使用（跳过ASR）
+            return
+
+        # 音频已缓存时直接复用
+        if self.cache is not None:
+            cached_audio = self.cache.get(db, "audio", self._audio_key(video, ctx))
+            if cached_audio is not None:
+                audio_path = self.audio_processor.output_dir / f"{video.source_id}{cached_audio.suffix}"
+                if not audio_path.exists():
+                    link_or_copy(cached_audio, audio_path)
+                ctx.note(provider="cache")
+
+        if audio_path is None:
+            ctx.note(provider=video.source_type)
+            audio_path, ai_subtitle = self._download_audio(video, db, ctx.user_id)
+            if audio_path is not None and self.cache is not None:
+                self.cache.put_file(db, "audio", self._audio_key(video, ctx), Path(audio_path))
+
+        if audio_path is not None and self.cache is not None:
+            self.cache.acquire(db, video.id, "audio", self._audio_key(video, ctx))
+
+        video.audio_path = str(audio_path)
+
+        ctx.audio_path = audio_path
+        ctx.ai_subtitle = ai_subtitle
+        ctx.note(bytes_out=_file_size(audio_path))
+
+        if audio_path is not None:
+            extra = None
             if ai_subtitle:
-                logger.info("using_ai_subtitle", source_id=video.source_id)
-                from services.asr import TranscriptResult, TranscriptSegment
-                result = TranscriptResult(
-                    text=ai_subtitle,
-                    language="zh",
-                    duration=video.duration or 0,
-                    segments=[TranscriptSegment(start=0, end=video.duration or 0, text=ai_subtitle)],
-                )
-            else:
-                # 使用ASR转写
-                if user_id:
-                    asr_provider = self._get_asr_provider(db, user_id)
-                    result = asr_provider.transcribe(str(audio_path))
+                subtitle_path = self.transcript_dir / f"{video.source_id}.subtitle.txt"
+                subtitle_path.write_text(ai_subtitle, encoding="utf-8")
+                extra = {"subtitle_path": str(subtitle_path)}
+            record_checkpoint(db, video.id, "download", artifact_path=Path(audio_path), extra=extra, models=ctx.models)
+        db.commit()
+
+    def _load_subtitle(self, video: Video, ctx: "PipelineContext") -> bool:
+        """通过B站接口获取字幕（转为 SRT 存入 ctx.ai_subtitle），没有字幕或获取失败时返回 False"""
+        if video.source_type != "bilibili":
+            return False
+
+        from services.watcher.bilibili import BilibiliClient
+
+        try:
+            with BilibiliClient(self.sessdata) as client:
+                body = client.fetch_subtitle(video.source_id)
+        except Exception as e:
+            logger.warning("subtitle_fetch_failed", source_id=video.source_id, error=str(e))
+            return False
+
+        segments = segments_from_bilibili(body or [])
+        if not segments:
+            return False
+        ctx.ai_subtitle = to_srt(segments)
+        logger.info("subtitle_loaded", source_id=video.source_id, segments=len(segments))
+        return True
+
+    def _download_progress(self, video_id: int, done: int, total: int):
+        """下载字节进度写入任务状态（总大小未知时只更新已下载量）"""
+        mb = done / (1 << 20)
+        if total:
+            self.status.stage_progress(
+                video_id, "download", done / total,
+                message=f"下载 {mb:.1f}/{total / (1 << 20):.1f} MB", detail={"bytes": done, "total_bytes": total},
+            )
+        else:
+            self.status.stage_progress(
+                video_id, "download", 0.0, message=f"下载 {mb:.1f} MB", detail={"bytes": done}
+            )
+
+    def _download_audio(self, video: Video, db: Session, user_id: Optional[int] = None) -> Tuple[Optional[Path], Optional[str]]:
+        """下载音频，返回 (音频路径, AI字幕)"""
+        ai_subtitle = None
+        audio_path = None
+
+        # 使用统一下载器接口
+        try:
+            from services.downloader import get_downloader, DownloadMode
+
+            downloader = get_downloader(video.source_type)
+            with get_limiter(DOWNLOAD).slot() as slot:
+                started = time.monotonic()
+                result = run_sync(downloader.download(
+                    video.source_id,
+                    mode=DownloadMode.AUDIO,
+                    progress=lambda done, total: self._download_progress(video.id, done, total),
+                ))
+                # 下载耗时随文件大小变化，按每 MB 耗时反馈给并发控制器
+                if result.success and result.file_path and Path(result.file_path).exists():
+                    size_mb = Path(result.file_path).stat().st_size / (1 << 20)
+                    slot.succeeded((time.monotonic() - started) / max(size_mb, 1.0))
                 else:
-                    result = self.asr_manager.transcribe(str(audio_path))
-            
-            # 保存转写结果
-            transcript_path = self._save_transcript(video.source_id, result)
-            video.transcript_path = str(transcript_path)
-            db.commit()
+                    slot.failed()
+            if result.success and result.file_path:
+                audio_path = result.file_path
+                if result.subtitle_content:
+                    ai_subtitle = result.subtitle_content
+                    logger.info("subtitle_found", source_id=video.source_id)
+                logger.info("download_success", source_type=video.source_type, source_id=video.source_id)
+        except (NetworkError, OSError, IOError) as e:
+            logger.error("download_failed", source_id=video.source_id, error=str(e), exc_info=True)
+        except Exception as e:
+            logger.exception("download_failed_unexpected", source_id=video.source_id)
 
-            # Step 4: AI分析（使用用户配置的摘要模型）
-            video.status = VideoStatus.ANALYZING.value
+        # 如果统一下载器失败，回退到旧逻辑（仅 bilibili）
+        if audio_path is None and video.source_type == "bilibili":
+            logger.info("fallback_to_legacy", source_id=video.source_id)
+            video_path = self.downloader.download_bilibili(video.source_id, self.sessdata)
+            video.video_path = str(video_path)
             db.commit()
+
+            # 提取音频
+            logger.info("pipeline_step", step="extract_audio", source_id=video.source_id)
+            # 直接提取为转写所用提供者的输入格式
+            asr_provider = self._get_asr_provider(db, user_id) if user_id else self.asr_manager
+            audio_path = self.audio_processor.extract_audio(
+                video_path, video.source_id, profile=asr_provider.audio_profile
+            )
             
+            # 删除原视频文件
             try:
-                logger.info("pipeline_step", step="analyze", source_id=video.source_id)
-                summarizer = self._get_summarizer(db, user_id) if user_id else None
+                if video_path.exists():
+                    video_path.unlink()
+                    logger.info("video_file_deleted", source_id=video.source_id, path=str(video_path))
+                video.video_path = None
+                db.commit()
+            except (OSError, IOError) as e:
+                logger.error("video_delete_failed", source_id=video.source_id, error=str(e), exc_info=True)
+            except Exception:
+                logger.exception("video_delete_failed_unexpected", source_id=video.source_id)
+
+        return audio_path, ai_subtitle
+
+    def _step_transcribe(self, video: Video, ctx: "PipelineContext", db: Session):
+        """Step 2: 转写"""
+        self._set_status(video, "transcribe", VideoStatus.TRANSCRIBING)
+        
+        logger.info("pipeline_step", step="transcribe", source_id=video.source_id)
+        
+        cache_keys: List[str] = []
+        if self.cache is not None:
+            cache_keys = self._transcript_keys(video, ctx)
+            if ctx.cached_transcript is None:
+                ctx.cached_transcript = self._lookup_transcript(db, cache_keys)
+        
+        # 优先复用缓存的转写
+        if ctx.cached_transcript is not None:
+            logger.info("using_cached_transcript", source_id=video.source_id)
+            ctx.note(provider="cache")
+            result = load_transcript(ctx.cached_transcript[1])
+        # 如果有AI字幕，直接使用（跳过ASR）
+        elif ctx.ai_subtitle:
+            logger.info("using_ai_subtitle", source_id=video.source_id)
+            ctx.note(provider="subtitle")
+            result = subtitle_transcript(ctx.ai_subtitle, duration=video.duration or 0)
+        else:
+            # 使用ASR转写
+            asr_provider = self._get_asr_provider(db, ctx.user_id) if ctx.user_id else self.asr_manager
+            if asr_provider is self.asr_manager:
+                ctx.note(provider=f"local:{self.asr_manager.default_provider}")
+            else:
+                ctx.note(provider=f"api:{asr_provider.model}")
+            ctx.note(bytes_in=_file_size(ctx.audio_path))
+            if asr_provider is self.asr_manager:
+                result = self._transcribe_streaming(video, ctx)
+            else:
+                result = asr_provider.transcribe(
+                    str(ctx.audio_path),
+                    progress=lambda done, total, detail: self.status.stage_progress(
+                        video.id, "transcribe", done / total, message=f"转写分片 {done}/{total}", detail=detail
+                    ),
+                )
+        
+        if result.gaps:
+            logger.warning("transcript_has_gaps", source_id=video.source_id, gaps=len(result.gaps))
+
+        # 保存转写结果
+        transcript_path = self._save_transcript(video.source_id, result)
+        video.transcript_path = str(transcript_path)
+
+        # 有缺失区间的转写不进入缓存，重新处理时补齐
+        if self.cache is not None and not result.gaps:
+            if ctx.cached_transcript is not None:
+                ref_key = ctx.cached_transcript[0]
+            else:
+                for key in cache_keys:
+                    self.cache.put_json(db, "transcript", key, self._transcript_dict(result))
+                ref_key = cache_keys[0]
+            self.cache.acquire(db, video.id, "transcript", ref_key)
+
+        ctx.result = result
+        ctx.note(bytes_out=len(result.text.encode("utf-8")))
+        # 缺失区间记入检查点：下次处理判定转写未完成，按分片清单只重传缺失的分片
+        checkpoint = record_checkpoint(
+            db, video.id, "transcribe", artifact_path=transcript_path.with_suffix(".json"),
+            extra={"gaps": len(result.gaps)} if result.gaps else None, models=ctx.models,
+        )
+        db.commit()
+        ctx.transcript_hash = checkpoint.content_hash
+        if result.gaps:
+            ctx.note(status="partial")
+
+    def _transcribe_streaming(self, video: Video, ctx: "PipelineContext") -> TranscriptResult:
+        """
+        本地模型流式转写：分段边产出边写入 <source_id>.partial.txt、增量分块并后台计算向量，
+        状态通道按已转写时长汇报进度
+        """
+        stream = self.asr_manager.transcribe_stream(str(ctx.audio_path))
+        writer = TranscriptWriter(self.transcript_dir, video.source_id)
+        embedder = self._stream_embedder(ctx.user_id)
+        duration = stream.duration or video.duration or 0
+        succeeded = False
+        try:
+            for seg in stream:
+                writer.write(seg)
+                if embedder is not None:
+                    embedder.feed(seg.text)
+                if duration:
+                    self.status.stage_progress(
+                        video.id,
+                        "transcribe",
+                        min(seg.end / duration, 1.0),
+                        message=f"已转写 {int(seg.end) // 60:02d}:{int(seg.end) % 60:02d}",
+                        detail={"partial_path": str(writer.path)},
+                    )
+            result = stream.result()
+            succeeded = True
+        finally:
+            writer.close()
+            # 未成功时向量不会被索引阶段取用，在此停止后台线程
+            if embedder is not None and not succeeded:
+                embedder.close()
+
+        ctx.embedder = embedder
+        if embedder is not None:
+            logger.info("transcript_streamed", source_id=video.source_id, chunks_ready=embedder.ready_chunks)
+        return result
+
+    @staticmethod
+    def _stream_embedder(user_id: Optional[int]) -> Optional[IncrementalEmbedder]:
+        """Chroma 后端才能传入预计算向量；其他后端不做增量向量化"""
+        from alice.rag import ChromaClient, get_rag_client
+
+        try:
+            client = get_rag_client(user_id=user_id)
+        except Exception as e:
+            logger.warning("stream_embedder_unavailable", error=str(e))
+            return None
+        return IncrementalEmbedder(client, chunk_size=500) if isinstance(client, ChromaClient) else None
+
+    def _step_analyze(self, video: Video, ctx: "PipelineContext", db: Session):
+        """Step 3: AI分析（使用用户配置的摘要模型），失败不阻塞流程"""
+        self._set_status(video, "analyze", VideoStatus.ANALYZING)
+        
+        try:
+            logger.info("pipeline_step", step="analyze", source_id=video.source_id)
+            
+            analysis = None
+            summary_key = None
+            if self.cache is not None:
+                from services.ai.summarizer import VideoAnalysis
+                summary_key = self._summary_key(video, ctx)
+                cached = self.cache.get_json(db, "summary", summary_key)
+                if cached is not None:
+                    analysis = VideoAnalysis(**cached)
+                    ctx.note(provider="cache")
+            
+            if analysis is None:
+                summarizer = self._get_summarizer(db, ctx.user_id) if ctx.user_id else None
                 if summarizer is None:
                     from services.ai import Summarizer
                     summarizer = Summarizer()
+                ctx.note(provider=getattr(summarizer.llm, "default_provider", None))
                     
                 analysis = summarizer.analyze(
-                    transcript=result.text,
+                    transcript=ctx.result.text,
                     title=video.title,
                     author=video.author,
                     duration=video.duration or 0,
                 )
-                
-                video.summary = analysis.summary
-                video.key_points = json.dumps(analysis.key_points, ensure_ascii=False)
-                video.concepts = json.dumps(analysis.concepts, ensure_ascii=False)
-                db.commit()
-                
-                logger.info(
-                    "analysis_complete",
-                    source_id=video.source_id,
-                    summary_length=len(analysis.summary),
-                )
-            except NetworkError as e:
-                # AI分析失败不阻塞流程
-                logger.error("analysis_skipped_network", source_id=video.source_id, error=str(e), exc_info=True)
-            except Exception as e:
-                # AI分析失败不阻塞流程
-                logger.exception("analysis_skipped_unexpected", source_id=video.source_id)
-
-            # Step 5: 向量化（索引到知识库）
-            video.status = VideoStatus.INDEXING.value
+                if summary_key is not None:
+                    self.cache.put_json(db, "summary", summary_key, asdict(analysis))
+            
+            if summary_key is not None:
+                self.cache.acquire(db, video.id, "summary", summary_key)
+            
+            video.summary = analysis.summary
+            video.key_points = json.dumps(analysis.key_points, ensure_ascii=False)
+            video.concepts = json.dumps(analysis.concepts, ensure_ascii=False)
+            ctx.note(
+                bytes_in=len(ctx.result.text.encode("utf-8")),
+                bytes_out=len(analysis.summary.encode("utf-8")),
+            )
+            record_checkpoint(db, video.id, "analyze", content_hash=ctx.transcript_hash, models=ctx.models)
             db.commit()
             
-            try:
-                logger.info("pipeline_step", step="indexing", source_id=video.source_id)
-                self._index_to_rag(video, result.text, db, user_id)
-            except NetworkError as e:
-                # 向量化失败不阻塞流程
-                logger.error("indexing_skipped_network", source_id=video.source_id, error=str(e), exc_info=True)
-            except Exception as e:
-                # 向量化失败不阻塞流程
-                logger.exception("indexing_skipped_unexpected", source_id=video.source_id)
+            logger.info(
+                "analysis_complete",
+                source_id=video.source_id,
+                summary_length=len(analysis.summary),
+            )
+        except NetworkError as e:
+            # AI分析失败不阻塞流程
+            logger.error("analysis_skipped_network", source_id=video.source_id, error=str(e), exc_info=True)
+            ctx.note(status="failed")
+        except Exception as e:
+            # AI分析失败不阻塞流程
+            logger.exception("analysis_skipped_unexpected", source_id=video.source_id)
+            ctx.note(status="failed")
 
-            # Step 6: 完成
-            video.status = VideoStatus.DONE.value
+    def _step_index(self, video: Video, ctx: "PipelineContext", db: Session):
+        """Step 4: 向量化（索引到知识库），失败不阻塞流程"""
+        self._set_status(video, "index", VideoStatus.INDEXING)
+        
+        try:
+            logger.info("pipeline_step", step="indexing", source_id=video.source_id)
+            ctx.note(provider=get_config().rag.provider, bytes_in=len(ctx.result.text.encode("utf-8")))
+            embedder, ctx.embedder = ctx.embedder, None
+            self._index_to_rag(video, ctx.result.text, db, ctx.user_id, embedder=embedder)
+            record_checkpoint(db, video.id, "index", content_hash=ctx.transcript_hash, models=ctx.models)
+            db.commit()
+        except NetworkError as e:
+            # 向量化失败不阻塞流程
+            logger.error("indexing_skipped_network", source_id=video.source_id, error=str(e), exc_info=True)
+            ctx.note(status="failed")
+        except Exception as e:
+            # 向量化失败不阻塞流程
+            logger.exception("indexing_skipped_unexpected", source_id=video.source_id)
+            ctx.note(status="failed")
+
+    def _step_finalize(self, video: Video, ctx: "PipelineContext", db: Session):
+        """Step 5: 完成并发送通知"""
+        with self.status.terminal(video.id):
+            self._set_terminal(video, VideoStatus.DONE)
             video.processed_at = datetime.utcnow()
             db.commit()
 
-            logger.info(
-                "pipeline_complete",
+        logger.info(
+            "pipeline_complete",
+            source_id=video.source_id,
+            text_length=len(ctx.result.text),
+        )
+
+        # 发送通知（增强版，带摘要）
+        if self.notifier and self.notifier.is_configured():
+            # 优先使用摘要，否则用转写预览
+            notify_content = video.summary or ctx.result.text[:200]
+            self.notifier.send_video_complete(
                 source_id=video.source_id,
-                text_length=len(result.text),
+                title=video.title,
+                transcript_preview=notify_content,
             )
 
-            # Step 6: 发送通知（增强版，带摘要）
-            if self.notifier and self.notifier.is_configured():
-                # 优先使用摘要，否则用转写预览
-                notify_content = video.summary or result.text[:200]
-                self.notifier.send_video_complete(
-                    source_id=video.source_id,
-                    title=video.title,
-                    transcript_preview=notify_content,
-                )
+    def _set_status(self, video: Video, stage: str, status: VideoStatus):
+        """中间状态只写入状态通道（见 status.py），合并后批量持久化"""
+        self.status.update(
+            video.id, status=status.value, stage=stage, progress=STAGE_PROGRESS[stage][0], message=None
+        )
 
-            return video
+    @staticmethod
+    def _set_terminal(video: Video, status: VideoStatus):
+        """
+        终态随本会话提交
 
-        except Exception as e:
-            video.status = VideoStatus.FAILED.value
-            video.error_message = str(e)
+        会话中加载的状态可能与数据库中写回的中间状态不同（如重新处理已完成的视频），
+        显式标记修改，保证终态一定写入。
+        """
+        video.status = status.value
+        flag_modified(video, "status")
+
+    def _mark_failed(self, video: Video, db: Session, error: Exception):
+        """标记视频处理失败并发送失败通知"""
+        with self.status.terminal(video.id):
+            self._set_terminal(video, VideoStatus.FAILED)
+            video.error_message = str(error)
             video.retry_count += 1
             db.commit()
-            
-            logger.exception("pipeline_failed", source_id=video.source_id, error=str(e))
-            
-            # 发送失败通知
-            if self.notifier and self.notifier.is_configured():
-                self.notifier.send_error(
-                    source_id=video.source_id,
-                    title=video.title,
-                    error=str(e),
-                )
-            
-            raise
+        
+        logger.exception("pipeline_failed", source_id=video.source_id, error=str(error))
+        
+        # 发送失败通知
+        if self.notifier and self.notifier.is_configured():
+            self.notifier.send_error(
+                source_id=video.source_id,
+                title=video.title,
+                error=str(error),
+            )
 
-    def _index_to_rag(self, video: Video, transcript: str, db: Session, user_id: int = None):
+    def _index_to_rag(
+        self,
+        video: Video,
+        transcript: str,
+        db: Session,
+        user_id: int = None,
+        embedder: Optional[IncrementalEmbedder] = None,
+    ):
         """
         索引视频到向量知识库
         
@@ -297,18 +952,37 @@ class VideoPipeline:
             transcript: 转写文本
             db: 数据库会话
             user_id: 用户ID（用于获取用户配置的 embedding）
+            embedder: 流式转写时的增量向量化结果（可选）
         """
-        from alice.rag import RAGService, get_rag_client
+        from alice.rag import ChromaClient, RAGService, get_rag_client
         
         # 获取 RAG 客户端（带用户配置）
         client = get_rag_client(user_id=user_id)
         rag_service = RAGService(client=client)
         
+        # 向量缓存（仅 Chroma 后端可传入预计算向量）
+        embeddings = None
+        if self.cache is not None and isinstance(client, ChromaClient):
+            key = cache_key("embedding", text_sha256(transcript), client.embedding_model_id, 500)
+            embeddings = self.cache.get_json(db, "embedding", key)
+            if embeddings is None:
+                if embedder is not None:
+                    embeddings = embedder.finish(transcript)
+                else:
+                    embeddings = client.embed_chunks(client.split_text(transcript, chunk_size=500))
+                self.cache.put_json(db, "embedding", key, embeddings)
+            self.cache.acquire(db, video.id, "embedding", key)
+        elif embedder is not None and isinstance(client, ChromaClient):
+            embeddings = embedder.finish(transcript)
+        if embedder is not None:
+            embedder.close()
+        
         # 索引视频
         doc_id = rag_service.index_video(
             tenant_id=video.tenant_id,
             video=video,
             transcript=transcript,
+            embeddings=embeddings,
         )
         
         logger.info(
@@ -318,6 +992,24 @@ class VideoPipeline:
             doc_id=doc_id,
         )
 
+    @staticmethod
+    def _transcript_dict(result: TranscriptResult) -> dict:
+        """转写结果的 JSON 结构（与 checkpoints.load_transcript 对应）"""
+        return {
+            "text": result.text,
+            "language": result.language,
+            "duration": result.duration,
+            "gaps": [list(gap) for gap in result.gaps],
+            "segments": [
+                {
+                    "start": seg.start,
+                    "end": seg.end,
+                    "text": seg.text,
+                }
+                for seg in result.segments
+            ],
+        }
+
     def _save_transcript(self, source_id: str, result: TranscriptResult) -> Path:
         """保存转写结果"""
         # 保存纯文本
@@ -328,31 +1020,17 @@ class VideoPipeline:
         # 保存带时间戳的JSON
         json_path = self.transcript_dir / f"{source_id}.json"
         with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(
-                {
-                    "text": result.text,
-                    "language": result.language,
-                    "duration": result.duration,
-                    "segments": [
-                        {
-                            "start": seg.start,
-                            "end": seg.end,
-                            "text": seg.text,
-                        }
-                        for seg in result.segments
-                    ],
-                },
-                f,
-                ensure_ascii=False,
-                indent=2,
-            )
+            json.dump(self._transcript_dict(result), f, ensure_ascii=False, indent=2)
+
+        # 流式转写的中间文件由正式文件取代（也清理此前中断的转写留下的文件）
+        (self.transcript_dir / f"{source_id}{PARTIAL_SUFFIX}").unlink(missing_ok=True)
 
         logger.info("transcript_saved", source_id=source_id, path=str(txt_path))
         return txt_path
 
     def process_pending(self, db: Session, tenant_id: int, limit: int = 10) -> list:
         """
-        处理待处理的视频
+        处理待处理的视频（分阶段并行）
         
         Args:
             db: 数据库会话
@@ -360,28 +1038,24 @@ class VideoPipeline:
             limit: 最大处理数量
             
         Returns:
-            处理的视频列表
+            处理成功的视频列表
         """
-        videos = (
-            db.query(Video)
-            .filter(
-                Video.tenant_id == tenant_id,
-                Video.status == VideoStatus.PENDING,
-            )
-            .limit(limit)
-            .all()
-        )
+        video_ids = claim_pending_videos(db, limit, tenant_id=tenant_id)
+        if not video_ids:
+            return []
+        videos = db.query(Video).filter(Video.id.in_(video_ids)).all()
+
+        by_id = {v.id: v for v in videos}
+        outcomes = self.process_many(list(by_id))
+
+        # 各阶段在独立会话中提交，刷新调用方会话中的对象
+        db.expire_all()
 
         processed = []
-        for video in videos:
-            try:
-                self.process(video, db)
-                processed.append(video)
-            except Exception as e:
-                logger.exception("process_video_failed", source_id=video.source_id)
-                video.status = VideoStatus.FAILED.value
-                video.error_message = str(e)
-                db.commit()
+        for video_id, error in outcomes:
+            if error is not None:
+                logger.error("process_video_failed", source_id=by_id[video_id].source_id, error=str(error))
                 continue
+            processed.append(by_id[video_id])
 
         return processed
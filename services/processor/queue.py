@@ -1,21 +1,32 @@
 """
 视频处理队列
-支持多视频并行处理
+任务持久化在任务队列后端（packages.queue），重启后自动恢复；
+本进程通过租约认领任务，交给分阶段流水线处理（不同视频的下载、转写、分析相互重叠）。
+认领顺序按优先级 + 租户加权公平（见 scheduling.py），而不是先进先出。
+
+扫描时已确认有字幕的视频（Video.processing_lane == SUBTITLE_LANE）进入独立的字幕队列，
+由单独的线程池串行处理各阶段，不占用 ASR 流水线的名额，也不排在长音频转写之后。
 """
 
+import os
+import socket
 import threading
-from concurrent.futures import ThreadPoolExecutor, Future
-from typing import Dict, Optional, Callable
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
 from packages.logging import get_logger
-from alice.errors import AliceError, NetworkError
+from packages.queue import FairSharePolicy, Job, JobBackend, JobState, Priority, get_job_backend
+from .status import get_status_channel
 
 logger = get_logger(__name__)
 
-# 最大并行处理视频数
-MAX_PARALLEL_VIDEOS = 2
+# 队列名称
+VIDEO_QUEUE = "video"
+SUBTITLE_QUEUE = "video_subtitle"   # 字幕快速通道
 
 
 class TaskStatus(Enum):
@@ -26,172 +37,544 @@ class TaskStatus(Enum):
     CANCELLED = "cancelled"
 
 
+_JOB_TO_TASK_STATUS = {
+    JobState.QUEUED: TaskStatus.QUEUED,
+    JobState.RUNNING: TaskStatus.RUNNING,
+    JobState.COMPLETED: TaskStatus.COMPLETED,
+    JobState.FAILED: TaskStatus.FAILED,
+    JobState.CANCELLED: TaskStatus.CANCELLED,
+}
+
+
 @dataclass
 class ProcessingTask:
     video_id: int
     user_id: int
     status: TaskStatus
+    job_id: Optional[int] = None
     future: Optional[Future] = None
     error: Optional[str] = None
+    queue: str = VIDEO_QUEUE
+
+
+def _video_key(video_id: int) -> str:
+    return f"video:{video_id}"
 
 
 class VideoProcessingQueue:
     """
     视频处理队列管理器
-    
+
     单例模式，全局共享一个队列
     支持：
-    - 最多 N 个视频并行处理
-    - 任务取消
-    - 状态查询
+    - 任务持久化，重启/部署后未完成任务自动恢复
+    - 租约 + 心跳，多进程可安全并发消费
+    - 过期租约回收、已结束任务定期清理
+    - 分阶段并行处理（每阶段独立并发，有界队列背压）
+    - 任务取消、状态查询
+    - 独立 worker 进程模式：认领数据库中的待处理视频，限制处理总数后退出
     """
-    
+
     _instance: Optional["VideoProcessingQueue"] = None
     _lock = threading.Lock()
-    
-    def __new__(cls):
+
+    def __new__(cls, *args, **kwargs):
         if cls._instance is None:
             with cls._lock:
                 if cls._instance is None:
                     cls._instance = super().__new__(cls)
                     cls._instance._initialized = False
         return cls._instance
-    
-    def __init__(self):
+
+    def __init__(
+        self,
+        backend: Optional[JobBackend] = None,
+        max_inflight: Optional[int] = None,
+        claim_pending: bool = False,
+        max_tasks: int = 0,
+        policy: Optional[FairSharePolicy] = None,
+    ):
+        """
+        Args:
+            backend: 任务队列后端（默认按配置创建）
+            max_inflight: 本进程同时处理的任务上限（默认 queue.max_inflight）
+            claim_pending: 队列空闲时是否认领数据库中的 PENDING 视频
+            max_tasks: 累计认领任务数上限，达到后不再认领（0 表示不限）
+            policy: 调度策略（默认按租户计划与配额）
+        """
         if self._initialized:
             return
-        
-        self._executor = ThreadPoolExecutor(
-            max_workers=MAX_PARALLEL_VIDEOS,
-            thread_name_prefix="video_processor",
-        )
-        self._tasks: Dict[int, ProcessingTask] = {}
+
+        from packages.config import get_config
+
+        self._config = get_config().queue
+        self._backend = backend or get_job_backend()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._max_inflight = max_inflight or self._config.max_inflight
+        self._claim_pending = claim_pending
+        self._max_tasks = max_tasks
+        self._claimed_count = 0
+        if policy is None:
+            from .scheduling import TenantSchedulingPolicy
+            policy = TenantSchedulingPolicy(self._config)
+        self._policy = policy
+        self._draining = False
+
+        self._pipeline = None
+        self._executor = None
+        self._subtitle_executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: Dict[int, ProcessingTask] = {}  # job_id -> 本进程处理中的任务
         self._tasks_lock = threading.Lock()
+        self._idle = threading.Condition(self._tasks_lock)
+
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._dispatcher: Optional[threading.Thread] = None
         self._initialized = True
-        
-        logger.info("video_queue_initialized", max_parallel=MAX_PARALLEL_VIDEOS)
-    
-    def submit(self, video_id: int, user_id: int) -> bool:
+
+        logger.info("video_queue_initialized", backend=self._backend.name, worker_id=self.worker_id)
+
+    def _get_pipeline(self):
+        if self._pipeline is None:
+            from packages.config import get_config
+            from .pipeline import VideoPipeline
+
+            self._pipeline = VideoPipeline(sessdata=get_config().bilibili.sessdata)
+        return self._pipeline
+
+    def _get_executor(self):
+        """延迟创建管道与分阶段执行器"""
+        if self._executor is None:
+            self._executor = self._get_pipeline().build_executor()
+            self._executor.start()
+        return self._executor
+
+    def _get_subtitle_executor(self) -> ThreadPoolExecutor:
+        """字幕快速通道的线程池（每个任务在一个线程内串行完成各阶段）"""
+        if self._subtitle_executor is None:
+            self._subtitle_executor = ThreadPoolExecutor(
+                max_workers=max(1, self._config.subtitle_inflight),
+                thread_name_prefix="subtitle_lane",
+            )
+        return self._subtitle_executor
+
+    # ========== 生产者 ==========
+
+    def submit(
+        self,
+        video_id: int,
+        user_id: int,
+        from_stage: Optional[str] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        tenant_id: Optional[int] = None,
+    ) -> bool:
         """
-        提交视频处理任务
-        
+        提交视频处理任务（持久化入队）
+
+        Args:
+            video_id: 视频ID
+            user_id: 用户ID
+            from_stage: 强制从指定阶段开始（默认按检查点续跑）
+            priority: 优先级（默认 interactive，即用户主动触发）
+            tenant_id: 视频所属租户（为空时查询数据库）
+
         Returns:
             True 如果成功提交，False 如果已在处理中
         """
-        with self._tasks_lock:
-            # 检查是否已在处理
-            if video_id in self._tasks:
-                existing = self._tasks[video_id]
-                if existing.status in (TaskStatus.QUEUED, TaskStatus.RUNNING):
-                    logger.warning("video_already_processing", video_id=video_id)
-                    return False
-            
-            # 创建任务
-            task = ProcessingTask(
-                video_id=video_id,
-                user_id=user_id,
-                status=TaskStatus.QUEUED,
-            )
-            self._tasks[video_id] = task
-        
-        # 提交到线程池
-        future = self._executor.submit(self._process_video, video_id, user_id)
-        future.add_done_callback(lambda f: self._on_task_complete(video_id, f))
-        
-        with self._tasks_lock:
-            if video_id in self._tasks:
-                self._tasks[video_id].future = future
-                self._tasks[video_id].status = TaskStatus.RUNNING
-        
-        logger.info("video_task_submitted", video_id=video_id, user_id=user_id)
+        from .scheduling import tenant_group
+
+        video_tenant, queue = self._video_route(video_id)
+        if tenant_id is None:
+            tenant_id = video_tenant
+
+        job = self._backend.enqueue(
+            queue,
+            {"video_id": video_id, "user_id": user_id, "from_stage": from_stage},
+            key=_video_key(video_id),
+            max_attempts=self._config.max_attempts,
+            priority=priority,
+            group=tenant_group(tenant_id),
+        )
+        if job is None:
+            logger.warning("video_already_processing", video_id=video_id)
+            return False
+
+        logger.info(
+            "video_task_submitted",
+            video_id=video_id,
+            user_id=user_id,
+            job_id=job.id,
+            queue=queue,
+            priority=Priority(priority).name.lower(),
+        )
+
+        if self._config.consume:
+            self.start()
+            self._wakeup.set()
         return True
-    
-    def _process_video(self, video_id: int, user_id: int):
-        """执行视频处理"""
-        from packages.db import get_db_context, Video
-        from services.processor import VideoPipeline
-        from packages.config import get_config
-        
-        logger.info("video_processing_started", video_id=video_id, user_id=user_id)
-        
-        try:
-            config = get_config()
-            with get_db_context() as db:
-                video = db.query(Video).filter(Video.id == video_id).first()
-                if video:
-                    pipeline = VideoPipeline(sessdata=config.bilibili.sessdata)
-                    pipeline.process(video, db, user_id=user_id)
-                    logger.info("video_processing_completed", video_id=video_id)
-                else:
-                    raise ValueError(f"Video {video_id} not found")
-        except (NetworkError, OSError, IOError) as e:
-            logger.error("video_processing_failed_network", video_id=video_id, error=str(e), exc_info=True)
-            raise
-        except Exception as e:
-            logger.exception("video_processing_failed_unexpected", video_id=video_id)
-            raise
-    
-    def _on_task_complete(self, video_id: int, future: Future):
-        """任务完成回调"""
-        with self._tasks_lock:
-            if video_id not in self._tasks:
-                return
-            
-            task = self._tasks[video_id]
-            
-            if future.cancelled():
-                task.status = TaskStatus.CANCELLED
-            elif future.exception():
-                task.status = TaskStatus.FAILED
-                task.error = str(future.exception())
-            else:
-                task.status = TaskStatus.COMPLETED
-    
+
     def cancel(self, video_id: int) -> bool:
         """
-        取消视频处理任务
-        
+        取消视频处理任务（仅限尚未开始的任务）
+
         Returns:
             True 如果成功取消，False 如果无法取消
         """
-        with self._tasks_lock:
-            if video_id not in self._tasks:
-                return False
-            
-            task = self._tasks[video_id]
-            if task.future and not task.future.done():
-                cancelled = task.future.cancel()
-                if cancelled:
-                    task.status = TaskStatus.CANCELLED
-                    logger.info("video_task_cancelled", video_id=video_id)
-                return cancelled
-            
+        job = self._backend.get_active_by_key(_video_key(video_id))
+        if job is None:
             return False
-    
+
+        if job.state == JobState.QUEUED:
+            cancelled = self._backend.cancel(job.id)
+        else:
+            # 已被本进程认领但尚未进入流水线首阶段
+            with self._tasks_lock:
+                task = self._tasks.get(job.id)
+            cancelled = bool(task and task.future and task.future.cancel())
+
+        if cancelled:
+            logger.info("video_task_cancelled", video_id=video_id)
+        return cancelled
+
+    # ========== 消费者 ==========
+
+    def start(self):
+        """启动调度线程（认领任务、续约、回收、清理）"""
+        with self._lock:
+            if self._dispatcher is not None and self._dispatcher.is_alive():
+                return
+            self._stop.clear()
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_loop,
+                name="video_queue_dispatcher",
+                daemon=True,
+            )
+            self._dispatcher.start()
+        logger.info("video_queue_started", worker_id=self.worker_id)
+
+    def _dispatch_loop(self):
+        last_heartbeat = last_reap = last_purge = 0.0
+
+        while not self._stop.is_set():
+            now = time.time()
+            try:
+                if now - last_reap >= self._config.reap_interval:
+                    self._backend.reap_expired()
+                    last_reap = now
+
+                if now - last_heartbeat >= self._config.heartbeat_interval:
+                    self._heartbeat()
+                    last_heartbeat = now
+
+                if now - last_purge >= 3600:
+                    self._purge()
+                    last_purge = now
+
+                self._claim()
+            except Exception:
+                logger.exception("video_queue_dispatch_error")
+
+            self._wakeup.wait(self._config.poll_interval)
+            self._wakeup.clear()
+
+    def _free_slots(self, queue: str, limit: int) -> int:
+        with self._tasks_lock:
+            running = sum(1 for task in self._tasks.values() if task.queue == queue)
+        free = limit - running
+        if self._max_tasks:
+            free = min(free, self._max_tasks - self._claimed_count)
+        return free
+
+    def _claim(self):
+        """按空闲容量认领任务并提交到流水线（字幕快速通道单独计算容量）"""
+        if self._draining:
+            return
+
+        lease = self._config.lease_seconds
+        free = self._free_slots(SUBTITLE_QUEUE, self._config.subtitle_inflight)
+        if free > 0:
+            for job in self._backend.claim(SUBTITLE_QUEUE, self.worker_id, lease, limit=free, policy=self._policy):
+                self._claimed_count += 1
+                self._start_job(job)
+
+        free = self._free_slots(VIDEO_QUEUE, self._max_inflight)
+        if free <= 0:
+            return
+
+        jobs = self._backend.claim(VIDEO_QUEUE, self.worker_id, lease, limit=free, policy=self._policy)
+        if len(jobs) < free and self._claim_pending and self._enqueue_pending(free - len(jobs)):
+            jobs += self._backend.claim(
+                VIDEO_QUEUE, self.worker_id, lease, limit=free - len(jobs), policy=self._policy
+            )
+
+        for job in jobs:
+            self._claimed_count += 1
+            self._start_job(job)
+
+    def _enqueue_pending(self, limit: int) -> int:
+        """
+        认领数据库中的 PENDING 视频并转为队列任务（之后享有租约与重试）
+
+        扫描发现的视频为 scheduled 优先级，失败后重新待处理的视频为 backfill。
+        没能入队的视频（去重键已被占用或入队出错）撤销认领，回到 PENDING。
+
+        Returns:
+            成功入队的视频数
+        """
+        from packages.db import SUBTITLE_LANE, Video, get_db_context
+        from .pipeline import claim_pending_videos, release_claimed_videos
+        from .scheduling import tenant_group
+
+        held_tenants = getattr(self._policy, "held_tenants", None)
+        held = held_tenants() if held_tenants else None
+        with get_db_context() as db:
+            video_ids = claim_pending_videos(db, limit, exclude_tenants=held)
+            videos = (
+                db.query(Video.id, Video.tenant_id, Video.retry_count, Video.processing_lane)
+                .filter(Video.id.in_(video_ids))
+                .all()
+            ) if video_ids else []
+
+        enqueued = set()
+        try:
+            for video in videos:
+                job = self._backend.enqueue(
+                    SUBTITLE_QUEUE if video.processing_lane == SUBTITLE_LANE else VIDEO_QUEUE,
+                    {"video_id": video.id, "user_id": None},
+                    key=_video_key(video.id),
+                    max_attempts=self._config.max_attempts,
+                    priority=Priority.BACKFILL if video.retry_count else Priority.SCHEDULED,
+                    group=tenant_group(video.tenant_id),
+                )
+                if job is not None:
+                    enqueued.add(video.id)
+        finally:
+            orphaned = [video_id for video_id in video_ids if video_id not in enqueued]
+            if orphaned:
+                with get_db_context() as db:
+                    release_claimed_videos(db, orphaned)
+        return len(enqueued)
+
+    @staticmethod
+    def _video_route(video_id: int) -> Tuple[Optional[int], str]:
+        """视频所属租户与应进入的队列"""
+        from packages.db import SUBTITLE_LANE, Video, get_db_context
+
+        with get_db_context() as db:
+            row = db.query(Video.tenant_id, Video.processing_lane).filter(Video.id == video_id).first()
+        if row is None:
+            return None, VIDEO_QUEUE
+        return row.tenant_id, SUBTITLE_QUEUE if row.processing_lane == SUBTITLE_LANE else VIDEO_QUEUE
+
+    @property
+    def exhausted(self) -> bool:
+        """是否已达到认领任务数上限"""
+        return bool(self._max_tasks) and self._claimed_count >= self._max_tasks
+
+    def _start_job(self, job: Job):
+        from .pipeline import PipelineContext
+
+        video_id = job.payload["video_id"]
+        user_id = job.payload.get("user_id")
+        task = ProcessingTask(
+            video_id=video_id,
+            user_id=user_id,
+            status=TaskStatus.QUEUED,
+            job_id=job.id,
+            queue=job.queue,
+        )
+        with self._tasks_lock:
+            self._tasks[job.id] = task
+
+        ctx = PipelineContext(
+            video_id=video_id,
+            user_id=user_id,
+            from_stage=job.payload.get("from_stage"),
+        )
+        if job.queue == SUBTITLE_QUEUE:
+            future = self._get_subtitle_executor().submit(self._get_pipeline().process_subtitle_lane, ctx)
+        else:
+            future = self._get_executor().submit(ctx)
+        task.future = future
+        future.add_done_callback(lambda f: self._on_task_complete(job.id, f))
+
+        logger.info("video_task_claimed", video_id=video_id, job_id=job.id, queue=job.queue, attempt=job.attempts)
+
+    def _on_task_complete(self, job_id: int, future: Future):
+        """任务完成回调：回写队列后端"""
+        with self._tasks_lock:
+            task = self._tasks.pop(job_id, None)
+            if not self._tasks:
+                self._idle.notify_all()
+        if task is None:
+            return
+
+        if future.cancelled():
+            self._backend.cancel(job_id, worker_id=self.worker_id)
+            logger.info("video_task_cancelled", video_id=task.video_id)
+        elif future.exception():
+            error = str(future.exception())
+            self._backend.fail(job_id, self.worker_id, error, retry_delay=self._config.retry_delay)
+            logger.error("video_processing_failed", video_id=task.video_id, error=error)
+        else:
+            self._backend.complete(job_id, self.worker_id)
+            if future.result() is False:
+                # 字幕已不可用：转入常规 ASR 队列
+                self.submit(task.video_id, task.user_id, priority=Priority.SCHEDULED)
+            else:
+                logger.info("video_processing_completed", video_id=task.video_id)
+
+        self._wakeup.set()
+
+    def _heartbeat(self):
+        """为本进程处理中的任务续约"""
+        with self._tasks_lock:
+            job_ids = list(self._tasks)
+        for job_id in job_ids:
+            if not self._backend.heartbeat(job_id, self.worker_id, self._config.lease_seconds):
+                logger.warning("video_task_lease_lost", job_id=job_id)
+
+    def _purge(self):
+        """清理过期的已结束任务"""
+        cutoff = time.time() - self._config.retention_hours * 3600
+        purged = self._backend.purge_finished(cutoff, max_finished=self._config.retention_max_jobs)
+        if purged:
+            logger.info("video_queue_purged", count=purged)
+
+    # ========== 状态 ==========
+
     def get_status(self, video_id: int) -> Optional[TaskStatus]:
         """获取任务状态"""
-        with self._tasks_lock:
-            if video_id in self._tasks:
-                return self._tasks[video_id].status
+        job = self._backend.get_active_by_key(_video_key(video_id))
+        if job is None:
             return None
-    
+
+        if job.state == JobState.RUNNING:
+            with self._tasks_lock:
+                task = self._tasks.get(job.id)
+            # 本进程已认领但仍在流水线入口排队
+            if task and task.future and not task.future.running() and not task.future.done():
+                return TaskStatus.QUEUED
+        return _JOB_TO_TASK_STATUS[job.state]
+
     def get_queue_info(self) -> dict:
         """获取队列信息"""
+        from packages.config import get_config
+
+        counts = self._backend.stats(VIDEO_QUEUE)
+        subtitle_counts = self._backend.stats(SUBTITLE_QUEUE)
+        with self._tasks_lock:
+            local = len(self._tasks)
+
+        pipeline_config = get_config().pipeline
+        return {
+            "max_parallel": max(
+                pipeline_config.download_workers,
+                pipeline_config.transcribe_workers,
+                pipeline_config.analyze_workers,
+                pipeline_config.index_workers,
+            ),
+            "running": counts[JobState.RUNNING.value],
+            "queued": counts[JobState.QUEUED.value],
+            "total_tasks": sum(counts.values()),
+            "jobs": counts,
+            "backend": self._backend.name,
+            "worker_id": self.worker_id,
+            "local_inflight": local,
+            "max_inflight": self._max_inflight,
+            "stages": self._executor.get_stats() if self._executor else {},
+            "subtitle_lane": {
+                "jobs": subtitle_counts,
+                "max_inflight": self._config.subtitle_inflight,
+            },
+            "status_writer": get_status_channel().stats(),
+        }
+
+    def get_queue_positions(self, tenant_id: Optional[int] = None) -> List[dict]:
+        """
+        排队中各视频的调度位置与预计开始时间
+
+        位置按当前调度策略模拟得出（忽略同时运行上限）；暂停调度的租户的任务排在最后且无 ETA。
+        ETA 基于最近 24 小时的平均单视频处理时长与当前运行中的任务数估算，仅供参考。
+
+        Args:
+            tenant_id: 只返回该租户的任务（位置仍为在全局队列中的位置）
+        """
+        from .metrics import mean_video_seconds
+
+        now = time.time()
+        queued = self._backend.list_queued(VIDEO_QUEUE)
+        usage, running = self._backend.group_usage(VIDEO_QUEUE, now - self._policy.usage_window)
+        ordered = self._policy.select(queued, usage, running, now, enforce_limits=False)
+        ordered_ids = {job.id for job in ordered}
+        held = [job for job in queued if job.id not in ordered_ids]
+
+        from packages.db import get_db_context
+        with get_db_context() as db:
+            avg_seconds = mean_video_seconds(db)
+        parallelism = max(1, sum(running.values()), self._max_inflight)
+
+        positions = []
+        for index, job in enumerate(ordered + held):
+            if tenant_id is not None and job.group != str(tenant_id):
+                continue
+            is_held = job.id not in ordered_ids
+            eta = None
+            if not is_held and avg_seconds is not None:
+                eta = max(job.available_at - now, (index // parallelism) * avg_seconds)
+            positions.append({
+                "position": index + 1,
+                "video_id": job.payload.get("video_id"),
+                "job_id": job.id,
+                "tenant_id": int(job.group) if job.group is not None else None,
+                "priority": Priority(job.priority).name.lower(),
+                "effective_priority": Priority(self._policy.effective_priority(job, now)).name.lower(),
+                "waiting_seconds": round(now - job.created_at, 1),
+                "attempts": job.attempts,
+                "held": is_held,
+                "eta_seconds": round(eta, 1) if eta is not None else None,
+            })
+        return positions
+
+    def get_tenant_limits(self, tenant_id: Optional[int] = None) -> List[dict]:
+        """各租户的调度参数（权重、同时处理上限、是否暂停），可只取指定租户"""
+        describe = getattr(self._policy, "describe", None)
+        limits = describe() if describe else []
+        if tenant_id is not None:
+            limits = [item for item in limits if item["tenant_id"] == tenant_id]
+        return limits
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        停止认领新任务，等待本进程处理中的任务完成（期间继续续约）
+
+        Returns:
+            True 如果在超时前全部完成
+        """
+        self._draining = True
         with self._tasks_lock:
-            running = sum(1 for t in self._tasks.values() if t.status == TaskStatus.RUNNING)
-            queued = sum(1 for t in self._tasks.values() if t.status == TaskStatus.QUEUED)
-            
-            return {
-                "max_parallel": MAX_PARALLEL_VIDEOS,
-                "running": running,
-                "queued": queued,
-                "total_tasks": len(self._tasks),
-            }
-    
+            return self._idle.wait_for(lambda: not self._tasks, timeout=timeout)
+
     def shutdown(self, wait: bool = True):
-        """关闭队列"""
+        """
+        关闭队列
+
+        停止认领新任务；wait=True 时等待流水线中的任务处理完毕。
+        未完成的任务租约到期后会被重新入队。
+        """
         logger.info("video_queue_shutdown", wait=wait)
-        self._executor.shutdown(wait=wait)
+        self._stop.set()
+        self._wakeup.set()
+        if self._dispatcher is not None and wait:
+            self._dispatcher.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        if self._subtitle_executor is not None:
+            self._subtitle_executor.shutdown(wait=wait)
+            self._subtitle_executor = None
+
+        get_status_channel().flush()
 
 
 # 全局队列实例
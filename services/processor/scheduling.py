@@ -0,0 +1,102 @@
+"""
+视频处理调度策略
+
+在通用的公平调度（packages.queue.scheduling）之上接入租户信息：
+- 分组 = 租户ID
+- 权重、同时处理上限按租户计划（queue.plan_weights / queue.plan_max_running）
+- 租户停用或已处理视频数达到 Tenant.max_videos 时暂停调度（任务保留在队列中）
+
+租户信息定期从数据库刷新，认领时不逐个查询。
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import func
+
+from packages.db import Tenant, Video, VideoStatus, get_db_context
+from packages.logging import get_logger
+from packages.queue import FairSharePolicy, GroupLimits
+
+logger = get_logger(__name__)
+
+
+def tenant_group(tenant_id: Optional[int]) -> Optional[str]:
+    """租户ID -> 队列分组"""
+    return str(tenant_id) if tenant_id is not None else None
+
+
+class TenantSchedulingPolicy(FairSharePolicy):
+    """按租户计划与配额的调度策略"""
+
+    def __init__(self, config=None, refresh_interval: float = 60.0):
+        """
+        Args:
+            config: QueueSettings（默认读取全局配置）
+            refresh_interval: 租户信息刷新间隔（秒）
+        """
+        if config is None:
+            from packages.config import get_config
+            config = get_config().queue
+
+        super().__init__(aging_seconds=config.aging_seconds, usage_window=config.fair_share_window)
+        self._plan_weights = config.plan_weights
+        self._plan_max_running = config.plan_max_running
+        self.refresh_interval = refresh_interval
+
+        self._groups: Dict[str, GroupLimits] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, GroupLimits]:
+        groups = {}
+        with get_db_context() as db:
+            done = dict(
+                db.query(Video.tenant_id, func.count(Video.id))
+                .filter(Video.status == VideoStatus.DONE.value)
+                .group_by(Video.tenant_id)
+                .all()
+            )
+            for tenant in db.query(Tenant).all():
+                plan = tenant.plan.value if tenant.plan else "free"
+                over_quota = bool(tenant.max_videos) and done.get(tenant.id, 0) >= tenant.max_videos
+                groups[tenant_group(tenant.id)] = GroupLimits(
+                    weight=float(self._plan_weights.get(plan, 1)),
+                    max_running=int(self._plan_max_running.get(plan, 0)),
+                    held=not tenant.is_active or over_quota,
+                )
+        return groups
+
+    def refresh(self, force: bool = False):
+        """按间隔刷新租户信息（失败时沿用旧数据）"""
+        with self._lock:
+            if not force and time.time() - self._loaded_at < self.refresh_interval:
+                return
+            try:
+                self._groups = self._load()
+            except Exception as e:
+                logger.warning("scheduling_policy_refresh_failed", error=str(e))
+            self._loaded_at = time.time()
+
+    def limits(self, group: Optional[str]) -> GroupLimits:
+        self.refresh()
+        return self._groups.get(group, GroupLimits())
+
+    def held_tenants(self) -> Set[int]:
+        """暂停调度的租户"""
+        self.refresh()
+        return {int(group) for group, limits in self._groups.items() if limits.held}
+
+    def describe(self) -> List[dict]:
+        """各租户的调度参数"""
+        self.refresh()
+        return [
+            {
+                "tenant_id": int(group),
+                "weight": limits.weight,
+                "max_running": limits.max_running,
+                "held": limits.held,
+            }
+            for group, limits in sorted(self._groups.items(), key=lambda item: int(item[0]))
+        ]
@@ -0,0 +1,211 @@
+"""
+分阶段流水线执行器
+每个阶段拥有独立的工作线程池，阶段之间通过有界队列交接，
+下游处理变慢时上游会被阻塞（背压），从而让下载、转写、分析等
+不同资源类型的工作在多个视频之间重叠执行。
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from packages.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 工作线程退出标记
+_STOP = object()
+
+
+@dataclass
+class Stage:
+    """流水线阶段定义"""
+    name: str
+    handler: Callable[[Any], Any]  # 接收上一阶段的输出，返回交给下一阶段的对象
+    workers: int = 1               # 阶段并发数
+    queue_size: int = 2            # 阶段输入队列容量（首阶段不受限）
+
+
+class _Envelope:
+    """在阶段之间传递的任务包装"""
+
+    __slots__ = ("item", "future")
+
+    def __init__(self, item: Any, future: Future):
+        self.item = item
+        self.future = future
+
+
+class StagedExecutor:
+    """
+    分阶段流水线执行器
+
+    - submit() 提交任务，返回 Future（可取消、可回调）
+    - 首阶段输入队列为任务积压，不设上限；其余阶段队列有界
+    - 任一阶段抛出异常时，该任务终止并通过 Future 传递异常
+    """
+
+    def __init__(self, stages: Sequence[Stage], name: str = "pipeline"):
+        if not stages:
+            raise ValueError("至少需要一个阶段")
+
+        self.name = name
+        self.stages = list(stages)
+        self._queues: List[queue.Queue] = [
+            queue.Queue(maxsize=0 if i == 0 else max(1, stage.queue_size))
+            for i, stage in enumerate(self.stages)
+        ]
+        self._threads: List[List[threading.Thread]] = [[] for _ in self.stages]
+        self._busy: List[int] = [0 for _ in self.stages]
+        self._alive: List[int] = [0 for _ in self.stages]
+        self._state_lock = threading.Lock()
+        self._started = False
+        self._shutdown = False
+
+    # ========== 生命周期 ==========
+
+    def start(self):
+        """启动所有阶段的工作线程"""
+        with self._state_lock:
+            if self._started:
+                return
+            self._started = True
+
+        for idx, stage in enumerate(self.stages):
+            for n in range(max(1, stage.workers)):
+                thread = threading.Thread(
+                    target=self._worker,
+                    args=(idx,),
+                    name=f"{self.name}_{stage.name}_{n}",
+                    daemon=True,
+                )
+                self._threads[idx].append(thread)
+                self._alive[idx] += 1
+                thread.start()
+
+        logger.info(
+            "staged_executor_started",
+            name=self.name,
+            stages={s.name: max(1, s.workers) for s in self.stages},
+        )
+
+    def submit(self, item: Any) -> Future:
+        """
+        提交任务
+
+        Returns:
+            Future，结果为最后一个阶段的返回值
+        """
+        if self._shutdown:
+            raise RuntimeError(f"{self.name} 已关闭")
+        self.start()
+
+        future: Future = Future()
+        self._queues[0].put(_Envelope(item, future))
+        return future
+
+    def map(self, items: Iterable[Any]) -> List[Tuple[Any, Optional[BaseException]]]:
+        """
+        批量处理并等待全部完成
+
+        Returns:
+            [(输入, 异常或None)]，顺序与输入一致
+        """
+        submitted = [(item, self.submit(item)) for item in items]
+        results = []
+        for item, future in submitted:
+            try:
+                future.result()
+                results.append((item, None))
+            except BaseException as e:  # noqa: BLE001 - 异常原样交给调用方
+                results.append((item, e))
+        return results
+
+    def shutdown(self, wait: bool = True):
+        """
+        关闭执行器
+
+        已提交的任务会全部处理完毕后工作线程才退出。
+        """
+        with self._state_lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            started = self._started
+
+        logger.info("staged_executor_shutdown", name=self.name, wait=wait)
+
+        if not started:
+            return
+
+        for _ in self._threads[0]:
+            self._queues[0].put(_STOP)
+
+        if wait:
+            for threads in self._threads:
+                for thread in threads:
+                    thread.join()
+
+    # ========== 状态 ==========
+
+    def get_stats(self) -> Dict[str, dict]:
+        """各阶段状态：并发数、忙碌数、排队数"""
+        with self._state_lock:
+            return {
+                stage.name: {
+                    "workers": max(1, stage.workers),
+                    "busy": self._busy[idx],
+                    "queued": self._queues[idx].qsize(),
+                    "capacity": self._queues[idx].maxsize or None,
+                }
+                for idx, stage in enumerate(self.stages)
+            }
+
+    # ========== 内部实现 ==========
+
+    def _worker(self, idx: int):
+        stage = self.stages[idx]
+        inbox = self._queues[idx]
+        is_last = idx == len(self.stages) - 1
+
+        while True:
+            envelope = inbox.get()
+            if envelope is _STOP:
+                break
+
+            future = envelope.future
+            # 首阶段负责把 Future 标记为运行中；已取消的任务直接丢弃
+            if idx == 0 and not future.set_running_or_notify_cancel():
+                continue
+
+            with self._state_lock:
+                self._busy[idx] += 1
+            try:
+                output = stage.handler(envelope.item)
+            except BaseException as e:  # noqa: BLE001 - 异常通过 Future 传递
+                logger.warning("stage_failed", executor=self.name, stage=stage.name, error=str(e))
+                future.set_exception(e)
+                continue
+            finally:
+                with self._state_lock:
+                    self._busy[idx] -= 1
+
+            if is_last:
+                future.set_result(output)
+            else:
+                # 下游队列已满时在此阻塞，形成背压
+                self._queues[idx + 1].put(_Envelope(output, future))
+
+        self._on_worker_exit(idx)
+
+    def _on_worker_exit(self, idx: int):
+        """本阶段所有线程退出后，通知下一阶段退出"""
+        with self._state_lock:
+            self._alive[idx] -= 1
+            last_one = self._alive[idx] == 0
+
+        if last_one and idx + 1 < len(self.stages):
+            for _ in self._threads[idx + 1]:
+                self._queues[idx + 1].put(_STOP)
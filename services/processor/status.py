@@ -0,0 +1,303 @@
+"""
+视频处理状态写回通道（write-behind）
+
+管道每个阶段都会改变视频状态，逐次 db.commit() 在 SQLite 上会与 API、定时任务抢写锁。
+这里把中间状态与细粒度进度保存在内存中：
+- 状态变化按视频合并，后台线程每隔 flush_interval 秒在一个事务里批量写入
+- 进度（阶段内百分比、分片进度）只保存在内存中，供状态接口实时读取
+- 阶段耗时记录（ProcessingStageMetric）同样排队，与状态变化在同一个事务里插入
+- 终态（done / failed）由管道在同一事务内与其他字段一起立即提交，
+  提交前丢弃该视频尚未写入的中间状态，保证不会被旧状态覆盖；之后以数据库为准
+
+flush_interval <= 0 时退化为同步写入（每次状态变化立即提交）。
+"""
+
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import bindparam, insert, update
+
+from packages.db import ProcessingStageMetric, Video, get_db_context
+from packages.logging import get_logger
+
+logger = get_logger(__name__)
+
+_videos = Video.__table__
+_STATUS_UPDATE = (
+    update(_videos)
+    .where(_videos.c.id == bindparam("vid"))
+    .values(status=bindparam("new_status"))
+)
+_METRIC_INSERT = insert(ProcessingStageMetric.__table__)
+
+# 写回持续失败时最多保留的待写入耗时记录（超出丢弃最旧的）
+MAX_PENDING_METRICS = 10000
+
+# 各阶段在整体进度中的区间
+STAGE_PROGRESS = {
+    "download": (0.0, 0.2),
+    "transcribe": (0.2, 0.7),
+    "analyze": (0.7, 0.85),
+    "index": (0.85, 0.98),
+    "finalize": (0.98, 1.0),
+}
+
+
+@dataclass
+class LiveStatus:
+    """内存中的实时处理状态"""
+    video_id: int
+    status: str
+    stage: Optional[str] = None
+    progress: float = 0.0            # 整体进度 0~1
+    message: Optional[str] = None
+    detail: Optional[dict] = None    # 阶段内的结构化进度（如转写分片 done/total/failed/resumed）
+    updated_at: float = field(default_factory=time.time)
+    persisted: bool = False          # 当前状态是否已写入数据库
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["progress"] = round(self.progress, 3)
+        return data
+
+
+class StatusChannel:
+    """视频状态的内存视图 + 合并批量写回"""
+
+    def __init__(
+        self,
+        flush_interval: float = 2.0,
+        retention: float = 3600.0,
+        session_factory: Optional[Callable] = None,
+    ):
+        """
+        Args:
+            flush_interval: 批量写回间隔（秒），<=0 表示同步写入
+            retention: 记录超过该时长（秒）没有更新即从内存中清理
+            session_factory: 返回数据库会话上下文管理器（默认 get_db_context）
+        """
+        self.flush_interval = flush_interval
+        self.retention = retention
+        self._session_factory = session_factory or get_db_context
+
+        self._live: Dict[int, LiveStatus] = {}
+        self._pending: Dict[int, str] = {}
+        self._metrics: List[dict] = []
+        self._lock = threading.Lock()
+        # 写回与终态提交互斥，避免批量写回把旧的中间状态写在终态之后
+        self._flush_lock = threading.Lock()
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stats = {"updates": 0, "flushes": 0, "rows_written": 0, "coalesced": 0, "metrics_written": 0}
+
+    # ========== 写入 ==========
+
+    def update(
+        self,
+        video_id: int,
+        status: Optional[str] = None,
+        stage: Optional[str] = None,
+        progress: Optional[float] = None,
+        message: Optional[str] = None,
+        detail: Optional[dict] = None,
+    ):
+        """更新实时状态；status 变化会在下次写回时持久化"""
+        with self._lock:
+            live = self._live.get(video_id)
+            if live is None:
+                live = self._live[video_id] = LiveStatus(video_id=video_id, status=status or "")
+            if status is not None and (status != live.status or not live.persisted):
+                live.status = status
+                live.persisted = False
+                if video_id in self._pending:
+                    self._stats["coalesced"] += 1
+                self._pending[video_id] = status
+            if stage is not None:
+                if stage != live.stage:
+                    live.detail = None
+                live.stage = stage
+            if progress is not None:
+                live.progress = min(1.0, max(0.0, progress))
+            if message is not None:
+                live.message = message
+            if detail is not None:
+                live.detail = dict(detail)
+            live.updated_at = time.time()
+            self._stats["updates"] += 1
+
+        if status is not None:
+            if self.flush_interval <= 0:
+                self.flush()
+            else:
+                self._ensure_started()
+
+    def add_metric(self, row: dict):
+        """排队一行阶段耗时记录（ProcessingStageMetric 的列），下次写回时插入"""
+        with self._lock:
+            self._metrics.append(row)
+            if len(self._metrics) > MAX_PENDING_METRICS:
+                del self._metrics[: len(self._metrics) - MAX_PENDING_METRICS]
+        if self.flush_interval <= 0:
+            self.flush()
+        else:
+            self._ensure_started()
+
+    def stage_progress(
+        self,
+        video_id: int,
+        stage: str,
+        fraction: float,
+        message: Optional[str] = None,
+        detail: Optional[dict] = None,
+    ):
+        """阶段内进度（0~1）换算为整体进度"""
+        low, high = STAGE_PROGRESS.get(stage, (0.0, 1.0))
+        self.update(video_id, stage=stage, progress=low + (high - low) * min(1.0, max(0.0, fraction)),
+                    message=message, detail=detail)
+
+    @contextmanager
+    def terminal(self, video_id: int):
+        """
+        终态提交：丢弃未写入的中间状态，调用方在上下文内提交终态（之后以数据库为准）
+
+        Usage:
+            with channel.terminal(video.id):
+                video.status = VideoStatus.DONE.value
+                db.commit()
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._pending.pop(video_id, None)
+            yield
+            with self._lock:
+                self._live.pop(video_id, None)
+
+    def forget(self, video_id: int):
+        """移除实时状态（如视频被删除或状态被外部重置）"""
+        with self._lock:
+            self._live.pop(video_id, None)
+            self._pending.pop(video_id, None)
+
+    # ========== 读取 ==========
+
+    def get(self, video_id: int) -> Optional[LiveStatus]:
+        with self._lock:
+            live = self._live.get(video_id)
+            return LiveStatus(**asdict(live)) if live else None
+
+    def status_of(self, video_id: int, default: str) -> str:
+        """实时状态（本进程未在处理该视频时返回数据库中的 default）"""
+        live = self.get(video_id)
+        return live.status if live and live.status else default
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "live": len(self._live),
+                "pending": len(self._pending),
+                "pending_metrics": len(self._metrics),
+            }
+
+    # ========== 写回 ==========
+
+    def flush(self) -> int:
+        """把合并后的状态变化与排队的耗时记录在一个事务内写入数据库，返回写入的状态行数"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending and not self._metrics:
+                    return 0
+                batch, self._pending = self._pending, {}
+                metrics, self._metrics = self._metrics, []
+
+            now = datetime.utcnow()
+            try:
+                with self._session_factory() as db:
+                    # Core executemany 不校验影响行数：批次中已被删除的视频直接跳过，
+                    # 不会因 StaleDataError 让整批（及之后的每次写回）失败
+                    if batch:
+                        db.execute(
+                            _STATUS_UPDATE.values(updated_at=now),
+                            [{"vid": vid, "new_status": status} for vid, status in batch.items()],
+                        )
+                    if metrics:
+                        db.execute(_METRIC_INSERT, metrics)
+                    db.commit()
+            except Exception as e:
+                logger.warning("status_flush_failed", videos=len(batch), metrics=len(metrics), error=str(e))
+                with self._lock:
+                    # 失败的写回放回队列（期间有更新的以新状态为准）
+                    for vid, status in batch.items():
+                        self._pending.setdefault(vid, status)
+                    self._metrics[:0] = metrics[-MAX_PENDING_METRICS:]
+                    del self._metrics[MAX_PENDING_METRICS:]
+                return 0
+
+            with self._lock:
+                for vid, status in batch.items():
+                    live = self._live.get(vid)
+                    if live is not None and live.status == status and vid not in self._pending:
+                        live.persisted = True
+                self._stats["flushes"] += 1
+                self._stats["rows_written"] += len(batch)
+                self._stats["metrics_written"] += len(metrics)
+            return len(batch)
+
+    def _prune(self):
+        """清理长时间没有更新的记录（如处理线程异常退出）"""
+        cutoff = time.time() - self.retention
+        with self._lock:
+            for vid in [
+                vid for vid, live in self._live.items()
+                if live.persisted and live.updated_at < cutoff
+            ]:
+                del self._live[vid]
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="status-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                self._prune()
+            except Exception:
+                logger.exception("status_writer_error")
+        self.flush()
+
+    def close(self):
+        """停止后台写回并写入剩余状态"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(5.0, self.flush_interval * 2))
+            self._thread = None
+        self.flush()
+
+
+_channel: Optional[StatusChannel] = None
+_channel_lock = threading.Lock()
+
+
+def get_status_channel() -> StatusChannel:
+    """获取进程内的状态通道单例"""
+    global _channel
+    if _channel is None:
+        with _channel_lock:
+            if _channel is None:
+                from packages.config import get_config
+                _channel = StatusChannel(flush_interval=get_config().pipeline.status_flush_interval)
+                atexit.register(_channel.close)
+    return _channel
@@ -0,0 +1,161 @@
+"""
+流式转写的下游处理
+
+本地模型边解码边产出分段（见 ASRProvider.transcribe_stream），这里在转写进行中：
+- TranscriptWriter 把分段逐条追加到 <source_id>.partial.txt，转写开始几秒后即可查看
+- IncrementalEmbedder 按与 ChromaClient.split_text 相同的规则增量分块，
+  已确定的分块在后台线程中计算向量，索引阶段只需补算最后几块
+
+最终结果仍以完整转写为准：分块与 split_text(全文) 不一致时全部重算。
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from packages.logging import get_logger
+from services.asr import TranscriptSegment
+
+logger = get_logger(__name__)
+
+PARTIAL_SUFFIX = ".partial.txt"
+EMBED_BATCH_SIZE = 8          # 每次提交计算向量的分块数
+
+
+def _timestamp(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+class TranscriptWriter:
+    """转写进行中的文本文件（每个分段一行，带起始时间），保存正式转写文件时删除（见 _save_transcript）"""
+
+    def __init__(self, transcript_dir: Path, source_id: str):
+        self.path = Path(transcript_dir) / f"{source_id}{PARTIAL_SUFFIX}"
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def write(self, seg: TranscriptSegment):
+        self._file.write(f"[{_timestamp(seg.start)}] {seg.text}\n")
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class IncrementalEmbedder:
+    """
+    转写过程中增量分块并计算向量
+
+    分块规则与 ChromaClient._split_text 一致：按 。！？ 和换行断句，
+    句子依次装入不超过 chunk_size 的分块。某个句子装不下时，前一个分块即已确定。
+    """
+
+    def __init__(self, client, chunk_size: int = 500, batch_size: int = EMBED_BATCH_SIZE):
+        """
+        Args:
+            client: ChromaClient（需要 split_text / embed_chunks）
+            chunk_size: 分块大小（与索引时一致）
+            batch_size: 每次提交计算向量的分块数
+        """
+        self.client = client
+        self.chunk_size = chunk_size
+        self.batch_size = max(1, batch_size)
+
+        self._started = False
+        self._pending = ""           # 尚未遇到句末标点的文本
+        self._current = ""           # 正在装填的分块
+        self._chunks: List[str] = []             # 已确定的分块
+        self._submitted = 0                      # 已提交计算的分块数
+        self._futures: List[Future] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    # ========== 转写线程 ==========
+
+    def feed(self, text: str):
+        """追加一个分段的文本（与 TranscriptResult.text 相同，分段之间以空格连接）"""
+        if self._started:
+            text = " " + text
+        self._started = True
+
+        parts = self._mark_sentences(self._pending + text).split("\n")
+        self._pending = parts.pop()
+        for sentence in parts:
+            self._add_sentence(sentence)
+
+        if len(self._chunks) - self._submitted >= self.batch_size:
+            self._submit(len(self._chunks))
+
+    @staticmethod
+    def _mark_sentences(text: str) -> str:
+        return text.replace("。", "。\n").replace("！", "！\n").replace("？", "？\n")
+
+    def _add_sentence(self, sentence: str):
+        if len(self._current) + len(sentence) <= self.chunk_size:
+            self._current += sentence
+        else:
+            if self._current:
+                self._chunks.append(self._current.strip())
+            self._current = sentence
+
+    def _submit(self, end: int):
+        batch = self._chunks[self._submitted:end]
+        if not batch:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream-embed")
+            self._futures.append(self._executor.submit(self.client.embed_chunks, batch))
+        self._submitted = end
+
+    @property
+    def ready_chunks(self) -> int:
+        return len(self._chunks)
+
+    # ========== 索引阶段 ==========
+
+    def finish(self, transcript: str) -> List[List[float]]:
+        """
+        完成分块并返回全部分块向量（与 split_text(transcript) 一一对应）
+
+        增量分块与全文分块不一致（如转写文本被替换）或后台计算失败时，按全文重新计算。
+        """
+        expected = self.client.split_text(transcript, chunk_size=self.chunk_size)
+
+        if self._pending:
+            self._add_sentence(self._pending)
+            self._pending = ""
+        chunks = list(self._chunks)
+        if self._current:
+            chunks.append(self._current.strip())
+
+        if chunks != expected:
+            logger.warning("incremental_chunks_mismatch", streamed=len(chunks), expected=len(expected))
+            self.close()
+            return self.client.embed_chunks(expected)
+
+        embeddings: List[List[float]] = []
+        try:
+            for future in self._futures:
+                embeddings.extend(future.result())
+        except Exception as e:
+            logger.warning("incremental_embedding_failed", error=str(e))
+            return self.client.embed_chunks(expected)
+        finally:
+            self.close()
+
+        reused = len(embeddings)
+        if reused < len(expected):
+            embeddings.extend(self.client.embed_chunks(expected[reused:]))
+        logger.info("incremental_embedding_done", chunks=len(expected), precomputed=reused)
+        return embeddings
+
+    def close(self):
+        """释放后台线程（未完成的计算结果丢弃）"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
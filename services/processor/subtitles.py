@@ -0,0 +1,80 @@
+"""
+字幕 → 带时间戳的转写分段
+
+字幕以 SRT 文本保存（B站接口字幕先转换为 SRT，与 BBDown 下载的字幕文件格式一致），
+转写阶段解析为逐条的 TranscriptSegment，而不是整段文本。
+"""
+
+import re
+from typing import Iterable, List
+
+from services.asr import TranscriptResult, TranscriptSegment
+
+_TIME = r"(\d+):(\d{2}):(\d{2})[,.](\d{1,3})"
+_CUE = re.compile(rf"{_TIME}\s*-->\s*{_TIME}")
+
+
+def _seconds(h: str, m: str, s: str, ms: str) -> float:
+    return int(h) * 3600 + int(m) * 60 + int(s) + int(ms.ljust(3, "0")) / 1000
+
+
+def _srt_time(seconds: float) -> str:
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def segments_from_bilibili(body: Iterable[dict]) -> List[TranscriptSegment]:
+    """B站字幕接口的 body（[{from, to, content}]）→ 分段"""
+    return [
+        TranscriptSegment(start=float(line["from"]), end=float(line["to"]), text=line["content"].strip())
+        for line in body
+        if line.get("content", "").strip()
+    ]
+
+
+def to_srt(segments: Iterable[TranscriptSegment]) -> str:
+    """分段 → SRT 文本"""
+    blocks = [
+        f"{index}\n{_srt_time(seg.start)} --> {_srt_time(seg.end)}\n{seg.text}\n"
+        for index, seg in enumerate(segments, start=1)
+    ]
+    return "\n".join(blocks)
+
+
+def parse_srt(content: str) -> List[TranscriptSegment]:
+    """解析 SRT（也兼容 WebVTT 的时间格式）；不是字幕格式时返回空列表"""
+    segments = []
+    for block in re.split(r"\n\s*\n", content.replace("\r\n", "\n").strip()):
+        lines = block.strip().split("\n")
+        for i, line in enumerate(lines):
+            match = _CUE.search(line)
+            if match:
+                text = " ".join(l.strip() for l in lines[i + 1:] if l.strip())
+                if text:
+                    segments.append(TranscriptSegment(
+                        start=_seconds(*match.groups()[:4]),
+                        end=_seconds(*match.groups()[4:]),
+                        text=text,
+                    ))
+                break
+    return segments
+
+
+def subtitle_transcript(content: str, duration: float = 0) -> TranscriptResult:
+    """
+    字幕文本 → 转写结果
+
+    能解析为字幕时每条字幕一个分段；否则（纯文本）整体作为一个分段。
+    """
+    segments = parse_srt(content)
+    if not segments:
+        segments = [TranscriptSegment(start=0, end=duration, text=content)]
+    return TranscriptResult(
+        text=" ".join(seg.text for seg in segments),
+        segments=segments,
+        language="zh",
+        duration=duration or segments[-1].end,
+    )
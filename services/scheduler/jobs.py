@@ -5,43 +5,50 @@
 from datetime import datetime
 from typing import Optional
 
+from packages.async_runtime import run_sync
 from packages.config import get_config
 from packages.db import get_db_context, Tenant, Video, VideoStatus
 from packages.logging import get_logger
 from services.processor import VideoPipeline
-from services.watcher import FolderScanner
+from services.watcher import AsyncFolderScanner
 
 logger = get_logger(__name__)
 
 
-def job_scan_folders(tenant_slug: str = "default", sessdata: Optional[str] = None):
+def job_scan_folders(tenant_slug: Optional[str] = None, sessdata: Optional[str] = None):
     """
     扫描收藏夹任务
-    - 检查所有监控的收藏夹
+    - 并发检查所有租户（或指定租户）监控的收藏夹，各租户用自己绑定的B站账号
     - 发现新视频入库
+
+    Args:
+        sessdata: 没有绑定B站账号的租户使用的 cookie（默认读取配置）
     """
     config = get_config()
     sessdata = sessdata or config.bilibili.sessdata
 
-    logger.info("job_start", job="scan_folders", tenant=tenant_slug)
+    logger.info("job_start", job="scan_folders", tenant=tenant_slug or "all")
 
-    with get_db_context() as db:
-        tenant = db.query(Tenant).filter(Tenant.slug == tenant_slug).first()
-        if not tenant:
-            logger.error("tenant_not_found", tenant=tenant_slug)
-            return
+    tenant_ids = None
+    if tenant_slug:
+        with get_db_context() as db:
+            tenant = db.query(Tenant).filter(Tenant.slug == tenant_slug).first()
+            if not tenant:
+                logger.error("tenant_not_found", tenant=tenant_slug)
+                return
+            tenant_ids = [tenant.id]
 
-        scanner = FolderScanner(db, tenant.id, sessdata)
-        new_videos = scanner.scan_all()
+    results = run_sync(AsyncFolderScanner(sessdata).scan(tenant_ids))
 
-        logger.info(
-            "job_complete",
-            job="scan_folders",
-            tenant=tenant_slug,
-            new_videos=len(new_videos),
-        )
+    logger.info(
+        "job_complete",
+        job="scan_folders",
+        tenant=tenant_slug or "all",
+        folders=len(results),
+        new_videos=sum(len(r.new_video_ids) for r in results),
+    )
 
-        return new_videos
+    return results
 
 
 def job_process_videos(
@@ -132,9 +139,12 @@ def job_cleanup_audio(retention_days: int = 1):
     
     logger.info("job_start", job="cleanup_audio", retention_days=retention_days)
     
+    from services.processor.artifact_cache import get_artifact_cache
+
     cutoff_time = datetime.utcnow() - timedelta(days=retention_days)
     cleaned_count = 0
     freed_bytes = 0
+    cache = get_artifact_cache()
     
     with get_db_context() as db:
         # 查找已处理且超过保留期的视频
@@ -178,6 +188,10 @@ def job_cleanup_audio(retention_days: int = 1):
             # 更新数据库
             video.audio_path = None
             cleaned_count += 1
+
+            # 释放缓存音频的引用，由 gc_artifact_cache 在宽限期后回收
+            if cache:
+                cache.release(db, video.id, "audio")
         
         db.commit()
     
@@ -190,3 +204,45 @@ def job_cleanup_audio(retention_days: int = 1):
     )
     
     return {"cleaned": cleaned_count, "freed_mb": round(freed_mb, 2)}
+
+
+def job_gc_artifact_cache(grace_hours: Optional[float] = None):
+    """
+    回收产物缓存
+    - 删除无引用且超过宽限期的缓存条目及文件
+    """
+    from services.processor.artifact_cache import get_artifact_cache
+
+    cache = get_artifact_cache()
+    if cache is None:
+        return {"entries": 0, "freed_mb": 0.0}
+
+    if grace_hours is None:
+        grace_hours = get_config().pipeline.cache_gc_grace_hours
+
+    logger.info("job_start", job="gc_artifact_cache", grace_hours=grace_hours)
+
+    with get_db_context() as db:
+        result = cache.gc(db, grace_hours=grace_hours)
+
+    logger.info("job_complete", job="gc_artifact_cache", **result)
+    return result
+
+
+def job_prune_stage_metrics(retention_days: Optional[int] = None):
+    """
+    清理阶段耗时记录
+    - 删除开始时间超过保留期的 processing_stage_metrics 行
+    """
+    from services.processor.metrics import prune_stage_metrics
+
+    if retention_days is None:
+        retention_days = get_config().pipeline.metrics_retention_days
+
+    logger.info("job_start", job="prune_stage_metrics", retention_days=retention_days)
+
+    with get_db_context() as db:
+        deleted = prune_stage_metrics(db, retention_days)
+
+    logger.info("job_complete", job="prune_stage_metrics", deleted=deleted)
+    return {"deleted": deleted}
@@ -14,7 +14,14 @@ from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED
 from packages.config import get_config
 from packages.logging import get_logger
 
-from .jobs import job_scan_folders, job_process_videos, job_retry_failed, job_cleanup_audio
+from .jobs import (
+    job_scan_folders,
+    job_process_videos,
+    job_retry_failed,
+    job_cleanup_audio,
+    job_gc_artifact_cache,
+    job_prune_stage_metrics,
+)
 
 logger = get_logger(__name__)
 
@@ -62,7 +69,7 @@ class TaskScheduler:
     def add_scan_job(
         self,
         interval_minutes: int = 5,
-        tenant_slug: str = "default",
+        tenant_slug: Optional[str] = None,
         sessdata: Optional[str] = None,
     ):
         """
@@ -70,7 +77,7 @@ class TaskScheduler:
         
         Args:
             interval_minutes: 扫描间隔（分钟）
-            tenant_slug: 租户标识
+            tenant_slug: 租户标识（默认扫描所有租户）
             sessdata: B站cookie
         """
         config = get_config()
@@ -79,8 +86,8 @@ class TaskScheduler:
         self.scheduler.add_job(
             job_scan_folders,
             trigger=IntervalTrigger(minutes=interval_minutes),
-            id=f"scan_folders_{tenant_slug}",
-            name=f"扫描收藏夹 ({tenant_slug})",
+            id=f"scan_folders_{tenant_slug or 'all'}",
+            name=f"扫描收藏夹 ({tenant_slug or '所有租户'})",
             kwargs={"tenant_slug": tenant_slug, "sessdata": sessdata},
             replace_existing=True,
         )
@@ -89,7 +96,7 @@ class TaskScheduler:
             "job_added",
             job="scan_folders",
             interval=f"{interval_minutes}min",
-            tenant=tenant_slug,
+            tenant=tenant_slug or "all",
         )
 
     def add_process_job(
@@ -177,12 +184,48 @@ class TaskScheduler:
 
         logger.info("job_added", job="cleanup_audio", cron=f"{cron_hour}:00", retention_days=retention_days)
 
+    def add_cache_gc_job(self, cron_hour: int = 5):
+        """
+        添加产物缓存回收任务（每天凌晨执行）
+        
+        Args:
+            cron_hour: 执行小时（0-23）
+        """
+        self.scheduler.add_job(
+            job_gc_artifact_cache,
+            trigger=CronTrigger(hour=cron_hour, minute=0),
+            id="gc_artifact_cache",
+            name="回收产物缓存",
+            replace_existing=True,
+        )
+
+        logger.info("job_added", job="gc_artifact_cache", cron=f"{cron_hour}:00")
+
+    def add_metrics_prune_job(self, cron_hour: int = 5):
+        """
+        添加阶段耗时记录清理任务（每天凌晨执行，保留期见 pipeline.metrics_retention_days）
+        
+        Args:
+            cron_hour: 执行小时（0-23）
+        """
+        self.scheduler.add_job(
+            job_prune_stage_metrics,
+            trigger=CronTrigger(hour=cron_hour, minute=30),
+            id="prune_stage_metrics",
+            name="清理阶段耗时记录",
+            replace_existing=True,
+        )
+
+        logger.info("job_added", job="prune_stage_metrics", cron=f"{cron_hour}:30")
+
     def setup_default_jobs(self, sessdata: Optional[str] = None):
         """设置默认任务集"""
         self.add_scan_job(interval_minutes=5, sessdata=sessdata)
         self.add_process_job(interval_minutes=10, limit=3, sessdata=sessdata)
         self.add_retry_job(cron_hour=3)
         self.add_cleanup_job(cron_hour=4, retention_days=1)
+        self.add_cache_gc_job(cron_hour=5)
+        self.add_metrics_prune_job(cron_hour=5)
 
     def start(self):
         """启动调度器"""
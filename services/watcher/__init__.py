@@ -1,4 +1,13 @@
-from .bilibili import BilibiliClient, FolderInfo, VideoInfo
+from .bilibili import AsyncBilibiliClient, BilibiliClient, FolderInfo, VideoInfo
 from .scanner import FolderScanner
+from .async_scanner import AsyncFolderScanner, FolderScanResult
 
-__all__ = ["BilibiliClient", "FolderInfo", "VideoInfo", "FolderScanner"]
+__all__ = [
+    "AsyncBilibiliClient",
+    "BilibiliClient",
+    "FolderInfo",
+    "VideoInfo",
+    "FolderScanner",
+    "AsyncFolderScanner",
+    "FolderScanResult",
+]
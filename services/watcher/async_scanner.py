@@ -0,0 +1,276 @@
+"""
+并发收藏夹扫描（定时任务用）
+
+所有租户的活跃收藏夹在一个事件循环上并发扫描：
+- 每个租户用自己绑定的B站账号请求（没有绑定的回退到全局 SESSDATA），相同凭证共用一个客户端
+- B站接口请求共用全局令牌桶（bilibili.api_rate / api_burst），风控响应时整体退避
+- 同时扫描的收藏夹数受 scan_concurrency 限制，单个收藏夹的获取与探测超过 folder_deadline 跳过，
+  等下一轮；已拿到结果的收藏夹写库不受时限影响
+- 数据库读写放在单个线程里串行执行（SQLite 单写者），不阻塞事件循环
+
+增量扫描下多数收藏夹每轮只需一次请求，一轮扫描的耗时主要取决于令牌桶速率而不是租户数。
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from packages.config import get_config
+from packages.db import Video, WatchedFolder
+from packages.db.database import get_session_local
+from packages.logging import get_logger
+
+from .bilibili import AsyncBilibiliClient, VideoInfo, api_limiter
+from .scanner import (
+    _reached_cursor,
+    advance_cursor,
+    insert_videos,
+    link_existing,
+    needs_full_scan,
+    subtitle_lane,
+    tenant_sessdata,
+    unknown_videos,
+)
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _FolderSnapshot:
+    """扫描开始时收藏夹与游标的快照（不跨线程传递 ORM 对象）"""
+    id: int
+    tenant_id: int
+    folder_id: str
+    folder_type: str
+    name: str
+    full_scan: bool
+    sessdata: Optional[str] = None
+    top_source_id: Optional[str] = None
+    top_fav_time: Optional[int] = None
+
+
+@dataclass
+class FolderScanResult:
+    """单个收藏夹的扫描结果"""
+    tenant_id: int
+    watched_folder_id: int
+    folder_id: str
+    full_scan: bool = False
+    fetched: int = 0
+    new_video_ids: List[int] = field(default_factory=list)
+    error: Optional[str] = None
+    timed_out: bool = False
+
+
+class AsyncFolderScanner:
+    """
+    跨租户并发扫描收藏夹
+
+    Args:
+        sessdata: 租户没有绑定B站账号时使用的 cookie（默认读取配置）
+        concurrency: 同时扫描的收藏夹数
+        folder_deadline: 单个收藏夹获取与探测的时限（秒）
+        session_factory: 数据库会话工厂（默认全局 SessionLocal）
+        client: 注入的异步客户端，所有租户共用（默认每轮扫描按凭证新建，扫描结束关闭）
+    """
+
+    def __init__(
+        self,
+        sessdata: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        folder_deadline: Optional[float] = None,
+        session_factory: Optional[Callable[[], Session]] = None,
+        client: Optional[AsyncBilibiliClient] = None,
+    ):
+        config = get_config().bilibili
+        self.sessdata = sessdata or config.sessdata
+        self.concurrency = concurrency or config.scan_concurrency
+        self.folder_deadline = folder_deadline or config.folder_deadline
+        self.session_factory = session_factory or get_session_local()
+        self.client = client
+
+    async def scan(self, tenant_ids: Optional[List[int]] = None) -> List[FolderScanResult]:
+        """
+        扫描活跃收藏夹
+
+        Args:
+            tenant_ids: 只扫描这些租户（默认所有租户）
+
+        Returns:
+            每个收藏夹的扫描结果（失败、超时的收藏夹也有一条记录）
+        """
+        started = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="folder-scan-db")
+        limiter = self.client.limiter if self.client else api_limiter()
+        clients: Dict[Optional[str], AsyncBilibiliClient] = {}
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        def client_for(sessdata: Optional[str]) -> AsyncBilibiliClient:
+            if self.client is not None:
+                return self.client
+            if sessdata not in clients:
+                clients[sessdata] = AsyncBilibiliClient(sessdata, limiter=limiter)
+            return clients[sessdata]
+
+        async def run(snapshot: _FolderSnapshot) -> FolderScanResult:
+            result = FolderScanResult(snapshot.tenant_id, snapshot.id, snapshot.folder_id, snapshot.full_scan)
+            async with semaphore:
+                try:
+                    fetched = await asyncio.wait_for(
+                        self._fetch_folder(client_for(snapshot.sessdata), executor, snapshot, result),
+                        self.folder_deadline,
+                    )
+                except asyncio.TimeoutError:
+                    result.timed_out = True
+                    logger.warning("folder_scan_timeout", folder_id=snapshot.folder_id, deadline=self.folder_deadline)
+                    return result
+                except Exception as e:
+                    result.error = str(e)
+                    logger.error("scan_folder_failed", folder_id=snapshot.folder_id, error=str(e))
+                    return result
+            # 写库不计入时限：中途取消会丢掉已经拿到的结果
+            try:
+                result.new_video_ids = await self._db(executor, self._commit_folder, snapshot, *fetched)
+            except Exception as e:
+                result.error = str(e)
+                logger.error("scan_folder_failed", folder_id=snapshot.folder_id, error=str(e))
+                return result
+            logger.info(
+                "folder_scanned",
+                folder_id=snapshot.folder_id,
+                folder_name=snapshot.name,
+                full_scan=snapshot.full_scan,
+                fetched=result.fetched,
+                new_videos=len(result.new_video_ids),
+            )
+            return result
+
+        try:
+            snapshots = await self._db(executor, self._load_folders, tenant_ids, self.sessdata)
+            results = await asyncio.gather(*(run(snapshot) for snapshot in snapshots))
+        finally:
+            for client in clients.values():
+                await client.close()
+            executor.shutdown(wait=True)
+
+        logger.info(
+            "scan_cycle_complete",
+            tenants=len({r.tenant_id for r in results}),
+            folders=len(results),
+            full_scans=sum(1 for r in results if r.full_scan),
+            fetched=sum(r.fetched for r in results),
+            new_videos=sum(len(r.new_video_ids) for r in results),
+            failed=sum(1 for r in results if r.error),
+            timed_out=sum(1 for r in results if r.timed_out),
+            credentials=len(clients),
+            elapsed=round(time.monotonic() - started, 3),
+            limiter=limiter.snapshot(),
+        )
+        return list(results)
+
+    async def _fetch_folder(
+        self,
+        client: AsyncBilibiliClient,
+        executor: ThreadPoolExecutor,
+        snapshot: _FolderSnapshot,
+        result: FolderScanResult,
+    ) -> Tuple[List[VideoInfo], List[VideoInfo], dict]:
+        """
+        获取列表 → 过滤已有条目 → 并发探测字幕
+
+        Returns:
+            (列表中的全部视频, 需要入库的视频, 字幕通道)，交给 _commit_folder 一次提交
+        """
+        if snapshot.folder_type == "season":
+            _, videos = await client.fetch_season(snapshot.folder_id)
+        else:
+            until = None if snapshot.full_scan else _reached_cursor(snapshot)
+            _, videos = await client.fetch_favlist(snapshot.folder_id, until=until)
+        result.fetched = len(videos)
+
+        infos = await self._db(executor, lambda db: unknown_videos(db, snapshot.tenant_id, videos))
+        lanes = {}
+        if infos and get_config().bilibili.subtitle_probe:
+            tracks = await asyncio.gather(*(self._probe_subtitle(client, info) for info in infos))
+            lanes = {info.source_id: lane for info, lane in zip(infos, tracks)}
+        return videos, infos, lanes
+
+    async def _probe_subtitle(self, client: AsyncBilibiliClient, info: VideoInfo) -> Optional[str]:
+        """探测失败按无字幕处理"""
+        try:
+            return subtitle_lane(info, await client.fetch_subtitle_track(info.source_id, info.cid))
+        except Exception as e:
+            logger.warning("subtitle_probe_failed", bvid=info.source_id, error=str(e))
+            return None
+
+    # ========== 数据库（单线程执行） ==========
+
+    async def _db(self, executor: ThreadPoolExecutor, fn, *args):
+        """在数据库线程里用新会话执行 fn(db, *args) 并提交"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self._in_session, fn, args)
+
+    def _in_session(self, fn, args):
+        db = self.session_factory()
+        try:
+            result = fn(db, *args)
+            db.commit()
+            return result
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _load_folders(
+        db: Session, tenant_ids: Optional[List[int]], fallback_sessdata: Optional[str]
+    ) -> List[_FolderSnapshot]:
+        query = db.query(WatchedFolder).filter(
+            WatchedFolder.is_active == True,
+            WatchedFolder.platform == "bilibili",
+        )
+        if tenant_ids is not None:
+            query = query.filter(WatchedFolder.tenant_id.in_(tenant_ids))
+        # 最久没扫描的先扫，超时跳过的收藏夹下一轮排在前面
+        folders = query.order_by(WatchedFolder.last_scan_at.is_not(None), WatchedFolder.last_scan_at).all()
+        credentials = tenant_sessdata(db, list({folder.tenant_id for folder in folders}))
+
+        snapshots = []
+        for folder in folders:
+            cursor = folder.scan_cursor
+            snapshots.append(_FolderSnapshot(
+                id=folder.id,
+                tenant_id=folder.tenant_id,
+                folder_id=folder.folder_id,
+                folder_type=folder.folder_type,
+                name=folder.name,
+                full_scan=folder.folder_type == "season" or needs_full_scan(cursor),
+                sessdata=credentials.get(folder.tenant_id, fallback_sessdata),
+                top_source_id=cursor.top_source_id if cursor else None,
+                top_fav_time=cursor.top_fav_time if cursor else None,
+            ))
+        return snapshots
+
+    @staticmethod
+    def _commit_folder(
+        db: Session,
+        snapshot: _FolderSnapshot,
+        videos: List[VideoInfo],
+        infos: List[VideoInfo],
+        lanes: dict,
+    ) -> List[int]:
+        folder = db.get(WatchedFolder, snapshot.id)
+        if folder is None:                      # 扫描期间被删除
+            return []
+        link_existing(db, snapshot.tenant_id, folder.id, [v.source_id for v in videos])
+        inserted: List[Video] = insert_videos(db, snapshot.tenant_id, folder.id, infos, lanes)
+        folder.last_scan_at = datetime.utcnow()
+        if folder.folder_type != "season":
+            advance_cursor(folder, videos, snapshot.full_scan)
+        return [video.id for video in inserted]
@@ -3,12 +3,14 @@ Bilibili API 客户端
 封装B站API调用，支持收藏夹、合集、追番等扫描
 """
 
+import random
 import re
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Callable, List, Optional
 
 import httpx
 
+from packages.concurrency import TokenBucket, get_token_bucket
 from packages.config import get_config
 from packages.logging import get_logger
 
@@ -20,6 +22,8 @@ API_FAVLIST_ALL = "https://api.bilibili.com/x/v3/fav/folder/created/list-all"
 API_FAVLIST_COLLECTED = "https://api.bilibili.com/x/v3/fav/folder/collected/list"
 API_BANGUMI = "https://api.bilibili.com/x/space/bangumi/follow/list"
 API_SEASON = "https://api.bilibili.com/x/polymer/web-space/seasons_archives_list"
+API_VIEW = "https://api.bilibili.com/x/web-interface/view"
+API_PLAYER = "https://api.bilibili.com/x/player/v2"
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
@@ -38,6 +42,8 @@ class VideoInfo:
     cover_url: Optional[str] = None
     view_count: Optional[int] = None
     aid: Optional[int] = None
+    cid: Optional[int] = None  # 首个分P（字幕按分P获取）
+    fav_time: Optional[int] = None  # 收藏时间（unix 秒，仅收藏夹）
 
 
 @dataclass
@@ -51,18 +57,116 @@ class FolderInfo:
     folder_type: str = "favlist"  # favlist / season
 
 
+# 风控/频率限制：-352 风控校验失败、-412 请求被拦截、-509/-799 请求过于频繁
+RISK_CONTROL_CODES = {-352, -412, -509, -799}
+
+
+class BilibiliAPIError(Exception):
+    """B站接口返回非 0 code"""
+
+    def __init__(self, code: int, message: Optional[str]):
+        super().__init__(f"API错误: {message}")
+        self.code = code
+
+
+class RiskControlError(BilibiliAPIError):
+    """触发风控或频率限制（需要退避后再请求）"""
+
+
+def _parse_response(url: str, resp: httpx.Response) -> dict:
+    """检查响应，返回 data 字段"""
+    if resp.status_code == 412:
+        logger.error("bilibili_api_error", url=url, code=412, message="HTTP 412")
+        raise RiskControlError(-412, "请求被拦截 (HTTP 412)")
+    data = resp.json()
+
+    if data["code"] != 0:
+        logger.error("bilibili_api_error", url=url, code=data["code"], message=data.get("message"))
+        error = RiskControlError if data["code"] in RISK_CONTROL_CODES else BilibiliAPIError
+        raise error(data["code"], data.get("message"))
+
+    return data["data"]
+
+
+def _favlist_info(info: dict) -> FolderInfo:
+    return FolderInfo(
+        id=str(info["id"]),
+        title=info["title"],
+        owner=info["upper"]["name"],
+        owner_mid=str(info["upper"]["mid"]),
+        media_count=info["media_count"],
+        folder_type="favlist",
+    )
+
+
+def _favlist_video(m: dict) -> VideoInfo:
+    return VideoInfo(
+        source_type="bilibili",
+        source_id=m["bvid"],
+        title=m["title"],
+        author=m["upper"]["name"],
+        duration=m["duration"],
+        cover_url=m.get("cover"),
+        view_count=m["cnt_info"]["play"],
+        cid=(m.get("ugc") or {}).get("first_cid"),
+        fav_time=m.get("fav_time"),
+    )
+
+
+def _season_video(v: dict, owner: str) -> VideoInfo:
+    return VideoInfo(
+        source_type="bilibili",
+        source_id=v["bvid"],
+        title=v["title"],
+        author=owner,
+        duration=v["duration"],
+        cover_url=v.get("pic"),
+        view_count=v["stat"]["view"],
+        aid=v["aid"],
+        cid=v.get("cid"),
+    )
+
+
+def _take_until(videos: List[VideoInfo], page: List[VideoInfo], until: Optional[Callable[[VideoInfo], bool]]) -> bool:
+    """把一页条目追加到 videos，遇到 until 返回 True 的条目时停止并返回 True"""
+    for video in page:
+        if until is not None and until(video):
+            return True
+        videos.append(video)
+    return False
+
+
+def _pick_subtitle_track(data: dict) -> Optional[dict]:
+    """优先 UP 主上传的中文字幕，其次 AI 中文字幕，再次任意语言"""
+    tracks = [t for t in (data.get("subtitle") or {}).get("subtitles") or [] if t.get("subtitle_url")]
+    if not tracks:
+        return None
+
+    def rank(track: dict) -> int:
+        lan = track.get("lan", "")
+        if lan.startswith("zh"):
+            return 0
+        if lan.startswith("ai-zh"):
+            return 1
+        return 2
+
+    return min(tracks, key=rank)
+
+
 class BilibiliClient:
     """Bilibili API客户端"""
 
-    def __init__(self, sessdata: Optional[str] = None):
+    def __init__(self, sessdata: Optional[str] = None, limiter: Optional[TokenBucket] = None):
         """
         初始化客户端
         
         Args:
             sessdata: B站登录cookie，用于访问私有内容
+            limiter: 请求速率限制（传入 api_limiter() 与定时扫描共用全局限速）
         """
         config = get_config()
         self.sessdata = sessdata or config.bilibili.sessdata
+        self.limiter = limiter
         self.client = httpx.Client(
             headers=HEADERS,
             cookies={"SESSDATA": self.sessdata} if self.sessdata else {},
@@ -103,23 +207,29 @@ class BilibiliClient:
 
     def _request(self, url: str, params: dict) -> dict:
         """发送请求并检查响应"""
+        if self.limiter is not None:
+            self.limiter.acquire()
         resp = self.client.get(url, params=params)
-        data = resp.json()
-        
-        if data["code"] != 0:
-            logger.error("bilibili_api_error", url=url, code=data["code"], message=data.get("message"))
-            raise Exception(f"API错误: {data['message']}")
-        
-        return data["data"]
+        try:
+            return _parse_response(url, resp)
+        except RiskControlError:
+            if self.limiter is not None:
+                self.limiter.penalize(get_config().bilibili.risk_backoff)
+            raise
 
     # ========== 收藏夹相关 ==========
 
-    def fetch_favlist(self, media_id: str) -> tuple[FolderInfo, List[VideoInfo]]:
+    def fetch_favlist(
+        self,
+        media_id: str,
+        until: Optional[Callable[[VideoInfo], bool]] = None,
+    ) -> tuple[FolderInfo, List[VideoInfo]]:
         """
-        获取收藏夹信息和视频列表
+        获取收藏夹信息和视频列表（按收藏时间倒序）
         
         Args:
             media_id: 收藏夹ID
+            until: 增量获取的停止条件，遇到返回 True 的条目即停止翻页（该条目及之后的不返回）
             
         Returns:
             (收藏夹信息, 视频列表)
@@ -128,39 +238,23 @@ class BilibiliClient:
         page = 1
         page_size = 20
         folder_info = None
+        stopped = False
 
-        while True:
-            params = {"media_id": media_id, "pn": page, "ps": page_size}
+        while not stopped:
+            params = {"media_id": media_id, "pn": page, "ps": page_size, "order": "mtime"}
             data = self._request(API_FAVLIST, params)
 
             if folder_info is None:
-                info = data["info"]
-                folder_info = FolderInfo(
-                    id=str(info["id"]),
-                    title=info["title"],
-                    owner=info["upper"]["name"],
-                    owner_mid=str(info["upper"]["mid"]),
-                    media_count=info["media_count"],
-                    folder_type="favlist",
-                )
-
-            medias = data.get("medias") or []
-            for m in medias:
-                all_videos.append(VideoInfo(
-                    source_type="bilibili",
-                    source_id=m["bvid"],
-                    title=m["title"],
-                    author=m["upper"]["name"],
-                    duration=m["duration"],
-                    cover_url=m.get("cover"),
-                    view_count=m["cnt_info"]["play"],
-                ))
+                folder_info = _favlist_info(data["info"])
 
+            stopped = _take_until(all_videos, [_favlist_video(m) for m in data.get("medias") or []], until)
             if not data.get("has_more"):
                 break
             page += 1
 
-        logger.info("fetched_favlist", folder_id=media_id, video_count=len(all_videos))
+        logger.info(
+            "fetched_favlist", folder_id=media_id, video_count=len(all_videos), pages=page, incremental=until is not None
+        )
         return folder_info, all_videos
 
     def fetch_user_favlists(self, user_id: str) -> List[FolderInfo]:
@@ -282,17 +376,7 @@ class BilibiliClient:
             if not archives:
                 break
 
-            for v in archives:
-                all_videos.append(VideoInfo(
-                    source_type="bilibili",
-                    source_id=v["bvid"],
-                    title=v["title"],
-                    author=season_owner,
-                    duration=v["duration"],
-                    cover_url=v.get("pic"),
-                    view_count=v["stat"]["view"],
-                    aid=v["aid"],
-                ))
+            all_videos.extend(_season_video(v, season_owner) for v in archives)
 
             # 检查是否还有更多
             total = len(data.get("aids") or [])
@@ -312,6 +396,45 @@ class BilibiliClient:
         logger.info("fetched_season", season_id=season_id, name=season_name, video_count=len(all_videos))
         return folder_info, all_videos
 
+    # ========== 字幕相关 ==========
+
+    def fetch_cid(self, bvid: str) -> int:
+        """获取视频首个分P的 cid"""
+        data = self._request(API_VIEW, {"bvid": bvid})
+        return data["cid"]
+
+    def fetch_subtitle_track(self, bvid: str, cid: Optional[int] = None) -> Optional[dict]:
+        """
+        获取视频的字幕轨道（只查询列表，不下载字幕内容）
+
+        优先 UP 主上传的中文字幕，其次 AI 中文字幕，再次任意语言。AI 字幕需要登录。
+
+        Returns:
+            {"lan", "lan_doc", "subtitle_url", ...}，没有字幕时返回 None
+        """
+        if cid is None:
+            cid = self.fetch_cid(bvid)
+        return _pick_subtitle_track(self._request(API_PLAYER, {"bvid": bvid, "cid": cid}))
+
+    def fetch_subtitle(self, bvid: str, cid: Optional[int] = None) -> Optional[List[dict]]:
+        """
+        下载字幕内容
+
+        Returns:
+            [{"from": 秒, "to": 秒, "content": 文本}, ...]，没有字幕时返回 None
+        """
+        track = self.fetch_subtitle_track(bvid, cid)
+        if track is None:
+            return None
+        url = track["subtitle_url"]
+        if url.startswith("//"):
+            url = "https:" + url
+        resp = self.client.get(url)
+        resp.raise_for_status()
+        body = resp.json().get("body") or []
+        logger.info("fetched_subtitle", bvid=bvid, lan=track.get("lan"), lines=len(body))
+        return body or None
+
     # ========== 追番相关 ==========
 
     def fetch_bangumi(self, user_id: str, is_drama: bool = False) -> List[dict]:
@@ -376,3 +499,131 @@ class BilibiliClient:
     # 保持向后兼容的别名
     def get_all_bvids_from_user(self, user_id: str) -> dict[str, List[str]]:
         return self.get_all_source_ids_from_user(user_id)
+
+
+def api_limiter() -> TokenBucket:
+    """B站接口全局令牌桶（进程内所有扫描共用，参数见 bilibili.api_rate / api_burst）"""
+    config = get_config().bilibili
+    return get_token_bucket("bilibili_api", config.api_rate, config.api_burst)
+
+
+class AsyncBilibiliClient:
+    """
+    Bilibili 异步 API 客户端（定时扫描用）
+
+    所有请求先从全局令牌桶取令牌；遇到风控响应时按带随机抖动的指数退避暂停整个令牌桶，
+    同一时刻在扫描的其他收藏夹一起降速，而不是各自继续撞风控。
+    """
+
+    def __init__(
+        self,
+        sessdata: Optional[str] = None,
+        limiter: Optional[TokenBucket] = None,
+        risk_retries: Optional[int] = None,
+        risk_backoff: Optional[float] = None,
+    ):
+        config = get_config().bilibili
+        self.sessdata = sessdata or config.sessdata
+        self.limiter = limiter or api_limiter()
+        self.risk_retries = config.risk_retries if risk_retries is None else risk_retries
+        self.risk_backoff = config.risk_backoff if risk_backoff is None else risk_backoff
+        self.client = httpx.AsyncClient(
+            headers=HEADERS,
+            cookies={"SESSDATA": self.sessdata} if self.sessdata else {},
+            timeout=30.0,
+        )
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def _request(self, url: str, params: dict) -> dict:
+        """限速发送请求；风控响应退避后重试 risk_retries 次"""
+        attempt = 0
+        while True:
+            await self.limiter.acquire_async()
+            resp = await self.client.get(url, params=params)
+            try:
+                return _parse_response(url, resp)
+            except RiskControlError as e:
+                if attempt >= self.risk_retries:
+                    raise
+                delay = self.risk_backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                attempt += 1
+                logger.warning("bilibili_risk_control_backoff", code=e.code, attempt=attempt, delay=round(delay, 2))
+                self.limiter.penalize(delay)
+
+    async def fetch_favlist(
+        self,
+        media_id: str,
+        until: Optional[Callable[[VideoInfo], bool]] = None,
+    ) -> tuple[FolderInfo, List[VideoInfo]]:
+        """同 BilibiliClient.fetch_favlist"""
+        all_videos = []
+        page = 1
+        folder_info = None
+
+        while True:
+            params = {"media_id": media_id, "pn": page, "ps": 20, "order": "mtime"}
+            data = await self._request(API_FAVLIST, params)
+            if folder_info is None:
+                folder_info = _favlist_info(data["info"])
+
+            stopped = _take_until(all_videos, [_favlist_video(m) for m in data.get("medias") or []], until)
+            if stopped or not data.get("has_more"):
+                break
+            page += 1
+
+        logger.info(
+            "fetched_favlist", folder_id=media_id, video_count=len(all_videos), pages=page, incremental=until is not None
+        )
+        return folder_info, all_videos
+
+    async def fetch_season(self, season_id: str, mid: str = "") -> tuple[FolderInfo, List[VideoInfo]]:
+        """同 BilibiliClient.fetch_season"""
+        all_videos = []
+        page = 1
+        season_name = ""
+        season_owner = ""
+
+        while True:
+            params = {"season_id": season_id, "page_num": page, "page_size": 100}
+            if mid:
+                params["mid"] = mid
+            data = await self._request(API_SEASON, params)
+
+            if page == 1:
+                meta = data.get("meta", {})
+                season_name = meta.get("name", f"合集{season_id}")
+                season_owner = meta.get("upper", {}).get("name", "")
+
+            archives = data.get("archives") or []
+            if not archives:
+                break
+            all_videos.extend(_season_video(v, season_owner) for v in archives)
+
+            if len(all_videos) >= len(data.get("aids") or []):
+                break
+            page += 1
+
+        folder_info = FolderInfo(
+            id=season_id,
+            title=season_name,
+            owner=season_owner,
+            owner_mid=mid,
+            media_count=len(all_videos),
+            folder_type="season",
+        )
+        logger.info("fetched_season", season_id=season_id, name=season_name, video_count=len(all_videos))
+        return folder_info, all_videos
+
+    async def fetch_subtitle_track(self, bvid: str, cid: Optional[int] = None) -> Optional[dict]:
+        """同 BilibiliClient.fetch_subtitle_track"""
+        if cid is None:
+            cid = (await self._request(API_VIEW, {"bvid": bvid}))["cid"]
+        return _pick_subtitle_track(await self._request(API_PLAYER, {"bvid": bvid, "cid": cid}))
@@ -3,18 +3,192 @@
 检测新视频并加入处理队列
 """
 
-from datetime import datetime
-from typing import List, Optional
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import case, insert
+from sqlalchemy.orm import Session, sessionmaker
 
-from packages.db import Video, VideoStatus, WatchedFolder, get_db_context
+from packages.async_runtime import run_sync
+from packages.config import get_config
+from packages.crypto import decrypt_value
+from packages.db import SUBTITLE_LANE, FolderScanCursor, User, UserRole, Video, VideoStatus, WatchedFolder, get_db_context
+from packages.db.models import UserPlatformBinding
 from packages.logging import get_logger
 
-from .bilibili import BilibiliClient, VideoInfo
+from .bilibili import BilibiliClient, VideoInfo, api_limiter
 
 logger = get_logger(__name__)
 
+_IN_CHUNK = 500  # 每次 IN 查询的 source_id 数（SQLite 旧版本限制 999 个绑定参数）
+
+
+def _insert_ignoring_duplicates(db: Session):
+    """Video 的 INSERT，SQLite / PostgreSQL 上唯一约束 uq_tenant_source 冲突的行忽略"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(Video)
+    return dialect_insert(Video).on_conflict_do_nothing(index_elements=["tenant_id", "source_type", "source_id"])
+
+
+def needs_full_scan(cursor: Optional[FolderScanCursor]) -> bool:
+    """没有游标或距上次完整扫描已超过 full_scan_interval 时完整扫描"""
+    if cursor is None or cursor.last_full_scan_at is None:
+        return True
+    interval = timedelta(seconds=get_config().bilibili.full_scan_interval)
+    return datetime.utcnow() - cursor.last_full_scan_at >= interval
+
+
+def advance_cursor(folder: WatchedFolder, videos: List[VideoInfo], full_scan: bool):
+    """游标移到本次获取到的最新条目（没有新条目时保持不变）"""
+    cursor = folder.scan_cursor
+    if cursor is None:
+        cursor = folder.scan_cursor = FolderScanCursor()
+    if videos:
+        cursor.top_source_id = videos[0].source_id
+        cursor.top_fav_time = videos[0].fav_time
+    if full_scan:
+        cursor.last_full_scan_at = datetime.utcnow()
+
+
+def link_existing(db: Session, tenant_id: int, watched_folder_id: int, source_ids: List[str]):
+    """已存在但没有关联收藏夹的视频补上关联（每 _IN_CHUNK 条一次 UPDATE）"""
+    for i in range(0, len(source_ids), _IN_CHUNK):
+        db.query(Video).filter(
+            Video.tenant_id == tenant_id,
+            Video.source_id.in_(source_ids[i:i + _IN_CHUNK]),
+            Video.watched_folder_id.is_(None),
+        ).update({Video.watched_folder_id: watched_folder_id}, synchronize_session=False)
+
+
+def unknown_videos(db: Session, tenant_id: int, videos: List[VideoInfo]) -> List[VideoInfo]:
+    """
+    过滤出库中还没有的条目（保持原顺序、去重）
+
+    每 _IN_CHUNK 条一次 IN 查询，而不是逐条 SELECT。
+    """
+    infos = {v.source_id: v for v in videos}          # 翻页期间列表变动可能出现重复条目
+    source_ids = list(infos)
+    known = set()
+    for i in range(0, len(source_ids), _IN_CHUNK):
+        known.update(
+            source_id for (source_id,) in db.query(Video.source_id).filter(
+                Video.tenant_id == tenant_id,
+                Video.source_id.in_(source_ids[i:i + _IN_CHUNK]),
+            )
+        )
+    return [info for source_id, info in infos.items() if source_id not in known]
+
+
+def insert_videos(
+    db: Session,
+    tenant_id: int,
+    watched_folder_id: int,
+    infos: List[VideoInfo],
+    lanes: Dict[str, Optional[str]],
+) -> List[Video]:
+    """
+    新视频一条多行 INSERT（不提交），按 infos 顺序返回实际插入的行
+
+    (tenant_id, source_type, source_id) 冲突的行忽略，并发扫描同一视频时不会报唯一约束错误。
+
+    Args:
+        lanes: source_id -> processing_lane（字幕快速通道标记）
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            "tenant_id": tenant_id,
+            "watched_folder_id": watched_folder_id,
+            "source_id": info.source_id,
+            "title": info.title,
+            "author": info.author,
+            "duration": info.duration,
+            "cover_url": info.cover_url,
+            "source_type": "bilibili",
+            "source_url": f"https://www.bilibili.com/video/{info.source_id}",
+            "status": VideoStatus.PENDING.value,
+            "processing_lane": lanes.get(info.source_id),
+            "collected_at": now,
+        }
+        for info in infos
+    ]
+    if not rows:
+        return []
+
+    inserted = db.scalars(_insert_ignoring_duplicates(db).returning(Video), rows).all()
+    order = {row["source_id"]: i for i, row in enumerate(rows)}
+    return sorted(inserted, key=lambda v: order[v.source_id])
+
+
+def subtitle_lane(video_info: VideoInfo, track: Optional[dict]) -> Optional[str]:
+    """字幕探测结果 -> processing_lane 取值（有字幕时为 SUBTITLE_LANE）"""
+    if track is None:
+        return None
+    logger.info("subtitle_lane", bvid=video_info.source_id, lan=track.get("lan"))
+    return SUBTITLE_LANE
+
+
+def tenant_sessdata(db: Session, tenant_ids: List[int]) -> Dict[int, str]:
+    """
+    各租户用于扫描的B站 SESSDATA（取租户内绑定了B站账号的用户，所有者、管理员优先）
+
+    Returns:
+        租户ID -> SESSDATA；没有可用绑定的租户不在结果里，由调用方回退到全局配置
+    """
+    if not tenant_ids:
+        return {}
+    role_rank = case(
+        (User.role == UserRole.OWNER, 0),
+        (User.role == UserRole.ADMIN, 1),
+        else_=2,
+    )
+    rows = (
+        db.query(User.tenant_id, UserPlatformBinding.credentials)
+        .join(UserPlatformBinding, UserPlatformBinding.user_id == User.id)
+        .filter(
+            User.tenant_id.in_(tenant_ids),
+            User.is_active == True,
+            UserPlatformBinding.platform == "bilibili",
+            UserPlatformBinding.is_active == True,
+        )
+        .order_by(User.tenant_id, role_rank, User.id)
+        .all()
+    )
+
+    resolved: Dict[int, str] = {}
+    for tenant_id, credentials in rows:
+        if tenant_id in resolved or not credentials:
+            continue
+        try:
+            sessdata = decrypt_value(json.loads(credentials).get("sessdata"))
+        except (ValueError, AttributeError):
+            continue
+        if sessdata:
+            resolved[tenant_id] = sessdata
+    return resolved
+
+
+def _reached_cursor(cursor: FolderScanCursor) -> Callable[[VideoInfo], bool]:
+    """
+    增量扫描的停止条件：翻到上次最新的条目，或收藏时间早于它的条目（上次最新的条目已被取消收藏）
+
+    cursor 只需要 top_source_id / top_fav_time 属性（也可以是游标的快照）。
+
+    收藏时间相同的条目仍然返回，由已存在检查去重。
+    """
+    def reached(video: VideoInfo) -> bool:
+        if video.source_id == cursor.top_source_id:
+            return True
+        return video.fav_time is not None and cursor.top_fav_time is not None and video.fav_time < cursor.top_fav_time
+    return reached
+
 
 class FolderScanner:
     """收藏夹扫描器"""
@@ -28,7 +202,8 @@ class FolderScanner:
             sessdata: B站登录cookie
         """
         self.tenant_id = tenant_id
-        self.client = BilibiliClient(sessdata)
+        # 列表获取与逐个字幕探测都走全局令牌桶，与定时扫描共用限速
+        self.client = BilibiliClient(sessdata, limiter=api_limiter())
 
     def scan_folder(self, folder: WatchedFolder, db: Session) -> List[Video]:
         """
@@ -42,52 +217,41 @@ class FolderScanner:
             新增的视频列表
         """
         new_videos = []
+        full_scan = True
+        started = time.monotonic()
 
         try:
             if folder.folder_type == "season":
+                # 合集按发布顺序排列、每页 100 条，总是完整获取
                 _, videos = self.client.fetch_season(folder.folder_id)
             else:
-                _, videos = self.client.fetch_favlist(folder.folder_id)
-
-            for video_info in videos:
-                # 检查是否已存在
-                exists = db.query(Video).filter(
-                    Video.tenant_id == self.tenant_id,
-                    Video.source_id == video_info.source_id,
-                ).first()
-
-                if exists:
-                    # 如果存在但没有关联收藏夹，更新关联
-                    if exists.watched_folder_id is None:
-                        exists.watched_folder_id = folder.id
-                    continue
-
-                # 创建新视频记录
-                video = Video(
-                    tenant_id=self.tenant_id,
-                    watched_folder_id=folder.id,
-                    bvid=video_info.source_id,
-                    title=video_info.title,
-                    author=video_info.author,
-                    duration=video_info.duration,
-                    cover_url=video_info.cover_url,
-                    source_type="bilibili",
-                    source_url=f"https://www.bilibili.com/video/{video_info.source_id}",
-                    status=VideoStatus.PENDING.value,
-                    collected_at=datetime.utcnow(),
-                )
-                db.add(video)
-                new_videos.append(video)
+                full_scan = needs_full_scan(folder.scan_cursor)
+                until = None if full_scan else _reached_cursor(folder.scan_cursor)
+                _, videos = self.client.fetch_favlist(folder.folder_id, until=until)
+
+            fetch_seconds = time.monotonic() - started
+            new_videos = self._insert_new(folder, videos, db)
+            # 提交后访问属性会逐行重新加载，统计在提交前完成
+            subtitle_lane = sum(1 for v in new_videos if v.processing_lane == SUBTITLE_LANE)
 
             # 更新扫描时间
             folder.last_scan_at = datetime.utcnow()
+            if folder.folder_type != "season":
+                advance_cursor(folder, videos, full_scan)
             db.commit()
+            elapsed = time.monotonic() - started
 
             logger.info(
                 "folder_scanned",
                 folder_id=folder.folder_id,
                 folder_name=folder.name,
+                full_scan=full_scan,
+                fetched=len(videos),
                 new_videos=len(new_videos),
+                subtitle_lane=subtitle_lane,
+                fetch_seconds=round(fetch_seconds, 3),
+                elapsed=round(elapsed, 3),
+                items_per_sec=round(len(videos) / max(elapsed, 1e-6)),
             )
 
         except Exception as e:
@@ -100,9 +264,31 @@ class FolderScanner:
 
         return new_videos
 
+    def _insert_new(self, folder: WatchedFolder, videos: List[VideoInfo], db: Session) -> List[Video]:
+        """批量写入新视频（不提交），字幕探测逐个同步进行"""
+        link_existing(db, self.tenant_id, folder.id, [v.source_id for v in videos])
+        infos = unknown_videos(db, self.tenant_id, videos)
+        lanes = {}
+        if get_config().bilibili.subtitle_probe:
+            lanes = {info.source_id: self._probe_subtitle(info) for info in infos}
+        return insert_videos(db, self.tenant_id, folder.id, infos, lanes)
+
+    def _probe_subtitle(self, video_info: VideoInfo) -> Optional[str]:
+        """
+        探测字幕：有字幕的视频标记为字幕快速通道（处理时不下载音频、不经过 ASR）
+
+        只查询字幕列表，不下载字幕内容；探测失败按无字幕处理。返回 processing_lane 取值。
+        """
+        try:
+            track = self.client.fetch_subtitle_track(video_info.source_id, video_info.cid)
+        except Exception as e:
+            logger.warning("subtitle_probe_failed", bvid=video_info.source_id, error=str(e))
+            return None
+        return subtitle_lane(video_info, track)
+
     def scan_all_folders(self, db: Session) -> List[Video]:
         """
-        扫描所有活跃的收藏夹
+        扫描本租户所有活跃的收藏夹（并发扫描，见 AsyncFolderScanner）
         
         Args:
             db: 数据库会话
@@ -110,28 +296,19 @@ class FolderScanner:
         Returns:
             所有新增的视频列表
         """
-        folders = db.query(WatchedFolder).filter(
-            WatchedFolder.tenant_id == self.tenant_id,
-            WatchedFolder.is_active == True,
-        ).all()
-
-        all_new_videos = []
-        for folder in folders:
-            try:
-                new_videos = self.scan_folder(folder, db)
-                all_new_videos.extend(new_videos)
-            except Exception as e:
-                logger.error("scan_folder_failed", folder_id=folder.folder_id, error=str(e))
-                continue
-
-        logger.info(
-            "all_folders_scanned",
-            tenant_id=self.tenant_id,
-            folder_count=len(folders),
-            new_videos=len(all_new_videos),
-        )
+        from .async_scanner import AsyncFolderScanner
+
+        # 扫描在独立会话中写入；先结束本会话的事务，之后才能读到新插入的行
+        db.commit()
+        scanner = AsyncFolderScanner(self.client.sessdata, session_factory=sessionmaker(bind=db.get_bind()))
+        results = run_sync(scanner.scan([self.tenant_id]))
 
-        return all_new_videos
+        ids = [video_id for result in results for video_id in result.new_video_ids]
+        videos = {}
+        for i in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[i:i + _IN_CHUNK]
+            videos.update((video.id, video) for video in db.query(Video).filter(Video.id.in_(chunk)))
+        return [videos[video_id] for video_id in ids if video_id in videos]
 
     def add_folder(
         self,
@@ -0,0 +1,12 @@
+"""
+独立 Worker 进程池
+
+用法: python -m services.worker [--processes N] [--concurrency N] [--max-tasks-per-child N]
+"""
+
+from .pool import WorkerPool, run_child
+
+__all__ = [
+    "WorkerPool",
+    "run_child",
+]
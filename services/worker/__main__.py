@@ -0,0 +1,61 @@
+"""
+Worker 进程池入口
+
+python -m services.worker --processes 4 --concurrency 2 --max-tasks-per-child 50
+"""
+
+import argparse
+import signal
+
+from packages.config import get_config
+from packages.db import init_db
+from packages.logging import get_logger, setup_logging
+
+from .pool import WorkerPool
+
+logger = get_logger(__name__)
+
+
+def main():
+    config = get_config()
+    worker_config = config.worker
+
+    parser = argparse.ArgumentParser(prog="python -m services.worker", description="AliceLM 后台处理 Worker")
+    parser.add_argument("--processes", type=int, default=worker_config.processes, help="worker 进程数")
+    parser.add_argument("--concurrency", type=int, default=worker_config.concurrency, help="每个进程同时处理的视频数")
+    parser.add_argument(
+        "--max-tasks-per-child",
+        type=int,
+        default=worker_config.max_tasks_per_child,
+        help="每个进程处理N个任务后重启（0 不限）",
+    )
+    parser.add_argument(
+        "--shutdown-timeout",
+        type=float,
+        default=worker_config.shutdown_timeout,
+        help="优雅退出等待时间（秒）",
+    )
+    args = parser.parse_args()
+
+    setup_logging(config.debug)
+    init_db()
+
+    pool = WorkerPool(
+        processes=args.processes,
+        concurrency=args.concurrency,
+        max_tasks_per_child=args.max_tasks_per_child,
+        shutdown_timeout=args.shutdown_timeout,
+    )
+
+    def shutdown(signum, frame):
+        logger.info("worker_signal_received", signal=signum)
+        pool.stop()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    pool.run()
+
+
+if __name__ == "__main__":
+    main()
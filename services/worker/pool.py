@@ -0,0 +1,185 @@
+"""
+Worker 进程池
+
+主进程只负责监督：按配置拉起 N 个子进程，异常退出或达到任务上限退出后补齐；
+收到停止信号时通知子进程优雅退出，超时后强制结束。
+
+每个子进程是一个独立的队列消费者（VideoProcessingQueue）：
+- 认领持久化队列中的任务（API 提交）
+- 队列空闲时原子认领数据库中的 PENDING 视频（扫描发现）
+- CPU 密集的转写/解析在各自进程中执行，不与 API 争用 GIL
+"""
+
+import multiprocessing
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from packages.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 子进程异常退出后的重启间隔（秒）
+RESTART_DELAY = 5.0
+
+
+def run_child(index: int, concurrency: int, max_tasks: int):
+    """
+    子进程入口
+
+    SIGTERM/SIGINT 后停止认领，等待处理中的任务完成后退出；
+    达到 max_tasks 后同样优雅退出，由主进程拉起新进程。
+    """
+    from packages.config import get_config
+    from packages.logging import setup_logging
+    from services.processor.queue import VideoProcessingQueue
+
+    setup_logging(get_config().debug)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    queue = VideoProcessingQueue(
+        max_inflight=concurrency,
+        claim_pending=True,
+        max_tasks=max_tasks,
+    )
+    queue.start()
+    logger.info("worker_child_started", index=index, worker_id=queue.worker_id)
+
+    while not stop.is_set() and not queue.exhausted:
+        stop.wait(1.0)
+
+    reason = "signal" if stop.is_set() else "max_tasks"
+    logger.info("worker_child_draining", index=index, reason=reason)
+    queue.drain()
+    queue.shutdown(wait=True)
+    logger.info("worker_child_exited", index=index, reason=reason)
+
+
+@dataclass
+class _Slot:
+    index: int
+    process: Optional[multiprocessing.process.BaseProcess] = None
+    restart_at: float = 0.0
+    spawn_count: int = 0
+
+
+class WorkerPool:
+    """Worker 进程池（监督者）"""
+
+    def __init__(
+        self,
+        processes: int = 2,
+        concurrency: int = 2,
+        max_tasks_per_child: int = 0,
+        shutdown_timeout: float = 600,
+        target: Callable = run_child,
+    ):
+        """
+        Args:
+            processes: 子进程数
+            concurrency: 每个子进程同时处理的任务数
+            max_tasks_per_child: 每个子进程处理N个任务后退出重启（0 不限）
+            shutdown_timeout: 优雅退出等待时间，超时后强制结束
+            target: 子进程入口，签名 (index, concurrency, max_tasks)
+        """
+        self.processes = max(1, processes)
+        self.concurrency = max(1, concurrency)
+        self.max_tasks_per_child = max(0, max_tasks_per_child)
+        self.shutdown_timeout = shutdown_timeout
+        self.target = target
+
+        # spawn：子进程不继承父进程的线程、数据库连接池等状态
+        self._ctx = multiprocessing.get_context("spawn")
+        self._slots: List[_Slot] = [_Slot(index=i) for i in range(self.processes)]
+        self._stop = threading.Event()
+
+    def _spawn(self, slot: _Slot):
+        process = self._ctx.Process(
+            target=self.target,
+            args=(slot.index, self.concurrency, self.max_tasks_per_child),
+            name=f"alice-worker-{slot.index}",
+        )
+        process.start()
+        slot.process = process
+        slot.spawn_count += 1
+        logger.info("worker_process_started", index=slot.index, pid=process.pid)
+
+    def _supervise(self):
+        """补齐已退出的子进程"""
+        now = time.time()
+        for slot in self._slots:
+            process = slot.process
+            if process is not None and process.is_alive():
+                continue
+
+            if process is not None:
+                process.join()
+                exitcode = process.exitcode
+                slot.process = None
+                if exitcode == 0:
+                    logger.info("worker_process_recycled", index=slot.index, pid=process.pid)
+                else:
+                    logger.error("worker_process_crashed", index=slot.index, pid=process.pid, exitcode=exitcode)
+                    slot.restart_at = now + RESTART_DELAY
+
+            if now >= slot.restart_at:
+                self._spawn(slot)
+
+    def run(self, poll_interval: float = 1.0):
+        """启动并监督子进程，阻塞直到 stop() 被调用"""
+        logger.info(
+            "worker_pool_started",
+            processes=self.processes,
+            concurrency=self.concurrency,
+            max_tasks_per_child=self.max_tasks_per_child,
+        )
+        try:
+            while not self._stop.is_set():
+                self._supervise()
+                self._stop.wait(poll_interval)
+        finally:
+            self._terminate()
+
+    def stop(self):
+        """请求停止（可在信号处理函数中调用）"""
+        self._stop.set()
+
+    def _terminate(self):
+        """通知子进程优雅退出，超时后强制结束"""
+        alive = [s.process for s in self._slots if s.process is not None and s.process.is_alive()]
+        logger.info("worker_pool_stopping", alive=len(alive), timeout=self.shutdown_timeout)
+
+        for process in alive:
+            process.terminate()  # SIGTERM：子进程停止认领并处理完手头任务
+
+        deadline = time.time() + self.shutdown_timeout
+        for process in alive:
+            process.join(max(0.0, deadline - time.time()))
+            if process.is_alive():
+                logger.warning("worker_process_killed", pid=process.pid)
+                process.kill()
+                process.join()
+
+        logger.info("worker_pool_stopped")
+
+    def get_stats(self) -> dict:
+        """各子进程状态"""
+        return {
+            "processes": self.processes,
+            "concurrency": self.concurrency,
+            "max_tasks_per_child": self.max_tasks_per_child,
+            "workers": [
+                {
+                    "index": slot.index,
+                    "pid": slot.process.pid if slot.process else None,
+                    "alive": bool(slot.process and slot.process.is_alive()),
+                    "spawn_count": slot.spawn_count,
+                }
+                for slot in self._slots
+            ],
+        }
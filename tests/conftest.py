@@ -280,3 +280,46 @@ def test_video(test_db_session: Session, test_tenant: Tenant) -> Video:
     test_db_session.commit()
     test_db_session.refresh(video)
     return video
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def make_job_backend(request, tmp_path, monkeypatch):
+    """
+    任务队列后端工厂（SQLite / Redis 各跑一遍，Redis 用 fakeredis 模拟）
+
+    同一用例里多次调用共享同一份存储，用于模拟多进程与重启
+    """
+    from packages.queue import SQLiteJobBackend
+
+    opened = []
+
+    if request.param == "sqlite":
+        path = str(tmp_path / "jobs.db")
+
+        def factory():
+            opened.append(SQLiteJobBackend(path))
+            return opened[-1]
+    else:
+        fakeredis = pytest.importorskip("fakeredis")
+        import redis
+
+        from packages.queue.redis_backend import RedisJobBackend
+
+        server = fakeredis.FakeServer()
+        monkeypatch.setattr(
+            redis.Redis, "from_url", lambda url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs)
+        )
+
+        def factory():
+            opened.append(RedisJobBackend(prefix="test:jobs"))
+            return opened[-1]
+
+    yield factory
+    for backend in opened:
+        backend.close()
+
+
+@pytest.fixture
+def job_backend(make_job_backend):
+    """任务队列后端（按参数分别为 SQLite / Redis）"""
+    return make_job_backend()
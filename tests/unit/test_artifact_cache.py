@@ -0,0 +1,144 @@
+"""
+services.processor.artifact_cache 单元测试
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from packages.db.models import ArtifactCacheEntry, Video
+from services.processor.artifact_cache import ArtifactCache, cache_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ArtifactCache(str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def videos(db_session, sample_tenant):
+    items = []
+    for source_id in ("BV1cacheA", "BV1cacheB"):
+        video = Video(
+            tenant_id=sample_tenant.id,
+            source_type="bilibili",
+            source_id=source_id,
+            title=source_id,
+            author="up",
+        )
+        db_session.add(video)
+        items.append(video)
+    db_session.commit()
+    return items
+
+
+def _age(db, key, hours):
+    entry = db.query(ArtifactCacheEntry).filter(ArtifactCacheEntry.cache_key == key).one()
+    entry.last_used_at = datetime.utcnow() - timedelta(hours=hours)
+    db.commit()
+
+
+def test_cache_key_depends_on_kind_and_parts():
+    assert cache_key("audio", "bilibili", "BV1") == cache_key("audio", "bilibili", "BV1")
+    assert cache_key("audio", "bilibili", "BV1") != cache_key("audio", "bilibili", "BV2")
+    assert cache_key("audio", "x") != cache_key("transcript", "x")
+
+
+def test_put_and_get_file(db_session, cache, tmp_path):
+    src = tmp_path / "a.m4a"
+    src.write_bytes(b"audio")
+    key = cache_key("audio", "bilibili", "BV1")
+
+    assert cache.get(db_session, "audio", key) is None
+    stored = cache.put_file(db_session, "audio", key, src)
+
+    assert src.exists()
+    assert stored.suffix == ".m4a"
+    assert cache.get(db_session, "audio", key).read_bytes() == b"audio"
+
+    entry = db_session.query(ArtifactCacheEntry).filter(ArtifactCacheEntry.cache_key == key).one()
+    assert entry.hit_count == 1
+    assert entry.size == 5
+
+
+def test_put_and_get_json(db_session, cache):
+    key = cache_key("summary", "abc")
+    cache.put_json(db_session, "summary", key, {"summary": "摘要"})
+
+    assert cache.get_json(db_session, "summary", key) == {"summary": "摘要"}
+
+
+def test_missing_file_is_a_miss(db_session, cache):
+    key = cache_key("summary", "gone")
+    path = cache.put_json(db_session, "summary", key, {})
+    path.unlink()
+
+    assert cache.get(db_session, "summary", key) is None
+    assert db_session.query(ArtifactCacheEntry).count() == 0
+
+
+def test_refs_are_shared_and_released(db_session, cache, videos):
+    key = cache_key("transcript", "shared")
+    cache.put_json(db_session, "transcript", key, {"text": "t"})
+
+    cache.acquire(db_session, videos[0].id, "transcript", key)
+    cache.acquire(db_session, videos[1].id, "transcript", key)
+    cache.acquire(db_session, videos[1].id, "transcript", key)
+    assert cache.ref_count(db_session, key) == 2
+
+    assert cache.release(db_session, videos[0].id, "transcript") == 1
+    assert cache.ref_count(db_session, key) == 1
+
+
+def test_gc_keeps_referenced_and_recent_entries(db_session, cache, videos):
+    kept = cache_key("summary", "kept")
+    recent = cache_key("summary", "recent")
+    stale = cache_key("summary", "stale")
+    for key in (kept, recent, stale):
+        cache.put_json(db_session, "summary", key, {"key": key})
+    cache.acquire(db_session, videos[0].id, "summary", kept)
+    _age(db_session, kept, 48)
+    _age(db_session, stale, 48)
+
+    stale_path = cache.get(db_session, "summary", stale)
+    _age(db_session, stale, 48)
+
+    result = cache.gc(db_session, grace_hours=24)
+
+    assert result["entries"] == 1
+    assert not stale_path.exists()
+    assert cache.get(db_session, "summary", kept) is not None
+    assert cache.get(db_session, "summary", recent) is not None
+    assert cache.get(db_session, "summary", stale) is None
+
+
+def test_pipeline_keys_follow_resolved_models(videos, tmp_path):
+    """不同用户解析出的 ASR / 摘要模型与音频编码不同时，不共享转写、摘要与音频缓存"""
+    from services.asr import TranscriptResult
+    from services.processor.pipeline import PipelineContext, VideoPipeline
+
+    pipeline = VideoPipeline(
+        video_dir=str(tmp_path / "v"), audio_dir=str(tmp_path / "a"), transcript_dir=str(tmp_path / "t"), notify=False
+    )
+    video = videos[0]
+
+    def ctx(asr_model, base_url, llm_model, profile):
+        return PipelineContext(
+            video_id=video.id,
+            result=TranscriptResult(text="hello"),
+            models={
+                "download": {"audio_profile": profile},
+                "transcribe": {"asr": "api", "provider": "openai", "model": asr_model, "base_url": base_url},
+                "analyze": {"provider": "openai", "model": llm_model, "base_url": base_url},
+            },
+        )
+
+    base = ctx("asr-a", "https://a", "llm-a", "opus")
+    same = ctx("asr-a", "https://a", "llm-a", "opus")
+    assert pipeline._transcript_keys(video, base) == pipeline._transcript_keys(video, same)
+    assert pipeline._summary_key(video, base) == pipeline._summary_key(video, same)
+
+    for other in (ctx("asr-b", "https://a", "llm-a", "opus"), ctx("asr-a", "https://b", "llm-a", "opus")):
+        assert pipeline._transcript_keys(video, base) != pipeline._transcript_keys(video, other)
+    assert pipeline._summary_key(video, base) != pipeline._summary_key(video, ctx("asr-a", "https://a", "llm-b", "opus"))
+    assert pipeline._audio_key(video, base) != pipeline._audio_key(video, ctx("asr-a", "https://a", "llm-a", "wav"))
@@ -0,0 +1,68 @@
+"""
+ASR HTTP 连接池单元测试
+"""
+
+import httpx
+import pytest
+
+from packages.concurrency import ASR, get_limiter, reset_limiters
+from packages.config import get_config
+from services.asr import APIASRProvider
+from services.asr import http_client
+
+
+@pytest.fixture(autouse=True)
+def _fresh_pool():
+    reset_limiters()
+    http_client.close_asr_clients()
+    yield
+    http_client.close_asr_clients()
+    reset_limiters()
+
+
+def test_client_shared_per_endpoint_with_budget_limits():
+    a = http_client.get_asr_client("https://asr.test/v1")
+    b = http_client.get_asr_client("https://asr.test/v1/other")
+    c = http_client.get_asr_client("https://other.test/v1")
+
+    assert a is b
+    assert a is not c
+    pool = a._transport._pool
+    assert pool._max_connections == get_limiter(ASR, "https://asr.test/v1").max_limit
+
+
+def test_http2_falls_back_without_h2(monkeypatch):
+    monkeypatch.setattr(get_config().asr, "http2", True)
+    monkeypatch.setattr(http_client, "_http2_available", lambda: False)
+
+    client = http_client.get_asr_client("https://asr.test/v1")
+    assert not client._transport._pool._http2
+
+
+def test_forked_process_gets_new_client(monkeypatch):
+    parent = http_client.get_asr_client("https://asr.test/v1")
+    monkeypatch.setattr(http_client, "_clients_pid", -1)
+
+    assert http_client.get_asr_client("https://asr.test/v1") is not parent
+
+
+def test_uploads_reuse_pooled_client(tmp_path, monkeypatch):
+    received = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        received.append(request.read())
+        return httpx.Response(200, json={"text": "ok", "segments": [], "duration": 1.0})
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr("services.asr.api_provider.get_asr_client", lambda base_url: client)
+
+    audio = tmp_path / "a.ogg"
+    audio.write_bytes(b"OggS" + b"\0" * 1000)
+    provider = APIASRProvider(base_url="https://asr.test/v1", api_key="k")
+    for _ in range(2):
+        assert provider._transcribe_single(str(audio)).text == "ok"
+
+    assert not client.is_closed
+    assert len(received) == 2
+    assert b'filename="a.ogg"' in received[0] and b"audio/ogg" in received[0]
+    client.close()
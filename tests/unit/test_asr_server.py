@@ -0,0 +1,136 @@
+"""
+本地 ASR 服务单元测试（使用假推理引擎，不依赖 faster-whisper）
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from services.asr import ASRServerProvider
+from services.asr.base import TranscriptSegment
+from services.asr_server import ASRServer, BatchScheduler, merge_speech
+
+RATE = 16000
+
+
+class FakeEngine:
+    """音频内容即为片段编号；每个片段转写为一个分段"""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def decode(self, audio_path):
+        with open(audio_path) as f:
+            clips = int(f.read())
+        return np.repeat(np.arange(clips, dtype=np.float32), RATE * 10)
+
+    def detect_language(self, audio):
+        return "zh"
+
+    def speech_clips(self, audio):
+        # 每 10 秒一个片段，只取中间 8 秒
+        return [(i * RATE * 10 + RATE, i * RATE * 10 + RATE * 9) for i in range(audio.size // (RATE * 10))]
+
+    def transcribe_batch(self, clips, language, prompt):
+        self.gate.wait()
+        if self.fail:
+            raise RuntimeError("model crashed")
+        self.batches.append((len(clips), prompt))
+        return [[TranscriptSegment(0.5, 1.5, f"{prompt}-{int(clip[0])}")] for clip in clips]
+
+
+def _audio(tmp_path, name, clips):
+    path = tmp_path / name
+    path.write_text(str(clips))
+    return str(path)
+
+
+def test_merge_speech_respects_window():
+    speech = [(0, 10 * RATE), (11 * RATE, 25 * RATE), (26 * RATE, 40 * RATE), (41 * RATE, 120 * RATE)]
+    clips = merge_speech(speech)
+
+    assert clips[0] == (0, 25 * RATE)
+    assert all(end - start <= 30 * RATE for start, end in clips)
+    assert clips[-1][1] == 120 * RATE
+
+
+def test_concurrent_jobs_share_batches(tmp_path):
+    engine = FakeEngine()
+    engine.gate.clear()
+    scheduler = BatchScheduler(engine, batch_size=8, max_wait=0.2)
+    results = {}
+
+    def run(name, clips):
+        results[name] = scheduler.transcribe(_audio(tmp_path, name, clips), prompt="p")
+
+    threads = [threading.Thread(target=run, args=(f"a{i}", 3)) for i in range(2)]
+    for t in threads:
+        t.start()
+    engine.gate.set()
+    for t in threads:
+        t.join(5)
+
+    assert scheduler.stats()["multi_job_batches"] >= 1
+    assert sum(size for size, _ in engine.batches) == 6
+    result = results["a0"]
+    assert [s.text for s in result.segments] == ["p-0", "p-1", "p-2"]
+    # 片段从 1 秒处开始，片段内 0.5 秒 -> 源音频 1.5 秒
+    assert [s.start for s in result.segments] == [1.5, 11.5, 21.5]
+    assert result.duration == 30.0
+    scheduler.stop()
+
+
+def test_different_prompts_are_not_mixed(tmp_path):
+    engine = FakeEngine()
+    scheduler = BatchScheduler(engine, batch_size=8, max_wait=0.05)
+    threads = [
+        threading.Thread(target=scheduler.transcribe, args=(_audio(tmp_path, f"b{p}", 2),), kwargs={"prompt": p})
+        for p in ("x", "y")
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    assert {prompt for _, prompt in engine.batches} == {"x", "y"}
+    assert sum(size for size, _ in engine.batches) == 4
+    scheduler.stop()
+
+
+def test_engine_failure_fails_job(tmp_path):
+    scheduler = BatchScheduler(FakeEngine(fail=True), batch_size=4, max_wait=0)
+    with pytest.raises(RuntimeError, match="model crashed"):
+        scheduler.transcribe(_audio(tmp_path, "c", 2))
+    scheduler.stop()
+
+
+def test_http_roundtrip(tmp_path):
+    server = ASRServer(("127.0.0.1", 0), BatchScheduler(FakeEngine(), max_wait=0), model_name="fake")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        provider = ASRServerProvider(base_url=f"http://127.0.0.1:{server.server_address[1]}")
+        assert provider.is_available()
+
+        result = provider.transcribe(_audio(tmp_path, "d", 2), prompt="q")
+        assert [s.text for s in result.segments] == ["q-0", "q-1"]
+        assert result.language == "zh"
+
+        with pytest.raises(RuntimeError, match="音频文件不存在"):
+            provider.transcribe(str(tmp_path / "missing.wav"))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_manager_instances_shared_across_pipelines():
+    from services.asr import ASRManager
+
+    provider = ASRManager("server").get_provider()
+    assert isinstance(provider, ASRServerProvider)
+    assert ASRManager("server").get_provider() is provider
+    assert ASRManager("server").audio_profile == "wav"
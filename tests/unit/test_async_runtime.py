@@ -0,0 +1,90 @@
+"""
+packages.async_runtime 单元测试
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from packages.async_runtime import AsyncRuntime
+
+
+@pytest.fixture
+def runtime():
+    rt = AsyncRuntime(name="test-runtime")
+    yield rt
+    rt.shutdown()
+
+
+def test_run_sync_returns_result_on_shared_loop(runtime):
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    first = runtime.run_sync(current_loop())
+    second = runtime.run_sync(current_loop())
+
+    assert first is second
+    assert first is runtime.loop
+
+
+def test_run_sync_propagates_exceptions(runtime):
+    async def boom():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        runtime.run_sync(boom())
+
+
+def test_run_sync_timeout_cancels_coroutine(runtime):
+    cancelled = threading.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(TimeoutError):
+        runtime.run_sync(slow(), timeout=0.05)
+    assert cancelled.wait(1.0)
+
+
+def test_run_sync_from_runtime_thread_is_rejected(runtime):
+    async def inner():
+        return 1
+
+    async def outer():
+        return runtime.run_sync(inner())
+
+    with pytest.raises(RuntimeError):
+        runtime.run_sync(outer())
+
+
+def test_concurrent_callers(runtime):
+    async def double(x):
+        await asyncio.sleep(0.01)
+        return x * 2
+
+    results = {}
+
+    def call(i):
+        results[i] = runtime.run_sync(double(i))
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {i: i * 2 for i in range(8)}
+
+
+def test_shutdown_and_restart(runtime):
+    async def one():
+        return 1
+
+    runtime.run_sync(one())
+    runtime.shutdown()
+    assert runtime.run_sync(one()) == 1
@@ -0,0 +1,207 @@
+"""并发收藏夹扫描：跨租户并发、全局令牌桶、风控退避、单收藏夹超时、按租户凭证"""
+
+import asyncio
+import json
+import time
+
+import httpx
+from sqlalchemy.orm import sessionmaker
+
+from packages.concurrency import TokenBucket
+from packages.crypto import encrypt_value
+from packages.db import Tenant, User, UserRole, Video, WatchedFolder
+from packages.db.models import UserPlatformBinding
+from services.watcher import AsyncBilibiliClient, AsyncFolderScanner
+from services.watcher import async_scanner
+
+
+def _favlist(media_id, count=3):
+    medias = [
+        {
+            "bvid": f"BV{media_id}x{i}", "title": f"v{i}", "upper": {"name": "up"}, "duration": 60,
+            "cnt_info": {"play": 0}, "ugc": {"first_cid": i}, "fav_time": 1_700_000_000 + i,
+        }
+        for i in range(count, 0, -1)
+    ]
+    return {"code": 0, "data": {
+        "info": {"id": media_id, "title": "f", "upper": {"name": "up", "mid": 1}, "media_count": count},
+        "medias": medias,
+        "has_more": False,
+    }}
+
+
+class _API:
+    """收藏夹接口替身：每次请求耗时 delay 秒，可对指定收藏夹先返回风控或一直挂起"""
+
+    def __init__(self, delay=0.05, risk_once=(), hang=()):
+        self.delay = delay
+        self.risk_once = set(risk_once)
+        self.hang = set(hang)
+        self.requests = []
+        self.cookies = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handler(self, request: httpx.Request):
+        if request.url.path.endswith("/player/v2"):
+            return httpx.Response(200, json={"code": 0, "data": {"subtitle": {"subtitles": []}}})
+        media_id = request.url.params["media_id"]
+        self.requests.append((media_id, time.monotonic()))
+        self.cookies[media_id] = request.headers.get("cookie")
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(3600 if media_id in self.hang else self.delay)
+        finally:
+            self.in_flight -= 1
+        if media_id in self.risk_once:
+            self.risk_once.discard(media_id)
+            return httpx.Response(200, json={"code": -412, "message": "请求被拦截"})
+        return httpx.Response(200, json=_favlist(media_id))
+
+
+def _tenants_with_folders(db_session, tenants, folders_per_tenant=1):
+    media_id = 100
+    for t in range(tenants):
+        tenant = Tenant(name=f"t{t}", slug=f"t{t}")
+        db_session.add(tenant)
+        db_session.flush()
+        for _ in range(folders_per_tenant):
+            media_id += 1
+            db_session.add(WatchedFolder(
+                tenant_id=tenant.id, folder_id=str(media_id), folder_type="favlist", name="f", platform="bilibili",
+            ))
+    db_session.commit()
+
+
+def _scan(db_engine, api, limiter=None, **kwargs):
+    async def run():
+        client = AsyncBilibiliClient(
+            sessdata="x", limiter=limiter or TokenBucket("test", rate=0, burst=1), risk_backoff=0.05,
+        )
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(api.handler))
+        try:
+            scanner = AsyncFolderScanner(client=client, session_factory=sessionmaker(bind=db_engine), **kwargs)
+            return await scanner.scan()
+        finally:
+            await client.close()
+
+    return asyncio.run(run())
+
+
+def test_all_tenants_scanned_concurrently(db_engine, db_session):
+    _tenants_with_folders(db_session, tenants=6, folders_per_tenant=2)
+    api = _API(delay=0.2)
+
+    started = time.monotonic()
+    results = _scan(db_engine, api, concurrency=16)
+    elapsed = time.monotonic() - started
+
+    assert len(results) == 12 and not any(r.error or r.timed_out for r in results)
+    assert len({r.tenant_id for r in results}) == 6
+    assert api.max_in_flight == 12
+    assert elapsed < 0.2 * 6                 # 顺序扫描需要 12 × 0.2s
+    assert db_session.query(Video).count() == 36
+    assert all(f.scan_cursor is not None for f in db_session.query(WatchedFolder))
+
+    # 第二轮只翻第一页，没有新增
+    assert sum(len(r.new_video_ids) for r in _scan(db_engine, api)) == 0
+
+
+def test_requests_share_global_rate_limit(db_engine, db_session):
+    _tenants_with_folders(db_session, tenants=4)
+    api = _API(delay=0)
+
+    _scan(db_engine, api, limiter=TokenBucket("test", rate=20, burst=1))
+
+    times = sorted(t for _, t in api.requests)
+    assert len(times) == 4
+    assert times[-1] - times[0] >= 3 / 20 * 0.9
+
+
+def test_risk_control_backs_off_and_retries(db_engine, db_session):
+    _tenants_with_folders(db_session, tenants=2)
+    api = _API(delay=0, risk_once={"101"})
+
+    results = _scan(db_engine, api)
+
+    assert not any(r.error for r in results)
+    assert [media_id for media_id, _ in api.requests].count("101") == 2
+    assert db_session.query(Video).count() == 6
+
+
+def test_slow_folder_hits_deadline_without_blocking_others(db_engine, db_session):
+    _tenants_with_folders(db_session, tenants=3)
+    api = _API(delay=0, hang={"102"})
+
+    results = {r.folder_id: r for r in _scan(db_engine, api, folder_deadline=0.3)}
+
+    assert results["102"].timed_out and not results["102"].new_video_ids
+    assert len(results["101"].new_video_ids) == 3 and len(results["103"].new_video_ids) == 3
+    slow = db_session.query(WatchedFolder).filter(WatchedFolder.folder_id == "102").one()
+    assert slow.scan_cursor is None and slow.last_scan_at is None
+
+
+def test_commit_not_cancelled_by_deadline(db_engine, db_session, monkeypatch):
+    """时限只约束获取与探测，已拿到结果的收藏夹写库慢也不会被取消"""
+    _tenants_with_folders(db_session, tenants=1)
+    commit = AsyncFolderScanner._commit_folder
+
+    def slow_commit(*args):
+        time.sleep(0.4)
+        return commit(*args)
+
+    monkeypatch.setattr(AsyncFolderScanner, "_commit_folder", staticmethod(slow_commit))
+
+    results = _scan(db_engine, _API(delay=0), folder_deadline=0.2)
+
+    assert not results[0].timed_out and len(results[0].new_video_ids) == 3
+    assert db_session.query(Video).count() == 3
+
+
+def test_each_tenant_uses_its_own_sessdata(db_engine, db_session, monkeypatch):
+    """租户用自己绑定的B站账号扫描，没有绑定的回退到全局 SESSDATA；相同凭证共用客户端"""
+    _tenants_with_folders(db_session, tenants=3)
+    tenants = db_session.query(Tenant).order_by(Tenant.id).all()
+    for tenant, sessdata in zip(tenants[:2], ("owner-a", "owner-b")):
+        member = User(tenant_id=tenant.id, email=f"m@{tenant.slug}", username="m", role=UserRole.MEMBER)
+        owner = User(tenant_id=tenant.id, email=f"o@{tenant.slug}", username="o", role=UserRole.OWNER)
+        db_session.add_all([member, owner])
+        db_session.flush()
+        for user, value in ((member, "member"), (owner, sessdata)):
+            db_session.add(UserPlatformBinding(
+                user_id=user.id, platform="bilibili", platform_uid=str(user.id),
+                credentials=json.dumps({"sessdata": encrypt_value(value)}),
+            ))
+    db_session.commit()
+
+    api = _API(delay=0)
+    created = []
+
+    class _Client(AsyncBilibiliClient):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.client = httpx.AsyncClient(
+                cookies={"SESSDATA": self.sessdata}, transport=httpx.MockTransport(api.handler),
+            )
+            created.append(self)
+
+    monkeypatch.setattr(async_scanner, "AsyncBilibiliClient", _Client)
+    results = asyncio.run(AsyncFolderScanner(
+        sessdata="global", session_factory=sessionmaker(bind=db_engine),
+    ).scan())
+
+    assert not any(r.error for r in results)
+    assert api.cookies == {"101": "SESSDATA=owner-a", "102": "SESSDATA=owner-b", "103": "SESSDATA=global"}
+    assert len(created) == 3
+    assert len({id(c.limiter) for c in created}) == 1
+
+
+def test_token_bucket_burst_then_paced():
+    bucket = TokenBucket("b", rate=10, burst=3)
+    waits = [bucket._reserve() for _ in range(5)]
+    assert all(w < 0.01 for w in waits[:3])
+    assert 0.05 < waits[3] <= 0.1 and 0.15 < waits[4] <= 0.2
+
+    bucket.penalize(1.0)
+    assert bucket._reserve() > 0.9
@@ -0,0 +1,70 @@
+"""
+ASR 音频编码配置单元测试
+"""
+
+import subprocess
+
+import pytest
+
+from services.asr import APIASRProvider
+from services.asr.profiles import get_profile
+from services.asr.segmenter import AudioSegmenter
+from services.processor.audio import AudioProcessor
+
+
+class _Run:
+    """记录 subprocess.run 调用，并创建输出文件"""
+
+    def __init__(self):
+        self.commands = []
+
+    def __call__(self, cmd, **kwargs):
+        self.commands.append(cmd)
+        open(cmd[-1] if cmd[-1] != "-y" else cmd[-2], "wb").close()
+        return subprocess.CompletedProcess(cmd, 0, stdout="", stderr="")
+
+
+def test_unknown_profile_rejected():
+    with pytest.raises(ValueError):
+        get_profile("aac")
+    with pytest.raises(ValueError):
+        AudioSegmenter(codec="aac")
+
+
+def test_extract_audio_writes_profile_format_directly(tmp_path, monkeypatch):
+    run = _Run()
+    monkeypatch.setattr("services.processor.audio.subprocess.run", run)
+    monkeypatch.setattr(AudioProcessor, "check_video_integrity", lambda self, path: True)
+    video = tmp_path / "v.mp4"
+    video.write_bytes(b"x")
+
+    audio = AudioProcessor(str(tmp_path / "audio")).extract_audio(video, "BV1", profile="opus")
+
+    assert audio.name == "BV1.ogg"
+    cmd = run.commands[-1]
+    assert cmd[cmd.index("-c:a") + 1] == "libopus"
+    assert cmd[cmd.index("-ar") + 1] == "16000"
+    assert cmd[cmd.index("-ac") + 1] == "1"
+
+
+def test_upload_skips_transcode_for_accepted_format(tmp_path, monkeypatch):
+    run = _Run()
+    monkeypatch.setattr("services.asr.api_provider.subprocess.run", run)
+    provider = APIASRProvider(base_url="http://asr.test/v1", api_key="k", audio_profile="opus")
+
+    ogg = tmp_path / "a.ogg"
+    assert provider._prepare_upload(str(ogg)) == str(ogg)
+    assert run.commands == []
+
+    m4a = tmp_path / "a.m4a"
+    assert provider._prepare_upload(str(m4a)) == str(tmp_path / "a.ogg")
+    assert "libopus" in run.commands[-1]
+
+
+def test_local_and_api_providers_declare_profiles():
+    from services.asr import ASRManager
+
+    assert ASRManager("faster_whisper").audio_profile == "wav"
+    provider = APIASRProvider(base_url="http://asr.test/v1", api_key="k", audio_profile="flac")
+    assert provider.audio_profile == "flac"
+    assert AudioSegmenter(codec="opus").suffix == ".ogg"
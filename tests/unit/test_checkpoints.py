@@ -0,0 +1,205 @@
+"""
+services.processor.checkpoints 单元测试
+"""
+
+import json
+
+import pytest
+
+from services.processor import checkpoints
+from services.processor.checkpoints import (
+    load_checkpoints,
+    plan_resume,
+    record_checkpoint,
+    restore_context,
+)
+from services.processor.pipeline import PipelineContext
+
+
+@pytest.fixture
+def video(sample_video):
+    return sample_video
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    audio = tmp_path / "BV1ckpt.m4a"
+    audio.write_bytes(b"audio-bytes")
+    transcript = tmp_path / "BV1ckpt.json"
+    transcript.write_text(json.dumps({
+        "text": "hello world",
+        "language": "zh",
+        "duration": 12.0,
+        "segments": [{"start": 0.0, "end": 12.0, "text": "hello world"}],
+    }), encoding="utf-8")
+    return audio, transcript
+
+
+def _complete_through(db, video, artifacts, stage):
+    audio, transcript = artifacts
+    record_checkpoint(db, video.id, "download", artifact_path=audio)
+    if stage == "download":
+        return
+    cp = record_checkpoint(db, video.id, "transcribe", artifact_path=transcript)
+    if stage == "transcribe":
+        return
+    record_checkpoint(db, video.id, "analyze", content_hash=cp.content_hash)
+    if stage == "analyze":
+        return
+    record_checkpoint(db, video.id, "index", content_hash=cp.content_hash)
+
+
+def test_checkpoint_committed_with_stage(db_session, video, artifacts):
+    """检查点只 flush，随阶段一起提交；阶段回滚时检查点一并回滚"""
+    record_checkpoint(db_session, video.id, "download", artifact_path=artifacts[0])
+    assert "download" in load_checkpoints(db_session, video.id)
+
+    db_session.rollback()
+    assert load_checkpoints(db_session, video.id) == {}
+
+
+class TestPlanResume:
+    """测试起始阶段判定"""
+
+    def test_no_checkpoints_starts_from_download(self, db_session, video):
+        assert plan_resume(db_session, video) == "download"
+
+    def test_resumes_after_last_valid_stage(self, db_session, video, artifacts):
+        _complete_through(db_session, video, artifacts, "transcribe")
+        assert plan_resume(db_session, video) == "analyze"
+
+    def test_all_done_only_finalizes(self, db_session, video, artifacts):
+        _complete_through(db_session, video, artifacts, "index")
+        assert plan_resume(db_session, video) == "finalize"
+
+    def test_missing_artifact_invalidates_stage(self, db_session, video, artifacts):
+        _complete_through(db_session, video, artifacts, "analyze")
+        artifacts[1].unlink()
+
+        assert plan_resume(db_session, video) == "transcribe"
+        assert set(load_checkpoints(db_session, video.id)) == {"download"}
+
+    def test_cleaned_audio_not_needed_after_transcribe(self, db_session, video, artifacts):
+        """音频被清理后，只要转写有效就不需要重新下载"""
+        _complete_through(db_session, video, artifacts, "transcribe")
+        artifacts[0].unlink()
+
+        assert plan_resume(db_session, video) == "analyze"
+
+    def test_cleaned_audio_redownloads_when_transcribing(self, db_session, video, artifacts):
+        _complete_through(db_session, video, artifacts, "download")
+        artifacts[0].unlink()
+
+        assert plan_resume(db_session, video) == "download"
+        assert load_checkpoints(db_session, video.id) == {}
+
+    def test_changed_transcript_invalidates_downstream(self, db_session, video, artifacts):
+        _complete_through(db_session, video, artifacts, "index")
+        artifacts[1].write_text('{"text": "edited"}', encoding="utf-8")
+
+        assert plan_resume(db_session, video) == "transcribe"
+        assert set(load_checkpoints(db_session, video.id)) == {"download"}
+
+    def test_transcript_with_gaps_is_retranscribed(self, db_session, video, artifacts):
+        """有缺失区间的转写不算完成：重新处理从转写开始（音频仍有效，分片清单补齐缺失部分）"""
+        audio, transcript = artifacts
+        record_checkpoint(db_session, video.id, "download", artifact_path=audio)
+        cp = record_checkpoint(db_session, video.id, "transcribe", artifact_path=transcript, extra={"gaps": 2})
+        for stage in ("analyze", "index"):
+            record_checkpoint(db_session, video.id, stage, content_hash=cp.content_hash)
+
+        assert plan_resume(db_session, video) == "transcribe"
+        assert set(load_checkpoints(db_session, video.id)) == {"download"}
+
+    def test_params_change_invalidates_stage(self, db_session, video, artifacts, monkeypatch):
+        _complete_through(db_session, video, artifacts, "index")
+        monkeypatch.setitem(checkpoints._STAGE_VERSIONS, "analyze", 999)
+
+        assert plan_resume(db_session, video) == "analyze"
+        assert set(load_checkpoints(db_session, video.id)) == {"download", "transcribe"}
+
+    def test_user_model_change_invalidates_stage(self, db_session, video, artifacts):
+        """用户自己的模型配置变化（全局配置不变）时，对应阶段及之后重做"""
+        audio, transcript = artifacts
+        models = {
+            "transcribe": {"asr": "api", "model": "asr-a", "base_url": "https://a"},
+            "analyze": {"provider": "openai", "model": "llm-a", "base_url": "https://a"},
+        }
+        record_checkpoint(db_session, video.id, "download", artifact_path=audio, models=models)
+        cp = record_checkpoint(db_session, video.id, "transcribe", artifact_path=transcript, models=models)
+        for stage in ("analyze", "index"):
+            record_checkpoint(db_session, video.id, stage, content_hash=cp.content_hash, models=models)
+        assert plan_resume(db_session, video, models=models) == "finalize"
+
+        switched = {**models, "analyze": {**models["analyze"], "model": "llm-b"}}
+        assert plan_resume(db_session, video, models=switched) == "analyze"
+        assert set(load_checkpoints(db_session, video.id)) == {"download", "transcribe"}
+
+    def test_models_resolved_per_user(self, tmp_path, monkeypatch):
+        from types import SimpleNamespace
+
+        from services.processor.pipeline import VideoPipeline
+
+        pipeline = VideoPipeline(
+            video_dir=str(tmp_path / "v"), audio_dir=str(tmp_path / "a"), transcript_dir=str(tmp_path / "t"),
+            notify=False,
+        )
+        user_models = {1: "asr-a", 2: "asr-b"}
+        monkeypatch.setattr(
+            pipeline, "_resolve_api_model",
+            lambda task, user_id: SimpleNamespace(provider="openai", model=f"{user_models[user_id]}:{task}", base_url="u"),
+        )
+
+        first, second = pipeline._resolve_models(1), pipeline._resolve_models(2)
+        assert first["transcribe"]["model"] == "asr-a:asr" and second["analyze"]["model"] == "asr-b:summary"
+        for stage in ("transcribe", "analyze"):
+            assert checkpoints.stage_params_version(stage, first) != checkpoints.stage_params_version(stage, second)
+        assert pipeline._resolve_models(None)["transcribe"]["asr"] == "local"
+
+    def test_from_stage_override(self, db_session, video, artifacts):
+        _complete_through(db_session, video, artifacts, "index")
+
+        assert plan_resume(db_session, video, from_stage="transcribe") == "transcribe"
+        assert set(load_checkpoints(db_session, video.id)) == {"download"}
+
+    def test_from_stage_cannot_skip_invalid_stage(self, db_session, video):
+        assert plan_resume(db_session, video, from_stage="index") == "download"
+
+    def test_unknown_stage_rejected(self, db_session, video):
+        with pytest.raises(ValueError):
+            plan_resume(db_session, video, from_stage="upload")
+
+
+class TestRestoreContext:
+    """测试上下文恢复"""
+
+    def test_restores_audio_before_transcribe(self, db_session, video, artifacts, tmp_path):
+        subtitle = tmp_path / "BV1ckpt.subtitle.txt"
+        subtitle.write_text("字幕", encoding="utf-8")
+        record_checkpoint(
+            db_session, video.id, "download",
+            artifact_path=artifacts[0], extra={"subtitle_path": str(subtitle)},
+        )
+
+        ctx = PipelineContext(video_id=video.id)
+        restore_context(db_session, ctx, "transcribe")
+
+        assert ctx.audio_path == artifacts[0]
+        assert ctx.ai_subtitle == "字幕"
+        assert ctx.result is None
+
+    def test_restores_transcript(self, db_session, video, artifacts):
+        _complete_through(db_session, video, artifacts, "transcribe")
+
+        ctx = PipelineContext(video_id=video.id)
+        restore_context(db_session, ctx, "analyze")
+
+        assert ctx.result.text == "hello world"
+        assert ctx.result.segments[0].end == 12.0
+        assert ctx.transcript_hash == load_checkpoints(db_session, video.id)["transcribe"].content_hash
+
+    def test_should_run_respects_start_stage(self):
+        ctx = PipelineContext(video_id=1, start_stage="index")
+        assert not ctx.should_run("analyze")
+        assert ctx.should_run("index")
+        assert ctx.should_run("finalize")
@@ -0,0 +1,112 @@
+"""
+分片转写清单与断点续转单元测试
+"""
+
+import io
+import struct
+
+import pytest
+
+from services.asr import APIASRProvider, ChunkTranscriptionError, TranscriptResult, TranscriptSegment
+from services.asr.manifest import manifest_path, read_chunk_progress
+from services.asr.profiles import get_profile
+from services.asr.segmenter import AudioSegmenter
+from services.processor.status import StatusChannel
+
+RATE = 100
+
+
+@pytest.fixture
+def audio(tmp_path, monkeypatch):
+    """25 秒音频，切成 3 个片段（0 / 10 / 20 秒起）"""
+    pcm = struct.pack(f"<{25 * RATE}h", *(i % 30000 for i in range(25 * RATE)))
+
+    def segment(self, source, out_dir):
+        self.sample_rate, self.codec, self.profile = RATE, "wav", get_profile("wav")
+        return self.segment_pcm(io.BytesIO(pcm), out_dir)
+
+    monkeypatch.setattr(AudioSegmenter, "segment", segment)
+    path = tmp_path / "lecture.m4a"
+    path.write_bytes(b"audio")
+    return path
+
+
+def _provider(monkeypatch, fail, **kwargs):
+    """fail(片段名, 第几次调用) 返回 True 时该次上传失败"""
+    provider = APIASRProvider(base_url="http://asr.test/v1", api_key="k", chunk_seconds=10, **kwargs)
+    provider.retry_backoff = 0
+    monkeypatch.setattr(provider, "_get_audio_duration", lambda path: 25.0)
+    uploads = []
+
+    def transcribe_single(path, language=None, prompt=None):
+        name = path[-7:-4]
+        uploads.append(name)
+        if fail(name, uploads.count(name)):
+            raise RuntimeError("502 Bad Gateway")
+        return TranscriptResult(
+            text=name, segments=[TranscriptSegment(start=1.0, end=2.0, text=name)], language="zh", duration=12.0,
+        )
+
+    monkeypatch.setattr(provider, "_transcribe_single", transcribe_single)
+    return provider, uploads
+
+
+def test_retry_only_transcribes_missing_chunks(audio, monkeypatch):
+    provider, uploads = _provider(monkeypatch, lambda name, n: name == "001", chunk_retries=1)
+    with pytest.raises(ChunkTranscriptionError) as exc:
+        provider.transcribe(str(audio))
+
+    assert [c.index for c in exc.value.failed] == [1]
+    assert uploads.count("001") == 2  # 首次 + 1 次重试
+    assert read_chunk_progress(audio) == {"done": 2, "failed": 1, "total": 3}
+
+    provider, uploads = _provider(monkeypatch, lambda name, n: False)
+    details = []
+    result = provider.transcribe(str(audio), progress=lambda done, total, detail: details.append(detail))
+
+    assert uploads == ["001"]
+    assert [s.text for s in result.segments] == ["000", "001", "002"]
+    assert details[-1] == {"done": 3, "total": 3, "failed": 0, "resumed": 2}
+    assert not manifest_path(audio).exists()
+
+
+def test_manifest_discarded_when_source_changes(audio, monkeypatch):
+    provider, _ = _provider(monkeypatch, lambda name, n: name == "002", chunk_retries=0)
+    with pytest.raises(ChunkTranscriptionError):
+        provider.transcribe(str(audio))
+
+    audio.write_bytes(b"re-downloaded audio")
+    provider, uploads = _provider(monkeypatch, lambda name, n: False)
+    provider.transcribe(str(audio))
+    assert sorted(uploads) == ["000", "001", "002"]
+
+
+def test_partial_transcript_marks_gap(audio, monkeypatch):
+    provider, _ = _provider(
+        monkeypatch, lambda name, n: name == "001", chunk_retries=0, allow_partial=True, max_gap_ratio=0.5,
+    )
+    result = provider.transcribe(str(audio))
+
+    assert result.gaps == [(10.0, 22.0)]
+    assert [s.text for s in result.segments] == ["000", "[转写缺失 00:10-00:22]", "002"]
+    assert result.text == "000 [转写缺失 00:10-00:22] 002"
+    # 清单保留，重新处理时补齐缺失片段
+    assert read_chunk_progress(audio)["failed"] == 1
+
+
+def test_partial_rejected_when_gap_too_large(audio, monkeypatch):
+    provider, _ = _provider(
+        monkeypatch, lambda name, n: name != "000", chunk_retries=0, allow_partial=True, max_gap_ratio=0.1,
+    )
+    with pytest.raises(ChunkTranscriptionError):
+        provider.transcribe(str(audio))
+
+
+def test_status_channel_keeps_stage_detail_until_stage_changes():
+    channel = StatusChannel(flush_interval=60, session_factory=lambda: None)
+    channel.stage_progress(1, "transcribe", 0.5, detail={"done": 1, "total": 2})
+    assert channel.get(1).detail == {"done": 1, "total": 2}
+
+    channel.stage_progress(1, "analyze", 0.0)
+    assert channel.get(1).detail is None
+    channel.close()
@@ -0,0 +1,129 @@
+"""
+自适应并发控制单元测试
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from packages.concurrency import (
+    AdaptiveLimiter,
+    LimiterTimeout,
+    classify_error,
+    get_limiter,
+    limiter_snapshots,
+    parse_retry_after,
+    reset_limiters,
+)
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"status_code": status_code, "headers": headers or {}})()
+
+
+class TestAdaptiveLimiter:
+    """测试 AIMD 调整"""
+
+    def test_limit_bounds_concurrency(self):
+        limiter = AdaptiveLimiter("t", initial=2, max_limit=2)
+        assert limiter.acquire(timeout=0.1)
+        assert limiter.acquire(timeout=0.1)
+        assert not limiter.acquire(timeout=0.05)
+
+        threading.Timer(0.05, limiter.release).start()
+        assert limiter.acquire(timeout=1)
+        assert limiter.snapshot()["timeouts"] == 1
+
+    def test_additive_increase_only_when_saturated(self):
+        limiter = AdaptiveLimiter("t", initial=2, max_limit=8)
+        for _ in range(20):
+            limiter.on_success(0.1)
+        assert limiter.limit == 2
+
+        for _ in range(2):
+            assert limiter.acquire(timeout=0)
+        for _ in range(10):
+            limiter.on_success(0.1)
+        assert limiter.limit > 2
+
+    def test_overload_decreases_and_honours_retry_after(self):
+        limiter = AdaptiveLimiter("t", initial=10, decrease_factor=0.5)
+        with pytest.raises(_HTTPError):
+            with limiter.slot():
+                raise _HTTPError(429, {"Retry-After": "0.2"})
+
+        snap = limiter.snapshot()
+        assert snap["limit"] == 5
+        assert snap["overloaded"] == 1
+        assert snap["paused_seconds"] > 0
+
+        started = time.monotonic()
+        with limiter.slot():
+            pass
+        assert time.monotonic() - started >= 0.15
+
+    def test_latency_spike_decreases(self):
+        limiter = AdaptiveLimiter("t", initial=8, latency_tolerance=2.0)
+        for _ in range(20):
+            limiter.on_success(0.01)
+        limiter.on_success(1.0)
+        assert limiter.limit < 8
+
+    def test_ordinary_errors_do_not_adjust(self):
+        limiter = AdaptiveLimiter("t", initial=4)
+        with pytest.raises(ValueError):
+            with limiter.slot():
+                raise ValueError("bad input")
+        assert limiter.limit == 4
+        assert limiter.inflight == 0
+
+    def test_async_waiters_share_limit_with_threads(self):
+        limiter = AdaptiveLimiter("t", initial=1, max_limit=1)
+        assert limiter.acquire(timeout=0)
+        threading.Timer(0.05, limiter.release).start()
+
+        async def run():
+            async with limiter.slot_async(timeout=1):
+                return limiter.inflight
+
+        assert asyncio.run(run()) == 1
+        assert limiter.inflight == 0
+
+        assert limiter.acquire(timeout=0)
+
+        async def timeout():
+            async with limiter.slot_async(timeout=0.05):
+                pass
+
+        with pytest.raises(LimiterTimeout):
+            asyncio.run(timeout())
+        limiter.release()
+        assert limiter.snapshot()["waiting"] == 0
+
+
+def test_parse_retry_after_and_classify():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("garbage") is None
+
+    assert classify_error(_HTTPError(503, {"retry-after": "5"})) == (True, 5.0)
+    assert classify_error(_HTTPError(400)) == (False, None)
+    assert classify_error(TimeoutError()) == (True, None)
+
+
+def test_registry_shares_limiters_per_endpoint():
+    reset_limiters()
+    a = get_limiter("llm", "https://api.example.com/v1")
+    assert get_limiter("llm", "https://api.example.com/v2") is a
+    assert get_limiter("llm", "http://localhost:11434/v1") is not a
+    assert a.name == "llm:api.example.com"
+    assert a.max_limit == 16
+
+    names = [item["name"] for item in limiter_snapshots()]
+    assert names == ["llm:api.example.com", "llm:localhost:11434"]
+    reset_limiters()
@@ -0,0 +1,104 @@
+"""收藏夹增量扫描：翻页到游标即停止，定期完整扫描校对"""
+
+from datetime import datetime, timedelta
+
+import httpx
+
+from packages.db import Video, WatchedFolder
+from services.watcher.bilibili import BilibiliClient
+from services.watcher.scanner import FolderScanner
+
+
+class _Favlist:
+    """按收藏时间倒序分页的收藏夹接口替身"""
+
+    def __init__(self, count):
+        self.items = [self._media(i) for i in range(count, 0, -1)]
+        self.pages = []
+
+    @staticmethod
+    def _media(i):
+        return {
+            "bvid": f"BV{i:04d}", "title": f"v{i}", "upper": {"name": "up"}, "duration": 60,
+            "cnt_info": {"play": 0}, "ugc": {"first_cid": i}, "fav_time": 1_700_000_000 + i,
+        }
+
+    def favorite(self, count):
+        top = len(self.items) + count
+        self.items[:0] = [self._media(i) for i in range(top, len(self.items), -1)]
+
+    def handler(self, request: httpx.Request):
+        if request.url.path.endswith("/player/v2"):
+            return httpx.Response(200, json={"code": 0, "data": {"subtitle": {"subtitles": []}}})
+        page, size = int(request.url.params["pn"]), int(request.url.params["ps"])
+        self.pages.append(page)
+        medias = self.items[(page - 1) * size:page * size]
+        return httpx.Response(200, json={"code": 0, "data": {
+            "info": {"id": 42, "title": "f", "upper": {"name": "up", "mid": 1}, "media_count": len(self.items)},
+            "medias": medias,
+            "has_more": page * size < len(self.items),
+        }})
+
+
+def _scanner(tenant_id, favlist):
+    scanner = FolderScanner(tenant_id)
+    scanner.client = BilibiliClient(sessdata="x")
+    scanner.client.client = httpx.Client(transport=httpx.MockTransport(favlist.handler))
+    return scanner
+
+
+def _folder(db_session, tenant_id):
+    folder = WatchedFolder(tenant_id=tenant_id, folder_id="42", folder_type="favlist", name="f", platform="bilibili")
+    db_session.add(folder)
+    db_session.commit()
+    return folder
+
+
+def test_incremental_scan_stops_at_cursor(db_session, sample_tenant):
+    favlist = _Favlist(95)
+    folder = _folder(db_session, sample_tenant.id)
+    scanner = _scanner(sample_tenant.id, favlist)
+
+    assert len(scanner.scan_folder(folder, db_session)) == 95
+    assert favlist.pages == [1, 2, 3, 4, 5]
+    assert folder.scan_cursor.top_source_id == "BV0095"
+
+    favlist.pages.clear()
+    favlist.favorite(3)
+    new_videos = scanner.scan_folder(folder, db_session)
+    assert [v.source_id for v in new_videos] == ["BV0098", "BV0097", "BV0096"]
+    assert favlist.pages == [1]
+    assert folder.scan_cursor.top_source_id == "BV0098"
+
+    favlist.pages.clear()
+    assert scanner.scan_folder(folder, db_session) == []
+    assert favlist.pages == [1] and folder.scan_cursor.top_source_id == "BV0098"
+
+
+def test_unfavorited_cursor_item_still_stops_by_fav_time(db_session, sample_tenant):
+    favlist = _Favlist(50)
+    folder = _folder(db_session, sample_tenant.id)
+    scanner = _scanner(sample_tenant.id, favlist)
+    scanner.scan_folder(folder, db_session)
+
+    favlist.items[0] = favlist._media(60)     # 取消收藏上次最新的条目，同时收藏了新的
+    favlist.pages.clear()
+    assert [v.source_id for v in scanner.scan_folder(folder, db_session)] == ["BV0060"]
+    assert favlist.pages == [1]
+
+
+def test_full_reconcile_after_interval(db_session, sample_tenant):
+    favlist = _Favlist(45)
+    folder = _folder(db_session, sample_tenant.id)
+    scanner = _scanner(sample_tenant.id, favlist)
+    scanner.scan_folder(folder, db_session)
+
+    # 增量扫描看不到的旧条目（例如处理记录被删除），完整扫描时补上
+    db_session.query(Video).filter(Video.source_id == "BV0001").delete()
+    folder.scan_cursor.last_full_scan_at = datetime.utcnow() - timedelta(days=2)
+    db_session.commit()
+
+    favlist.pages.clear()
+    assert [v.source_id for v in scanner.scan_folder(folder, db_session)] == ["BV0001"]
+    assert favlist.pages == [1, 2, 3]
+    assert datetime.utcnow() - folder.scan_cursor.last_full_scan_at < timedelta(minutes=1)
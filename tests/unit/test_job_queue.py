@@ -0,0 +1,193 @@
+"""
+packages.queue 单元测试（SQLite / Redis 后端，Redis 用 fakeredis 模拟）
+"""
+
+import threading
+import time
+
+import pytest
+
+from packages.queue import JobState, SQLiteJobBackend
+
+
+@pytest.fixture
+def backend(job_backend):
+    return job_backend
+
+
+class TestJobBackend:
+    """测试任务队列后端（两种后端跑同一组用例）"""
+
+    def test_enqueue_and_claim(self, backend):
+        """入队后可被认领，认领授予租约"""
+        job = backend.enqueue("video", {"video_id": 1}, key="video:1")
+        assert job.state == JobState.QUEUED
+
+        claimed = backend.claim("video", "w1", lease_seconds=30)
+        assert [j.id for j in claimed] == [job.id]
+        assert claimed[0].state == JobState.RUNNING
+        assert claimed[0].lease_owner == "w1"
+        assert claimed[0].attempts == 1
+        assert backend.claim("video", "w2", lease_seconds=30) == []
+
+    def test_duplicate_key_rejected_while_active(self, backend):
+        """同一去重键在活跃期间只允许一个任务"""
+        first = backend.enqueue("video", {"video_id": 1}, key="video:1")
+        assert backend.enqueue("video", {"video_id": 1}, key="video:1") is None
+
+        backend.claim("video", "w1", lease_seconds=30)
+        backend.complete(first.id, "w1")
+        assert backend.enqueue("video", {"video_id": 1}, key="video:1") is not None
+
+    def test_concurrent_claims_are_exclusive(self, make_job_backend):
+        """多连接并发认领不会重复拿到同一任务"""
+        setup = make_job_backend()
+        for i in range(50):
+            setup.enqueue("video", {"video_id": i})
+
+        claimed = []
+        lock = threading.Lock()
+
+        backends = [make_job_backend() for _ in range(4)]
+
+        def worker(name, b):
+            while True:
+                jobs = b.claim("video", name, lease_seconds=30, limit=3)
+                if not jobs:
+                    break
+                with lock:
+                    claimed.extend(j.id for j in jobs)
+
+        threads = [threading.Thread(target=worker, args=(f"w{i}", b)) for i, b in enumerate(backends)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(claimed) == 50
+        assert len(set(claimed)) == 50
+
+    def test_heartbeat_requires_lease_owner(self, backend):
+        """只有租约持有者可以续约和完成"""
+        job = backend.enqueue("video", {})
+        backend.claim("video", "w1", lease_seconds=30)
+
+        assert backend.heartbeat(job.id, "w1", lease_seconds=60)
+        assert not backend.heartbeat(job.id, "w2", lease_seconds=60)
+        assert not backend.complete(job.id, "w2")
+        assert backend.complete(job.id, "w1")
+        assert backend.get(job.id).state == JobState.COMPLETED
+
+    def test_fail_retries_until_max_attempts(self, backend):
+        """失败后重新入队，达到上限后标记失败"""
+        job = backend.enqueue("video", {}, max_attempts=2)
+
+        backend.claim("video", "w1", lease_seconds=30)
+        backend.fail(job.id, "w1", "boom", retry_delay=0.2)
+        retried = backend.get(job.id)
+        assert retried.state == JobState.QUEUED
+        assert retried.error == "boom"
+        # 退避期内不可见
+        assert backend.claim("video", "w1", lease_seconds=30) == []
+
+        time.sleep(0.25)
+        assert backend.claim("video", "w1", lease_seconds=30)[0].id == job.id
+        backend.fail(job.id, "w1", "boom again")
+        assert backend.get(job.id).state == JobState.FAILED
+
+    def test_reaper_requeues_expired_leases(self, backend):
+        """租约过期的任务被回收并可被其他执行者认领"""
+        job = backend.enqueue("video", {})
+        backend.claim("video", "dead-worker", lease_seconds=0.01)
+        time.sleep(0.02)
+
+        assert backend.reap_expired() == 1
+        assert backend.get(job.id).state == JobState.QUEUED
+
+        claimed = backend.claim("video", "w2", lease_seconds=30)
+        assert claimed[0].id == job.id
+        assert claimed[0].attempts == 2
+        # 原执行者租约已失效
+        assert not backend.complete(job.id, "dead-worker")
+
+    def test_cancel(self, backend):
+        """排队任务可取消；运行中任务仅持有者可取消"""
+        queued = backend.enqueue("video", {}, key="a")
+        assert backend.cancel(queued.id)
+        assert backend.get(queued.id).state == JobState.CANCELLED
+
+        running = backend.enqueue("video", {}, key="b")
+        backend.claim("video", "w1", lease_seconds=30)
+        assert not backend.cancel(running.id)
+        assert backend.cancel(running.id, worker_id="w1")
+
+    def test_purge_finished_retention(self, backend):
+        """按时间与数量清理已结束任务，不影响活跃任务"""
+        for i in range(5):
+            job = backend.enqueue("video", {"i": i})
+            backend.claim("video", "w1", lease_seconds=30)
+            backend.complete(job.id, "w1")
+        active = backend.enqueue("video", {"active": True})
+
+        assert backend.purge_finished(older_than=0, max_finished=2) == 3
+        counts = backend.stats("video")
+        assert counts["completed"] == 2
+        assert counts["queued"] == 1
+
+        assert backend.purge_finished(older_than=time.time() + 1) == 2
+        assert backend.get(active.id) is not None
+
+    def test_stats_track_state_transitions(self, backend):
+        """各队列各状态计数随认领、重试、完成、取消、回收、清理变化"""
+        jobs = [backend.enqueue("video", {"i": i}, group=f"t{i % 2}") for i in range(4)]
+        backend.enqueue("subtitle", {})
+
+        backend.claim("video", "w1", lease_seconds=30, limit=3)
+        backend.complete(jobs[0].id, "w1")
+        backend.fail(jobs[1].id, "w1", "boom", retry_delay=60)
+        backend.cancel(jobs[3].id)
+        assert backend.group_usage("video", 0)[1] == {"t0": 1}
+
+        assert backend.stats("video") == {
+            "queued": 1, "running": 1, "completed": 1, "failed": 0, "cancelled": 1,
+        }
+        assert backend.stats("subtitle")["queued"] == 1
+        assert backend.stats()["queued"] == 2
+
+        assert backend.reap_expired(now=time.time() + 60) == 1
+        assert backend.stats("video")["running"] == 0
+        assert backend.stats("video")["queued"] == 2
+
+        backend.purge_finished(older_than=time.time() + 1)
+        assert backend.stats("video")["completed"] == 0
+        assert backend.stats("video")["cancelled"] == 0
+
+    def test_state_survives_reopen(self, make_job_backend):
+        """重新打开后任务仍在（模拟重启）"""
+        b1 = make_job_backend()
+        job = b1.enqueue("video", {"video_id": 7}, key="video:7")
+        b1.close()
+
+        b2 = make_job_backend()
+        assert b2.get_active_by_key("video:7").id == job.id
+        assert b2.claim("video", "w1", lease_seconds=30)[0].payload == {"video_id": 7}
+
+
+class TestSQLiteReads:
+    """SQLite 只读查询不取写锁"""
+
+    def test_reads_do_not_wait_for_writer(self, tmp_path):
+        backend = SQLiteJobBackend(str(tmp_path / "jobs.db"))
+        job = backend.enqueue("video", {}, key="k")
+        try:
+            with backend._tx():
+                result = {}
+                reader = threading.Thread(target=lambda: result.update(
+                    job=backend.get(job.id), stats=backend.stats("video"),
+                ))
+                reader.start()
+                reader.join(timeout=2)
+                assert not reader.is_alive()
+            assert result["job"].id == job.id and result["stats"]["queued"] == 1
+        finally:
+            backend.close()
@@ -0,0 +1,99 @@
+"""媒体探测缓存与分级完整性检查"""
+
+import json
+import os
+import subprocess
+
+import pytest
+
+from services.asr import probe
+from services.processor.audio import AudioProcessor
+
+FFPROBE_OUTPUT = {
+    "format": {"duration": "120.5", "format_name": "mov,mp4,m4a"},
+    "streams": [{"codec_type": "video", "codec_name": "h264"}, {"codec_type": "audio", "codec_name": "aac"}],
+}
+
+
+@pytest.fixture
+def commands(monkeypatch):
+    """记录外部命令；ffprobe 返回固定结果，ffmpeg 成功且无错误输出"""
+    calls = []
+
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        if cmd[0] == "ffprobe":
+            return subprocess.CompletedProcess(cmd, 0, stdout=json.dumps(FFPROBE_OUTPUT), stderr="")
+        return subprocess.CompletedProcess(cmd, 0, stdout="", stderr="")
+
+    monkeypatch.setattr(subprocess, "run", run)
+    probe.clear_probe_cache()
+    yield calls
+    probe.clear_probe_cache()
+
+
+def test_probe_cached_until_file_changes(tmp_path, commands):
+    media = tmp_path / "a.mp4"
+    media.write_bytes(b"x" * 10)
+
+    info = probe.probe_media(media)
+    assert info.duration == 120.5 and info.has_audio and info.has_video
+    assert probe.media_duration(str(media)) == 120.5
+    assert AudioProcessor(str(tmp_path / "out")).get_audio_duration(media) == 120.5
+    assert len(commands) == 1
+
+    media.write_bytes(b"x" * 20)
+    os.utime(media, ns=(1, 1))
+    probe.probe_media(media)
+    assert len(commands) == 2
+
+
+def test_probe_failure(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        subprocess, "run", lambda cmd, **kw: subprocess.CompletedProcess(cmd, 1, stdout="", stderr="moov atom not found")
+    )
+    media = tmp_path / "broken.mp4"
+    media.write_bytes(b"x")
+    with pytest.raises(probe.ProbeError, match="moov"):
+        probe.probe_media(media)
+    assert probe.media_duration(media) == 0.0
+    assert probe.media_duration(tmp_path / "missing.mp4") == 0.0
+
+
+def test_default_integrity_check_samples_tail(tmp_path, commands):
+    media = tmp_path / "v.mp4"
+    media.write_bytes(b"x")
+    processor = AudioProcessor(str(tmp_path / "out"), integrity_check="probe", tail_seconds=5)
+
+    assert processor.check_video_integrity(media)
+    decode = [cmd for cmd in commands if cmd[0] == "ffmpeg"]
+    assert len(decode) == 1
+    assert decode[0][decode[0].index("-ss") + 1] == "115.500"
+    assert "-t" in decode[0]
+
+    commands.clear()
+    assert processor.check_video_integrity(media, mode="full")
+    assert "-ss" not in commands[0] and commands[0][0] == "ffmpeg"
+
+
+def test_extraction_failure_triggers_full_decode(tmp_path, monkeypatch):
+    calls = []
+
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        if cmd[0] == "ffprobe":
+            return subprocess.CompletedProcess(cmd, 0, stdout=json.dumps(FFPROBE_OUTPUT), stderr="")
+        if "-f" in cmd:          # 完整性检查
+            return subprocess.CompletedProcess(cmd, 0, stdout="", stderr="")
+        return subprocess.CompletedProcess(cmd, 1, stdout="", stderr="decode error")
+
+    monkeypatch.setattr(subprocess, "run", run)
+    probe.clear_probe_cache()
+    media = tmp_path / "v.mp4"
+    media.write_bytes(b"x")
+
+    with pytest.raises(Exception, match="音频提取失败"):
+        AudioProcessor(str(tmp_path / "out"), integrity_check="probe").extract_audio(media, profile="wav")
+
+    checks = [cmd for cmd in calls if cmd[0] == "ffmpeg" and "-f" in cmd]
+    assert ["-ss" in cmd for cmd in checks] == [True, False]   # 先尾部采样，提取失败后完整解码
@@ -0,0 +1,113 @@
+"""播客下载：流式写入 .part、Range 续传与 ETag 校验"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from services.downloader import podcast_downloader
+from services.downloader.podcast_downloader import PodcastDownloader
+
+URL = "https://cdn.example.com/ep1.mp3"
+BODY = bytes(range(256)) * 40
+
+
+class _Server:
+    """支持 Range / If-Range 的假 CDN，可在指定字节处断开连接"""
+
+    def __init__(self, body=BODY, etag='"v1"'):
+        self.body = body
+        self.etag = etag
+        self.cut_at = None
+        self.requests = []
+
+    def handler(self, request: httpx.Request):
+        self.requests.append(request)
+        headers = {"content-type": "audio/mpeg", "etag": self.etag}
+        start = 0
+        range_header = request.headers.get("range")
+        if range_header and request.headers.get("if-range") == self.etag:
+            start = int(range_header[len("bytes="):].rstrip("-"))
+            if start >= len(self.body):
+                return httpx.Response(416, headers=headers)
+            headers["content-range"] = f"bytes {start}-{len(self.body) - 1}/{len(self.body)}"
+        payload = self.body[start:]
+        headers["content-length"] = str(len(payload))
+        stream = _Stream(payload, self.cut_at - start if self.cut_at else None)
+        return httpx.Response(206 if start else 200, headers=headers, stream=stream)
+
+
+class _Stream(httpx.AsyncByteStream):
+    def __init__(self, payload, cut_at):
+        self.payload = payload
+        self.cut_at = cut_at
+
+    async def __aiter__(self):
+        end = len(self.payload) if self.cut_at is None else self.cut_at
+        for i in range(0, end, 1000):
+            yield self.payload[i:min(i + 1000, end)]
+        if self.cut_at is not None:
+            raise httpx.ReadError("connection reset")
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = _Server()
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        podcast_downloader.httpx, "AsyncClient",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(server.handler)),
+    )
+    return server
+
+
+def _download(tmp_path, progress=None):
+    return asyncio.run(PodcastDownloader(str(tmp_path), segments=1).download(URL, progress=progress))
+
+
+def test_streams_to_part_and_reports_progress(tmp_path, server):
+    events = []
+    result = _download(tmp_path, progress=lambda done, total: events.append((done, total)))
+
+    assert result.success
+    assert result.file_path.suffix == ".mp3" and result.file_path.read_bytes() == BODY
+    assert events[-1] == (len(BODY), len(BODY))
+    assert not list(tmp_path.glob("*.part*"))
+
+
+def test_interrupted_download_resumes_with_range(tmp_path, server):
+    server.cut_at = 4000
+    assert not _download(tmp_path).success
+    part = next(tmp_path.glob("*.part"))
+    assert part.stat().st_size == 4000
+    assert json.loads(part.with_name(part.name + ".json").read_text())["etag"] == '"v1"'
+
+    server.cut_at = None
+    result = _download(tmp_path)
+    assert result.success and result.file_path.read_bytes() == BODY
+    assert server.requests[-1].headers["range"] == "bytes=4000-"
+    assert server.requests[-1].headers["if-range"] == '"v1"'
+
+
+def test_changed_etag_restarts_from_zero(tmp_path, server):
+    server.cut_at = 4000
+    _download(tmp_path)
+
+    server.cut_at = None
+    server.etag = '"v2"'
+    server.body = b"new episode" * 100
+    result = _download(tmp_path)
+
+    assert server.requests[-1].headers["range"] == "bytes=4000-"   # If-Range 不匹配，服务端返回完整文件
+    assert result.success and result.file_path.read_bytes() == server.body
+
+
+def test_complete_part_is_finished_without_download(tmp_path, server):
+    server.cut_at = len(BODY)          # 数据写完但连接在结束前断开，.part 已完整
+    assert not _download(tmp_path).success
+    server.cut_at = None
+
+    result = _download(tmp_path)
+    assert result.success and result.file_path.read_bytes() == BODY
+    assert [r.headers.get("range") for r in server.requests] == [None, f"bytes={len(BODY)}-"]
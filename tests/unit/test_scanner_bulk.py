@@ -0,0 +1,64 @@
+"""扫描器批量写入：IN 查询已存在条目、多行 INSERT 忽略冲突、每次扫描一次提交"""
+
+from sqlalchemy import event
+
+from packages.db import Video, WatchedFolder
+from services.watcher.bilibili import FolderInfo, VideoInfo
+from services.watcher.scanner import FolderScanner, _insert_ignoring_duplicates
+
+
+class _FakeClient:
+    def __init__(self, source_ids):
+        self.source_ids = source_ids
+
+    def fetch_favlist(self, folder_id, until=None):
+        videos = [VideoInfo(title=bvid, author="up", duration=60, source_id=bvid) for bvid in self.source_ids]
+        return FolderInfo(id=folder_id, title="f", owner="up", owner_mid="1", media_count=len(videos)), videos
+
+    def fetch_subtitle_track(self, bvid, cid=None):
+        return None
+
+
+def _statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+    return statements
+
+
+def test_large_folder_scanned_with_set_based_queries(db_session, sample_tenant):
+    folder = WatchedFolder(tenant_id=sample_tenant.id, folder_id="42", folder_type="favlist", name="f", platform="bilibili")
+    orphan = Video(tenant_id=sample_tenant.id, source_type="bilibili", source_id="BV00005", title="t", author="up")
+    db_session.add_all([folder, orphan])
+    db_session.commit()
+
+    source_ids = [f"BV{i:05d}" for i in range(1200)]
+    scanner = FolderScanner(sample_tenant.id)
+    scanner.client = _FakeClient(source_ids + ["BV00007"])      # 翻页期间列表变动导致的重复条目
+    statements = _statements(db_session.get_bind())
+
+    new_videos = scanner.scan_folder(folder, db_session)
+
+    selects = [sql for sql in statements if sql.lstrip().upper().startswith("SELECT") and "videos" in sql]
+    inserts = [sql for sql in statements if sql.lstrip().upper().startswith("INSERT INTO VIDEOS")]
+    assert len(selects) == 3               # 1200 条分 3 批 IN 查询
+    assert 1 <= len(inserts) <= 2          # 多行 INSERT（按方言的绑定参数上限分批）
+
+    assert [v.source_id for v in new_videos] == [s for s in source_ids if s != "BV00005"]
+    assert all(v.id for v in new_videos)
+    db_session.refresh(orphan)
+    assert orphan.watched_folder_id == folder.id
+
+
+def test_conflicting_rows_are_ignored(db_session, sample_tenant):
+    # 另一个扫描在本次存在检查之后插入了同一视频
+    db_session.add(Video(tenant_id=sample_tenant.id, source_type="bilibili", source_id="BVa", title="t", author="up"))
+    db_session.commit()
+
+    rows = [
+        {"tenant_id": sample_tenant.id, "source_type": "bilibili", "source_id": bvid, "title": bvid, "author": "up"}
+        for bvid in ("BVa", "BVb")
+    ]
+    inserted = db_session.scalars(_insert_ignoring_duplicates(db_session).returning(Video), rows).all()
+
+    assert [v.source_id for v in inserted] == ["BVb"]
+    assert db_session.query(Video).filter(Video.source_id == "BVa").count() == 1
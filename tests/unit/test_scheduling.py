@@ -0,0 +1,226 @@
+"""
+优先级 + 租户公平调度单元测试
+"""
+
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from packages.db.models import Tenant, TenantPlan, Video, VideoStatus
+from packages.queue import FairSharePolicy, GroupLimits, Job, Priority
+
+
+def _job(job_id, priority=Priority.SCHEDULED, group=None, age=0.0, now=1_000_000.0):
+    return Job(
+        id=job_id,
+        queue="video",
+        payload={"video_id": job_id},
+        priority=priority,
+        group=group,
+        available_at=now - age,
+        created_at=now - age,
+    )
+
+
+@pytest.fixture
+def backend(job_backend):
+    return job_backend
+
+
+class TestFairSharePolicy:
+    """测试调度策略"""
+
+    NOW = 1_000_000.0
+
+    def test_priority_beats_age(self):
+        policy = FairSharePolicy(aging_seconds=0)
+        jobs = [
+            _job(1, Priority.BACKFILL, age=500),
+            _job(2, Priority.SCHEDULED, age=100),
+            _job(3, Priority.INTERACTIVE),
+        ]
+        assert [j.id for j in policy.select(jobs, {}, {}, self.NOW)] == [3, 2, 1]
+
+    def test_aging_promotes_waiting_jobs(self):
+        policy = FairSharePolicy(aging_seconds=60)
+        old_backfill = _job(1, Priority.BACKFILL, age=150)
+        assert policy.effective_priority(old_backfill, self.NOW) == Priority.INTERACTIVE
+
+        jobs = [old_backfill, _job(2, Priority.SCHEDULED)]
+        assert [j.id for j in policy.select(jobs, {}, {}, self.NOW, limit=1)] == [1]
+
+    def test_tenants_interleave_instead_of_fifo(self):
+        policy = FairSharePolicy(aging_seconds=0)
+        bulk = [_job(i, group="1", age=100 - i) for i in range(1, 6)]
+        other = [_job(10, group="2"), _job(11, group="2")]
+
+        order = [j.group for j in policy.select(bulk + other, {}, {}, self.NOW)]
+        assert order[:4] == ["1", "2", "1", "2"]
+
+    def test_weights_and_usage(self):
+        limits = {"1": GroupLimits(weight=1), "2": GroupLimits(weight=4)}
+        policy = FairSharePolicy(aging_seconds=0, limits=lambda g: limits[g])
+        jobs = [_job(i, group="1", age=100) for i in range(1, 11)]
+        jobs += [_job(i, group="2") for i in range(11, 21)]
+
+        picked = policy.select(jobs, {"1": 0, "2": 0}, {}, self.NOW, limit=10)
+        assert sum(j.group == "2" for j in picked) == 8
+
+        # 已占用较多服务量的租户让位
+        picked = policy.select(jobs, {"2": 100}, {}, self.NOW, limit=3)
+        assert [j.group for j in picked] == ["1", "1", "1"]
+
+    def test_max_running_and_held(self):
+        limits = {
+            "1": GroupLimits(max_running=1),
+            "2": GroupLimits(held=True),
+            "3": GroupLimits(),
+        }
+        policy = FairSharePolicy(aging_seconds=0, limits=lambda g: limits[g])
+        jobs = [_job(1, group="1"), _job(2, group="1"), _job(3, group="2"), _job(4, group="3")]
+
+        picked = policy.select(jobs, {}, {"1": 0}, self.NOW)
+        assert [j.id for j in picked] == [1, 4]
+        assert [j.id for j in policy.select(jobs, {}, {"1": 1}, self.NOW)] == [4]
+        # 估算位置时忽略同时运行上限，held 仍然排除
+        assert 3 not in [j.id for j in policy.select(jobs, {}, {"1": 1}, self.NOW, enforce_limits=False)]
+
+
+class TestSQLiteScheduling:
+    """测试 SQLite 后端按策略认领"""
+
+    def test_interactive_jumps_queue(self, backend):
+        for i in range(20):
+            backend.enqueue("video", {"video_id": i}, priority=Priority.SCHEDULED, group="1")
+        urgent = backend.enqueue("video", {"video_id": 99}, priority=Priority.INTERACTIVE, group="2")
+
+        claimed = backend.claim("video", "w1", lease_seconds=30, limit=1)
+        assert [j.id for j in claimed] == [urgent.id]
+        assert claimed[0].claimed_at is not None
+
+    def test_recent_usage_shares_single_slot(self, backend):
+        """只有一个并发槽时，按最近用量轮流服务各租户"""
+        for i in range(4):
+            backend.enqueue("video", {"n": i}, group="bulk")
+        backend.enqueue("video", {"n": 99}, group="small")
+
+        first = backend.claim("video", "w1", lease_seconds=30)[0]
+        backend.complete(first.id, "w1")
+        second = backend.claim("video", "w1", lease_seconds=30)[0]
+
+        assert first.group == "bulk"
+        assert second.group == "small"
+
+        usage, running = backend.group_usage("video", since=time.time() - 60)
+        assert usage == {"bulk": 1, "small": 1}
+        assert running == {"small": 1}
+
+    def test_list_queued(self, backend):
+        backend.enqueue("video", {}, group="1")
+        backend.enqueue("video", {}, group="2", delay=60)
+        backend.claim("video", "w1", lease_seconds=30)
+
+        queued = backend.list_queued("video")
+        assert [j.group for j in queued] == ["2"]
+
+
+class TestTenantPolicy:
+    """测试按租户计划与配额的策略"""
+
+    @pytest.fixture
+    def policy(self, db_session, monkeypatch):
+        from packages.config import get_config
+        from services.processor import scheduling
+
+        @contextmanager
+        def fake_db_context():
+            yield db_session
+
+        monkeypatch.setattr(scheduling, "get_db_context", fake_db_context)
+        return scheduling.TenantSchedulingPolicy(get_config().queue)
+
+    def test_plan_weight_and_quota(self, db_session, policy):
+        pro = Tenant(name="Pro", slug="pro", plan=TenantPlan.PRO)
+        full = Tenant(name="Full", slug="full", max_videos=1)
+        db_session.add_all([pro, full])
+        db_session.commit()
+        db_session.add(Video(
+            tenant_id=full.id, source_type="bilibili", source_id="BV1done",
+            title="t", author="a", status=VideoStatus.DONE.value,
+        ))
+        db_session.commit()
+
+        assert policy.limits(str(pro.id)).weight == 2
+        assert not policy.limits(str(pro.id)).held
+        assert policy.limits(str(full.id)).held
+        assert policy.held_tenants() == {full.id}
+
+
+def test_claim_pending_round_robin_across_tenants(db_session, sample_tenant):
+    from services.processor.pipeline import claim_pending_videos
+
+    other = Tenant(name="Other", slug="other")
+    db_session.add(other)
+    db_session.commit()
+    for i in range(5):
+        db_session.add(Video(
+            tenant_id=sample_tenant.id, source_type="bilibili", source_id=f"BV1bulk{i}",
+            title="t", author="a",
+        ))
+    db_session.add(Video(
+        tenant_id=other.id, source_type="bilibili", source_id="BV1other", title="t", author="a",
+    ))
+    db_session.commit()
+
+    claimed = claim_pending_videos(db_session, limit=2)
+    tenants = {db_session.get(Video, vid).tenant_id for vid in claimed}
+    assert tenants == {sample_tenant.id, other.id}
+
+    claimed = claim_pending_videos(db_session, limit=10, exclude_tenants=[sample_tenant.id])
+    assert claimed == []
+
+
+def test_enqueue_pending_releases_videos_not_enqueued(backend, db_session, sample_tenant, monkeypatch):
+    """去重键已被占用、没能入队的视频撤销认领，回到 PENDING"""
+    import packages.db
+    from services.processor.queue import VIDEO_QUEUE, VideoProcessingQueue, _video_key
+
+    @contextmanager
+    def fake_db_context():
+        yield db_session
+
+    monkeypatch.setattr(packages.db, "get_db_context", fake_db_context)
+    monkeypatch.setattr(VideoProcessingQueue, "_instance", None)
+    videos = [
+        Video(tenant_id=sample_tenant.id, source_type="bilibili", source_id=f"BV1pend{i}", title="t", author="a")
+        for i in range(2)
+    ]
+    db_session.add_all(videos)
+    db_session.commit()
+    backend.enqueue(VIDEO_QUEUE, {"video_id": videos[0].id}, key=_video_key(videos[0].id))
+    queue = VideoProcessingQueue(backend=backend, policy=FairSharePolicy())
+
+    assert queue._enqueue_pending(10) == 1
+
+    db_session.expire_all()
+    assert db_session.get(Video, videos[0].id).status == VideoStatus.PENDING.value
+    assert db_session.get(Video, videos[1].id).status == VideoStatus.DOWNLOADING.value
+    assert backend.get_active_by_key(_video_key(videos[1].id)) is not None
+
+
+def test_queue_positions_scoped_to_tenant(backend, monkeypatch):
+    from services.processor import metrics
+    from services.processor.queue import VideoProcessingQueue
+
+    monkeypatch.setattr(VideoProcessingQueue, "_instance", None)
+    monkeypatch.setattr(metrics, "mean_video_seconds", lambda db: None)
+    for video_id, group in ((1, "1"), (2, "2"), (3, "1")):
+        backend.enqueue("video", {"video_id": video_id}, group=group)
+    queue = VideoProcessingQueue(backend=backend, policy=FairSharePolicy())
+
+    mine = queue.get_queue_positions(tenant_id=1)
+    assert [p["video_id"] for p in mine] == [1, 3]
+    assert {p["tenant_id"] for p in mine} == {1}
+    assert [p["position"] for p in mine] == [1, 3]      # 全局队列中的位置
+    assert len(queue.get_queue_positions()) == 3
@@ -0,0 +1,182 @@
+"""分段并发下载：本地支持 Range 的 HTTP 替身"""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from packages.config import get_config
+from services.downloader import HTTPDownloader
+from services.downloader.segmented import split_ranges
+
+BODY = bytes(range(256)) * 4096          # 1 MiB
+
+
+class _RangeServer(ThreadingHTTPServer):
+    """
+    本地媒体服务器
+
+    Args:
+        ranges: 是否支持 Range（False 时忽略 Range 头，总是返回 200 全量）
+        drop_once: 第一次请求到这些起始偏移的分段时，只发一半数据就断开连接
+    """
+
+    daemon_threads = True
+
+    def __init__(self, ranges=True, drop_once=()):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.ranges = ranges
+        self.drop_once = set(drop_once)
+        self.etag = '"v1"'
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/episode.mp3"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        range_header = self.headers.get("Range")
+        with server.lock:
+            server.requests.append(range_header)
+
+        if not (server.ranges and range_header):
+            self._send(200, BODY)
+            return
+
+        start, _, end = range_header[len("bytes="):].partition("-")
+        start, end = int(start), min(int(end or len(BODY) - 1), len(BODY) - 1)
+        payload = BODY[start:end + 1]
+        with server.lock:
+            drop = start in server.drop_once
+            server.drop_once.discard(start)
+        self._send(206, payload, {"Content-Range": f"bytes {start}-{end}/{len(BODY)}"},
+                   truncate=len(payload) // 2 if drop else None)
+
+    def _send(self, status, payload, headers=None, truncate=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("ETag", self.server.etag)
+        if self.server.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload if truncate is None else payload[:truncate])
+        if truncate is not None:
+            self.close_connection = True
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    for var in ("HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "http_proxy", "https_proxy", "all_proxy"):
+        monkeypatch.delenv(var, raising=False)
+    servers = []
+
+    def start(**kwargs):
+        server = _RangeServer(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _download(tmp_path, url, **kwargs):
+    downloader = HTTPDownloader(str(tmp_path), min_segment_size=128 * 1024, **kwargs)
+    return asyncio.run(downloader.download(url))
+
+
+def test_split_ranges_cover_file():
+    assert split_ranges(10, 3) == [(0, 3), (4, 7), (8, 9)]
+    assert split_ranges(1, 4) == [(0, 0)]
+
+
+def test_segments_fetched_concurrently_and_reassembled(tmp_path, serve):
+    server = serve()
+    result = _download(tmp_path, server.url, segments=4)
+
+    assert result.success and result.file_path.suffix == ".mp3"
+    assert result.file_path.read_bytes() == BODY
+    segment_requests = sorted(r for r in server.requests if r != "bytes=0-0")
+    assert segment_requests == sorted(f"bytes={s}-{e}" for s, e in split_ranges(len(BODY), 4))
+    assert not list(tmp_path.glob("*.seg")) and not list(tmp_path.glob("*.part*"))
+
+
+def test_dropped_segment_is_retried_from_where_it_stopped(tmp_path, serve):
+    second = split_ranges(len(BODY), 4)[1]
+    server = serve(drop_once={second[0]})
+    result = _download(tmp_path, server.url, segments=4)
+
+    assert result.success and result.file_path.read_bytes() == BODY
+    retried = [r for r in server.requests if r and r.endswith(f"-{second[1]}") and r != f"bytes={second[0]}-{second[1]}"]
+    assert len(retried) == 1
+    resumed_at = int(retried[0][len("bytes="):].split("-")[0])
+    assert second[0] < resumed_at <= second[1]
+
+
+def _requested_bytes(requests):
+    spans = [r[len("bytes="):].split("-") for r in requests if r and r != "bytes=0-0"]
+    return sum(int(end) - int(start) + 1 for start, end in spans)
+
+
+def test_interrupted_download_resumes_missing_ranges(tmp_path, serve, monkeypatch):
+    """某段重试耗尽时保留 .seg 与已完成区间，下次只请求缺失的部分"""
+    monkeypatch.setattr(get_config().download, "segment_retries", 0)
+    second = split_ranges(len(BODY), 4)[1]
+    server = serve(drop_once={second[0]})
+
+    first = _download(tmp_path, server.url, segments=4)
+    assert not first.success
+    assert len(list(tmp_path.glob("*.seg"))) == 1 and len(list(tmp_path.glob("*.seg.json"))) == 1
+
+    server.requests.clear()
+    result = _download(tmp_path, server.url, segments=4)
+
+    assert result.success and result.file_path.read_bytes() == BODY
+    assert f"bytes={second[0]}-{second[1]}" not in server.requests
+    assert _requested_bytes(server.requests) <= len(BODY) - (second[1] - second[0] + 1) // 2
+    assert not list(tmp_path.glob("*.seg*"))
+
+
+def test_changed_file_is_not_resumed(tmp_path, serve, monkeypatch):
+    """服务端文件已变化（ETag 不同）时丢弃已下载的分段，完整重新下载"""
+    monkeypatch.setattr(get_config().download, "segment_retries", 0)
+    second = split_ranges(len(BODY), 4)[1]
+    server = serve(drop_once={second[0]})
+    assert not _download(tmp_path, server.url, segments=4).success
+
+    server.etag = '"v2"'
+    server.requests.clear()
+    result = _download(tmp_path, server.url, segments=4)
+
+    assert result.success and result.file_path.read_bytes() == BODY
+    assert _requested_bytes(server.requests) == len(BODY)
+
+
+def test_falls_back_to_single_stream_without_range_support(tmp_path, serve):
+    server = serve(ranges=False)
+    result = _download(tmp_path, server.url, segments=4)
+
+    assert result.success and result.file_path.read_bytes() == BODY
+    assert server.requests == ["bytes=0-0", None]
+
+
+def test_small_files_are_not_split(tmp_path, serve):
+    server = serve()
+    downloader = HTTPDownloader(str(tmp_path), segments=4, min_segment_size=len(BODY))
+    result = asyncio.run(downloader.download(server.url))
+
+    assert result.success and result.file_path.read_bytes() == BODY
+    assert server.requests == ["bytes=0-0", None]
@@ -0,0 +1,89 @@
+"""
+单遍音频分片单元测试
+"""
+
+import io
+import struct
+import wave
+
+from services.asr import APIASRProvider, TranscriptResult, TranscriptSegment
+from services.asr.segmenter import AudioSegmenter
+
+RATE = 100  # 测试用低采样率：1 秒 = 100 个采样
+
+
+def _pcm(seconds: float) -> bytes:
+    count = int(seconds * RATE)
+    return struct.pack(f"<{count}h", *(i % 30000 for i in range(count)))
+
+
+class _Stream(io.BytesIO):
+    """记录读取进度，并以奇数字节块返回数据（覆盖残余字节处理）"""
+
+    def read(self, size=-1):
+        return super().read(min(size, 333) if size and size > 0 else size)
+
+
+def _segmenter():
+    return AudioSegmenter(chunk_seconds=10, overlap_seconds=2, sample_rate=RATE, codec="wav")
+
+
+def test_overlapping_chunks_from_single_pass(tmp_path):
+    pcm = _pcm(25)
+    segmenter = _segmenter()
+    chunks = list(segmenter.segment_pcm(_Stream(pcm), tmp_path))
+
+    assert [(c.index, c.start, c.duration) for c in chunks] == [
+        (0, 0.0, 12.0),
+        (1, 10.0, 12.0),
+        (2, 20.0, 5.0),
+    ]
+    assert segmenter.duration == 25.0
+
+    with wave.open(str(chunks[1].path)) as wav:
+        assert wav.getframerate() == RATE
+        assert wav.readframes(wav.getnframes()) == pcm[10 * RATE * 2:22 * RATE * 2]
+
+
+def test_tail_inside_overlap_is_dropped(tmp_path):
+    chunks = list(_segmenter().segment_pcm(_Stream(_pcm(20.5)), tmp_path))
+
+    assert [(c.start, c.duration) for c in chunks] == [(0.0, 12.0), (10.0, 10.5)]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["chunk_000.wav", "chunk_001.wav"]
+
+
+def test_chunks_are_emitted_before_stream_ends(tmp_path):
+    stream = _Stream(_pcm(40))
+    first = next(_segmenter().segment_pcm(stream, tmp_path))
+
+    assert first.index == 0
+    assert stream.tell() < len(stream.getvalue()) / 2
+
+
+def test_api_provider_uploads_segments_and_merges(tmp_path, monkeypatch):
+    pcm = _pcm(25)
+    monkeypatch.setattr(
+        AudioSegmenter, "segment",
+        lambda self, source, out_dir: AudioSegmenter(10, 2, RATE, "wav").segment_pcm(_Stream(pcm), out_dir),
+    )
+
+    provider = APIASRProvider(base_url="http://asr.test/v1", api_key="k", chunk_seconds=10)
+    monkeypatch.setattr(provider, "_get_audio_duration", lambda path: 25.0)
+    monkeypatch.setattr(
+        provider, "_transcribe_single",
+        lambda path, language=None, prompt=None: TranscriptResult(
+            text=path[-7:-4], segments=[TranscriptSegment(start=1.0, end=2.0, text=path[-7:-4])],
+            language="zh", duration=12.0,
+        ),
+    )
+
+    audio = tmp_path / "lecture.m4a"
+    audio.write_bytes(b"")
+    calls = []
+    result = provider.transcribe(str(audio), progress=lambda done, total, detail: calls.append((done, total)))
+
+    assert [s.start for s in result.segments] == [1.0, 11.0, 21.0]
+    assert [s.text for s in result.segments] == ["000", "001", "002"]
+    assert calls[-1] == (3, 3)
+    assert not audio.with_suffix(".mp3").exists()
+    assert not (tmp_path / "lecture_chunks").exists()
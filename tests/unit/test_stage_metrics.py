@@ -0,0 +1,163 @@
+"""
+services.processor.metrics 单元测试
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+from packages.db.models import ProcessingStageMetric
+from services.processor.metrics import (
+    percentile,
+    prune_stage_metrics,
+    record_stage_metric,
+    stage_latency_percentiles,
+)
+from services.processor.status import StatusChannel
+
+
+@pytest.fixture
+def video(sample_video):
+    return sample_video
+
+
+def _channel(db):
+    @contextmanager
+    def session_factory():
+        yield db
+
+    return StatusChannel(flush_interval=60, session_factory=session_factory)
+
+
+def _record(db, video, stage, duration_ms, provider=None, status="ok", tenant_id=None, age_hours=0.0):
+    channel = _channel(db)
+    record_stage_metric(
+        video_id=video.id,
+        tenant_id=tenant_id if tenant_id is not None else video.tenant_id,
+        stage=stage,
+        started_at=datetime.utcnow() - timedelta(hours=age_hours),
+        duration_ms=duration_ms,
+        status=status,
+        provider=provider,
+        bytes_in=10,
+        bytes_out=20,
+        channel=channel,
+    )
+    channel.flush()
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
+
+
+def test_percentiles_per_stage(db_session, video):
+    for ms in range(1, 101):
+        _record(db_session, video, "transcribe", ms)
+    _record(db_session, video, "download", 500, status="failed")
+
+    items = stage_latency_percentiles(db_session, since=datetime.utcnow() - timedelta(hours=1))
+
+    assert [item["stage"] for item in items] == ["download", "transcribe"]
+    download, transcribe = items
+    assert download["count"] == 1
+    assert download["failed"] == 1
+    assert transcribe["count"] == 100
+    assert (transcribe["p50_ms"], transcribe["p95_ms"], transcribe["p99_ms"]) == (50, 95, 99)
+    assert transcribe["bytes_in"] == 1000
+    assert transcribe["bytes_out"] == 2000
+
+
+def test_group_by_provider_and_tenant(db_session, video):
+    _record(db_session, video, "transcribe", 100, provider="local:faster_whisper")
+    _record(db_session, video, "transcribe", 300, provider="api:whisper-1")
+    _record(db_session, video, "transcribe", 500, provider="api:whisper-1", tenant_id=video.tenant_id + 1)
+
+    items = stage_latency_percentiles(
+        db_session,
+        since=datetime.utcnow() - timedelta(hours=1),
+        group_by=["stage", "provider"],
+    )
+    by_provider = {item["provider"]: item for item in items}
+    assert by_provider["api:whisper-1"]["count"] == 2
+    assert by_provider["api:whisper-1"]["p50_ms"] == 300
+    assert by_provider["local:faster_whisper"]["p99_ms"] == 100
+
+    items = stage_latency_percentiles(
+        db_session,
+        since=datetime.utcnow() - timedelta(hours=1),
+        group_by=["tenant"],
+        tenant_id=video.tenant_id,
+    )
+    assert len(items) == 1
+    assert items[0]["tenant"] == video.tenant_id
+    assert items[0]["count"] == 2
+
+
+def test_window_excludes_old_samples(db_session, video):
+    _record(db_session, video, "analyze", 100)
+    _record(db_session, video, "analyze", 9000, age_hours=48)
+
+    items = stage_latency_percentiles(db_session, since=datetime.utcnow() - timedelta(hours=24))
+
+    assert items[0]["count"] == 1
+    assert db_session.query(ProcessingStageMetric).count() == 2
+
+
+def test_prune_removes_rows_past_retention(db_session, video):
+    _record(db_session, video, "download", 100)
+    _record(db_session, video, "transcribe", 100, age_hours=24 * 10)
+    _record(db_session, video, "analyze", 100, age_hours=24 * 40)
+
+    assert prune_stage_metrics(db_session, retention_days=30) == 1
+    assert sorted(m.stage for m in db_session.query(ProcessingStageMetric)) == ["download", "transcribe"]
+
+
+def test_unknown_group_rejected(db_session):
+    with pytest.raises(ValueError):
+        stage_latency_percentiles(db_session, since=datetime.utcnow(), group_by=["model"])
+
+
+def test_failed_stage_not_recorded_as_partial(db_session, video, tmp_path):
+    """阶段标记了 partial 后又出错时记为 failed"""
+    from services.processor.pipeline import PipelineContext, VideoPipeline
+
+    pipeline = VideoPipeline(
+        video_dir=str(tmp_path / "v"), audio_dir=str(tmp_path / "a"), transcript_dir=str(tmp_path / "t"), notify=False
+    )
+    pipeline.status = _channel(db_session)
+
+    def step(video, ctx, db):
+        ctx.note(status="partial")
+        raise IOError("disk full")
+
+    with pytest.raises(IOError):
+        pipeline._execute_step("transcribe", step, video, PipelineContext(video_id=video.id), db_session)
+    pipeline.status.flush()
+
+    assert [m.status for m in db_session.query(ProcessingStageMetric)] == ["failed"]
+
+
+def test_metrics_batched_without_touching_stage_session(db_session, video, tmp_path):
+    """阶段记录不提交、不回滚阶段会话，耗时记录在状态通道写回时一起插入"""
+    from services.processor.pipeline import PipelineContext, VideoPipeline
+
+    pipeline = VideoPipeline(
+        video_dir=str(tmp_path / "v"), audio_dir=str(tmp_path / "a"), transcript_dir=str(tmp_path / "t"), notify=False
+    )
+    pipeline.status = _channel(db_session)
+
+    def step(video, ctx, db):
+        video.title = "pending change"
+
+    pipeline._execute_step("analyze", step, video, PipelineContext(video_id=video.id), db_session)
+
+    assert video in db_session.dirty
+    assert pipeline.status.stats()["pending_metrics"] == 1
+    pipeline.status.flush()
+    assert [m.stage for m in db_session.query(ProcessingStageMetric)] == ["analyze"]
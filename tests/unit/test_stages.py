@@ -0,0 +1,139 @@
+"""
+services.processor.stages 单元测试
+"""
+
+import threading
+import time
+
+import pytest
+
+from services.processor.stages import Stage, StagedExecutor
+
+
+class TestStagedExecutor:
+    """测试分阶段流水线执行器"""
+
+    def test_items_flow_through_all_stages(self):
+        """每个任务依次经过所有阶段"""
+        executor = StagedExecutor([
+            Stage("double", lambda x: x * 2, workers=2),
+            Stage("inc", lambda x: x + 1, workers=2),
+        ])
+        try:
+            futures = [executor.submit(i) for i in range(10)]
+            assert [f.result(timeout=5) for f in futures] == [i * 2 + 1 for i in range(10)]
+        finally:
+            executor.shutdown()
+
+    def test_stages_overlap_across_items(self):
+        """不同任务的不同阶段同时执行"""
+        active = set()
+        overlapped = threading.Event()
+        lock = threading.Lock()
+
+        def make(name):
+            def handler(x):
+                with lock:
+                    active.add(name)
+                    if len(active) > 1:
+                        overlapped.set()
+                time.sleep(0.05)
+                with lock:
+                    active.discard(name)
+                return x
+            return handler
+
+        executor = StagedExecutor([Stage("a", make("a")), Stage("b", make("b"))])
+        try:
+            results = executor.map(range(4))
+        finally:
+            executor.shutdown()
+
+        assert all(err is None for _, err in results)
+        assert overlapped.is_set()
+
+    def test_backpressure_blocks_upstream(self):
+        """下游阻塞时上游最多领先队列容量 + 并发数个任务"""
+        release = threading.Event()
+        produced = []
+
+        def fast(x):
+            produced.append(x)
+            return x
+
+        def slow(x):
+            release.wait(timeout=5)
+            return x
+
+        executor = StagedExecutor([
+            Stage("fast", fast, workers=1),
+            Stage("slow", slow, workers=1, queue_size=1),
+        ])
+        try:
+            futures = [executor.submit(i) for i in range(10)]
+            time.sleep(0.2)
+            # slow 处理中 1 个 + 队列 1 个 + fast 阻塞在 put 的 1 个
+            assert len(produced) <= 3
+            release.set()
+            for f in futures:
+                f.result(timeout=5)
+        finally:
+            release.set()
+            executor.shutdown()
+
+        assert len(produced) == 10
+
+    def test_error_stops_item_and_propagates(self):
+        """某阶段失败时任务终止，其余任务不受影响"""
+        seen = []
+
+        def boom(x):
+            if x == 2:
+                raise ValueError("bad item")
+            return x
+
+        def record(x):
+            seen.append(x)
+            return x
+
+        executor = StagedExecutor([Stage("boom", boom), Stage("record", record)])
+        try:
+            results = executor.map(range(4))
+        finally:
+            executor.shutdown()
+
+        errors = {item: err for item, err in results}
+        assert isinstance(errors[2], ValueError)
+        assert all(errors[i] is None for i in (0, 1, 3))
+        assert 2 not in seen
+
+    def test_cancel_before_start(self):
+        """尚未进入首阶段的任务可以取消"""
+        gate = threading.Event()
+        executor = StagedExecutor([Stage("wait", lambda x: gate.wait(timeout=5) and x)])
+        try:
+            first = executor.submit(1)
+            second = executor.submit(2)
+            time.sleep(0.05)
+            assert second.cancel()
+            gate.set()
+            assert first.result(timeout=5) == 1
+            assert second.cancelled()
+        finally:
+            gate.set()
+            executor.shutdown()
+
+    def test_submit_after_shutdown_rejected(self):
+        """关闭后不再接受任务"""
+        executor = StagedExecutor([Stage("noop", lambda x: x)])
+        executor.shutdown()
+        with pytest.raises(RuntimeError):
+            executor.submit(1)
+
+    def test_stats_report_stages(self):
+        """状态包含每个阶段"""
+        executor = StagedExecutor([Stage("a", lambda x: x, workers=3), Stage("b", lambda x: x)])
+        stats = executor.get_stats()
+        assert stats["a"]["workers"] == 3
+        assert set(stats) == {"a", "b"}
+        executor.shutdown()
@@ -0,0 +1,132 @@
+"""
+状态写回通道单元测试
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from packages.db.models import Video, VideoStatus
+from services.processor.status import StatusChannel
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    SessionLocal = sessionmaker(bind=db_engine)
+
+    @contextmanager
+    def factory():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    return factory
+
+
+@pytest.fixture
+def video(sample_video):
+    return sample_video
+
+
+def _db_status(db_session, video_id):
+    return db_session.execute(
+        text("SELECT status FROM videos WHERE id = :id"), {"id": video_id}
+    ).scalar_one()
+
+
+def test_updates_are_coalesced_until_flush(db_session, video, session_factory):
+    channel = StatusChannel(flush_interval=60, session_factory=session_factory)
+    for status in ("downloading", "transcribing", "analyzing"):
+        channel.update(video.id, status=status, stage="x")
+    channel.stage_progress(video.id, "analyze", 0.5, message="half")
+
+    assert _db_status(db_session, video.id) == "done"
+    live = channel.get(video.id)
+    assert live.status == "analyzing"
+    assert live.progress == pytest.approx(0.775)
+    assert not live.persisted
+
+    assert channel.flush() == 1
+    assert _db_status(db_session, video.id) == "analyzing"
+    assert channel.get(video.id).persisted
+    assert channel.stats()["coalesced"] == 2
+    assert channel.flush() == 0
+    channel.close()
+
+
+def test_terminal_discards_pending_intermediate_status(db_session, video, session_factory):
+    channel = StatusChannel(flush_interval=60, session_factory=session_factory)
+    channel.update(video.id, status="indexing")
+
+    with channel.terminal(video.id):
+        video.status = VideoStatus.DONE.value
+        db_session.commit()
+
+    assert channel.flush() == 0
+    assert channel.get(video.id) is None
+    assert _db_status(db_session, video.id) == "done"
+    channel.close()
+
+
+def test_failed_flush_is_retried(db_session, video, session_factory):
+    calls = []
+
+    @contextmanager
+    def broken_then_ok():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        with session_factory() as db:
+            yield db
+
+    channel = StatusChannel(flush_interval=60, session_factory=broken_then_ok)
+    channel.update(video.id, status="downloading")
+    assert channel.flush() == 0
+    assert channel.flush() == 1
+    assert _db_status(db_session, video.id) == "downloading"
+    channel.close()
+
+
+def test_write_through_when_interval_disabled(db_session, video, session_factory):
+    channel = StatusChannel(flush_interval=0, session_factory=session_factory)
+    channel.update(video.id, status="downloading")
+    assert _db_status(db_session, video.id) == "downloading"
+
+
+def test_terminal_status_written_even_if_session_value_unchanged(db_session, video):
+    """重新处理已完成的视频：会话中仍是 done，数据库已写回中间状态"""
+    from services.processor.pipeline import VideoPipeline
+
+    video.status = VideoStatus.DONE.value
+    db_session.commit()
+    assert video.status == "done"
+    db_session.execute(text("UPDATE videos SET status = 'indexing' WHERE id = :id"), {"id": video.id})
+
+    VideoPipeline._set_terminal(video, VideoStatus.DONE)
+    db_session.commit()
+    assert _db_status(db_session, video.id) == "done"
+
+
+def test_deleted_video_does_not_block_other_writes(db_session, video, sample_tenant, session_factory):
+    other = Video(tenant_id=sample_tenant.id, source_type="bilibili", source_id="BV2status", title="t", author="up")
+    db_session.add(other)
+    db_session.commit()
+
+    channel = StatusChannel(flush_interval=60, session_factory=session_factory)
+    channel.update(video.id, status="downloading")
+    channel.update(other.id, status="transcribing")
+    db_session.delete(other)
+    db_session.commit()
+
+    assert channel.flush() == 2
+    assert _db_status(db_session, video.id) == "downloading"
+    assert channel.stats()["pending"] == 0
+
+    channel.update(video.id, status="analyzing")
+    assert channel.flush() == 1
+    assert _db_status(db_session, video.id) == "analyzing"
+    channel.close()
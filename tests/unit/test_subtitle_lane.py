@@ -0,0 +1,144 @@
+"""字幕快速通道：扫描时探测字幕、字幕转为带时间戳的分段"""
+
+from contextlib import contextmanager
+
+import httpx
+
+import packages.db
+from packages.db import SUBTITLE_LANE, Video, WatchedFolder
+from services.processor.subtitles import parse_srt, segments_from_bilibili, subtitle_transcript, to_srt
+from services.watcher.bilibili import BilibiliClient, FolderInfo, VideoInfo, api_limiter
+from services.watcher.scanner import FolderScanner
+
+BODY = [
+    {"from": 0.5, "to": 2.25, "content": "大家好"},
+    {"from": 2.25, "to": 5.0, "content": " 今天讲缓存。 "},
+    {"from": 5.0, "to": 6.0, "content": ""},
+    {"from": 3661.0, "to": 3662.5, "content": "结束"},
+]
+
+
+def test_bilibili_body_roundtrips_through_srt():
+    segments = segments_from_bilibili(BODY)
+    assert [seg.text for seg in segments] == ["大家好", "今天讲缓存。", "结束"]
+
+    srt = to_srt(segments)
+    assert "01:01:01,000 --> 01:01:02,500" in srt
+    assert parse_srt(srt) == segments
+
+
+def test_subtitle_transcript_is_timed_and_plain_text_falls_back():
+    result = subtitle_transcript(to_srt(segments_from_bilibili(BODY)), duration=3700)
+    assert len(result.segments) == 3
+    assert result.segments[1].start == 2.25
+    assert result.text == "大家好 今天讲缓存。 结束"
+    assert result.duration == 3700
+
+    plain = subtitle_transcript("没有时间轴的文本", duration=30)
+    assert len(plain.segments) == 1 and plain.segments[0].end == 30
+
+
+def test_subtitle_track_prefers_uploaded_chinese():
+    tracks = [
+        {"lan": "en-US", "subtitle_url": "//sub/en.json"},
+        {"lan": "ai-zh", "subtitle_url": "//sub/ai.json"},
+        {"lan": "zh-CN", "subtitle_url": "//sub/zh.json"},
+    ]
+    requests = []
+
+    def handler(request: httpx.Request):
+        requests.append(request.url)
+        if request.url.path.endswith("/player/v2"):
+            return httpx.Response(200, json={"code": 0, "data": {"subtitle": {"subtitles": tracks}}})
+        return httpx.Response(200, json={"body": BODY})
+
+    client = BilibiliClient(sessdata="x")
+    client.client = httpx.Client(transport=httpx.MockTransport(handler))
+    assert client.fetch_subtitle_track("BV1", cid=1)["lan"] == "zh-CN"
+    assert client.fetch_subtitle("BV1", cid=1) == BODY
+    assert str(requests[-1]) == "https://sub/zh.json"
+
+    tracks[:] = []
+    assert client.fetch_subtitle_track("BV1", cid=1) is None
+
+
+class _FakeClient:
+    def __init__(self, with_subtitle):
+        self.with_subtitle = with_subtitle
+
+    def fetch_favlist(self, folder_id, until=None):
+        videos = [VideoInfo(title=bvid, author="up", duration=60, source_id=bvid, cid=1) for bvid in ("BVa", "BVb", "BVc")]
+        return FolderInfo(id=folder_id, title="f", owner="up", owner_mid="1", media_count=3), videos
+
+    def fetch_subtitle_track(self, bvid, cid=None):
+        if bvid == "BVc":
+            raise httpx.ConnectError("boom")
+        return {"lan": "ai-zh"} if bvid in self.with_subtitle else None
+
+
+def test_scan_marks_subtitle_lane(db_session, sample_tenant):
+    folder = WatchedFolder(tenant_id=sample_tenant.id, folder_id="42", folder_type="favlist", name="f", platform="bilibili")
+    db_session.add(folder)
+    db_session.commit()
+
+    scanner = FolderScanner(sample_tenant.id)
+    scanner.client = _FakeClient(with_subtitle={"BVa"})
+    new_videos = scanner.scan_folder(folder, db_session)
+
+    assert len(new_videos) == 3
+    lanes = dict(db_session.query(Video.source_id, Video.processing_lane).all())
+    assert lanes == {"BVa": SUBTITLE_LANE, "BVb": None, "BVc": None}
+    assert all(v.asr_provider is None for v in new_videos)
+
+
+def test_scan_probes_through_global_rate_limit():
+    assert FolderScanner(1).client.limiter is api_limiter()
+
+
+def test_demotion_keeps_asr_provider(db_session, sample_tenant, tmp_path, monkeypatch):
+    """字幕不可用时只移出快速通道，asr_provider 保持原值"""
+    from services.processor.pipeline import PipelineContext, VideoPipeline
+
+    @contextmanager
+    def fake_db_context():
+        yield db_session
+
+    video = Video(tenant_id=sample_tenant.id, source_type="bilibili", source_id="BVgone", title="t", author="up",
+                  asr_provider="api", processing_lane=SUBTITLE_LANE)
+    db_session.add(video)
+    db_session.commit()
+    monkeypatch.setattr(packages.db, "get_db_context", fake_db_context)
+    monkeypatch.setattr(BilibiliClient, "fetch_subtitle", lambda self, bvid, cid=None: [])
+
+    pipeline = VideoPipeline(
+        video_dir=str(tmp_path / "v"), audio_dir=str(tmp_path / "a"), transcript_dir=str(tmp_path / "t"), notify=False
+    )
+    assert pipeline.process_subtitle_lane(PipelineContext(video_id=video.id)) is False
+
+    db_session.refresh(video)
+    assert video.processing_lane is None
+    assert video.asr_provider == "api"
+
+
+def test_subtitle_lane_skips_audio_download(db_session, sample_tenant, tmp_path, monkeypatch):
+    from services.processor.pipeline import PipelineContext, VideoPipeline
+
+    video = Video(tenant_id=sample_tenant.id, source_type="bilibili", source_id="BVsub", title="t", author="up",
+                  duration=3700, processing_lane=SUBTITLE_LANE)
+    db_session.add(video)
+    db_session.commit()
+
+    pipeline = VideoPipeline(
+        video_dir=str(tmp_path / "v"), audio_dir=str(tmp_path / "a"), transcript_dir=str(tmp_path / "t"), notify=False
+    )
+    pipeline.cache = None
+    monkeypatch.setattr(BilibiliClient, "fetch_subtitle", lambda self, bvid, cid=None: BODY)
+    monkeypatch.setattr(pipeline, "_download_audio", lambda *args: (_ for _ in ()).throw(AssertionError("下载了音频")))
+
+    ctx = PipelineContext(video_id=video.id)
+    pipeline._step_download(video, ctx, db_session)
+    pipeline._step_transcribe(video, ctx, db_session)
+
+    assert ctx.audio_path is None
+    assert [seg.text for seg in ctx.result.segments] == ["大家好", "今天讲缓存。", "结束"]
+    assert (tmp_path / "t" / "BVsub.subtitle.srt").exists()
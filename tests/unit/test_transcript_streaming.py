@@ -0,0 +1,143 @@
+"""流式转写：逐段产出、增量分块与向量复用"""
+
+import pytest
+
+from services.asr import SegmentStream, TranscriptSegment
+from services.asr.base import ASRProvider, TranscriptResult
+from services.processor.streaming import PARTIAL_SUFFIX, IncrementalEmbedder, TranscriptWriter
+
+
+class _Client:
+    """与 ChromaClient 分块一致的假客户端，记录计算过向量的分块"""
+
+    def __init__(self):
+        from alice.rag.chroma_client import ChromaClient
+
+        self._split = ChromaClient._split_text
+        self.embedded = []
+
+    def split_text(self, text, chunk_size=500):
+        return self._split(self, text, chunk_size=chunk_size)
+
+    def embed_chunks(self, chunks):
+        self.embedded.extend(chunks)
+        return [[float(len(chunk))] for chunk in chunks]
+
+
+def _segments(count=40):
+    return [
+        TranscriptSegment(start=i * 3.0, end=i * 3.0 + 2.5, text=f"第{i}句话讲的是一些内容，" + "很长" * (i % 7) + "。")
+        for i in range(count)
+    ]
+
+
+def test_segment_stream_yields_lazily_and_collects():
+    produced = []
+
+    def generate():
+        for seg in _segments(3):
+            produced.append(seg)
+            yield seg
+
+    stream = SegmentStream(generate(), language="zh", duration=9.0)
+    first = next(iter(stream))
+    assert len(produced) == 1 and first.start == 0.0
+
+    result = stream.result()
+    assert len(result.segments) == 3
+    assert result.text == " ".join(seg.text for seg in _segments(3))
+    assert result.duration == 8.5
+
+
+def test_default_transcribe_stream_wraps_transcribe():
+    class Provider(ASRProvider):
+        name = "fake"
+
+        def transcribe(self, audio_path, language=None, prompt=None):
+            return TranscriptResult(text="a b", segments=_segments(2), language="en", duration=6.0)
+
+    stream = Provider().transcribe_stream("x.wav")
+    assert stream.language == "en" and stream.duration == 6.0
+    assert [seg.text for seg in stream] == [seg.text for seg in _segments(2)]
+
+
+def test_incremental_chunks_match_full_split_and_reuse_embeddings():
+    client = _Client()
+    embedder = IncrementalEmbedder(client, chunk_size=120, batch_size=2)
+    segments = _segments()
+    for seg in segments:
+        embedder.feed(seg.text)
+    assert embedder.ready_chunks > 2           # 转写未结束时已有确定的分块
+
+    transcript = " ".join(seg.text for seg in segments)
+    expected = client.split_text(transcript, chunk_size=120)
+    embeddings = embedder.finish(transcript)
+
+    assert embeddings == [[float(len(chunk))] for chunk in expected]
+    assert client.embedded == expected          # 每个分块只计算一次
+
+
+def test_incremental_embedder_falls_back_on_mismatch():
+    client = _Client()
+    embedder = IncrementalEmbedder(client, chunk_size=120, batch_size=1)
+    for seg in _segments():
+        embedder.feed(seg.text)
+
+    other = "完全不同的文本。" * 40
+    expected = client.split_text(other, chunk_size=120)
+    assert embedder.finish(other) == [[float(len(chunk))] for chunk in expected]
+
+
+def test_transcript_writer_appends(tmp_path):
+    writer = TranscriptWriter(tmp_path, "BV1")
+    for seg in _segments(2):
+        writer.write(seg)
+        assert (tmp_path / f"BV1{PARTIAL_SUFFIX}").read_text(encoding="utf-8").count("\n") == seg.start // 3 + 1
+    assert writer.path.read_text(encoding="utf-8").startswith("[00:00] 第0句话")
+
+    writer.close()
+    assert writer._file.closed
+
+
+def test_streaming_failure_closes_writer_and_embedder(tmp_path, monkeypatch):
+    """stream.result() 出错时也关闭中间文件并停止增量向量化"""
+    from services.processor.pipeline import PipelineContext, VideoPipeline
+
+    class _Stream(SegmentStream):
+        def result(self):
+            raise RuntimeError("decoder crashed")
+
+    class _Embedder:
+        closed = False
+
+        def feed(self, text):
+            pass
+
+        def close(self):
+            self.closed = True
+
+    pipeline = VideoPipeline(
+        video_dir=str(tmp_path / "v"), audio_dir=str(tmp_path / "a"), transcript_dir=str(tmp_path / "t"), notify=False
+    )
+    embedder = _Embedder()
+    monkeypatch.setattr(pipeline.asr_manager, "transcribe_stream", lambda path: _Stream(_segments(3)))
+    monkeypatch.setattr(pipeline, "_stream_embedder", lambda user_id: embedder)
+    opened = []
+
+    class _Writer(TranscriptWriter):
+        def __init__(self, *args):
+            super().__init__(*args)
+            opened.append(self)
+
+    monkeypatch.setattr("services.processor.pipeline.TranscriptWriter", _Writer)
+
+    class _Video:
+        id, source_id, duration = 1, "BV1", 0
+
+    ctx = PipelineContext(video_id=1, audio_path=tmp_path / "a.wav")
+    with pytest.raises(RuntimeError):
+        pipeline._transcribe_streaming(_Video(), ctx)
+
+    assert opened[0]._file.closed
+    assert embedder.closed
+    assert ctx.embedder is None
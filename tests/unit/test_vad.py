@@ -0,0 +1,114 @@
+"""
+静音检测分片单元测试
+"""
+
+import io
+
+import numpy as np
+import pytest
+
+from services.asr import APIASRProvider, TranscriptResult, TranscriptSegment
+from services.asr.segmenter import AudioSegmenter
+from services.asr.vad import SilencePlanner, VADConfig
+
+RATE = 1000  # 测试用低采样率：1 秒 = 1000 个采样，一帧 30 个采样
+
+
+def _audio(*parts):
+    """parts: (秒数, 是否有声) 序列，拼成 int16 采样"""
+    rng = np.random.default_rng(0)
+    pieces = []
+    for seconds, voiced in parts:
+        count = int(seconds * RATE)
+        if voiced:
+            pieces.append((np.sin(np.arange(count) * 0.7) * 8000).astype(np.int16))
+        else:
+            pieces.append(rng.integers(-20, 20, count).astype(np.int16))
+    return np.concatenate(pieces)
+
+
+def _plan(samples, config, block=777):
+    planner = SilencePlanner(RATE, config)
+    chunks = []
+    for i in range(0, samples.size, block):
+        chunks.extend(planner.feed(samples[i:i + block]))
+    chunks.extend(planner.finish())
+    return planner, chunks
+
+
+def test_cuts_inside_silence_near_target():
+    samples = _audio((8.4, True), (0.6, False), (5, True), (0.5, False), (4, True))
+    config = VADConfig(target_seconds=10, search_seconds=3, drop_silence=5)
+    _, chunks = _plan(samples, config)
+
+    assert len(chunks) == 2
+    cut = chunks[0].source_end / RATE
+    assert 8.4 < cut < 9.0
+    assert chunks[1].source_start == chunks[0].source_end
+    assert sum(c.pcm.size for c in chunks) == samples.size
+
+
+def test_hard_cut_when_no_silence_in_window():
+    samples = _audio((25, True))
+    _, chunks = _plan(samples, VADConfig(target_seconds=10, search_seconds=3))
+
+    assert all(c.pcm.size <= 10 * RATE for c in chunks)
+    assert sum(c.pcm.size for c in chunks) == samples.size
+
+
+def test_long_silence_is_dropped_and_mapped_back(tmp_path):
+    samples = _audio((3, True), (6, False), (3, True))
+    config = VADConfig(target_seconds=60, drop_silence=2.0, keep_padding=0.25)
+    planner, chunks = _plan(samples, config)
+
+    assert len(chunks) == 1
+    assert planner.dropped_samples / RATE == pytest.approx(5.5, abs=0.1)
+
+    segmenter = AudioSegmenter(chunk_seconds=60, sample_rate=RATE, codec="wav", vad=config)
+    [chunk] = segmenter.segment_pcm(io.BytesIO(samples.astype("<i2").tobytes()), tmp_path)
+    assert chunk.duration == pytest.approx(6.5, abs=0.1)
+    # 静音 3-9 秒两侧各留 0.25 秒：片段内 3.25 秒之后对应源音频 8.75 秒之后
+    assert chunk.to_source(1.0) == pytest.approx(1.0)
+    assert chunk.to_source(3.75) == pytest.approx(9.25, abs=0.05)
+    assert segmenter.duration == 12.0
+    assert segmenter.dropped == pytest.approx(5.5, abs=0.1)
+
+
+def test_all_silent_tail_is_not_uploaded():
+    samples = _audio((9, True), (1, False), (15, False))
+    _, chunks = _plan(samples, VADConfig(target_seconds=10, search_seconds=3))
+
+    assert len(chunks) == 1
+    assert chunks[0].source_start == 0
+
+
+def test_provider_maps_timestamps_through_dropped_silence(tmp_path, monkeypatch):
+    samples = _audio((5, True), (10, False), (5, True), (1, False), (8, True))
+    config = VADConfig(search_seconds=5)
+    monkeypatch.setattr(
+        AudioSegmenter, "segment",
+        lambda self, source, out_dir: AudioSegmenter(
+            self.chunk_seconds, sample_rate=RATE, codec="wav", vad=self.vad
+        ).segment_pcm(io.BytesIO(samples.astype("<i2").tobytes()), out_dir),
+    )
+
+    provider = APIASRProvider(base_url="http://asr.test/v1", api_key="k", chunk_seconds=15, vad=config)
+    monkeypatch.setattr(provider, "_get_audio_duration", lambda path: 29.0)
+    monkeypatch.setattr(
+        provider, "_transcribe_single",
+        lambda path, language=None, prompt=None: TranscriptResult(
+            text="x", segments=[TranscriptSegment(start=1.0, end=1.5, text=path[-7:-4])],
+            language="zh", duration=5.0,
+        ),
+    )
+
+    audio = tmp_path / "talk.m4a"
+    audio.write_bytes(b"")
+    result = provider.transcribe(str(audio))
+
+    # 第一片段在 5-15 秒的静音中切分；第二片段开头的静音只保留 0.25 秒留白
+    starts = [s.start for s in result.segments]
+    assert [s.text for s in result.segments] == ["000", "001", "002"]
+    assert starts[0] == pytest.approx(1.0)
+    assert starts[1] == pytest.approx(15.75, abs=0.1)
+    assert result.duration == 29.0
@@ -0,0 +1,158 @@
+"""
+services.worker 与待处理视频认领单元测试
+"""
+
+import signal
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from packages.db.database import Base
+from packages.db.models import Tenant, Video
+from services.worker import WorkerPool
+
+
+def _exit_immediately(index, concurrency, max_tasks):
+    """模拟达到任务上限后正常退出的子进程"""
+
+
+def _wait_for_sigterm(index, concurrency, max_tasks, marker_dir):
+    """模拟收到 SIGTERM 后处理完手头任务再退出的子进程"""
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    Path(marker_dir, f"ready-{index}").touch()
+    stop.wait(30)
+    Path(marker_dir, f"drained-{index}").touch()
+
+
+def _add_videos(db, tenant_id, statuses):
+    for i, status in enumerate(statuses):
+        db.add(Video(
+            tenant_id=tenant_id,
+            source_type="bilibili",
+            source_id=f"BV{i:04d}",
+            title=f"video {i}",
+            author="up",
+            status=status,
+        ))
+    db.commit()
+
+
+def _wait_until(predicate, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestClaimPendingVideos:
+    """测试待处理视频的原子认领"""
+
+    def test_claims_only_pending(self, db_session, sample_tenant):
+        from services.processor.pipeline import claim_pending_videos
+
+        _add_videos(db_session, sample_tenant.id, ["pending", "done", "pending", "failed", "pending"])
+
+        first = claim_pending_videos(db_session, limit=2)
+        second = claim_pending_videos(db_session, limit=5)
+
+        assert len(first) == 2
+        assert len(second) == 1
+        assert not set(first) & set(second)
+        assert claim_pending_videos(db_session, limit=5) == []
+
+        statuses = {v.id: v.status for v in db_session.query(Video).all()}
+        for video_id in first + second:
+            assert statuses[video_id] == "downloading"
+
+    def test_filters_by_tenant(self, db_session, sample_tenant):
+        from services.processor.pipeline import claim_pending_videos
+
+        other = Tenant(name="Other", slug="other")
+        db_session.add(other)
+        db_session.commit()
+        _add_videos(db_session, sample_tenant.id, ["pending"])
+        _add_videos(db_session, other.id, ["pending"])
+
+        claimed = claim_pending_videos(db_session, limit=10, tenant_id=other.id)
+        assert [db_session.get(Video, i).tenant_id for i in claimed] == [other.id]
+
+    def test_concurrent_claims_do_not_overlap(self, tmp_path):
+        """多个会话并发认领，同一视频只被认领一次"""
+        from services.processor.pipeline import claim_pending_videos
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'videos.db'}", connect_args={"timeout": 30})
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+
+        with Session() as db:
+            tenant = Tenant(name="T", slug="t")
+            db.add(tenant)
+            db.commit()
+            _add_videos(db, tenant.id, ["pending"] * 40)
+
+        claimed = []
+        lock = threading.Lock()
+
+        def worker():
+            with Session() as db:
+                while True:
+                    ids = claim_pending_videos(db, limit=3)
+                    if not ids:
+                        return
+                    with lock:
+                        claimed.extend(ids)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        engine.dispose()
+
+        assert len(claimed) == 40
+        assert len(set(claimed)) == 40
+
+
+class TestWorkerPool:
+    """测试 worker 进程池的监督逻辑"""
+
+    def test_recycles_exited_children(self):
+        """子进程正常退出（达到任务上限）后会被重新拉起"""
+        pool = WorkerPool(processes=2, target=_exit_immediately, shutdown_timeout=10)
+        runner = threading.Thread(target=pool.run, kwargs={"poll_interval": 0.05})
+        runner.start()
+        try:
+            assert _wait_until(lambda: all(
+                w["spawn_count"] >= 2 for w in pool.get_stats()["workers"]
+            ))
+        finally:
+            pool.stop()
+            runner.join(timeout=30)
+        assert not runner.is_alive()
+
+    def test_stop_lets_children_drain(self, tmp_path):
+        """停止时子进程收到 SIGTERM 并优雅退出"""
+        from functools import partial
+
+        pool = WorkerPool(
+            processes=2,
+            target=partial(_wait_for_sigterm, marker_dir=str(tmp_path)),
+            shutdown_timeout=20,
+        )
+        runner = threading.Thread(target=pool.run, kwargs={"poll_interval": 0.05})
+        runner.start()
+        try:
+            # 等待子进程安装信号处理函数
+            assert _wait_until(lambda: len(list(tmp_path.glob("ready-*"))) == 2)
+        finally:
+            pool.stop()
+            runner.join(timeout=30)
+
+        assert sorted(p.name for p in tmp_path.glob("drained-*")) == ["drained-0", "drained-1"]
+        assert all(w["spawn_count"] == 1 for w in pool.get_stats()["workers"])